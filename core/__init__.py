@@ -2,5 +2,26 @@
 
 from .metrics_collector import load_current_metrics
 from .alert_manager import load_alerts, create_empty_alerts_file
+from .archive_index import ArchiveIndex
+from .sqlite_store import SQLiteStore, open_store
+from .retention import RetentionEngine, RetentionPolicy
+from .history import JsonlHistoryWriter, read_history
+from .wal import WriteAheadLog
+from .rule_engine import Rule, RuleEngine, load_rules
+from .alert_store import AlertStore
+from .alert_lifecycle import AlertLifecycle
+from .anomaly import AnomalyDetector
+from .forecast import TrendForecaster
+from .notifier import NotificationDispatcher
+from .fleet_eval import FleetEvaluator
+from .correlation import CorrelationEngine
+from .rollups import RollupStore, fleet_summary, range_summary
+from .report_catalog import ReportCatalog
 
-__all__ = ['load_current_metrics', 'load_alerts', 'create_empty_alerts_file']
+__all__ = ['load_current_metrics', 'load_alerts', 'create_empty_alerts_file', 'ArchiveIndex',
+           'SQLiteStore', 'open_store', 'RetentionEngine', 'RetentionPolicy',
+           'JsonlHistoryWriter', 'read_history', 'WriteAheadLog', 'Rule', 'RuleEngine',
+           'load_rules', 'AlertStore', 'AlertLifecycle',
+           'AnomalyDetector', 'TrendForecaster', 'NotificationDispatcher',
+           'FleetEvaluator', 'CorrelationEngine', 'RollupStore', 'range_summary',
+           'fleet_summary', 'ReportCatalog']
@@ -0,0 +1,313 @@
+"""
+Alert Journal Module
+
+Append-only JSONL journal in front of the alerts.json snapshot. New alerts
+are appended as one compact line each (alerts.journal.jsonl next to the
+snapshot) instead of rewriting the whole snapshot, and compaction
+periodically folds the journal into alerts.json.
+
+Writers in one process share a single write+fsync per batch (group
+commit); writers in different processes serialize on an advisory lock
+file (alerts.json.lock). Readers take the lock shared, so they never see
+a snapshot and journal from different sides of a compaction.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = '.journal.jsonl'
+LOCK_SUFFIX = '.lock'
+
+# Fold the journal into the snapshot once it grows past this size
+COMPACT_BYTES = 1024 * 1024
+
+
+def journal_path(snapshot_path) -> Path:
+    """Return the journal path for a snapshot (alerts.json -> alerts.journal.jsonl)."""
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(snapshot_path.stem + JOURNAL_SUFFIX)
+
+
+@contextmanager
+def file_lock(path, shared: bool = False):
+    """
+    Hold an advisory lock on `path` (created if missing).
+
+    Args:
+        path: Lock file path
+        shared: Take a shared (reader) lock; exclusive otherwise.
+                Windows only supports exclusive locks.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def read_journal(path) -> List[Dict[str, Any]]:
+    """
+    Read alerts from a journal file, oldest first.
+
+    A torn last line (crash mid-append) is skipped.
+
+    Returns:
+        list: Alert dicts (empty if the journal is missing)
+    """
+    return read_journal_from(path)[0]
+
+
+def read_journal_from(path, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Read the alerts appended to a journal after byte `offset`.
+
+    Only complete (newline-terminated) lines are consumed, so a line that
+    is still being written is picked up by the next call.
+
+    Returns:
+        tuple: (alert dicts oldest first, offset to resume from)
+    """
+    alerts = []
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return alerts, 0
+
+    end = data.rfind(b'\n') + 1
+    for line in data[:end].splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            alerts.append(json.loads(line))
+        except ValueError:
+            logger.warning(f"Skipping torn line in alert journal {path}")
+    if end < len(data):
+        logger.warning(f"Skipping torn line in alert journal {path}")
+    return alerts, offset + end
+
+
+class AlertJournal:
+    """Group-committed, lock-protected alert journal with compaction."""
+
+    def __init__(self, snapshot_path, fsync: bool = True,
+                 compact_bytes: Optional[int] = COMPACT_BYTES):
+        """Initialize alert journal
+
+        Args:
+            snapshot_path: alerts.json snapshot the journal belongs to
+            fsync: fsync each committed batch
+            compact_bytes: Compact automatically past this journal size
+                           (None to compact only on demand)
+        """
+        self.snapshot_path = Path(snapshot_path)
+        self.path = journal_path(self.snapshot_path)
+        self.lock_path = self.snapshot_path.with_name(self.snapshot_path.name + LOCK_SUFFIX)
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+
+        self._cond = threading.Condition()
+        self._pending: List[str] = []
+        self._appended = 0
+        self._durable = 0
+        self._flushing = False
+
+    def append(self, alert: Dict[str, Any]):
+        """Append one alert and return once it is durable."""
+        self.append_many([alert])
+
+    def append_many(self, alerts: List[Dict[str, Any]]):
+        """
+        Append alerts and return once they are durable.
+
+        Concurrent callers are batched into one write+fsync (group commit).
+        """
+        lines = [json.dumps(alert, separators=(',', ':')) + '\n' for alert in alerts]
+        with self._cond:
+            self._pending.extend(lines)
+            self._appended += len(lines)
+            target = self._appended
+
+            while self._durable < target:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+
+                self._flushing = True
+                batch = self._pending
+                self._pending = []
+                batch_end = self._appended
+                self._cond.release()
+                written = False
+                try:
+                    self._write(''.join(batch))
+                    written = True
+                finally:
+                    self._cond.acquire()
+                    if written:
+                        self._durable = batch_end
+                    else:
+                        self._pending[0:0] = batch
+                    self._flushing = False
+                    self._cond.notify_all()
+
+        if self.compact_bytes is not None and _size_exceeds(self.path, self.compact_bytes):
+            self.compact()
+
+    def _write(self, data: str):
+        with file_lock(self.lock_path):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a+b') as f:
+                # Start on a fresh line after a torn tail left by a crash
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        data = '\n' + data
+                f.write(data.encode('utf-8'))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+    def read(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Read the snapshot and journal under a shared lock.
+
+        Returns:
+            tuple: (snapshot dict, journal alerts oldest first). Journal
+                   entries already folded into the snapshot (crash between
+                   snapshot replace and journal truncate) are dropped.
+        """
+        with file_lock(self.lock_path, shared=True):
+            snapshot = self._read_snapshot()
+            tail = read_journal(self.path)
+        return snapshot, _drop_folded(snapshot.get('alerts', []), tail)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Return snapshot alerts followed by the journal tail (oldest first)."""
+        snapshot, tail = self.read()
+        alerts = snapshot.get('alerts', [])
+        if not isinstance(alerts, list):
+            logger.warning(f"Invalid alerts format in {self.snapshot_path}")
+            alerts = []
+        return alerts + tail
+
+    def compact(self, keep=None) -> int:
+        """
+        Fold the journal into the snapshot and truncate it.
+
+        Args:
+            keep: Optional callable taking the full alert list (oldest first)
+                  and returning the alerts to keep (used for retention)
+
+        Returns:
+            int: Number of alerts in the new snapshot
+        """
+        with file_lock(self.lock_path):
+            snapshot = self._read_snapshot()
+            alerts = snapshot.get('alerts', [])
+            if not isinstance(alerts, list):
+                alerts = []
+            alerts = alerts + _drop_folded(alerts, read_journal(self.path))
+            if keep is not None:
+                alerts = keep(alerts)
+
+            snapshot['alerts'] = alerts
+            snapshot['timestamp'] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            self._write_snapshot(snapshot)
+
+            # Crash here leaves duplicates that _drop_folded() filters out
+            if self.path.exists():
+                with open(self.path, 'r+', encoding='utf-8') as f:
+                    f.truncate(0)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+            return len(alerts)
+
+    def clear(self):
+        """Remove every alert (empty snapshot, empty journal)."""
+        self.compact(keep=lambda alerts: [])
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        try:
+            with self.snapshot_path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {"timestamp": "", "alerts": []}
+        return data if isinstance(data, dict) else {"timestamp": "", "alerts": []}
+
+    def _write_snapshot(self, data: Dict[str, Any]):
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+
+def _size_exceeds(path, limit: int) -> bool:
+    try:
+        return os.path.getsize(path) > limit
+    except OSError:
+        return False
+
+
+def _drop_folded(snapshot_alerts: List[Dict[str, Any]],
+                 tail: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop journal entries whose id already appears in the snapshot."""
+    if not tail:
+        return tail
+    folded = {a.get('id') for a in snapshot_alerts if isinstance(a, dict) and a.get('id')}
+    if not folded:
+        return tail
+    return [a for a in tail if a.get('id') not in folded]
+
+
+_journals: Dict[str, AlertJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def open_journal(snapshot_path) -> AlertJournal:
+    """
+    Return the shared AlertJournal for a snapshot path.
+
+    Journals are cached per resolved path so every writer in the process
+    takes part in the same group commit.
+    """
+    key = str(Path(snapshot_path).resolve())
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = AlertJournal(snapshot_path)
+        return journal
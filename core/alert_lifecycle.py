@@ -0,0 +1,269 @@
+"""
+Alert Lifecycle Module
+
+Stateful layer between alert producers and the alert log. Each alert is
+identified by a fingerprint (host + metric + resource + level) and moves
+between 'open' and 'resolved':
+
+- Raising an alert that is already open bumps its repeat counter instead
+  of writing a duplicate row; the counter is recorded when it resolves.
+- A fingerprint that changes state too often inside a window is marked
+  flapping: one 'flapping' row is written, further open/resolve rows are
+  suppressed, and the settled state is written once it has been stable
+  for the dampening period.
+
+Together with raise/clear hysteresis in core.rule_engine this bounds the
+number of rows (and writes) a noisy signal can produce.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .alert_manager import DEFAULT_ALERTS_PATH, add_alert
+
+logger = logging.getLogger(__name__)
+
+# Flap detection defaults
+FLAP_WINDOW = 600.0      # seconds over which state changes are counted
+FLAP_THRESHOLD = 4       # state changes within the window that mean flapping
+DAMPEN_SECONDS = 300.0   # seconds without a change before flapping ends
+
+
+def fingerprint(metric: str, level: str, resource: Optional[str] = None,
+                host: Optional[str] = None) -> str:
+    """
+    Return the fingerprint identifying one alert across raises.
+
+    Example:
+        >>> fingerprint('disk', 'critical', '/data', 'web-1')
+        'e0c5...'
+    """
+    key = '\x1f'.join([host or '', metric, resource or '', level])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass
+class AlertState:
+    """Lifecycle state of one fingerprint."""
+    fingerprint: str
+    metric: str
+    level: str
+    resource: Optional[str]
+    host: Optional[str]
+    message: str = ''
+    resolve_message: Optional[str] = None
+    value: Optional[float] = None
+    threshold: Optional[float] = None
+    state: str = 'resolved'
+    opened_at: Optional[float] = None
+    last_seen: Optional[float] = None
+    last_change: Optional[float] = None
+    repeat_count: int = 0
+    flapping: bool = False
+    suppressed: int = 0
+    transitions: Deque[float] = field(default_factory=deque)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class AlertLifecycle:
+    """Deduplicate, track and dampen alerts before they reach the alert log."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_ALERTS_PATH,
+        flap_window: float = FLAP_WINDOW,
+        flap_threshold: int = FLAP_THRESHOLD,
+        dampen_seconds: float = DAMPEN_SECONDS,
+        writer: Optional[Callable[..., Any]] = None
+    ):
+        """Initialize alert lifecycle
+
+        Args:
+            path: Alerts path rows are written to (via add_alert)
+            flap_window: Seconds over which state changes are counted
+            flap_threshold: State changes within the window that mean flapping
+            dampen_seconds: Seconds without a change before flapping ends
+            writer: Row writer with add_alert's signature minus `path`
+                    (defaults to add_alert on `path`)
+        """
+        self.flap_window = flap_window
+        self.flap_threshold = flap_threshold
+        self.dampen_seconds = dampen_seconds
+        self.writer = writer if writer is not None else partial(add_alert, path=path)
+
+        self._lock = threading.RLock()
+        self._states: Dict[str, AlertState] = {}
+        self.rows_written = 0
+        self.rows_suppressed = 0
+
+    # ------------------------------------------------------------------
+    # Producer API
+    # ------------------------------------------------------------------
+
+    def open(
+        self,
+        metric: str,
+        level: str,
+        message: str,
+        value: Optional[float] = None,
+        threshold: Optional[float] = None,
+        resource: Optional[str] = None,
+        host: Optional[str] = None,
+        now: Optional[float] = None,
+        **extra: Any
+    ) -> str:
+        """
+        Raise an alert.
+
+        Returns:
+            str: 'opened' (row written), 'repeat' (already open, counter
+                 bumped), 'flapping' (flapping row written) or 'suppressed'
+        """
+        now = time.time() if now is None else now
+        fp = fingerprint(metric, level, resource, host)
+        with self._lock:
+            st = self._states.get(fp)
+            if st is None:
+                st = self._states[fp] = AlertState(fp, metric, level, resource, host)
+            st.message, st.value, st.threshold = message, value, threshold
+            st.last_seen = now
+            st.extra = extra
+            st.resolve_message = None
+
+            if st.state == 'open':
+                st.repeat_count += 1
+                return 'repeat'
+
+            st.state = 'open'
+            st.opened_at = now
+            st.repeat_count = 0
+            return self._transition(st, now)
+
+    def resolve(
+        self,
+        metric: str,
+        level: str,
+        resource: Optional[str] = None,
+        host: Optional[str] = None,
+        value: Optional[float] = None,
+        message: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> str:
+        """
+        Resolve an open alert.
+
+        Returns:
+            str: 'resolved' (row written), 'flapping', 'suppressed' or
+                 'ignored' (nothing open for this fingerprint)
+        """
+        now = time.time() if now is None else now
+        fp = fingerprint(metric, level, resource, host)
+        with self._lock:
+            st = self._states.get(fp)
+            if st is None or st.state != 'open':
+                return 'ignored'
+            st.state = 'resolved'
+            st.value = value if value is not None else st.value
+            st.last_seen = now
+            st.resolve_message = message
+            return self._transition(st, now)
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """
+        End flapping for fingerprints that have been stable long enough.
+
+        The settled state is written once. Resolved, non-flapping states
+        are forgotten.
+
+        Returns:
+            int: Number of rows written
+        """
+        now = time.time() if now is None else now
+        written = 0
+        with self._lock:
+            for fp, st in list(self._states.items()):
+                if st.flapping and now - st.last_change >= self.dampen_seconds:
+                    st.flapping = False
+                    st.transitions.clear()
+                    self._write_state(st, now, note=f"stable after flapping ({st.suppressed} suppressed)")
+                    st.suppressed = 0
+                    written += 1
+                if st.state == 'resolved' and not st.flapping and not self._recent(st, now):
+                    del self._states[fp]
+        return written
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Return the open and flapping alerts."""
+        with self._lock:
+            return [
+                {'fingerprint': st.fingerprint, 'metric': st.metric, 'level': st.level,
+                 'resource': st.resource, 'host': st.host, 'state': st.state,
+                 'flapping': st.flapping, 'repeat_count': st.repeat_count,
+                 'opened_at': st.opened_at, 'last_seen': st.last_seen}
+                for st in self._states.values()
+                if st.state == 'open' or st.flapping
+            ]
+
+    def get(self, fp: str) -> Optional[AlertState]:
+        """Return the state for a fingerprint."""
+        with self._lock:
+            return self._states.get(fp)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _recent(self, st: AlertState, now: float) -> bool:
+        while st.transitions and now - st.transitions[0] > self.flap_window:
+            st.transitions.popleft()
+        return bool(st.transitions)
+
+    def _transition(self, st: AlertState, now: float) -> str:
+        st.last_change = now
+        st.transitions.append(now)
+        self._recent(st, now)
+
+        if st.flapping:
+            st.suppressed += 1
+            self.rows_suppressed += 1
+            return 'suppressed'
+
+        if len(st.transitions) >= self.flap_threshold:
+            st.flapping = True
+            self._write(st, st.level, f"Flapping: {st.message} "
+                        f"({len(st.transitions)} state changes in {self.flap_window:g}s)",
+                        state='flapping')
+            return 'flapping'
+
+        self._write_state(st, now)
+        return 'opened' if st.state == 'open' else 'resolved'
+
+    def _write_state(self, st: AlertState, now: float, note: Optional[str] = None):
+        suffix = f" [{note}]" if note else ''
+        if st.state == 'open':
+            self._write(st, st.level, st.message + suffix, state='open')
+        else:
+            message = st.resolve_message or f"Resolved: {st.message}"
+            duration = now - st.opened_at if st.opened_at is not None else None
+            self._write(st, 'info', message + suffix, state='resolved',
+                        repeat_count=st.repeat_count,
+                        duration_seconds=round(duration, 3) if duration is not None else None)
+
+    def _write(self, st: AlertState, level: str, message: str, **fields):
+        row = dict(st.extra, host=st.host, resource=st.resource,
+                   fingerprint=st.fingerprint, **fields)
+        try:
+            self.writer(st.metric, level, message, value=st.value, threshold=st.threshold, **row)
+            self.rows_written += 1
+        except Exception as e:
+            logger.error(f"Failed to write alert {st.fingerprint}: {e}")
@@ -2,15 +2,22 @@
 Alert Manager Module
 
 Manages system alerts by reading from alerts.json and providing
-filtering and sorting capabilities.
+filtering and sorting capabilities. New alerts are appended to an
+alerts.journal.jsonl journal that is periodically compacted into
+alerts.json (core.alert_journal). Paths ending in .db/.sqlite are
+served by the optional SQLite backend (core.sqlite_store).
 """
 
 import json
 import logging
+import uuid
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
 
+from .alert_journal import journal_path, open_journal
+from .sqlite_store import is_sqlite_path, open_store
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,6 +28,9 @@
 # Default paths
 DEFAULT_ALERTS_PATH = "data/alerts/alerts.json"
 
+# Retention folds the journal in past this size even when nothing is trimmed
+TRIM_COMPACT_BYTES = 64 * 1024
+
 # Alert levels
 ALERT_LEVELS = ['info', 'warning', 'critical']
 
@@ -59,21 +69,19 @@ def load_alerts(
     alerts_path = Path(path)
     
     try:
+        # SQLite backend: indexed query instead of load-filter-sort
+        if is_sqlite_path(path):
+            level = level_filter if level_filter in ALERT_LEVELS else None
+            return open_store(path).latest_alerts(limit=limit, level=level)
+        
         # Create empty file if it doesn't exist
-        if not alerts_path.exists():
+        if not alerts_path.exists() and not journal_path(alerts_path).exists():
             logger.info(f"Alerts file not found. Creating empty file: {alerts_path}")
             create_empty_alerts_file(path)
             return []
         
-        with alerts_path.open('r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Extract alerts list
-        alerts = data.get('alerts', [])
-        
-        if not isinstance(alerts, list):
-            logger.warning(f"Invalid alerts format in {alerts_path}")
-            return []
+        # Snapshot plus the journal tail not yet compacted into it
+        alerts = open_journal(path).load()
         
         # Filter by level if specified
         if level_filter and level_filter in ALERT_LEVELS:
@@ -119,6 +127,11 @@ def create_empty_alerts_file(path: str = DEFAULT_ALERTS_PATH) -> bool:
     alerts_path = Path(path)
     
     try:
+        # SQLite backend: opening the store creates the schema
+        if is_sqlite_path(path):
+            open_store(path)
+            return True
+        
         # Ensure parent directory exists
         alerts_path.parent.mkdir(parents=True, exist_ok=True)
         
@@ -149,10 +162,11 @@ def add_alert(
     message: str,
     value: Optional[float] = None,
     threshold: Optional[float] = None,
-    path: str = DEFAULT_ALERTS_PATH
+    path: str = DEFAULT_ALERTS_PATH,
+    **extra: Any
 ) -> bool:
     """
-    Add a new alert to alerts.json.
+    Add a new alert to the alert journal.
     
     Args:
         metric: Metric type (cpu, memory, disk, etc.)
@@ -161,6 +175,7 @@ def add_alert(
         value: Current metric value
         threshold: Threshold that triggered the alert
         path: Path to alerts.json file
+        **extra: Additional alert fields (e.g. host, resource, rule)
         
     Returns:
         bool: True if alert added successfully, False otherwise
@@ -169,20 +184,35 @@ def add_alert(
         >>> add_alert('cpu', 'warning', 'CPU usage above 80%', 85.5, 80.0)
         True
     """
+    return store_alert(metric, level, message, value, threshold, path=path, **extra) is not None
+
+
+def store_alert(
+    metric: str,
+    level: str,
+    message: str,
+    value: Optional[float] = None,
+    threshold: Optional[float] = None,
+    path: str = DEFAULT_ALERTS_PATH,
+    **extra: Any
+) -> Optional[Dict[str, Any]]:
+    """
+    Add a new alert like add_alert() and return the row as stored.
+    
+    Args:
+        Same as add_alert()
+        
+    Returns:
+        dict or None: The stored alert with its id and timestamp, or None
+                      if it could not be added
+    """
     if level not in ALERT_LEVELS:
         logger.error(f"Invalid alert level: {level}. Must be one of {ALERT_LEVELS}")
-        return False
+        return None
     
     alerts_path = Path(path)
     
     try:
-        # Load existing alerts
-        if alerts_path.exists():
-            with alerts_path.open('r', encoding='utf-8') as f:
-                data = json.load(f)
-        else:
-            data = {"timestamp": "", "alerts": []}
-        
         # Create new alert
         new_alert = {
             "level": level,
@@ -195,21 +225,26 @@ def add_alert(
             new_alert["value"] = value
         if threshold is not None:
             new_alert["threshold"] = threshold
+        for key, field_value in extra.items():
+            if field_value is not None:
+                new_alert.setdefault(key, field_value)
         
-        # Add to alerts list
-        data["alerts"].append(new_alert)
-        data["timestamp"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        # SQLite backend: single-row insert, id assigned by the database
+        if is_sqlite_path(path):
+            new_alert["id"] = open_store(path).insert_alert(new_alert)
+            logger.info(f"Added {level} alert for {metric}: {message}")
+            return new_alert
         
-        # Write back to file
-        with alerts_path.open('w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Append to the journal (O(1) per alert, group-committed)
+        new_alert.setdefault("id", uuid.uuid4().hex)
+        open_journal(alerts_path).append(new_alert)
         
         logger.info(f"Added {level} alert for {metric}: {message}")
-        return True
+        return new_alert
         
     except Exception as e:
         logger.error(f"Error adding alert: {e}")
-        return False
+        return None
 
 
 def clear_alerts(path: str = DEFAULT_ALERTS_PATH) -> bool:
@@ -226,12 +261,109 @@ def clear_alerts(path: str = DEFAULT_ALERTS_PATH) -> bool:
         >>> clear_alerts()
         True
     """
-    return create_empty_alerts_file(path)
+    if is_sqlite_path(path):
+        try:
+            open_store(path).clear_alerts()
+            return True
+        except Exception as e:
+            logger.error(f"Error clearing alerts in {path}: {e}")
+            return False
+    
+    if not journal_path(path).exists():
+        return create_empty_alerts_file(path)
+    
+    try:
+        open_journal(path).clear()
+        return True
+    except Exception as e:
+        logger.error(f"Error clearing alerts in {path}: {e}")
+        return False
+
+
+def trim_alerts(
+    path: str = DEFAULT_ALERTS_PATH,
+    max_count: Optional[int] = None,
+    max_age_seconds: Optional[float] = None,
+    now: Optional[float] = None
+) -> int:
+    """
+    Remove old alerts so the alert log stays within retention limits.
+    
+    Args:
+        path: Path to alerts.json file (or SQLite database)
+        max_count: Keep at most this many of the newest alerts
+        max_age_seconds: Remove alerts older than this
+        now: Reference time in epoch seconds (default: current time)
+        
+    Returns:
+        int: Number of alerts removed
+        
+    Example:
+        >>> trim_alerts(max_count=1000, max_age_seconds=30 * 86400)
+        12
+    """
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    cutoff = now - max_age_seconds if max_age_seconds is not None else None
+    
+    if is_sqlite_path(path):
+        return open_store(path).trim_alerts(max_count=max_count, before_ts=cutoff)
+    
+    alerts_path = Path(path)
+    if not alerts_path.exists() and not journal_path(alerts_path).exists():
+        return 0
+    
+    cutoff_str = None
+    if cutoff is not None:
+        cutoff_str = datetime.fromtimestamp(cutoff, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    removed = 0
+    
+    def keep(alerts):
+        nonlocal removed
+        kept = _sort_alerts_by_timestamp(alerts)
+        if cutoff_str is not None:
+            kept = [a for a in kept if a.get('timestamp', '') >= cutoff_str]
+        if max_count is not None:
+            kept = kept[:max_count]
+        removed = len(alerts) - len(kept)
+        # Preserve the original (oldest first) file order
+        kept_ids = {id(a) for a in kept}
+        return [a for a in alerts if id(a) in kept_ids]
+    
+    # Rewriting alerts.json changes its stamp and makes every reader reload,
+    # so only compact when alerts go or the journal is due to be folded in
+    journal = open_journal(alerts_path)
+    keep(journal.load())
+    if not removed and not _journal_exceeds(alerts_path, TRIM_COMPACT_BYTES):
+        return 0
+    
+    # Compaction folds the journal in, so trimming sees every alert
+    journal.compact(keep=keep)
+    if removed:
+        logger.info(f"Trimmed {removed} alerts from {alerts_path}")
+    
+    return removed
+
+
+def _journal_exceeds(alerts_path: Path, limit: int) -> bool:
+    try:
+        return journal_path(alerts_path).stat().st_size > limit
+    except OSError:
+        return False
+
+
+def counted(alert: Dict[str, Any]) -> bool:
+    """
+    Return whether an alert counts towards the per-level totals.
+    
+    Resolution rows written by AlertLifecycle (state 'resolved') close an
+    alert counted when it opened, so they are not counted again.
+    """
+    return alert.get('state') != 'resolved'
 
 
 def get_alert_counts(alerts: List[Dict[str, Any]]) -> Dict[str, int]:
     """
-    Get count of alerts by level.
+    Get count of alerts by level, resolution rows excluded.
     
     Args:
         alerts: List of alert dictionaries
@@ -248,7 +380,7 @@ def get_alert_counts(alerts: List[Dict[str, Any]]) -> Dict[str, int]:
     
     for alert in alerts:
         level = alert.get('level', 'info')
-        if level in counts:
+        if level in counts and counted(alert):
             counts[level] += 1
     
     return counts
@@ -0,0 +1,467 @@
+"""
+Alert Store Module
+
+In-memory, indexed view of the alert log for consumers that query it
+repeatedly (TUI footer, /api/alerts). Alerts are kept in timestamp order
+with secondary indexes by level and metric, per-level counts are
+maintained incrementally, and queries page with an opaque cursor
+(`after=<alert id>`) instead of re-sorting the whole log. stats() serves
+per-level counts over time buckets and the noisiest metrics from
+aggregates that are updated as alerts are added or removed.
+
+When bound to an alerts path, refresh() picks up new alerts
+incrementally: only the journal tail appended since the last refresh (or
+the SQLite rows with a higher id) is read, and the JSON log is reloaded
+in full only after a compaction.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .alert_journal import file_lock, journal_path, read_journal_from, LOCK_SUFFIX
+from .alert_manager import ALERT_LEVELS, counted
+from .sqlite_store import is_sqlite_path, open_store
+
+logger = logging.getLogger(__name__)
+
+# Sort key: (epoch seconds, insertion sequence)
+Key = Tuple[float, int]
+
+# Bucket sizes stats() keeps aggregates for (seconds)
+STATS_BUCKETS = (60, 300, 3600, 86400)
+
+
+def alert_id(alert: Dict[str, Any]) -> str:
+    """
+    Return the stable id of an alert.
+
+    Alerts written by add_alert() carry an 'id'; legacy alerts without one
+    get a content hash so cursors stay valid across reloads.
+    """
+    if alert.get('id') is not None:
+        return str(alert['id'])
+    canonical = json.dumps(alert, sort_keys=True, separators=(',', ':'))
+    return 'h' + hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def parse_alert_time(timestamp: Optional[str]) -> float:
+    """Parse an alert's ISO 8601 timestamp to epoch seconds (0.0 if invalid)."""
+    if not timestamp:
+        return 0.0
+    try:
+        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class AlertStore:
+    """Timestamp-ordered alert collection with level/metric indexes."""
+
+    def __init__(self, path=None):
+        """Initialize alert store
+
+        Args:
+            path: Optional alerts path (alerts.json or .db/.sqlite) that
+                  refresh() keeps the store in sync with
+        """
+        self.path = Path(path) if path is not None else None
+
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._keys: List[Key] = []
+        self._by_key: Dict[Key, Dict[str, Any]] = {}
+        self._key_by_id: Dict[str, Key] = {}
+        self._by_level: Dict[str, List[Key]] = {}
+        self._by_metric: Dict[str, List[Key]] = {}
+        # Counted alerts only (resolution rows left out), for stats()
+        self._counted_by_metric: Dict[str, List[Key]] = {}
+        self._by_host: Dict[Optional[str], List[Key]] = {}
+        self._counts: Dict[str, int] = {level: 0 for level in ALERT_LEVELS}
+        # bucket seconds -> bucket start -> level -> count (built on first use)
+        self._buckets: Dict[int, Dict[int, Dict[str, int]]] = {}
+        # XOR of the member ids' hashes: identifies the alert set (see version)
+        self._digest = 0
+
+        # Called with each newly inserted alert (e.g. CorrelationEngine.process)
+        self.listeners: List[Callable[[Dict[str, Any]], Any]] = []
+
+        # Source tracking for refresh()
+        self._snapshot_stamp = None
+        self._journal_offset = 0
+        self._sqlite_last_id = 0
+        self._sqlite_count = 0
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add(self, alert: Dict[str, Any]) -> Optional[str]:
+        """
+        Insert an alert.
+
+        Returns:
+            str or None: Alert id, or None if an alert with that id exists
+        """
+        ident = alert_id(alert)
+        with self._lock:
+            if ident in self._key_by_id:
+                return None
+            self._seq += 1
+            key = (parse_alert_time(alert.get('timestamp')), self._seq)
+            alert = dict(alert, id=alert.get('id', ident))
+
+            _insert(self._keys, key)
+            self._by_key[key] = alert
+            self._key_by_id[ident] = key
+
+            level = alert.get('level', 'info')
+            _insert(self._by_level.setdefault(level, []), key)
+            _insert(self._by_metric.setdefault(alert.get('metric'), []), key)
+            _insert(self._by_host.setdefault(alert.get('host'), []), key)
+            if counted(alert):
+                _insert(self._counted_by_metric.setdefault(alert.get('metric'), []), key)
+                self._counts[level] = self._counts.get(level, 0) + 1
+                self._bucket_add(key[0], level, 1)
+            self._digest ^= _id_hash(ident)
+
+            for listener in self.listeners:
+                try:
+                    listener(alert)
+                except Exception as e:
+                    logger.error(f"Alert listener failed: {e}")
+            return ident
+
+    def add_many(self, alerts: List[Dict[str, Any]]) -> int:
+        """Insert several alerts. Returns the number inserted."""
+        with self._lock:
+            return sum(1 for alert in alerts if self.add(alert) is not None)
+
+    def remove(self, ident: str) -> bool:
+        """Remove an alert by id. Returns True if it was present."""
+        with self._lock:
+            key = self._key_by_id.pop(ident, None)
+            if key is None:
+                return False
+            alert = self._by_key.pop(key)
+            level = alert.get('level', 'info')
+            _remove(self._keys, key)
+            _remove(self._by_level[level], key)
+            _remove(self._by_metric[alert.get('metric')], key)
+            _remove(self._by_host[alert.get('host')], key)
+            if counted(alert):
+                _remove(self._counted_by_metric[alert.get('metric')], key)
+                self._counts[level] -= 1
+                self._bucket_add(key[0], level, -1)
+            self._digest ^= _id_hash(ident)
+            return True
+
+    def clear(self):
+        """Remove every alert."""
+        with self._lock:
+            self._keys = []
+            self._by_key = {}
+            self._key_by_id = {}
+            self._by_level = {}
+            self._by_metric = {}
+            self._counted_by_metric = {}
+            self._by_host = {}
+            self._counts = {level: 0 for level in ALERT_LEVELS}
+            self._buckets = {}
+            self._digest = 0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def version(self) -> str:
+        """
+        Identify the current alert set (O(1)).
+
+        Derived from the ids of the alerts present, so two stores holding
+        the same alerts report the same version, also across restarts.
+        """
+        with self._lock:
+            return f"{len(self._keys)}-{self._digest:016x}"
+
+    def get(self, ident: str) -> Optional[Dict[str, Any]]:
+        """Return the alert with the given id, if present."""
+        with self._lock:
+            key = self._key_by_id.get(ident)
+            return self._by_key[key] if key is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of alerts per level, resolution rows excluded (O(1))."""
+        with self._lock:
+            return dict(self._counts)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Return the newest alert (O(1))."""
+        with self._lock:
+            return self._by_key[self._keys[-1]] if self._keys else None
+
+    def query(
+        self,
+        level: Optional[str] = None,
+        metric: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = 50,
+        host: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return alerts newest first, optionally filtered.
+
+        Args:
+            level: Only alerts of this level
+            metric: Only alerts for this metric
+            after: Cursor; return alerts older than the alert with this id
+            limit: Maximum number of alerts (None for all)
+            host: Only alerts for this host
+            since: Only alerts at or after this epoch time
+            until: Only alerts at or before this epoch time
+
+        Returns:
+            list: Alert dicts, newest first (empty if the cursor is unknown)
+
+        Example:
+            >>> page = store.query(level='critical', limit=20)
+            >>> next_page = store.query(level='critical', after=page[-1]['id'], limit=20)
+        """
+        with self._lock:
+            # Walk the smallest matching index and check the other fields
+            filters = [(field, value, index) for field, value, index in (
+                ('level', level, self._by_level),
+                ('metric', metric, self._by_metric),
+                ('host', host, self._by_host),
+            ) if value is not None]
+            if filters:
+                candidates = [(index.get(value, []), field) for field, value, index in filters]
+                keys, walked = min(candidates, key=lambda c: len(c[0]))
+                checks = [(field, value) for field, value, _ in filters if field != walked]
+            else:
+                keys, checks = self._keys, []
+
+            # Keys are time ordered: the time range is a slice
+            start = 0 if since is None else bisect_left(keys, (since, 0))
+            end = len(keys) if until is None else bisect_right(keys, (until, math.inf))
+            if after is not None:
+                cursor = self._key_by_id.get(after)
+                if cursor is None:
+                    return []
+                end = min(end, bisect_left(keys, cursor))
+
+            results = []
+            for index in range(end - 1, start - 1, -1):
+                alert = self._by_key[keys[index]]
+                if checks and not all(_field(alert, field) == value for field, value in checks):
+                    continue
+                results.append(alert)
+                if limit is not None and len(results) >= limit:
+                    break
+            return results
+
+    def page(self, limit: int = 50, **filters) -> Dict[str, Any]:
+        """
+        Return one page of query() results with the cursor for the next page.
+
+        Returns:
+            dict: {'alerts': [...], 'next': id or None}
+        """
+        alerts = self.query(limit=limit + 1, **filters)
+        has_more = len(alerts) > limit
+        alerts = alerts[:limit]
+        return {'alerts': alerts, 'next': alerts[-1]['id'] if has_more else None}
+
+    def iterate(self, batch_size: int = 500, **filters) -> Iterator[Dict[str, Any]]:
+        """
+        Yield query() results newest first, one page at a time.
+
+        The lock is held only while a page is collected, so a consumer that
+        renders rows as they arrive (e.g. a streamed report) neither copies
+        the whole result nor blocks writers. Alerts added meanwhile are not
+        yielded; removed ones may end the iteration early.
+
+        Args:
+            batch_size: Alerts fetched per page
+            **filters: query() filters (level, metric, host, since, until)
+        """
+        after = None
+        while True:
+            page = self.query(limit=batch_size, after=after, **filters)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = page[-1]['id']
+
+    def stats(
+        self,
+        bucket_seconds: int = 3600,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        top: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Return alert aggregates without scanning the alerts.
+
+        Args:
+            bucket_seconds: Bucket size, one of STATS_BUCKETS
+            since: Only buckets/alerts at or after this epoch time
+            until: Only buckets/alerts at or before this epoch time
+            top: Number of noisiest metrics to return
+
+        Returns:
+            dict: {'counts': per-level totals (as counts()),
+                   'buckets': [{'start': epoch, 'info': n, ...}, ...] oldest first,
+                   'top_metrics': [{'metric': name, 'count': n}, ...]}
+            Buckets are aligned to multiples of bucket_seconds, so the first
+            and last may extend past the range.
+        """
+        if bucket_seconds not in STATS_BUCKETS:
+            raise ValueError(f"bucket_seconds must be one of {STATS_BUCKETS}")
+        with self._lock:
+            buckets = self._buckets.get(bucket_seconds)
+            if buckets is None:
+                # First request for this size: build once, then kept up to date
+                buckets = self._buckets[bucket_seconds] = {}
+                for key in self._keys:
+                    if not counted(self._by_key[key]):
+                        continue
+                    level = self._by_key[key].get('level', 'info')
+                    row = buckets.setdefault(int(key[0] // bucket_seconds) * bucket_seconds, {})
+                    row[level] = row.get(level, 0) + 1
+
+            low = -math.inf if since is None else since // bucket_seconds * bucket_seconds
+            high = math.inf if until is None else until
+            series = [dict({level: 0 for level in ALERT_LEVELS}, start=start, **row)
+                      for start, row in sorted(buckets.items())
+                      if low <= start <= high and any(row.values())]
+
+            # Per-metric counts in range are two bisections per metric
+            lo_key = None if since is None else (since, 0)
+            hi_key = None if until is None else (until, math.inf)
+            noisy = []
+            for metric, keys in self._counted_by_metric.items():
+                count = ((len(keys) if hi_key is None else bisect_right(keys, hi_key))
+                         - (0 if lo_key is None else bisect_left(keys, lo_key)))
+                if count > 0:
+                    noisy.append({'metric': metric, 'count': count})
+            noisy.sort(key=lambda entry: (-entry['count'], str(entry['metric'])))
+
+            return {'counts': dict(self._counts), 'buckets': series, 'top_metrics': noisy[:top]}
+
+    def _bucket_add(self, ts: float, level: str, delta: int):
+        for size, buckets in self._buckets.items():
+            row = buckets.setdefault(int(ts // size) * size, {})
+            row[level] = row.get(level, 0) + delta
+
+    # ------------------------------------------------------------------
+    # Syncing with the alert log
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> int:
+        """
+        Pick up changes to the bound alerts path.
+
+        Returns:
+            int: Number of alerts added by this refresh
+        """
+        if self.path is None:
+            return 0
+        with self._lock:
+            if is_sqlite_path(self.path):
+                return self._refresh_sqlite()
+            return self._refresh_json()
+
+    def _refresh_json(self) -> int:
+        journal = journal_path(self.path)
+        lock_path = self.path.with_name(self.path.name + LOCK_SUFFIX)
+        if not self.path.exists() and not journal.exists():
+            if self._keys:
+                self.clear()
+            self._snapshot_stamp, self._journal_offset = None, 0
+            return 0
+
+        added = 0
+        with file_lock(lock_path, shared=True):
+            stamp = _file_stamp(self.path)
+            journal_size = _file_stamp(journal)[1] if journal.exists() else 0
+            if stamp != self._snapshot_stamp or journal_size < self._journal_offset:
+                # Compaction rewrote the snapshot: reload everything
+                self.clear()
+                self._snapshot_stamp = stamp
+                self._journal_offset = 0
+                if self.path.exists():
+                    try:
+                        with self.path.open('r', encoding='utf-8') as f:
+                            alerts = json.load(f).get('alerts', [])
+                    except (OSError, ValueError, AttributeError) as e:
+                        logger.error(f"Error reading {self.path}: {e}")
+                        alerts = []
+                    if isinstance(alerts, list):
+                        added += self.add_many(alerts)
+
+            tail, self._journal_offset = read_journal_from(journal, self._journal_offset)
+        return added + self.add_many(tail)
+
+    def _refresh_sqlite(self) -> int:
+        store = open_store(self.path)
+        # Count before fetching so rows inserted in between are never missed
+        total = sum(store.alert_counts().values())
+        new = store.alerts_after(self._sqlite_last_id)
+        if total != self._sqlite_count + len(new):
+            # Rows were trimmed or cleared: drop the ones that are gone
+            present = {str(ident) for ident in store.alert_ids()}
+            for ident in [i for i in self._key_by_id if i not in present]:
+                self.remove(ident)
+        if new:
+            self._sqlite_last_id = new[-1]['id']
+        # Listeners see only the new alerts, in insertion order
+        added = self.add_many(new)
+        self._sqlite_count = len(self._keys)
+        return added
+
+
+def _id_hash(ident: str) -> int:
+    return int.from_bytes(hashlib.sha1(ident.encode('utf-8')).digest()[:8], 'big')
+
+
+def _field(alert: Dict[str, Any], field: str) -> Any:
+    return alert.get(field, 'info') if field == 'level' else alert.get(field)
+
+
+def _insert(keys: List[Key], key: Key):
+    # New alerts are almost always the newest: append instead of insort
+    if not keys or keys[-1] < key:
+        keys.append(key)
+    else:
+        insort(keys, key)
+
+
+def _remove(keys: List[Key], key: Key):
+    index = bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
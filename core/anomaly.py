@@ -0,0 +1,288 @@
+"""
+Anomaly Detection Module
+
+Streaming anomaly scores for every numeric series in a metrics snapshot.
+Each series keeps a fixed amount of state, updated once per sample:
+
+- EWMA mean and variance (fast-adapting z-score)
+- Frugal streaming median and MAD estimates (robust z-score that a few
+  spikes cannot drag around)
+- Optionally, an hour-of-week baseline (168 EWMA buckets) so a nightly
+  batch job is compared with previous nights rather than with the day
+
+No history is scanned: a sample is scored against the state built from
+earlier samples, then folded into it. Cumulative counters (network bytes)
+are scored as per-second rates.
+
+annotate() returns the snapshot with an 'anomaly' section mirroring the
+metric layout, so rules can use paths such as
+'anomaly.cpu.usage_percent > 6 for 5m'.
+"""
+
+import logging
+import math
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .metrics_collector import identity_key, snapshot_epoch
+
+logger = logging.getLogger(__name__)
+
+# Leaf fields that are cumulative counters (scored as rates)
+COUNTER_FIELDS = frozenset({'rx_bytes', 'tx_bytes'})
+
+# Leaf fields that are static or monotonic and carry no anomaly signal
+IGNORED_FIELDS = frozenset({
+    'uptime_seconds', 'power_on_hours', 'logical_processors', 'count',
+    'total_mb', 'total_gb', 'memory_total_mb',
+})
+
+# MAD of a normal distribution is 0.6745 sigma
+MAD_SCALE = 1.4826
+
+HOURS_PER_WEEK = 168
+
+# Spread floor (relative to the baseline) so a flat series that suddenly
+# moves scores high instead of dividing by zero; scores are capped
+MIN_RELATIVE_SCALE = 0.01
+MIN_ABSOLUTE_SCALE = 1e-3
+SCORE_CAP = 100.0
+
+
+@dataclass
+class AnomalyScore:
+    """Anomaly score for one sample of one series.
+
+    Attributes:
+        value: Sample value (rate for counters)
+        score: Signed z-score with the largest magnitude of the detectors
+        ewma_z: z-score against the EWMA mean/variance
+        robust_z: z-score against the streaming median/MAD
+        seasonal_z: z-score against the hour-of-week baseline (if enabled)
+        expected: Baseline the sample was compared with (EWMA mean)
+    """
+    value: float
+    score: float
+    ewma_z: float
+    robust_z: float
+    seasonal_z: Optional[float] = None
+    expected: Optional[float] = None
+
+
+class SeriesState:
+    """Constant-size streaming statistics for one series."""
+
+    __slots__ = ('count', 'mean', 'var', 'median', 'mad', 'last_raw', 'last_ts',
+                 'season_mean', 'season_var', 'season_count')
+
+    def __init__(self, seasonal: bool = False):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.median = 0.0
+        self.mad = 0.0
+        self.last_raw: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        if seasonal:
+            self.season_mean = array('d', bytes(8 * HOURS_PER_WEEK))
+            self.season_var = array('d', bytes(8 * HOURS_PER_WEEK))
+            self.season_count = array('I', bytes(4 * HOURS_PER_WEEK))
+        else:
+            self.season_mean = self.season_var = self.season_count = None
+
+    def score(self, x: float, bucket: Optional[int], seasonal_warmup: int) -> AnomalyScore:
+        """Score `x` against the state built from earlier samples."""
+        ewma_z = _z(x, self.mean, math.sqrt(self.var))
+        robust_z = _z(x, self.median, MAD_SCALE * self.mad)
+
+        seasonal_z = None
+        if bucket is not None and self.season_count[bucket] >= seasonal_warmup:
+            seasonal_z = _z(x, self.season_mean[bucket], math.sqrt(self.season_var[bucket]))
+
+        candidates = [ewma_z, robust_z] if seasonal_z is None else [ewma_z, robust_z, seasonal_z]
+        score = max(candidates, key=abs)
+        return AnomalyScore(x, score, ewma_z, robust_z, seasonal_z, self.mean)
+
+    def update(self, x: float, alpha: float, rate: float, bucket: Optional[int]):
+        """Fold `x` into the running statistics."""
+        self.count += 1
+        if self.count == 1:
+            self.mean = self.median = x
+            if bucket is not None:
+                self.season_mean[bucket] = x
+                self.season_count[bucket] = 1
+            return
+
+        # EWMA mean/variance (West's incremental form)
+        diff = x - self.mean
+        incr = alpha * diff
+        self.mean += incr
+        self.var = (1.0 - alpha) * (self.var + diff * incr)
+
+        # Frugal median/MAD: step towards the sample, scaled by the spread
+        dev = x - self.median
+        step = rate * (self.mad if self.mad > 0 else abs(dev))
+        self.median += math.copysign(step, dev) if dev else 0.0
+        abs_dev = abs(x - self.median)
+        if self.mad == 0:
+            self.mad = rate * abs_dev
+        elif abs_dev != self.mad:
+            self.mad += math.copysign(rate * self.mad, abs_dev - self.mad)
+
+        if bucket is not None:
+            n = self.season_count[bucket]
+            if n == 0:
+                self.season_mean[bucket] = x
+            else:
+                d = x - self.season_mean[bucket]
+                inc = alpha * d
+                self.season_mean[bucket] += inc
+                self.season_var[bucket] = (1.0 - alpha) * (self.season_var[bucket] + d * inc)
+            self.season_count[bucket] = n + 1
+
+
+class AnomalyDetector:
+    """Score every numeric series of incoming snapshots."""
+
+    def __init__(
+        self,
+        alpha: float = 0.05,
+        median_rate: float = 0.05,
+        warmup: int = 30,
+        seasonal: bool = False,
+        seasonal_warmup: int = 3
+    ):
+        """Initialize anomaly detector
+
+        Args:
+            alpha: EWMA smoothing factor (higher adapts faster)
+            median_rate: Step size of the streaming median/MAD estimates
+            warmup: Samples per series before scores are reported
+            seasonal: Keep hour-of-week baselines (168 buckets per series)
+            seasonal_warmup: Samples per bucket before it is used
+        """
+        self.alpha = alpha
+        self.median_rate = median_rate
+        self.warmup = warmup
+        self.seasonal = seasonal
+        self.seasonal_warmup = seasonal_warmup
+        self._series: Dict[Tuple[str, Tuple[str, ...]], SeriesState] = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def update(self, key, value: float, ts: float) -> Optional[AnomalyScore]:
+        """
+        Score one sample and fold it into the series state.
+
+        Args:
+            key: Hashable series key
+            value: Sample value
+            ts: Sample time in epoch seconds
+
+        Returns:
+            AnomalyScore or None while the series is warming up
+        """
+        return self._update(key, value, ts, counter=False)
+
+    def _update(self, key, value: float, ts: float, counter: bool) -> Optional[AnomalyScore]:
+        state = self._series.get(key)
+        if state is None:
+            state = self._series[key] = SeriesState(self.seasonal)
+
+        if counter:
+            previous, previous_ts = state.last_raw, state.last_ts
+            state.last_raw, state.last_ts = value, ts
+            if previous is None or ts <= previous_ts or value < previous:
+                return None  # first sample or counter reset
+            value = (value - previous) / (ts - previous_ts)
+
+        bucket = _hour_of_week(ts) if self.seasonal else None
+        result = None
+        if state.count >= self.warmup:
+            result = state.score(value, bucket, self.seasonal_warmup)
+        state.update(value, self.alpha, self.median_rate, bucket)
+        return result
+
+    def observe(self, snapshot: Dict[str, Any], now: Optional[float] = None,
+                host: Optional[str] = None) -> Dict[Tuple[str, ...], AnomalyScore]:
+        """
+        Update every numeric series of a snapshot.
+
+        Args:
+            snapshot: Metrics snapshot
+            now: Sample time (default: snapshot timestamp, then current time)
+            host: Host name (default: system.hostname)
+
+        Returns:
+            dict: Path tuple (e.g. ('disk', '/', 'used_percent')) -> score,
+                  for series past their warm-up
+        """
+        if now is None:
+            now = snapshot_epoch(snapshot, time.time())
+        if host is None:
+            host = (snapshot.get('system') or {}).get('hostname') or 'unknown'
+
+        scores = {}
+        for path, value in _numeric_leaves(snapshot, ()):
+            leaf = path[-1]
+            if leaf in IGNORED_FIELDS:
+                continue
+            result = self._update((host, path), value, now, counter=leaf in COUNTER_FIELDS)
+            if result is not None:
+                scores[path] = result
+        return scores
+
+    def annotate(self, snapshot: Dict[str, Any], now: Optional[float] = None,
+                 host: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return a copy of `snapshot` with an 'anomaly' section of scores.
+
+        The section mirrors the metric layout with list entries keyed by
+        identity, e.g. {'cpu': {'usage_percent': 0.4}, 'disk': {'/': {...}}}.
+        The input snapshot is not modified.
+        """
+        section: Dict[str, Any] = {}
+        for path, result in self.observe(snapshot, now, host).items():
+            node = section
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = round(result.score, 3)
+        return dict(snapshot, anomaly=section)
+
+    def forget(self, host: str) -> int:
+        """Drop all series of a host. Returns the number dropped."""
+        keys = [key for key in self._series if key[0] == host]
+        for key in keys:
+            del self._series[key]
+        return len(keys)
+
+
+def _numeric_leaves(node: Any, path: Tuple[str, ...]) -> Iterator[Tuple[Tuple[str, ...], float]]:
+    if isinstance(node, dict):
+        items = node.items()
+    elif isinstance(node, list):
+        items = ((identity_key(entry, pos), entry) for pos, entry in enumerate(node))
+    else:
+        return
+    for key, value in items:
+        if isinstance(value, bool) or value is None:
+            continue
+        if isinstance(value, (int, float)):
+            yield path + (str(key),), float(value)
+        elif isinstance(value, (dict, list)) and key != 'anomaly':
+            yield from _numeric_leaves(value, path + (str(key),))
+
+
+def _z(x: float, baseline: float, scale: float) -> float:
+    scale = max(scale, MIN_RELATIVE_SCALE * abs(baseline), MIN_ABSOLUTE_SCALE)
+    return max(-SCORE_CAP, min(SCORE_CAP, (x - baseline) / scale))
+
+
+def _hour_of_week(ts: float) -> int:
+    # Local time: batch schedules follow the wall clock
+    dt = datetime.fromtimestamp(ts)
+    return dt.weekday() * 24 + dt.hour
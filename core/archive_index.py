@@ -0,0 +1,419 @@
+"""
+Archive Index Module
+
+Maintains a sorted index of the metric archive files written by the JSON
+logging service (json/YYYYMMDD_HHMMSS.json). Entries are keyed by the
+timestamp embedded in the filename, so lookups never need to stat files.
+
+The persisted index is a snapshot (.archive_index) plus an append-only
+change log (.archive_index.log, one '+name' or '-name' line per change).
+Writers append to the log and fold it into the snapshot every
+LOG_COMPACT_ENTRIES changes; readers replay only the log lines appended
+since their last refresh.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Archive filename format (local time, matches web/json_logger.py)
+ARCHIVE_NAME_FORMAT = '%Y%m%d_%H%M%S'
+ARCHIVE_SUFFIX = '.json'
+
+# Persisted index lives next to the archives but does not match '*.json'
+INDEX_FILENAME = '.archive_index'
+LOG_SUFFIX = '.log'
+
+# Fold the change log into the snapshot after this many changes
+LOG_COMPACT_ENTRIES = 1000
+
+
+def parse_archive_name(name: str) -> Optional[datetime]:
+    """
+    Parse the timestamp embedded in an archive filename.
+
+    Args:
+        name: Filename such as '20251218_085343.json'
+
+    Returns:
+        datetime or None: Parsed timestamp, None if the name does not match
+
+    Example:
+        >>> parse_archive_name('20251218_085343.json')
+        datetime.datetime(2025, 12, 18, 8, 53, 43)
+    """
+    if not name.endswith(ARCHIVE_SUFFIX):
+        return None
+
+    try:
+        return datetime.strptime(name[:-len(ARCHIVE_SUFFIX)], ARCHIVE_NAME_FORMAT)
+    except ValueError:
+        return None
+
+
+def _locked(method):
+    """Run an ArchiveIndex method while holding the instance lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ArchiveIndex:
+    """Sorted, persisted index of timestamped archive files.
+
+    The index is rebuilt from a directory listing once at start-up and then
+    updated incrementally with add()/remove(). Readers in other processes
+    call refresh(), which costs two stats plus reading any new change log
+    lines. All methods are safe to call from several threads.
+    """
+
+    def __init__(self, directory, writable: bool = True):
+        """Initialize archive index
+
+        Args:
+            directory: Directory holding the archive files
+            writable: Persist every change to the index. Only the process
+                      that writes archives should set this.
+        """
+        self.directory = Path(directory)
+        self.index_path = self.directory / INDEX_FILENAME
+        self.log_path = self.directory / (INDEX_FILENAME + LOG_SUFFIX)
+        self.writable = writable
+
+        self._keys: List[datetime] = []
+        self._names: List[str] = []
+        self._loaded_mtime_ns: Optional[int] = None
+        # Bytes of the change log applied (readers) or lines written (writers)
+        self._log_offset = 0
+        self._log_entries = 0
+        self._generation: Optional[int] = None
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @_locked
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._names)
+
+    # ------------------------------------------------------------------
+    # Loading and persistence
+    # ------------------------------------------------------------------
+
+    @_locked
+    def load(self) -> 'ArchiveIndex':
+        """Load the index at start-up.
+
+        Writers always rebuild from disk. Readers use the persisted index
+        when present and fall back to a rebuild otherwise.
+
+        Returns:
+            ArchiveIndex: self, for chaining
+        """
+        if self.writable or not self._read_persisted():
+            self.rebuild()
+        self._loaded = True
+        return self
+
+    @_locked
+    def rebuild(self) -> int:
+        """Rebuild the index from a directory listing (names only, no stat).
+
+        Returns:
+            int: Number of indexed archive files
+        """
+        entries: List[Tuple[datetime, str]] = []
+
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    ts = parse_archive_name(entry.name)
+                    if ts is not None:
+                        entries.append((ts, entry.name))
+        except FileNotFoundError:
+            logger.debug(f"Archive directory not found: {self.directory}")
+        except Exception as e:
+            logger.error(f"Error scanning archive directory {self.directory}: {e}")
+
+        entries.sort()
+        self._keys = [ts for ts, _ in entries]
+        self._names = [name for _, name in entries]
+        self._loaded = True
+
+        logger.debug(f"Rebuilt archive index with {len(self._names)} entries")
+        self._persist()
+        return len(self._names)
+
+    @_locked
+    def refresh(self) -> bool:
+        """Reload the persisted index if another process changed it.
+
+        Returns:
+            bool: True if the in-memory index was reloaded
+        """
+        if not self._loaded:
+            self.load()
+            return True
+        if self.writable:
+            return False
+
+        try:
+            mtime_ns = self.index_path.stat().st_mtime_ns
+        except OSError:
+            return False
+
+        if mtime_ns != self._loaded_mtime_ns:
+            return self._read_persisted()
+
+        try:
+            log_size = self.log_path.stat().st_size
+        except OSError:
+            log_size = 0
+        if log_size < self._log_offset:
+            # The log restarted: the writer compacted since our snapshot stat
+            return self._read_persisted()
+        if log_size == self._log_offset:
+            return False
+        return self._read_log() > 0
+
+    def _read_persisted(self) -> bool:
+        """Read the snapshot and replay the change log. Returns False if unusable."""
+        try:
+            mtime_ns = self.index_path.stat().st_mtime_ns
+            with self.index_path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            names = data.get('entries', [])
+            generation = data.get('generation')
+        except (OSError, ValueError, AttributeError) as e:
+            logger.debug(f"Persisted archive index unavailable: {e}")
+            return False
+
+        entries = []
+        for name in names:
+            ts = parse_archive_name(name) if isinstance(name, str) else None
+            if ts is not None:
+                entries.append((ts, name))
+        entries.sort()
+
+        self._keys = [ts for ts, _ in entries]
+        self._names = [name for _, name in entries]
+        self._loaded_mtime_ns = mtime_ns
+        self._generation = generation
+        self._loaded = True
+        self._log_offset = 0
+        self._read_log()
+        return True
+
+    def _read_log(self) -> int:
+        """Apply change log lines past the offset. Returns the number applied."""
+        try:
+            with self.log_path.open('rb') as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except OSError:
+            return 0
+
+        # A torn last line (writer mid-append) is left for the next refresh
+        end = data.rfind(b'\n') + 1
+        lines = data[:end].decode('utf-8', errors='replace').splitlines()
+        if self._log_offset == 0:
+            # The log opens with its snapshot's generation; one left over from
+            # before a compaction (or already newer than our snapshot) is skipped
+            if not lines or lines[0] != f"@{self._generation}":
+                return 0
+            lines = lines[1:]
+        applied = 0
+        for line in lines:
+            op, name = line[:1], line[1:]
+            if op == '+':
+                applied += self._insert(name)
+            elif op == '-':
+                applied += self._discard(name)
+        self._log_offset += end
+        return applied
+
+    def _log(self, op: str, names: List[str]):
+        """Append changes to the log, compacting it when it grows (writers only)."""
+        if not self.writable:
+            return
+        if self._log_entries + len(names) > LOG_COMPACT_ENTRIES:
+            self._persist()
+            return
+        try:
+            with self.log_path.open('a', encoding='utf-8') as f:
+                f.write(''.join(f"{op}{name}\n" for name in names))
+            self._log_entries += len(names)
+        except Exception as e:
+            logger.warning(f"Could not append to archive index log {self.log_path}: {e}")
+
+    def _persist(self):
+        """Atomically write the snapshot and empty the change log (writers only)."""
+        if not self.writable:
+            return
+
+        tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        generation = time.time_ns()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'entries': self._names, 'generation': generation}, f)
+            os.replace(tmp_path, self.index_path)
+            self._loaded_mtime_ns = self.index_path.stat().st_mtime_ns
+            # Restart the log only after the snapshot holds every logged change
+            with self.log_path.open('w', encoding='utf-8') as f:
+                f.write(f"@{generation}\n")
+            self._log_entries = 0
+        except Exception as e:
+            logger.warning(f"Could not persist archive index {self.index_path}: {e}")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    @_locked
+    def add(self, filename) -> bool:
+        """Record a newly written archive file.
+
+        Args:
+            filename: Archive filename or path
+
+        Returns:
+            bool: True if the entry was added
+        """
+        self._ensure_loaded()
+        name = Path(filename).name
+        if not self._insert(name):
+            return False
+        self._log('+', [name])
+        return True
+
+    @_locked
+    def remove(self, filename) -> bool:
+        """Forget an archive file that was deleted.
+
+        Args:
+            filename: Archive filename or path
+
+        Returns:
+            bool: True if the entry was present
+        """
+        self._ensure_loaded()
+        name = Path(filename).name
+        if not self._discard(name):
+            return False
+        self._log('-', [name])
+        return True
+
+    @_locked
+    def remove_many(self, filenames) -> int:
+        """Forget several archive files with a single log append.
+
+        Returns:
+            int: Number of entries removed
+        """
+        self._ensure_loaded()
+        removed = [name for name in (Path(f).name for f in filenames) if self._discard(name)]
+        if removed:
+            self._log('-', removed)
+        return len(removed)
+
+    def _insert(self, name: str) -> bool:
+        ts = parse_archive_name(name)
+        if ts is None:
+            return False
+        pos = bisect.bisect_left(self._keys, ts)
+        if pos < len(self._keys) and self._names[pos] == name:
+            return False
+        self._keys.insert(pos, ts)
+        self._names.insert(pos, name)
+        return True
+
+    def _discard(self, name: str) -> bool:
+        ts = parse_archive_name(name)
+        if ts is None:
+            return False
+        pos = bisect.bisect_left(self._keys, ts)
+        if pos < len(self._keys) and self._names[pos] == name:
+            del self._keys[pos]
+            del self._names[pos]
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    @_locked
+    def latest(self) -> Optional[Path]:
+        """Return the newest archive file, or None if the index is empty."""
+        self._ensure_loaded()
+        return self.directory / self._names[-1] if self._names else None
+
+    @_locked
+    def latest_n(self, n: int) -> List[Path]:
+        """Return up to n archive files, newest first."""
+        self._ensure_loaded()
+        if n <= 0:
+            return []
+        return [self.directory / name for name in reversed(self._names[-n:])]
+
+    @_locked
+    def nearest(self, when: datetime) -> Optional[Path]:
+        """Return the archive file whose timestamp is closest to `when`.
+
+        Args:
+            when: Naive local datetime to look up
+
+        Returns:
+            Path or None: Closest archive file
+        """
+        self._ensure_loaded()
+        if not self._keys:
+            return None
+
+        pos = bisect.bisect_left(self._keys, when)
+        if pos == 0:
+            best = 0
+        elif pos == len(self._keys):
+            best = pos - 1
+        else:
+            before, after = self._keys[pos - 1], self._keys[pos]
+            best = pos - 1 if (when - before) <= (after - when) else pos
+        return self.directory / self._names[best]
+
+    @_locked
+    def range(self, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> List[Path]:
+        """Return archive files with start <= timestamp <= end, oldest first.
+
+        Args:
+            start: Inclusive lower bound (None for unbounded)
+            end: Inclusive upper bound (None for unbounded)
+        """
+        self._ensure_loaded()
+        lo = bisect.bisect_left(self._keys, start) if start else 0
+        hi = bisect.bisect_right(self._keys, end) if end else len(self._keys)
+        return [self.directory / name for name in self._names[lo:hi]]
+
+    @_locked
+    def excess(self, keep: int) -> List[Path]:
+        """Return the archive files beyond the newest `keep`, oldest first."""
+        self._ensure_loaded()
+        if keep < 0 or len(self._names) <= keep:
+            return []
+        cutoff = len(self._names) - keep
+        return [self.directory / name for name in self._names[:cutoff]]
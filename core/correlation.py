@@ -0,0 +1,315 @@
+"""
+Correlation Module
+
+Groups the alert stream into incidents. When a host degrades it usually
+raises CPU, memory, temperature and disk alerts within seconds of each
+other, and the same alert may arrive from both the legacy (Bash host API)
+and native (Go agent) sources. CorrelationEngine folds these into one
+incident per host storm:
+
+- Duplicates: an alert with the same fingerprint and state as one seen
+  within `dedupe_window` (from any source) is merged into the incident
+  as a duplicate instead of counting as a new member.
+- Grouping: an alert joins the host's live incident if it arrives within
+  `window` seconds of the incident's last activity, or if the incident
+  still has unresolved members and a causal rule links the metrics
+  (e.g. temperature -> cpu).
+- Root cause: the earliest member, unless a later member is a known
+  cause of it under the causal rules.
+
+Incidents resolve when every member alert has resolved and close once
+they have been quiet for `window` seconds. Processing is incremental and
+bounded: only live incidents, a capped list of closed ones and a
+time-pruned duplicate index are kept in memory.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from .alert_lifecycle import fingerprint
+from .alert_manager import ALERT_LEVELS
+from .alert_store import alert_id, parse_alert_time
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_WINDOW = 300.0   # seconds of quiet before an incident stops collecting
+DEDUPE_WINDOW = 120.0        # seconds within which identical alerts are duplicates
+STALE_AFTER = 6 * 3600.0     # close incidents with unresolved members after this long idle
+MAX_CLOSED = 1000            # closed incidents kept for the API
+
+# cause -> metrics it commonly drives
+CAUSAL_RULES: Dict[str, List[str]] = {
+    'temperature': ['cpu', 'gpu'],
+    'memory': ['cpu', 'disk'],
+    'disk': ['cpu'],
+    'forecast': ['disk', 'temperature'],
+}
+
+
+@dataclass
+class Incident:
+    """A group of related alerts on one host.
+
+    Attributes:
+        id: Stable incident id
+        host: Host the member alerts belong to
+        status: 'open', 'resolved' (all members resolved) or 'closed'
+        level: Highest member level
+        root_cause: Metric considered the origin of the incident
+        alert_ids: Ids of the member alerts, in arrival order
+        duplicate_ids: Ids of alerts merged as duplicates of members
+    """
+    id: str
+    host: str
+    opened_at: float
+    updated_at: float
+    level: str
+    root_cause: str
+    status: str = 'open'
+    closed_at: Optional[float] = None
+    alert_ids: List[str] = field(default_factory=list)
+    duplicate_ids: List[str] = field(default_factory=list)
+    metrics: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    active: Set[str] = field(default_factory=set, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {key: value for key, value in self.__dict__.items() if key != 'active'}
+        data['active_count'] = len(self.active)
+        data['alert_count'] = len(self.alert_ids)
+        data['duplicate_count'] = len(self.duplicate_ids)
+        return data
+
+
+class CorrelationEngine:
+    """Incrementally correlate alerts into incidents."""
+
+    def __init__(
+        self,
+        window: float = CORRELATION_WINDOW,
+        dedupe_window: float = DEDUPE_WINDOW,
+        stale_after: float = STALE_AFTER,
+        max_closed: int = MAX_CLOSED,
+        causal_rules: Optional[Dict[str, List[str]]] = None
+    ):
+        """Initialize correlation engine
+
+        Args:
+            window: Seconds of quiet after which an incident stops collecting
+            dedupe_window: Seconds within which identical alerts are duplicates
+            stale_after: Idle seconds after which unresolved incidents close
+            max_closed: Closed incidents kept in memory
+            causal_rules: cause metric -> effect metrics (defaults to CAUSAL_RULES)
+        """
+        self.window = window
+        self.dedupe_window = dedupe_window
+        self.stale_after = stale_after
+        self.max_closed = max_closed
+        self.causal_rules = CAUSAL_RULES if causal_rules is None else causal_rules
+
+        self._lock = threading.RLock()
+        self._live: Dict[str, Incident] = {}                      # host -> incident
+        self._live_ids: Dict[str, Incident] = {}                  # id -> live incident
+        self._closed: "OrderedDict[str, Incident]" = OrderedDict()  # id -> incident, oldest first
+        self._by_alert: Dict[str, str] = {}                       # alert id -> incident id
+        # (fingerprint, state) -> (last seen, incident id); pruned in time order
+        self._recent: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        self._recent_order: Deque[Tuple[float, Tuple[str, str]]] = deque()
+        self.watermark = 0.0
+
+    # ------------------------------------------------------------------
+    # Stream processing
+    # ------------------------------------------------------------------
+
+    def process(self, alert: Dict[str, Any]) -> Optional[Incident]:
+        """
+        Fold one alert into the incidents.
+
+        Alerts already seen, and alerts older than the window behind the
+        newest alert processed, are ignored.
+
+        Returns:
+            Incident or None: The incident the alert joined
+        """
+        ident = alert_id(alert)
+        ts = parse_alert_time(alert.get('timestamp'))
+        with self._lock:
+            if ident in self._by_alert or ts < self.watermark - self.window:
+                return None
+            self.watermark = max(self.watermark, ts)
+            self.expire(self.watermark)
+
+            host = alert.get('host') or ''
+            metric = alert.get('metric') or 'unknown'
+            state = alert.get('state') or 'open'
+            fp = alert.get('fingerprint') or fingerprint(metric, alert.get('level', 'info'),
+                                                         alert.get('resource'), host or None)
+            source = alert.get('source') or 'unknown'
+
+            # Same alert from another source (or a repeat) within the dedupe window
+            key = (fp, state)
+            seen = self._recent.get(key)
+            if seen is not None and ts - seen[0] <= self.dedupe_window:
+                incident = self._find(seen[1])
+                if incident is not None:
+                    incident.duplicate_ids.append(ident)
+                    _add_unique(incident.sources, source)
+                    incident.updated_at = max(incident.updated_at, ts)
+                    self._by_alert[ident] = incident.id
+                    return incident
+
+            if state == 'resolved':
+                incident = self._live.get(host)
+                if incident is None or fp not in incident.active:
+                    return None
+            else:
+                incident = self._join(host, metric, ts)
+                if incident is None:
+                    incident = self._open(host, metric, ident, ts, alert.get('level', 'info'))
+
+            self._add_member(incident, ident, fp, metric, state, source, alert.get('level', 'info'), ts)
+            self._remember(key, ts, incident.id)
+            # A state change is not a duplicate of the previous state
+            self._recent.pop((fp, 'open' if state == 'resolved' else 'resolved'), None)
+            return incident
+
+    def process_many(self, alerts: List[Dict[str, Any]]) -> int:
+        """Process alerts oldest first. Returns the number that joined an incident."""
+        return sum(1 for alert in alerts if self.process(alert) is not None)
+
+    def expire(self, now: float) -> int:
+        """
+        Close live incidents that have been quiet long enough.
+
+        Resolved incidents close after `window` seconds without activity,
+        incidents with unresolved members after `stale_after` seconds.
+
+        Returns:
+            int: Number of incidents closed
+        """
+        closed = 0
+        with self._lock:
+            for host, incident in list(self._live.items()):
+                idle = now - incident.updated_at
+                limit = self.window if not incident.active else self.stale_after
+                if idle > limit:
+                    self._close(incident, now)
+                    closed += 1
+            while len(self._closed) > self.max_closed:
+                _, evicted = self._closed.popitem(last=False)
+                for ident in evicted.alert_ids + evicted.duplicate_ids:
+                    self._by_alert.pop(ident, None)
+
+            while self._recent_order and now - self._recent_order[0][0] > self.dedupe_window:
+                ts, key = self._recent_order.popleft()
+                if self._recent.get(key, (None,))[0] == ts:
+                    del self._recent[key]
+        return closed
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def incidents(self, status: Optional[str] = None, host: Optional[str] = None,
+                  limit: Optional[int] = 50) -> List[Incident]:
+        """Return incidents newest first, optionally filtered by status and host."""
+        with self._lock:
+            candidates = list(self._live.values()) + list(self._closed.values())
+            results = [incident for incident in candidates
+                       if (status is None or incident.status == status)
+                       and (host is None or incident.host == host)]
+        results.sort(key=lambda incident: incident.opened_at, reverse=True)
+        return results if limit is None else results[:limit]
+
+    def get(self, incident_id: str) -> Optional[Incident]:
+        """Return an incident by id."""
+        with self._lock:
+            return self._find(incident_id)
+
+    def incident_for(self, ident: str) -> Optional[Incident]:
+        """Return the incident an alert id belongs to."""
+        with self._lock:
+            incident_id = self._by_alert.get(ident)
+            return self._find(incident_id) if incident_id is not None else None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _find(self, incident_id: str) -> Optional[Incident]:
+        return self._live_ids.get(incident_id) or self._closed.get(incident_id)
+
+    def _close(self, incident: Incident, now: float):
+        del self._live[incident.host]
+        del self._live_ids[incident.id]
+        incident.status = 'closed'
+        incident.closed_at = now
+        self._closed[incident.id] = incident
+
+    def _join(self, host: str, metric: str, ts: float) -> Optional[Incident]:
+        incident = self._live.get(host)
+        if incident is None:
+            return None
+        if ts - incident.updated_at <= self.window:
+            return incident
+        if incident.active and self._related(metric, incident.metrics):
+            return incident
+        return None
+
+    def _related(self, metric: str, metrics: List[str]) -> bool:
+        return any(metric in self.causal_rules.get(other, ()) or
+                   other in self.causal_rules.get(metric, ())
+                   for other in metrics)
+
+    def _open(self, host: str, metric: str, ident: str, ts: float, level: str) -> Incident:
+        previous = self._live.get(host)
+        if previous is not None:
+            self._close(previous, ts)
+
+        digest = hashlib.sha1(f"{host}\x1f{ident}".encode('utf-8')).hexdigest()[:12]
+        incident = Incident(id=f"inc-{digest}", host=host, opened_at=ts, updated_at=ts,
+                            level=level, root_cause=metric)
+        self._live[host] = incident
+        self._live_ids[incident.id] = incident
+        logger.debug(f"Opened incident {incident.id} on {host or 'unknown host'} ({metric})")
+        return incident
+
+    def _add_member(self, incident: Incident, ident: str, fp: str, metric: str, state: str,
+                    source: str, level: str, ts: float):
+        incident.alert_ids.append(ident)
+        _add_unique(incident.sources, source)
+        incident.updated_at = max(incident.updated_at, ts)
+        self._by_alert[ident] = incident.id
+
+        if state == 'resolved':
+            incident.active.discard(fp)
+            if not incident.active:
+                incident.status = 'resolved'
+            return
+
+        incident.active.add(fp)
+        incident.status = 'open'
+        if metric not in incident.metrics:
+            incident.metrics.append(metric)
+            # A later alert can explain the one that opened the incident
+            if incident.root_cause in self.causal_rules.get(metric, ()):
+                incident.root_cause = metric
+        if _level_rank(level) > _level_rank(incident.level):
+            incident.level = level
+
+    def _remember(self, key: Tuple[str, str], ts: float, incident_id: str):
+        self._recent[key] = (ts, incident_id)
+        self._recent_order.append((ts, key))
+
+
+def _add_unique(values: List[str], value: str):
+    if value not in values:
+        values.append(value)
+
+
+def _level_rank(level: str) -> int:
+    return ALERT_LEVELS.index(level) if level in ALERT_LEVELS else 0
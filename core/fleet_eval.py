@@ -0,0 +1,364 @@
+"""
+Fleet Evaluation Module
+
+Batch rule evaluation for many hosts at once. RuleEngine.on_snapshot()
+walks every rule for every host; with hundreds of hosts the per-host
+Python overhead dominates. FleetEvaluator instead gathers each rule
+path's values across all hosts into one column and evaluates thresholds,
+clear thresholds and 'for' timers as vector operations over per-series
+state arrays. Only series whose state changes produce Python work (a
+RuleEvent).
+
+Rules sharing a path (e.g. a warning and a critical disk rule) share one
+gathered column. NumPy is used when installed; otherwise the same state
+is kept in array.array columns and stepped with a plain loop.
+
+Semantics match RuleEngine: the same rule expressions, hysteresis,
+'for' durations, and resolution of resources that disappear from a
+host's snapshot.
+
+Example:
+    >>> fleet = FleetEvaluator(sink=print)
+    >>> fleet.evaluate({'web-1': snapshot_1, 'web-2': snapshot_2}, now=time.time())
+"""
+
+import logging
+import math
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .rule_engine import DEFAULT_RULES, OPERATORS, AlertManagerSink, Rule, RuleEvent
+
+try:
+    import numpy as np
+except ImportError:  # optional: fall back to array.array columns
+    np = None
+
+logger = logging.getLogger(__name__)
+
+INITIAL_CAPACITY = 64
+
+_NUMPY_OPERATORS = {
+    '>': 'greater',
+    '>=': 'greater_equal',
+    '<': 'less',
+    '<=': 'less_equal',
+    '==': 'equal',
+    '!=': 'not_equal',
+}
+
+
+class _Columns:
+    """Allocation helpers for NumPy arrays or array.array fallbacks."""
+
+    def __init__(self, use_numpy: bool):
+        self.use_numpy = use_numpy
+
+    def floats(self, size: int, fill: float = math.nan):
+        if self.use_numpy:
+            return np.full(size, fill, dtype=np.float64)
+        return array('d', [fill]) * size
+
+    def flags(self, size: int):
+        if self.use_numpy:
+            return np.zeros(size, dtype=np.bool_)
+        return array('b', bytes(size))
+
+    def ints(self, size: int, fill: int = -1):
+        if self.use_numpy:
+            return np.full(size, fill, dtype=np.int64)
+        return array('q', [fill]) * size
+
+    def grow(self, column, extra: int, fill):
+        if self.use_numpy:
+            return np.concatenate([column, np.full(extra, fill, dtype=column.dtype)])
+        column.extend(array(column.typecode, [fill]) * extra)
+        return column
+
+
+class _RuleColumn:
+    """Per-series state of one rule: pending-since time and firing flag."""
+
+    __slots__ = ('rule', 'pending', 'firing', 'compare')
+
+    def __init__(self, rule: Rule, columns: _Columns, capacity: int):
+        self.rule = rule
+        self.pending = columns.floats(capacity)
+        self.firing = columns.flags(capacity)
+        if columns.use_numpy:
+            self.compare = getattr(np, _NUMPY_OPERATORS[rule.op])
+        else:
+            self.compare = OPERATORS[rule.op]
+
+
+class _PathColumn:
+    """Series (host, resource) of one rule path and the rules reading it."""
+
+    def __init__(self, path: str, accessor, columns: _Columns):
+        self.path = path
+        self.accessor = accessor
+        self.columns = columns
+        self.capacity = INITIAL_CAPACITY
+        self.size = 0                                    # high-water mark of used slots
+        self.slots: Dict[Tuple[int, str], int] = {}      # (host id, resource) -> slot
+        self.keys: List[Optional[Tuple[int, str]]] = []  # slot -> (host id, resource)
+        self.free: List[int] = []
+        self.values = columns.floats(self.capacity)
+        self.host_ids = columns.ints(self.capacity)
+        self.seen = columns.ints(self.capacity)
+        self.rules: List[_RuleColumn] = []
+
+    def add_rule(self, rule: Rule):
+        self.rules.append(_RuleColumn(rule, self.columns, self.capacity))
+
+    def slot(self, host_id: int, resource: str) -> int:
+        key = (host_id, resource)
+        slot = self.slots.get(key)
+        if slot is not None:
+            return slot
+        if self.free:
+            slot = self.free.pop()
+            self.keys[slot] = key
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            slot = self.size
+            self.size += 1
+            self.keys.append(key)
+        self.slots[key] = slot
+        self.host_ids[slot] = host_id
+        return slot
+
+    def release(self, slot: int):
+        del self.slots[self.keys[slot]]
+        self.keys[slot] = None
+        self.free.append(slot)
+        self.host_ids[slot] = -1
+        self.seen[slot] = -1
+        self.values[slot] = math.nan
+        for column in self.rules:
+            column.pending[slot] = math.nan
+            column.firing[slot] = False
+
+    def _grow(self):
+        extra = self.capacity
+        self.capacity += extra
+        grow = self.columns.grow
+        self.values = grow(self.values, extra, math.nan)
+        self.host_ids = grow(self.host_ids, extra, -1)
+        self.seen = grow(self.seen, extra, -1)
+        for column in self.rules:
+            column.pending = grow(column.pending, extra, math.nan)
+            column.firing = grow(column.firing, extra, False)
+
+
+class FleetEvaluator:
+    """Evaluate rules for a whole fleet of hosts per round."""
+
+    def __init__(self, rules: Optional[List[Rule]] = None,
+                 sink: Optional[Callable[[RuleEvent], None]] = None,
+                 use_numpy: Optional[bool] = None):
+        """Initialize fleet evaluator
+
+        Args:
+            rules: Rules to evaluate (defaults to DEFAULT_RULES)
+            sink: Called with each RuleEvent (defaults to AlertManagerSink)
+            use_numpy: Force the NumPy (True) or array.array (False) backend;
+                       default is NumPy when installed
+        """
+        if rules is None:
+            rules = [Rule.from_dict(data) for data in DEFAULT_RULES]
+        if use_numpy is None:
+            use_numpy = np is not None
+        elif use_numpy and np is None:
+            raise RuntimeError("NumPy is not installed")
+
+        self.sink = sink if sink is not None else AlertManagerSink()
+        self.backend = 'numpy' if use_numpy else 'array'
+        self._columns = _Columns(use_numpy)
+        self._paths: Dict[str, _PathColumn] = {}
+        self._hosts: Dict[str, int] = {}
+        self._host_names: List[str] = []
+        self._round = 0
+
+        names = set()
+        for rule in rules:
+            if rule.name in names:
+                raise ValueError(f"Duplicate rule name: {rule.name}")
+            names.add(rule.name)
+            column = self._paths.get(rule.path)
+            if column is None:
+                column = self._paths[rule.path] = _PathColumn(rule.path, rule.accessor, self._columns)
+            column.add_rule(rule)
+
+    def evaluate(self, snapshots: Mapping[str, Dict[str, Any]],
+                 now: Optional[float] = None) -> List[RuleEvent]:
+        """
+        Evaluate every rule against one round of snapshots.
+
+        Hosts missing from `snapshots` keep their state untouched.
+
+        Args:
+            snapshots: Host name -> metrics snapshot
+            now: Evaluation time in epoch seconds (default: current time)
+
+        Returns:
+            list: RuleEvents emitted (also passed to the sink)
+        """
+        now = time.time() if now is None else now
+        self._round += 1
+        host_ids = [self._host_id(host) for host in snapshots]
+        items = list(zip(host_ids, snapshots.values()))
+        evaluated = set(host_ids)
+
+        events: List[RuleEvent] = []
+        for column in self._paths.values():
+            slots, values = self._gather(column, items)
+            if self._columns.use_numpy:
+                self._step_numpy(column, slots, values, now, events)
+            else:
+                self._step_array(column, slots, values, now, events)
+            self._drop_missing(column, evaluated, now, events)
+
+        for event in events:
+            try:
+                self.sink(event)
+            except Exception as e:
+                logger.error(f"Alert sink failed for rule {event.rule.name}: {e}")
+
+        tick = getattr(self.sink, 'tick', None)
+        if tick is not None:
+            tick(now)
+        return events
+
+    def firing(self) -> List[Dict[str, Any]]:
+        """Return the currently firing (host, rule, resource) combinations."""
+        active = []
+        for column in self._paths.values():
+            for slot in range(column.size):
+                key = column.keys[slot]
+                if key is None:
+                    continue
+                for rule_column in column.rules:
+                    if rule_column.firing[slot]:
+                        active.append({'host': self._host_names[key[0]],
+                                       'rule': rule_column.rule.name, 'resource': key[1],
+                                       'value': float(column.values[slot])})
+        return active
+
+    def forget(self, host: str) -> int:
+        """Drop all series of a host without emitting events. Returns the number dropped."""
+        host_id = self._hosts.get(host)
+        if host_id is None:
+            return 0
+        dropped = 0
+        for column in self._paths.values():
+            for slot in [s for (h, _), s in column.slots.items() if h == host_id]:
+                column.release(slot)
+                dropped += 1
+        return dropped
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _host_id(self, host: str) -> int:
+        host_id = self._hosts.get(host)
+        if host_id is None:
+            host_id = self._hosts[host] = len(self._host_names)
+            self._host_names.append(host)
+        return host_id
+
+    def _gather(self, column: _PathColumn, items) -> Tuple[List[int], List[float]]:
+        """Collect the path's numeric values across hosts into (slots, values)."""
+        slots, values = [], []
+        accessor, slot_of = column.accessor, column.slot
+        for host_id, snapshot in items:
+            for resource, raw in accessor(snapshot):
+                if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+                    continue
+                slots.append(slot_of(host_id, resource))
+                values.append(float(raw))
+        return slots, values
+
+    def _step_numpy(self, column: _PathColumn, slots: List[int], values: List[float],
+                    now: float, events: List[RuleEvent]):
+        if not slots:
+            return
+        idx = np.asarray(slots, dtype=np.intp)
+        v = np.asarray(values, dtype=np.float64)
+        column.values[idx] = v
+        column.seen[idx] = self._round
+
+        for rule_column in column.rules:
+            rule = rule_column.rule
+            firing = rule_column.firing[idx]
+            pending = rule_column.pending[idx]
+            match = rule_column.compare(v, rule.threshold)
+            still = match if rule.clear is None else rule_column.compare(v, rule.clear)
+
+            # Timers only run while not firing; a non-match resets them
+            started = np.where(np.isnan(pending), now, pending)
+            pending = np.where(firing, pending, np.where(match, started, np.nan))
+            raised = ~firing & match & (now - pending >= rule.for_seconds)
+            resolved = firing & ~still
+            # A resolved series starts a fresh timer on its next match
+            pending = np.where(resolved, np.nan, pending)
+
+            rule_column.pending[idx] = pending
+            rule_column.firing[idx] = (firing & still) | raised
+
+            for i in np.flatnonzero(raised | resolved):
+                kind = 'raise' if raised[i] else 'resolve'
+                events.append(self._event(kind, rule, column, slots[i], values[i], now))
+
+    def _step_array(self, column: _PathColumn, slots: List[int], values: List[float],
+                    now: float, events: List[RuleEvent]):
+        for slot, value in zip(slots, values):
+            column.values[slot] = value
+            column.seen[slot] = self._round
+
+        for rule_column in column.rules:
+            rule = rule_column.rule
+            compare, threshold = rule_column.compare, rule.threshold
+            clear = threshold if rule.clear is None else rule.clear
+            pending, firing = rule_column.pending, rule_column.firing
+
+            for slot, value in zip(slots, values):
+                if firing[slot]:
+                    if not compare(value, clear):
+                        firing[slot] = False
+                        pending[slot] = math.nan
+                        events.append(self._event('resolve', rule, column, slot, value, now))
+                elif compare(value, threshold):
+                    if math.isnan(pending[slot]):
+                        pending[slot] = now
+                    if now - pending[slot] >= rule.for_seconds:
+                        firing[slot] = True
+                        events.append(self._event('raise', rule, column, slot, value, now))
+                else:
+                    pending[slot] = math.nan
+
+    def _drop_missing(self, column: _PathColumn, host_ids, now: float,
+                      events: List[RuleEvent]):
+        """Resolve and release series of evaluated hosts that were not in this round."""
+        size = column.size
+        if self._columns.use_numpy:
+            hosts = column.host_ids[:size]
+            mask = (column.seen[:size] != self._round) & np.isin(hosts, list(host_ids))
+            stale = np.flatnonzero(mask).tolist()
+        else:
+            stale = [slot for slot in range(size)
+                     if column.seen[slot] != self._round and column.host_ids[slot] in host_ids]
+        for slot in stale:
+            value = float(column.values[slot])
+            for rule_column in column.rules:
+                if rule_column.firing[slot]:
+                    events.append(self._event('resolve', rule_column.rule, column, slot, value, now))
+            column.release(slot)
+
+    def _event(self, kind: str, rule: Rule, column: _PathColumn, slot: int,
+               value: float, now: float) -> RuleEvent:
+        host_id, resource = column.keys[slot]
+        return RuleEvent(kind, rule, resource, float(value), now, self._host_names[host_id])
@@ -0,0 +1,319 @@
+"""
+Forecast Module
+
+Trend forecasts for disks and temperature sensors: "time until the disk
+is full" and "time until the sensor reaches its thermal threshold".
+
+Samples are first averaged into fixed rollup buckets (5 minutes for
+disks, 1 minute for temperatures) so collection noise does not dominate,
+and each closed rollup updates a recursive least squares (RLS) line fit
+with exponential forgetting. Every update is O(1): no history is kept or
+refitted. bootstrap() replays stored history once at start-up.
+
+annotate() adds a 'forecast' section to a snapshot, e.g.
+
+    {'disk': {'/': {'hours_to_full': 31.5, 'slope_per_hour': 0.21}},
+     'temperature': {'cpu_celsius': {'hours_to_threshold': 0.4, ...}}}
+
+so rules such as 'forecast.disk.*.hours_to_full < 24' can alert on it.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .metrics_collector import identity_key, snapshot_epoch
+
+logger = logging.getLogger(__name__)
+
+DISK_ROLLUP_SECONDS = 300
+TEMPERATURE_ROLLUP_SECONDS = 60
+
+# Forgetting factors per rollup: ~200 rollups (~17 h) for disks,
+# ~20 rollups (~20 min) for temperatures
+DISK_FORGETTING = 0.995
+TEMPERATURE_FORGETTING = 0.95
+
+DEFAULT_THERMAL_THRESHOLD = 85.0
+
+# Rollups a series needs before a forecast is reported
+MIN_ROLLUPS = 3
+
+# Forecasts further out than this are reported as None (no meaningful trend)
+MAX_HORIZON_HOURS = 24 * 365
+
+
+class RecursiveLeastSquares:
+    """Online fit of y = a + b*t with exponential forgetting.
+
+    Time is measured in hours from the first sample so the slope comes
+    out per hour and the normal equations stay well conditioned.
+    """
+
+    __slots__ = ('forgetting', 'origin', 'a', 'b', 'p00', 'p01', 'p11', 'count')
+
+    def __init__(self, forgetting: float = 0.99, initial_covariance: float = 1e6):
+        self.forgetting = forgetting
+        self.origin: Optional[float] = None
+        self.a = 0.0
+        self.b = 0.0
+        self.p00 = self.p11 = initial_covariance
+        self.p01 = 0.0
+        self.count = 0
+
+    def update(self, ts: float, y: float):
+        """Add one observation at epoch time `ts`."""
+        if self.origin is None:
+            self.origin = ts
+        t = (ts - self.origin) / 3600.0
+        lam = self.forgetting
+
+        # P x with x = (1, t)
+        px0 = self.p00 + self.p01 * t
+        px1 = self.p01 + self.p11 * t
+        denom = lam + px0 + px1 * t
+        k0, k1 = px0 / denom, px1 / denom
+
+        error = y - (self.a + self.b * t)
+        self.a += k0 * error
+        self.b += k1 * error
+
+        # P = (P - k (P x)^T) / lambda
+        self.p00 = (self.p00 - k0 * px0) / lam
+        self.p01 = (self.p01 - k0 * px1) / lam
+        self.p11 = (self.p11 - k1 * px1) / lam
+
+        self.count += 1
+
+    def value_at(self, ts: float) -> float:
+        """Fitted value at epoch time `ts`."""
+        return self.a + self.b * ((ts - self.origin) / 3600.0)
+
+    @property
+    def slope_per_hour(self) -> float:
+        return self.b
+
+
+class TrendSeries:
+    """Rollup accumulator feeding an RLS fit for one series."""
+
+    __slots__ = ('target', 'rollup_seconds', 'fit', 'bucket', 'bucket_sum', 'bucket_count',
+                 'last_value', 'last_ts')
+
+    def __init__(self, target: float, rollup_seconds: float, forgetting: float):
+        self.target = target
+        self.rollup_seconds = rollup_seconds
+        self.fit = RecursiveLeastSquares(forgetting)
+        self.bucket: Optional[int] = None
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+        self.last_value: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+    def add(self, ts: float, value: float):
+        """Add a raw sample; closes the current rollup when a new one starts."""
+        bucket = int(ts // self.rollup_seconds)
+        if self.bucket is not None and bucket != self.bucket and self.bucket_count:
+            midpoint = (self.bucket + 0.5) * self.rollup_seconds
+            self.fit.update(midpoint, self.bucket_sum / self.bucket_count)
+            self.bucket_sum = 0.0
+            self.bucket_count = 0
+        self.bucket = bucket
+        self.bucket_sum += value
+        self.bucket_count += 1
+        self.last_value, self.last_ts = value, ts
+
+    def forecast(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the current trend and time to target.
+
+        Returns:
+            dict or None: {'current', 'target', 'slope_per_hour',
+                           'hours_to_target'} (None until MIN_ROLLUPS rollups)
+        """
+        if self.fit.count < MIN_ROLLUPS:
+            return None
+        now = self.last_ts if now is None else now
+        slope = self.fit.slope_per_hour
+        current = self.last_value
+
+        hours = None
+        if current >= self.target:
+            hours = 0.0
+        elif slope > 0:
+            # Distance from the fitted level, so one noisy sample does not swing the ETA
+            fitted = self.fit.value_at(now)
+            hours = max(0.0, (self.target - fitted) / slope)
+            if hours > MAX_HORIZON_HOURS:
+                hours = None
+
+        return {
+            'current': round(current, 3),
+            'target': self.target,
+            'slope_per_hour': round(slope, 6),
+            'hours_to_target': round(hours, 3) if hours is not None else None,
+        }
+
+
+@dataclass
+class Forecast:
+    """One series forecast, as returned by TrendForecaster.forecasts()."""
+    host: str
+    kind: str
+    name: str
+    current: float
+    target: float
+    slope_per_hour: float
+    hours_to_target: Optional[float]
+    as_of: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(self.__dict__)
+        data['eta'] = None
+        if self.hours_to_target is not None:
+            data['eta'] = time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                        time.gmtime(self.as_of + self.hours_to_target * 3600))
+        return data
+
+
+class TrendForecaster:
+    """Per-host disk-full and thermal forecasts updated from snapshots."""
+
+    def __init__(self, thermal_thresholds: Optional[Dict[str, float]] = None,
+                 default_thermal_threshold: float = DEFAULT_THERMAL_THRESHOLD):
+        """Initialize forecaster
+
+        Args:
+            thermal_thresholds: Per-sensor thresholds in °C
+                                (e.g. {'gpu_celsius': 90})
+            default_thermal_threshold: Threshold for other sensors
+        """
+        self.thermal_thresholds = thermal_thresholds or {}
+        self.default_thermal_threshold = default_thermal_threshold
+        # (host, kind, name) -> series
+        self._series: Dict[Tuple[str, str, str], TrendSeries] = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def observe(self, snapshot: Dict[str, Any], now: Optional[float] = None,
+                host: Optional[str] = None):
+        """Fold one snapshot's disk usage and temperatures into the trends."""
+        if now is None:
+            now = snapshot_epoch(snapshot, time.time())
+        if host is None:
+            host = (snapshot.get('system') or {}).get('hostname') or 'unknown'
+
+        for kind, name, value in _trend_samples(snapshot):
+            key = (host, kind, name)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._new_series(kind, name)
+            series.add(now, value)
+
+    def bootstrap(self, snapshots: Iterable[Dict[str, Any]]) -> int:
+        """Replay stored snapshots (oldest first). Returns the number replayed."""
+        count = 0
+        for snapshot in snapshots:
+            ts = snapshot_epoch(snapshot)
+            if ts is not None:
+                self.observe(snapshot, now=ts)
+                count += 1
+        return count
+
+    def forecasts(self, host: Optional[str] = None) -> List[Forecast]:
+        """Return the forecasts that have enough data, optionally for one host."""
+        results = []
+        for (series_host, kind, name), series in self._series.items():
+            if host is not None and series_host != host:
+                continue
+            data = series.forecast()
+            if data is not None:
+                results.append(Forecast(series_host, kind, name, data['current'], data['target'],
+                                        data['slope_per_hour'], data['hours_to_target'],
+                                        series.last_ts))
+        return results
+
+    def annotate(self, snapshot: Dict[str, Any], now: Optional[float] = None,
+                 host: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Observe a snapshot and return a copy with a 'forecast' section.
+
+        Only series with a finite time to target are included, so rules on
+        'forecast.disk.*.hours_to_full' resolve once a trend flattens.
+        """
+        if host is None:
+            host = (snapshot.get('system') or {}).get('hostname') or 'unknown'
+        self.observe(snapshot, now, host)
+
+        section: Dict[str, Dict[str, Any]] = {}
+        for forecast in self.forecasts(host):
+            if forecast.hours_to_target is None:
+                continue
+            field = 'hours_to_full' if forecast.kind == 'disk' else 'hours_to_threshold'
+            section.setdefault(forecast.kind, {})[forecast.name] = {
+                field: forecast.hours_to_target,
+                'slope_per_hour': forecast.slope_per_hour,
+            }
+        return dict(snapshot, forecast=section)
+
+    def save(self, path):
+        """Atomically write the current forecasts as JSON (for the web API)."""
+        path = Path(path)
+        data = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'forecasts': [f.to_dict() for f in self.forecasts()],
+        }
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _new_series(self, kind: str, name: str) -> TrendSeries:
+        if kind == 'disk':
+            return TrendSeries(100.0, DISK_ROLLUP_SECONDS, DISK_FORGETTING)
+        threshold = self.thermal_thresholds.get(name, self.default_thermal_threshold)
+        return TrendSeries(threshold, TEMPERATURE_ROLLUP_SECONDS, TEMPERATURE_FORGETTING)
+
+
+def load_forecasts(path) -> Dict[str, Any]:
+    """Read forecasts written by TrendForecaster.save() (empty if missing)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'timestamp': None, 'forecasts': []}
+
+
+def _trend_samples(snapshot: Dict[str, Any]) -> Iterator[Tuple[str, str, float]]:
+    """Yield (kind, name, value) for disk usage and temperature readings."""
+    disks = snapshot.get('disk')
+    if isinstance(disks, list):
+        for position, entry in enumerate(disks):
+            value = entry.get('used_percent') if isinstance(entry, dict) else None
+            if _is_number(value):
+                yield 'disk', identity_key(entry, position), float(value)
+
+    temperature = snapshot.get('temperature')
+    if isinstance(temperature, dict):
+        for name, value in temperature.items():
+            # 0 means the sensor is unavailable
+            if name.endswith('_celsius') and _is_number(value) and value > 0:
+                yield 'temperature', name, float(value)
+
+    gpu = snapshot.get('gpu')
+    devices = gpu.get('devices') if isinstance(gpu, dict) else None
+    if isinstance(devices, list):
+        for position, entry in enumerate(devices):
+            value = entry.get('temperature_celsius') if isinstance(entry, dict) else None
+            if _is_number(value) and value > 0:
+                yield 'temperature', f"gpu{identity_key(entry, position)}", float(value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
@@ -0,0 +1,155 @@
+"""
+Metric History Module
+
+Append-only metric history kept in one rolling JSONL file per day
+(history/metrics_YYYYMMDD.jsonl). Snapshots are appended in batches and
+fsync'd periodically rather than per sample, so short collection intervals
+do not multiply disk writes. SQLiteStore offers the same append_batch()
+interface for installs that use the SQLite backend.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .metrics_collector import snapshot_epoch
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PREFIX = 'metrics_'
+HISTORY_SUFFIX = '.jsonl'
+
+
+def history_filename(ts: float) -> str:
+    """Return the rolling history filename for an epoch timestamp (local day)."""
+    return f"{HISTORY_PREFIX}{datetime.fromtimestamp(ts).strftime('%Y%m%d')}{HISTORY_SUFFIX}"
+
+
+class JsonlHistoryWriter:
+    """Append snapshot batches to a daily rolling JSONL file."""
+
+    def __init__(self, directory, fsync_interval: float = 5.0):
+        """Initialize history writer
+
+        Args:
+            directory: Directory holding metrics_YYYYMMDD.jsonl files
+            fsync_interval: Minimum seconds between fsync calls
+                            (0 to fsync after every batch)
+        """
+        self.directory = Path(directory)
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._filename: Optional[str] = None
+        self._last_fsync = 0.0
+        self._dirty = False
+
+    def append_batch(self, snapshots: List[Dict[str, Any]]) -> int:
+        """
+        Append snapshots as compact JSON lines.
+
+        Args:
+            snapshots: Metric snapshots, oldest first
+
+        Returns:
+            int: Number of snapshots written
+        """
+        if not snapshots:
+            return 0
+
+        with self._lock:
+            for snapshot in snapshots:
+                ts = snapshot_epoch(snapshot, time.time())
+                self._roll(history_filename(ts))
+                self._file.write(json.dumps(snapshot, separators=(',', ':')) + '\n')
+            self._file.flush()
+            self._dirty = True
+
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync()
+
+        return len(snapshots)
+
+    def flush(self):
+        """Flush and fsync any buffered data."""
+        with self._lock:
+            if self._file and self._dirty:
+                self._file.flush()
+                self._fsync()
+
+    def close(self):
+        """Flush, fsync and close the current file."""
+        with self._lock:
+            self._close_current()
+
+    def _roll(self, filename: str):
+        """Switch to `filename` if the day changed."""
+        if filename == self._filename and self._file:
+            return
+        self._close_current()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.directory / filename, 'a', encoding='utf-8')
+        self._filename = filename
+
+    def _close_current(self):
+        if self._file:
+            self._file.flush()
+            if self._dirty:
+                self._fsync()
+            self._file.close()
+            self._file = None
+            self._filename = None
+
+    def _fsync(self):
+        try:
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            logger.warning(f"fsync failed for {self._filename}: {e}")
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+
+
+def read_history(directory, start: Optional[float] = None,
+                 end: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate stored snapshots within [start, end], oldest first.
+
+    Only the daily files overlapping the range are opened. A torn final
+    line (from a crash mid-write) is skipped.
+
+    Args:
+        directory: History directory
+        start: Inclusive start in epoch seconds (None for unbounded)
+        end: Inclusive end in epoch seconds (None for unbounded)
+
+    Yields:
+        dict: Metric snapshots
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        return
+
+    first = history_filename(start) if start is not None else None
+    last = history_filename(end) if end is not None else None
+
+    for path in sorted(directory.glob(f"{HISTORY_PREFIX}*{HISTORY_SUFFIX}")):
+        if (first and path.name < first) or (last and path.name > last):
+            continue
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    snapshot = json.loads(line)
+                except ValueError:
+                    continue
+                ts = snapshot_epoch(snapshot)
+                if ts is None:
+                    continue
+                if (start is not None and ts < start) or (end is not None and ts > end):
+                    continue
+                yield snapshot
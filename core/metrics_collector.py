@@ -414,3 +414,96 @@ def get_metric_value(metrics: Dict[str, Any], path: str, default: Any = 'N/A') -
             return default
     
     return value if value is not None else default
+
+
+# Fields used to identify entries of list sections (disk, network, gpus, ...)
+_IDENTITY_FIELDS = ('device', 'mount', 'iface', 'name', 'id', 'index')
+
+
+def identity_key(entry: Any, position: int) -> Any:
+    """
+    Return the key identifying a list entry (disk device, interface, ...).
+    
+    Args:
+        entry: List element from a metrics section
+        position: Index of the element, used when no identity field exists
+        
+    Returns:
+        The first non-empty identity field value, else `position`
+        
+    Example:
+        >>> identity_key({'device': '/', 'used_percent': 40.0}, 0)
+        '/'
+    """
+    if isinstance(entry, dict):
+        for field in _IDENTITY_FIELDS:
+            if entry.get(field) not in (None, ''):
+                return entry[field]
+    return position
+
+
+def flatten_metrics(metrics: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    """
+    Flatten a metrics snapshot into numeric series keyed by dot paths.
+    
+    List entries are keyed by their identity field (device, iface, name, ...)
+    so that the same disk or interface maps to the same series over time.
+    Strings, booleans and nulls are skipped.
+    
+    Args:
+        metrics: Metrics dictionary (raw or parsed)
+        prefix: Prefix for generated keys (used for recursion)
+        
+    Returns:
+        dict: Mapping of series name to float value
+        
+    Example:
+        >>> flatten_metrics({'cpu': {'usage_percent': 45.2}, 'disk': [{'device': '/', 'used_percent': 12.0}]})
+        {'cpu.usage_percent': 45.2, 'disk./.used_percent': 12.0}
+    """
+    series: Dict[str, float] = {}
+    
+    if isinstance(metrics, dict):
+        items = metrics.items()
+    elif isinstance(metrics, list):
+        items = [(identity_key(entry, position), entry) for position, entry in enumerate(metrics)]
+    else:
+        return series
+    
+    for key, value in items:
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, bool) or value is None:
+            continue
+        if isinstance(value, (int, float)):
+            series[name] = float(value)
+        elif isinstance(value, (dict, list)):
+            series.update(flatten_metrics(value, name))
+    
+    return series
+
+
+def snapshot_epoch(metrics: Dict[str, Any], default: Optional[float] = None) -> Optional[float]:
+    """
+    Return the snapshot's ISO 8601 'timestamp' as epoch seconds.
+    
+    Args:
+        metrics: Metrics dictionary
+        default: Value returned when the timestamp is missing or invalid
+        
+    Returns:
+        float or default: Seconds since the epoch (UTC)
+    """
+    from datetime import datetime, timezone
+    
+    raw = metrics.get('timestamp') if isinstance(metrics, dict) else None
+    if not isinstance(raw, str):
+        return default
+    
+    try:
+        dt = datetime.fromisoformat(raw.replace('Z', '+00:00'))
+    except ValueError:
+        return default
+    
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
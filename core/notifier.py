@@ -0,0 +1,399 @@
+"""
+Notifier Module
+
+Delivers alerts to external destinations (HTTP webhook, SMTP, file,
+stdout) without ever blocking the caller.
+
+notify() only appends the alert to each matching destination's outbox
+(a core.wal.WriteAheadLog under outbox/<name>.wal) and hands it to an
+asyncio event loop running in its own thread. Each destination has a
+worker that groups queued alerts into a digest (up to batch_max alerts,
+or whatever arrived within batch_wait seconds), sends it in a worker
+thread, retries with exponential backoff and jitter, and checkpoints the
+outbox only after a successful send. Alerts still in the outbox are
+re-queued on the next start, so nothing is lost across restarts.
+
+Destinations config (JSON list):
+    [{"name": "ops", "type": "webhook", "url": "http://hooks.local/alerts",
+      "min_level": "warning", "batch_max": 50, "batch_wait": 10},
+     {"name": "mail", "type": "smtp", "host": "localhost", "port": 25,
+      "sender": "monitor@example.com", "recipients": ["oncall@example.com"]},
+     {"name": "audit", "type": "file", "path": "data/logs/notifications.jsonl"},
+     {"name": "console", "type": "stdout"}]
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import random
+import smtplib
+import sys
+import threading
+import urllib.request
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .alert_manager import ALERT_LEVELS, store_alert
+from .wal import WriteAheadLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_MAX = 50
+DEFAULT_BATCH_WAIT = 5.0
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 300.0
+
+
+# ----------------------------------------------------------------------
+# Sinks
+# ----------------------------------------------------------------------
+
+class NotificationSink(abc.ABC):
+    """Base class for destinations. send() runs in a worker thread."""
+
+    @abc.abstractmethod
+    def send(self, alerts: List[Dict[str, Any]]):
+        """Deliver a digest of alerts; raise to have it retried."""
+
+
+class WebhookSink(NotificationSink):
+    """POST the digest as JSON to an HTTP endpoint."""
+
+    def __init__(self, url: str, timeout: float = 10.0, headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+
+    def send(self, alerts: List[Dict[str, Any]]):
+        body = json.dumps({'count': len(alerts), 'alerts': alerts}).encode('utf-8')
+        req = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+        # urlopen raises HTTPError for non-2xx responses
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            response.read()
+
+
+class SMTPSink(NotificationSink):
+    """Send the digest as one plain-text email."""
+
+    def __init__(self, host: str, sender: str, recipients: List[str], port: int = 25,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = False, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, alerts: List[Dict[str, Any]]):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message['Subject'] = format_subject(alerts)
+        message.set_content(format_digest(alerts))
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or '')
+            smtp.send_message(message)
+
+
+class FileSink(NotificationSink):
+    """Append alerts to a JSONL file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def send(self, alerts: List[Dict[str, Any]]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, separators=(',', ':')) + '\n')
+
+
+class StdoutSink(NotificationSink):
+    """Print the digest (useful for containers that ship stdout)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def send(self, alerts: List[Dict[str, Any]]):
+        stream = self.stream or sys.stdout
+        stream.write(format_digest(alerts) + '\n')
+        stream.flush()
+
+
+def format_subject(alerts: List[Dict[str, Any]]) -> str:
+    """Return a one-line summary such as '[critical] 3 alerts: disk, cpu'."""
+    worst = max((a.get('level', 'info') for a in alerts), key=_level_rank, default='info')
+    metrics = sorted({a.get('metric', '?') for a in alerts})
+    noun = 'alert' if len(alerts) == 1 else 'alerts'
+    return f"[{worst}] {len(alerts)} {noun}: {', '.join(metrics)}"
+
+
+def format_digest(alerts: List[Dict[str, Any]]) -> str:
+    """Render alerts as plain text, one per line."""
+    lines = [format_subject(alerts)]
+    for alert in alerts:
+        host = f" {alert['host']}" if alert.get('host') else ''
+        lines.append(f"{alert.get('timestamp', '')} {alert.get('level', 'info').upper():8}"
+                     f"{host} {alert.get('metric', '')}: {alert.get('message', '')}")
+    return '\n'.join(lines)
+
+
+SINK_TYPES = {
+    'webhook': WebhookSink,
+    'smtp': SMTPSink,
+    'file': FileSink,
+    'stdout': StdoutSink,
+}
+
+
+# ----------------------------------------------------------------------
+# Destinations
+# ----------------------------------------------------------------------
+
+@dataclass
+class Destination:
+    """A named sink with its batching, filtering and retry settings.
+
+    Attributes:
+        name: Unique name (also the outbox file name)
+        sink: Sink that delivers digests
+        min_level: Lowest alert level delivered
+        batch_max: Maximum alerts per digest
+        batch_wait: Seconds to wait for more alerts after the first one
+        backoff_base: First retry delay in seconds (doubles per attempt)
+        backoff_max: Upper bound for the retry delay
+    """
+    name: str
+    sink: NotificationSink
+    min_level: str = 'warning'
+    batch_max: int = DEFAULT_BATCH_MAX
+    batch_wait: float = DEFAULT_BATCH_WAIT
+    backoff_base: float = BACKOFF_BASE
+    backoff_max: float = BACKOFF_MAX
+
+    # Delivery statistics
+    sent: int = field(default=0, init=False)
+    failures: int = field(default=0, init=False)
+
+    def accepts(self, alert: Dict[str, Any]) -> bool:
+        return _level_rank(alert.get('level', 'info')) >= _level_rank(self.min_level)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry `attempt` (1-based), with +/-20% jitter."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+
+def load_destinations(path) -> List[Destination]:
+    """Build destinations from a JSON config file (see module docstring)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    destinations = []
+    for entry in entries:
+        entry = dict(entry)
+        name = entry.pop('name')
+        kind = entry.pop('type')
+        options = {key: entry.pop(key) for key in
+                   ('min_level', 'batch_max', 'batch_wait', 'backoff_base', 'backoff_max')
+                   if key in entry}
+        if kind not in SINK_TYPES:
+            raise ValueError(f"Unknown notification sink type {kind!r} for {name}")
+        destinations.append(Destination(name, SINK_TYPES[kind](**entry), **options))
+    return destinations
+
+
+# ----------------------------------------------------------------------
+# Dispatcher
+# ----------------------------------------------------------------------
+
+class NotificationDispatcher:
+    """Fan alerts out to destinations from a background asyncio loop."""
+
+    def __init__(self, destinations: List[Destination], outbox_dir, fsync: bool = True):
+        """Initialize dispatcher
+
+        Args:
+            destinations: Destinations to deliver to
+            outbox_dir: Directory holding one <name>.wal outbox per destination
+            fsync: fsync outbox appends (disable only for tests)
+        """
+        names = [d.name for d in destinations]
+        if len(set(names)) != len(names):
+            raise ValueError("Destination names must be unique")
+
+        self.destinations = destinations
+        self.outbox_dir = Path(outbox_dir)
+        self._outboxes = {d.name: WriteAheadLog(self.outbox_dir / f"{d.name}.wal", fsync=fsync)
+                          for d in destinations}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        # Held while appending to an outbox and while the outboxes are
+        # replayed at start, so every alert is queued exactly once
+        self._lock = threading.Lock()
+        self._accepting = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------
+    # Producer side (any thread)
+    # ------------------------------------------------------------------
+
+    def notify(self, alert: Dict[str, Any]) -> int:
+        """
+        Queue an alert for every destination that accepts its level.
+
+        Only the local outbox append happens in the caller's thread;
+        delivery happens on the dispatcher loop.
+
+        Returns:
+            int: Number of destinations the alert was queued for
+        """
+        queued = 0
+        with self._lock:
+            for destination in self.destinations:
+                if not destination.accepts(alert):
+                    continue
+                outbox = self._outboxes[destination.name]
+                lsn = outbox.append(alert)
+                outbox.commit(lsn)
+                # Before start() the alert is picked up by the outbox replay
+                if self._accepting:
+                    self._loop.call_soon_threadsafe(
+                        self._queues[destination.name].put_nowait, (lsn, alert))
+                queued += 1
+        return queued
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """
+        Start the dispatcher thread and re-queue alerts left in the outboxes.
+
+        A dispatcher is started once; create a new one after stop().
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='notifier', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the workers. Undelivered alerts stay in the outbox."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+        with self._lock:
+            self._accepting = False
+        for outbox in self._outboxes.values():
+            outbox.close()
+
+    def pending(self) -> Dict[str, int]:
+        """Return the number of alerts waiting per destination."""
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return sent/failure counts per destination."""
+        return {d.name: {'sent': d.sent, 'failures': d.failures} for d in self.destinations}
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._stopping = asyncio.Event()
+        with self._lock:
+            for destination in self.destinations:
+                queue = self._queues[destination.name] = asyncio.Queue()
+                # Alerts not delivered before the last shutdown (or queued
+                # before start); the k-th record in a fresh log has LSN k
+                outbox = self._outboxes[destination.name]
+                for lsn, alert in enumerate(outbox.replay(), start=1):
+                    queue.put_nowait((lsn, alert))
+                if queue.qsize():
+                    logger.info(f"Queued {queue.qsize()} undelivered alert(s) for {destination.name}")
+            self._accepting = True
+        self._ready.set()
+
+        workers = [asyncio.ensure_future(self._worker(d)) for d in self.destinations]
+        await self._stopping.wait()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self, destination: Destination):
+        queue = self._queues[destination.name]
+        outbox = self._outboxes[destination.name]
+
+        while True:
+            batch = [await queue.get()]
+            deadline = self._loop.time() + destination.batch_wait
+            while len(batch) < destination.batch_max:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._deliver(destination, batch)
+            # Delivered: drop these alerts from the outbox
+            await asyncio.to_thread(outbox.checkpoint, batch[-1][0])
+
+    async def _deliver(self, destination: Destination, batch: List[Tuple[int, Dict[str, Any]]]):
+        alerts = [alert for _, alert in batch]
+        attempt = 0
+        while True:
+            try:
+                await asyncio.to_thread(destination.sink.send, alerts)
+                destination.sent += len(alerts)
+                return
+            except Exception as e:
+                attempt += 1
+                destination.failures += 1
+                delay = destination.backoff(attempt)
+                logger.warning(f"Notification to {destination.name} failed "
+                               f"(attempt {attempt}, retry in {delay:.1f}s): {e}")
+                await asyncio.sleep(delay)
+
+
+def notifying_writer(dispatcher: NotificationDispatcher, path: str):
+    """
+    Return an alert writer (for AlertLifecycle) that also notifies.
+
+    The row is written with core.alert_manager.store_alert first; the
+    stored row (with its id and timestamp) is handed to the dispatcher only
+    if that succeeded.
+    """
+    def write(metric: str, level: str, message: str, value: Optional[float] = None,
+              threshold: Optional[float] = None, **extra: Any) -> bool:
+        alert = store_alert(metric, level, message, value, threshold, path=path, **extra)
+        if alert is None:
+            return False
+        dispatcher.notify(alert)
+        return True
+
+    return write
+
+
+def _level_rank(level: str) -> int:
+    return ALERT_LEVELS.index(level) if level in ALERT_LEVELS else 0
@@ -0,0 +1,420 @@
+"""
+Report Catalog Module
+
+Indexed catalog of the generated report files (reports/html, markdown and
+pdf). Every report written or deleted is recorded as one line in an
+append-only manifest (reports/catalog.jsonl), so listing, paginating and
+pruning reports never globs or stats the report directories.
+
+The manifest is shared by the dashboard (which writes reports) and the
+JSON logging service (whose retention engine prunes them): appends and
+compaction serialize on an advisory lock file, and each process tails the
+lines the others appended since its last read. A missing manifest is
+rebuilt once from the report directories.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .alert_journal import file_lock
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = 'catalog.jsonl'
+LOCK_SUFFIX = '.lock'
+
+# Report type -> directory under reports/ and file suffix
+REPORT_DIRS = {'html': 'html', 'markdown': 'markdown', 'pdf': 'pdf'}
+REPORT_SUFFIXES = {'html': '.html', 'markdown': '.md', 'pdf': '.pdf'}
+
+# Report kinds; all but 'snapshot' are named report_<kind>_<timestamp>_<key>
+REPORT_KINDS = ('snapshot', 'range', 'fleet')
+
+# Rewrite the manifest once superseded lines outnumber live entries
+COMPACT_MIN_LINES = 1000
+
+DEFAULT_PAGE_SIZE = 50
+
+
+@dataclass
+class ReportEntry:
+    """One generated report file.
+
+    Attributes:
+        filename: File name inside the type's directory
+        type: 'html', 'markdown' or 'pdf'
+        kind: 'snapshot', 'range' or 'fleet'
+        size: File size in bytes
+        created: Epoch seconds the file was written
+        key: Input hash of the report (see web.report_cache.input_key);
+             only its 8-character prefix is known for rebuilt entries
+        range_start: Start of the covered time range (epoch seconds)
+        range_end: End of the covered time range (epoch seconds)
+    """
+    filename: str
+    type: str
+    kind: str = 'snapshot'
+    size: int = 0
+    created: float = 0.0
+    key: Optional[str] = None
+    range_start: Optional[float] = None
+    range_end: Optional[float] = None
+
+    @property
+    def path(self) -> str:
+        """Path relative to the reports directory (e.g. 'html/report_x.html')."""
+        return f"{REPORT_DIRS.get(self.type, self.type)}/{self.filename}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['path'] = self.path
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ReportEntry':
+        return cls(**{name: data[name] for name in cls.__dataclass_fields__ if name in data})
+
+
+def parse_report_name(name: str) -> Tuple[str, Optional[str]]:
+    """
+    Return (kind, key prefix) from a report filename.
+
+    Example:
+        >>> parse_report_name('report_range_20250101_120000_1a2b3c4d.html')
+        ('range', '1a2b3c4d')
+    """
+    stem = name.rsplit('.', 1)[0]
+    kind = next((kind for kind in REPORT_KINDS[1:] if stem.startswith(f'report_{kind}_')),
+                'snapshot')
+    parts = stem.split('_')
+    key = parts[-1] if len(parts) >= 4 and len(parts[-1]) == 8 else None
+    return kind, key
+
+
+def _locked(method):
+    """Run a ReportCatalog method while holding the instance lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ReportCatalog:
+    """Persisted, incrementally updated index of generated reports.
+
+    Entries are kept sorted by creation time in memory; listing and
+    pruning work on that index only. All methods are safe to call from
+    several threads and processes.
+    """
+
+    def __init__(self, reports_dir, compact_min_lines: int = COMPACT_MIN_LINES):
+        """Initialize report catalog
+
+        Args:
+            reports_dir: Reports directory (holds html/, markdown/, pdf/)
+            compact_min_lines: Superseded manifest lines tolerated before
+                               the manifest is rewritten
+        """
+        self.reports_dir = Path(reports_dir)
+        self.path = self.reports_dir / CATALOG_FILENAME
+        self.lock_path = self.reports_dir / (CATALOG_FILENAME + LOCK_SUFFIX)
+        self.compact_min_lines = compact_min_lines
+
+        self._entries: Dict[str, ReportEntry] = {}
+        self._order: List[Tuple[float, str]] = []
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._lines = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @_locked
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @_locked
+    def refresh(self) -> bool:
+        """Apply manifest lines appended by other processes.
+
+        Costs one stat when nothing changed. A manifest that was replaced
+        (compaction) is re-read from the start; a missing one is rebuilt
+        from the report directories.
+
+        Returns:
+            bool: True if the in-memory index changed
+        """
+        if not self.path.exists() and not (self._loaded and not self._entries):
+            with file_lock(self.lock_path):
+                if not self.path.exists():
+                    self.rebuild()
+                    return True
+        return self._catch_up()
+
+    def _catch_up(self) -> bool:
+        """Read the lines appended since the last read (caller holds the lock)."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._loaded = True
+            return False
+
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset()
+            self._inode = stat.st_ino
+        elif stat.st_size == self._offset:
+            self._loaded = True
+            return False
+
+        self._read_from(self._offset)
+        self._loaded = True
+        return True
+
+    def _reset(self):
+        self._entries = {}
+        self._order = []
+        self._offset = 0
+        self._lines = 0
+
+    def _read_from(self, offset: int):
+        try:
+            with self.path.open('rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # Only complete lines: a line being appended is read next time
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping torn line in report catalog {self.path}")
+                continue
+            self._lines += 1
+            self._apply(record)
+        self._offset = offset + end
+
+    def _apply(self, record: Dict[str, Any]):
+        if record.get('op') == 'remove':
+            self._discard(record.get('path', ''))
+            return
+        try:
+            entry = ReportEntry.from_dict(record)
+        except TypeError:
+            return
+        self._discard(entry.path)
+        self._entries[entry.path] = entry
+        bisect.insort(self._order, (entry.created, entry.path))
+
+    def _discard(self, path: str) -> bool:
+        entry = self._entries.pop(path, None)
+        if entry is None:
+            return False
+        pos = bisect.bisect_left(self._order, (entry.created, path))
+        if pos < len(self._order) and self._order[pos][1] == path:
+            del self._order[pos]
+        return True
+
+    @_locked
+    def rebuild(self) -> int:
+        """Rebuild the manifest from the report directories (one stat per file).
+
+        Returns:
+            int: Number of catalogued reports
+        """
+        self._reset()
+        for report_type, dirname in REPORT_DIRS.items():
+            directory = self.reports_dir / dirname
+            suffix = REPORT_SUFFIXES[report_type]
+            try:
+                with os.scandir(directory) as it:
+                    files = [entry for entry in it
+                             if entry.name.startswith('report_') and entry.name.endswith(suffix)]
+                    for item in files:
+                        try:
+                            stat = item.stat()
+                        except OSError:
+                            continue
+                        kind, key = parse_report_name(item.name)
+                        self._apply(asdict(ReportEntry(
+                            filename=item.name, type=report_type, kind=kind,
+                            size=stat.st_size, created=stat.st_mtime, key=key)))
+            except FileNotFoundError:
+                continue
+        self._write_all()
+        logger.debug(f"Rebuilt report catalog with {len(self._entries)} entries")
+        return len(self._entries)
+
+    def _write_all(self):
+        """Atomically rewrite the manifest with the live entries."""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open('w', encoding='utf-8') as f:
+                for _, path in self._order:
+                    f.write(json.dumps(asdict(self._entries[path]), separators=(',', ':')) + '\n')
+            os.replace(tmp_path, self.path)
+            stat = self.path.stat()
+            self._inode, self._offset = stat.st_ino, stat.st_size
+            self._lines = len(self._entries)
+            self._loaded = True
+        except OSError as e:
+            logger.warning(f"Could not write report catalog {self.path}: {e}")
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    @_locked
+    def add(self, report_path, report_type: str, kind: str = 'snapshot',
+            key: Optional[str] = None, range_start: Optional[float] = None,
+            range_end: Optional[float] = None) -> ReportEntry:
+        """Record a report file that was just written.
+
+        Args:
+            report_path: The report file
+            report_type: 'html', 'markdown' or 'pdf'
+            kind: 'snapshot', 'range' or 'fleet'
+            key: Input hash of the report
+            range_start: Start of the covered time range (epoch seconds)
+            range_end: End of the covered time range (epoch seconds)
+
+        Returns:
+            ReportEntry: The recorded entry
+        """
+        report_path = Path(report_path)
+        stat = report_path.stat()
+        entry = ReportEntry(filename=report_path.name, type=report_type, kind=kind,
+                            size=stat.st_size, created=stat.st_mtime, key=key,
+                            range_start=range_start, range_end=range_end)
+        self._append([asdict(entry)])
+        return entry
+
+    @_locked
+    def remove_many(self, paths: Iterable[str]) -> int:
+        """Forget deleted reports.
+
+        Args:
+            paths: Catalog paths (ReportEntry.path, e.g. 'html/report_x.html')
+
+        Returns:
+            int: Number of entries removed
+        """
+        self.refresh()
+        records = [{'op': 'remove', 'path': path} for path in paths if path in self._entries]
+        if records:
+            self._append(records)
+        return len(records)
+
+    def _append(self, records: List[Dict[str, Any]]):
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self.refresh()
+        with file_lock(self.lock_path):
+            # Catch up first so the offset stays at the end of the file
+            self._catch_up()
+            payload = ''.join(json.dumps(record, separators=(',', ':')) + '\n'
+                              for record in records)
+            try:
+                with self.path.open('a', encoding='utf-8') as f:
+                    f.write(payload)
+            except OSError as e:
+                logger.warning(f"Could not append to report catalog {self.path}: {e}")
+                return
+            self._read_from(self._offset)
+
+            dead = self._lines - len(self._entries)
+            if dead > self.compact_min_lines and dead > len(self._entries):
+                self._write_all()
+
+    # ------------------------------------------------------------------
+    # Listing and pruning
+    # ------------------------------------------------------------------
+
+    @_locked
+    def query(self, report_type: Optional[str] = None, kind: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              key: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = DEFAULT_PAGE_SIZE) -> Tuple[List[ReportEntry], int]:
+        """
+        Return one page of reports, newest first.
+
+        Args:
+            report_type: Only this type ('html', 'markdown', 'pdf')
+            kind: Only 'snapshot', 'range' or 'fleet' reports
+            since: Created at or after (epoch seconds)
+            until: Created at or before (epoch seconds)
+            key: Input hash or hash prefix
+            offset: Matching entries to skip
+            limit: Page size (None for all)
+
+        Returns:
+            tuple: (entries, total number of matching entries)
+        """
+        self.refresh()
+        lo = bisect.bisect_left(self._order, (since,)) if since is not None else 0
+        hi = bisect.bisect_right(self._order, (until, '\uffff')) if until is not None else len(self._order)
+
+        page, total = [], 0
+        stop = None if limit is None else offset + limit
+        for _, path in reversed(self._order[lo:hi]):
+            entry = self._entries[path]
+            if report_type and entry.type != report_type:
+                continue
+            if kind and entry.kind != kind:
+                continue
+            if key and not (entry.key and (entry.key.startswith(key) or key.startswith(entry.key))):
+                continue
+            if total >= offset and (stop is None or total < stop):
+                page.append(entry)
+            total += 1
+        return page, total
+
+    @_locked
+    def get(self, path: str) -> Optional[ReportEntry]:
+        """Return the entry for a catalog path, or None."""
+        self.refresh()
+        return self._entries.get(path)
+
+    @_locked
+    def select_expired(self, max_age_seconds: Optional[float] = None,
+                       max_count: Optional[int] = None,
+                       now: Optional[float] = None) -> List[ReportEntry]:
+        """
+        Return the reports beyond the retention limits, per report type.
+
+        Args:
+            max_age_seconds: Reports older than this expire
+            max_count: Newest reports kept per type
+            now: Reference time in epoch seconds (default: current time)
+        """
+        self.refresh()
+        now = now if now is not None else time.time()
+        kept: Dict[str, int] = {}
+        expired = []
+        for created, path in reversed(self._order):
+            entry = self._entries[path]
+            position = kept.get(entry.type, 0)
+            too_old = max_age_seconds is not None and now - created > max_age_seconds
+            too_many = max_count is not None and position >= max_count
+            if too_old or too_many:
+                expired.append(entry)
+            else:
+                kept[entry.type] = position + 1
+        return expired
@@ -0,0 +1,541 @@
+"""
+Retention Module
+
+Policy-driven retention for metric archives, reports, logs and the alert
+log. Each policy limits a directory by age, total bytes and file count
+(optionally per series). Snapshots evicted from a compactable directory
+are folded into daily gzip JSONL segments instead of being deleted, which
+turns thousands of small per-minute files into a handful of large ones.
+
+The engine can run in a background thread at low CPU/I/O priority and
+reports what each pass reclaimed.
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .archive_index import parse_archive_name
+
+logger = logging.getLogger(__name__)
+
+# Segment files written by compaction: <segment_dir>/YYYYMMDD.jsonl.gz
+SEGMENT_SUFFIX = '.jsonl.gz'
+
+DAY = 86400
+
+
+@dataclass
+class RetentionPolicy:
+    """Retention limits for the files of one directory.
+
+    Attributes:
+        directory: Directory the policy applies to
+        pattern: Glob selecting the managed files
+        max_age_seconds: Remove files older than this
+        max_bytes: Keep the newest files within this many bytes
+        max_count: Keep at most this many files
+        series_pattern: Regex whose first group names the series a file
+                        belongs to; limits then apply per series
+        compact_dir: If set, evicted JSON snapshots are appended to daily
+                     segments in this directory instead of being deleted
+    """
+    directory: Path
+    pattern: str = '*'
+    max_age_seconds: Optional[float] = None
+    max_bytes: Optional[int] = None
+    max_count: Optional[int] = None
+    series_pattern: Optional[str] = None
+    compact_dir: Optional[Path] = None
+
+    def __post_init__(self):
+        self.directory = Path(self.directory)
+        if self.compact_dir is not None:
+            self.compact_dir = Path(self.compact_dir)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], base_dir=None) -> 'RetentionPolicy':
+        """Build a policy from a config dict (relative paths use base_dir)."""
+        data = dict(data)
+        base = Path(base_dir) if base_dir else Path('.')
+        for key in ('directory', 'compact_dir'):
+            if data.get(key) is not None and not Path(data[key]).is_absolute():
+                data[key] = base / data[key]
+        return cls(**data)
+
+
+@dataclass
+class AlertRetentionPolicy:
+    """Retention limits for the alert log (alerts.json or SQLite)."""
+    path: Path
+    max_age_seconds: Optional[float] = None
+    max_count: Optional[int] = None
+
+    def __post_init__(self):
+        self.path = Path(self.path)
+
+
+@dataclass
+class ReportRetentionPolicy:
+    """Retention limits for generated reports, applied through the report catalog.
+
+    max_count applies per report type (html, markdown, pdf).
+    """
+    reports_dir: Path
+    max_age_seconds: Optional[float] = None
+    max_count: Optional[int] = None
+
+    def __post_init__(self):
+        self.reports_dir = Path(self.reports_dir)
+
+
+@dataclass
+class RetentionResult:
+    """What one policy reclaimed in one pass."""
+    target: str
+    files_deleted: int = 0
+    files_compacted: int = 0
+    segments_written: int = 0
+    alerts_removed: int = 0
+    bytes_reclaimed: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _FileEntry:
+    path: Path
+    ts: float
+    size: int
+
+
+def default_policies(project_root, alerts_path=None) -> List[Any]:
+    """
+    Return the default policies for a project checkout.
+
+    Args:
+        project_root: Repository root (contains json/, reports/, data/)
+        alerts_path: Configured alert log, JSON or SQLite
+                     (default: data/alerts/alerts.json under project_root)
+
+    Returns:
+        list: RetentionPolicy, ReportRetentionPolicy and AlertRetentionPolicy
+              instances
+    """
+    root = Path(project_root)
+    return [
+        RetentionPolicy(root / 'json', pattern='*.json', max_count=10,
+                        compact_dir=root / 'json' / 'segments'),
+        RetentionPolicy(root / 'json' / 'segments', pattern='*' + SEGMENT_SUFFIX,
+                        max_age_seconds=7 * DAY, max_bytes=256 * 1024 * 1024),
+        RetentionPolicy(root / 'json' / 'history', pattern='metrics_*.jsonl',
+                        max_age_seconds=7 * DAY, max_bytes=512 * 1024 * 1024),
+        RetentionPolicy(root / 'json' / 'history' / 'rollups', pattern='metrics_*.rollup.*',
+                        max_age_seconds=8 * DAY),
+        ReportRetentionPolicy(root / 'reports', max_age_seconds=30 * DAY, max_count=500),
+        RetentionPolicy(root / 'reports' / 'cache' / 'charts', pattern='*',
+                        max_age_seconds=30 * DAY, max_bytes=64 * 1024 * 1024),
+        RetentionPolicy(root / 'data' / 'logs', pattern='*.log.*',
+                        max_age_seconds=14 * DAY, max_bytes=50 * 1024 * 1024),
+        AlertRetentionPolicy(alerts_path or root / 'data' / 'alerts' / 'alerts.json',
+                             max_age_seconds=30 * DAY, max_count=10000),
+    ]
+
+
+def load_policies(config_path, base_dir=None) -> List[Any]:
+    """
+    Load policies from a JSON config file.
+
+    The file holds a list of objects; entries with a 'path' key are alert
+    policies, entries with a 'reports_dir' key are report (catalog)
+    policies, all others are directory policies.
+
+    Example config:
+        [{"directory": "json", "pattern": "*.json", "max_count": 30},
+         {"reports_dir": "reports", "max_count": 200},
+         {"path": "data/alerts/alerts.json", "max_count": 5000}]
+    """
+    config_path = Path(config_path)
+    base = Path(base_dir) if base_dir else config_path.parent
+
+    with config_path.open('r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    policies = []
+    for entry in entries:
+        if 'path' in entry:
+            entry = dict(entry)
+            if not Path(entry['path']).is_absolute():
+                entry['path'] = base / entry['path']
+            policies.append(AlertRetentionPolicy(**entry))
+        elif 'reports_dir' in entry:
+            entry = dict(entry)
+            if not Path(entry['reports_dir']).is_absolute():
+                entry['reports_dir'] = base / entry['reports_dir']
+            policies.append(ReportRetentionPolicy(**entry))
+        else:
+            policies.append(RetentionPolicy.from_dict(entry, base))
+    return policies
+
+
+def lower_io_priority():
+    """
+    Lower the calling thread's scheduling priority (best effort).
+
+    On Linux the nice value of a single thread can be changed through its
+    native thread id; the CFQ/BFQ I/O schedulers derive the best-effort I/O
+    priority from it. Elsewhere this is a no-op.
+    """
+    setpriority = getattr(os, 'setpriority', None)
+    if setpriority is None:
+        return
+    try:
+        setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (OSError, AttributeError) as e:
+        logger.debug(f"Could not lower thread priority: {e}")
+
+
+class RetentionEngine:
+    """Apply retention policies once or periodically in the background."""
+
+    def __init__(self, policies: List[Any],
+                 on_delete: Optional[Callable[[Path, List[str]], None]] = None,
+                 io_pause: float = 0.0):
+        """Initialize retention engine
+
+        Args:
+            policies: RetentionPolicy / ReportRetentionPolicy /
+                      AlertRetentionPolicy instances
+            on_delete: Called as on_delete(directory, filenames) after files
+                       are removed, e.g. to update an ArchiveIndex
+            io_pause: Seconds to sleep after each file touched, to keep the
+                      engine's I/O rate low on constrained disks
+        """
+        self.policies = list(policies)
+        self.on_delete = on_delete
+        self.io_pause = io_pause
+
+        self.last_results: List[RetentionResult] = []
+        self.last_run: Optional[float] = None
+        self.totals = {'files_deleted': 0, 'files_compacted': 0,
+                       'alerts_removed': 0, 'bytes_reclaimed': 0, 'runs': 0}
+
+        self._catalogs: Dict[Path, Any] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Background operation
+    # ------------------------------------------------------------------
+
+    def start(self, interval: float = 300.0) -> threading.Thread:
+        """Run the engine every `interval` seconds in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return self._thread
+
+        self._stop.clear()
+
+        def loop():
+            lower_io_priority()
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"Retention pass failed: {e}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name='retention', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cumulative totals and the results of the last pass."""
+        with self._lock:
+            return {
+                'last_run': self.last_run,
+                'totals': dict(self.totals),
+                'last_results': [r.to_dict() for r in self.last_results]
+            }
+
+    # ------------------------------------------------------------------
+    # Single pass
+    # ------------------------------------------------------------------
+
+    def run_once(self, now: Optional[float] = None) -> List[RetentionResult]:
+        """
+        Apply every policy once.
+
+        Args:
+            now: Reference time in epoch seconds (default: current time)
+
+        Returns:
+            list: One RetentionResult per policy
+        """
+        now = now if now is not None else time.time()
+        results = []
+
+        for policy in self.policies:
+            if isinstance(policy, AlertRetentionPolicy):
+                result = self._apply_alert_policy(policy, now)
+            elif isinstance(policy, ReportRetentionPolicy):
+                result = self._apply_report_policy(policy, now)
+            else:
+                result = self._apply_policy(policy, now)
+            results.append(result)
+
+            if result.bytes_reclaimed or result.alerts_removed:
+                logger.info(
+                    f"Retention {result.target}: deleted {result.files_deleted}, "
+                    f"compacted {result.files_compacted}, alerts {result.alerts_removed}, "
+                    f"reclaimed {result.bytes_reclaimed} bytes"
+                )
+
+        with self._lock:
+            self.last_results = results
+            self.last_run = now
+            self.totals['runs'] += 1
+            for result in results:
+                self.totals['files_deleted'] += result.files_deleted
+                self.totals['files_compacted'] += result.files_compacted
+                self.totals['alerts_removed'] += result.alerts_removed
+                self.totals['bytes_reclaimed'] += result.bytes_reclaimed
+
+        return results
+
+    def _scan(self, policy: RetentionPolicy) -> List[_FileEntry]:
+        """List managed files, newest first."""
+        entries = []
+        if not policy.directory.is_dir():
+            return entries
+
+        for path in policy.directory.glob(policy.pattern):
+            if not path.is_file() or path.name.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            embedded = parse_archive_name(path.name)
+            ts = embedded.timestamp() if embedded else stat.st_mtime
+            entries.append(_FileEntry(path, ts, stat.st_size))
+
+        entries.sort(key=lambda e: (e.ts, e.path.name), reverse=True)
+        return entries
+
+    def _select_evictions(self, policy: RetentionPolicy, entries: List[_FileEntry],
+                          now: float) -> List[_FileEntry]:
+        """Apply age/count/byte limits per series; returns files to evict."""
+        groups: Dict[str, List[_FileEntry]] = defaultdict(list)
+        series_re = re.compile(policy.series_pattern) if policy.series_pattern else None
+        for entry in entries:
+            key = ''
+            if series_re:
+                match = series_re.search(entry.path.name)
+                key = match.group(1) if match and match.groups() else ''
+            groups[key].append(entry)
+
+        evict = []
+        for group in groups.values():
+            kept_bytes = 0
+            for position, entry in enumerate(group):
+                too_old = (policy.max_age_seconds is not None
+                           and now - entry.ts > policy.max_age_seconds)
+                too_many = policy.max_count is not None and position >= policy.max_count
+                too_big = (policy.max_bytes is not None
+                           and kept_bytes + entry.size > policy.max_bytes)
+                if too_old or too_many or too_big:
+                    evict.append(entry)
+                else:
+                    kept_bytes += entry.size
+        return evict
+
+    def _apply_policy(self, policy: RetentionPolicy, now: float) -> RetentionResult:
+        result = RetentionResult(target=str(policy.directory))
+        try:
+            evict = self._select_evictions(policy, self._scan(policy), now)
+        except Exception as e:
+            result.errors.append(str(e))
+            return result
+        if not evict:
+            return result
+
+        if policy.compact_dir is not None:
+            evict = self._compact(policy, evict, result)
+
+        removed = []
+        for entry in evict:
+            try:
+                entry.path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                result.errors.append(f"{entry.path.name}: {e}")
+                continue
+            removed.append(entry.path.name)
+            result.files_deleted += 1
+            result.bytes_reclaimed += entry.size
+            if self.io_pause:
+                time.sleep(self.io_pause)
+
+        if removed and self.on_delete:
+            try:
+                self.on_delete(policy.directory, removed)
+            except Exception as e:
+                result.errors.append(f"on_delete callback: {e}")
+        return result
+
+    def _compact(self, policy: RetentionPolicy, evict: List[_FileEntry],
+                 result: RetentionResult) -> List[_FileEntry]:
+        """Append evicted JSON snapshots to daily segments.
+
+        Returns the entries that may now be deleted (successfully compacted
+        or unreadable); files that could not be written stay on disk.
+        """
+        by_day: Dict[str, List[_FileEntry]] = defaultdict(list)
+        for entry in sorted(evict, key=lambda e: e.ts):
+            by_day[datetime.fromtimestamp(entry.ts).strftime('%Y%m%d')].append(entry)
+
+        policy.compact_dir.mkdir(parents=True, exist_ok=True)
+        deletable = []
+
+        for day, entries in by_day.items():
+            segment = policy.compact_dir / f"{day}{SEGMENT_SUFFIX}"
+            lines = []
+            for entry in entries:
+                try:
+                    with entry.path.open('r', encoding='utf-8-sig') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    # Torn or unreadable snapshot: nothing worth keeping
+                    logger.warning(f"Dropping unreadable snapshot {entry.path.name}: {e}")
+                    deletable.append(entry)
+                    continue
+                if isinstance(data, dict):
+                    data.setdefault('archive_file', entry.path.name)
+                lines.append((entry, json.dumps(data, separators=(',', ':'))))
+
+            if not lines:
+                continue
+
+            try:
+                before = segment.stat().st_size if segment.exists() else 0
+                # gzip streams concatenate, so appending a new member is safe
+                with gzip.open(segment, 'at', encoding='utf-8') as f:
+                    for _, line in lines:
+                        f.write(line + '\n')
+                grown = segment.stat().st_size - before
+            except OSError as e:
+                result.errors.append(f"{segment.name}: {e}")
+                continue
+
+            result.segments_written += 1
+            result.files_compacted += len(lines)
+            result.bytes_reclaimed -= grown
+            deletable.extend(entry for entry, _ in lines)
+            if self.io_pause:
+                time.sleep(self.io_pause)
+
+        return deletable
+
+    def _apply_report_policy(self, policy: ReportRetentionPolicy, now: float) -> RetentionResult:
+        """Prune reports from the catalog's index (no directory scan)."""
+        from .report_catalog import ReportCatalog
+
+        result = RetentionResult(target=str(policy.reports_dir))
+        catalog = self._catalogs.get(policy.reports_dir)
+        if catalog is None:
+            catalog = self._catalogs[policy.reports_dir] = ReportCatalog(policy.reports_dir)
+        try:
+            expired = catalog.select_expired(policy.max_age_seconds, policy.max_count, now)
+        except Exception as e:
+            result.errors.append(str(e))
+            return result
+
+        removed = []
+        for entry in expired:
+            try:
+                (policy.reports_dir / entry.path).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                result.errors.append(f"{entry.path}: {e}")
+                continue
+            else:
+                result.files_deleted += 1
+                result.bytes_reclaimed += entry.size
+            removed.append(entry.path)
+            if self.io_pause:
+                time.sleep(self.io_pause)
+
+        if removed:
+            catalog.remove_many(removed)
+        return result
+
+    def _apply_alert_policy(self, policy: AlertRetentionPolicy, now: float) -> RetentionResult:
+        from .alert_manager import trim_alerts
+        from .alert_journal import journal_path
+
+        result = RetentionResult(target=str(policy.path))
+        # The JSON log may so far exist only as its journal
+        paths = [policy.path, journal_path(policy.path)]
+        if not any(p.exists() for p in paths):
+            return result
+
+        def size():
+            return sum(p.stat().st_size for p in paths if p.exists())
+
+        try:
+            before = size()
+            removed = trim_alerts(
+                str(policy.path),
+                max_count=policy.max_count,
+                max_age_seconds=policy.max_age_seconds,
+                now=now
+            )
+            result.alerts_removed = removed
+            if removed:
+                result.bytes_reclaimed = max(0, before - size())
+        except Exception as e:
+            result.errors.append(str(e))
+        return result
+
+
+def read_segment(path) -> List[Dict[str, Any]]:
+    """
+    Read the snapshots stored in a compacted segment.
+
+    Args:
+        path: Segment file (YYYYMMDD.jsonl.gz)
+
+    Returns:
+        list: Snapshot dicts in append order; a torn final line is skipped
+    """
+    snapshots = []
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    snapshots.append(json.loads(line))
+                except ValueError:
+                    continue
+    except (OSError, EOFError) as e:
+        logger.warning(f"Error reading segment {path}: {e}")
+    return snapshots
@@ -0,0 +1,951 @@
+"""
+Rollups Module
+
+Fixed-interval rollups of the metric history and the range statistics
+built on them. A week of 2 s samples is ~300k snapshots; reports over such
+ranges read per-minute rollups instead (count, sum, min, max and the
+first/last value of each bucket per series), which is ~30x less data and
+enough for min/avg/max, approximate percentiles, time above a threshold,
+growth and counter totals.
+
+RollupStore keeps the rollups of each daily history file
+(history/rollups/metrics_YYYYMMDD.rollup.json) up to date incrementally:
+they record how many bytes of the history file they cover, so only newly
+appended snapshots are read. While a day is current, buckets that can no
+longer change are appended to a log next to it (.rollup.log.jsonl, one
+record per closed bucket) instead of rewriting the day; once the day is
+over, the log is folded into the rollup file, whose columns are packed
+float64 arrays (base64) so loading a day costs a few decodes rather than
+parsing thousands of JSON numbers. Only the process writing the history
+persists rollups; read-only stores fold the rest of the history in
+memory. SQLiteStore computes the same rollups with SQL
+(SQLiteStore.rollups()).
+
+range_summary() turns rollups into report statistics and fleet_summary()
+compares hosts side by side. Both use NumPy when installed and plain
+loops otherwise.
+
+Example:
+    >>> store = RollupStore('json/history')
+    >>> summary = range_summary(store.load(time.time() - 7 * 86400, time.time()),
+    ...                         time.time() - 7 * 86400, time.time())
+"""
+
+import base64
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .history import HISTORY_PREFIX, HISTORY_SUFFIX, history_filename
+from .metrics_collector import flatten_metrics, snapshot_epoch
+from .rule_engine import DEFAULT_RULES, Rule
+
+try:
+    import numpy as np
+except ImportError:  # optional: statistics fall back to plain loops
+    np = None
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_SECONDS = 60
+ROLLUP_SUFFIX = '.rollup.json'
+# Closed buckets appended since the rollup file was last written
+ROLLUP_LOG_SUFFIX = '.rollup.log.jsonl'
+ROLLUP_VERSION = 1
+
+# Day rollups kept decoded in memory
+CACHE_DAYS = 16
+
+# Columns of a rollup series: bucket start, sample count, sum, min, max,
+# first and last value (in arrival order)
+FIELDS = ('start', 'n', 'sum', 'min', 'max', 'first', 'last')
+
+# Snapshot sections not rolled up (identity, or derived by other modules)
+EXCLUDED_SECTIONS = ('system', 'anomaly', 'forecast', 'timestamp')
+
+# Series reported with min/avg/max/p95
+REPORT_METRICS = (
+    'cpu.usage_percent',
+    'memory.usage_percent',
+    'disk.*.used_percent',
+    'disk.*.usage_percent',
+    'temperature.*celsius',
+    'gpu.*celsius',
+    'gpu.*utilization_percent',
+)
+
+# Counter series (monotonic byte counts) and their direction
+NETWORK_COUNTERS = (('network.*.rx_bytes', 'rx_bytes'), ('network.*.tx_bytes', 'tx_bytes'))
+LOOPBACK_INTERFACES = ('lo', 'loopback')
+
+DISK_USED_PERCENT = ('used_percent', 'usage_percent')
+
+
+class RollupSeries:
+    """Rollup columns of one series, oldest bucket first.
+
+    Columns are NumPy arrays when NumPy is installed, else array.array.
+    """
+
+    __slots__ = ('seconds',) + FIELDS
+
+    def __init__(self, seconds: int, columns: Dict[str, Any]):
+        """Initialize rollup series
+
+        Args:
+            seconds: Bucket width
+            columns: FIELDS -> column
+        """
+        self.seconds = seconds
+        for name in FIELDS:
+            setattr(self, name, columns[name])
+
+    @classmethod
+    def from_arrays(cls, seconds: int, columns: Dict[str, array],
+                    use_numpy: Optional[bool] = None) -> 'RollupSeries':
+        """Build a series from array('d') columns (as NumPy arrays when available)."""
+        if (np is not None) if use_numpy is None else (use_numpy and np is not None):
+            columns = {name: np.frombuffer(columns[name], dtype=np.float64) for name in FIELDS}
+        return cls(seconds, columns)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def samples(self) -> int:
+        return int(sum(self.n))
+
+
+# ----------------------------------------------------------------------
+# Building rollups
+# ----------------------------------------------------------------------
+
+def _empty_columns() -> Dict[str, array]:
+    return {name: array('d') for name in FIELDS}
+
+
+def _add_sample(columns: Dict[str, array], bucket: float, value: float):
+    _merge_bucket(columns, (bucket, 1.0, value, value, value, value, value))
+
+
+def _merge_bucket(columns: Dict[str, array], row: Tuple[float, ...]):
+    """Fold one bucket's aggregates (a FIELDS tuple) into the columns."""
+    bucket = row[0]
+    starts = columns['start']
+    if starts and starts[-1] == bucket:
+        i = len(starts) - 1
+    elif not starts or bucket > starts[-1]:
+        for name, value in zip(FIELDS, row):
+            columns[name].append(value)
+        return
+    else:
+        # Out-of-order sample (e.g. WAL replay): find or insert its bucket
+        i = bisect_left(starts, bucket)
+        if i == len(starts) or starts[i] != bucket:
+            for name, value in zip(FIELDS, row):
+                columns[name].insert(i, value)
+            return
+    columns['n'][i] += row[1]
+    columns['sum'][i] += row[2]
+    if row[3] < columns['min'][i]:
+        columns['min'][i] = row[3]
+    if row[4] > columns['max'][i]:
+        columns['max'][i] = row[4]
+    columns['last'][i] = row[6]
+
+
+def _merge_series(into: Dict[str, Dict[str, Dict[str, array]]],
+                  delta: Dict[str, Dict[str, Dict[str, array]]]):
+    """Fold host -> series -> columns rollups into another such mapping."""
+    for host, by_name in delta.items():
+        target = into.setdefault(host, {})
+        for name, columns in by_name.items():
+            existing = target.get(name)
+            if existing is None:
+                target[name] = {field: array('d', columns[field]) for field in FIELDS}
+                continue
+            for row in zip(*(columns[field] for field in FIELDS)):
+                _merge_bucket(existing, row)
+
+
+def _split_series(series: Dict[str, Dict[str, Dict[str, array]]], before: float):
+    """Split rollups into the buckets starting before `before` and the rest."""
+    head: Dict[str, Dict[str, Dict[str, array]]] = {}
+    tail: Dict[str, Dict[str, Dict[str, array]]] = {}
+    for host, by_name in series.items():
+        for name, columns in by_name.items():
+            cut = bisect_left(columns['start'], before)
+            if cut:
+                head.setdefault(host, {})[name] = {field: columns[field][:cut] for field in FIELDS}
+            if cut < len(columns['start']):
+                tail.setdefault(host, {})[name] = {field: columns[field][cut:] for field in FIELDS}
+    return head, tail
+
+
+def rollup_snapshots(snapshots: Iterable[Dict[str, Any]], seconds: int = ROLLUP_SECONDS,
+                     into: Optional[Dict[str, Dict[str, Dict[str, array]]]] = None
+                     ) -> Dict[str, Dict[str, Dict[str, array]]]:
+    """
+    Fold snapshots into rollup columns.
+
+    Args:
+        snapshots: Metric snapshots (with 'timestamp')
+        seconds: Bucket width
+        into: Existing host -> series -> columns mapping to extend
+
+    Returns:
+        dict: host -> series name -> FIELDS -> array('d')
+    """
+    series = {} if into is None else into
+    for snapshot in snapshots:
+        ts = snapshot_epoch(snapshot)
+        if ts is None:
+            continue
+        host = (snapshot.get('system') or {}).get('hostname') or 'unknown'
+        bucket = float(int(ts // seconds) * seconds)
+        by_name = series.setdefault(host, {})
+        for section, value in snapshot.items():
+            if section in EXCLUDED_SECTIONS or not isinstance(value, (dict, list)):
+                continue
+            for name, number in flatten_metrics(value, section).items():
+                if math.isfinite(number):
+                    columns = by_name.get(name)
+                    if columns is None:
+                        columns = by_name[name] = _empty_columns()
+                    _add_sample(columns, bucket, number)
+    return series
+
+
+def _encode(column: array) -> str:
+    if sys.byteorder != 'little':
+        column = array('d', column)
+        column.byteswap()
+    return base64.b64encode(column.tobytes()).decode('ascii')
+
+
+def _decode(text: str) -> array:
+    column = array('d')
+    column.frombytes(base64.b64decode(text))
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+class _DayRollup:
+    """Rollups of one daily history file and how much of it they cover.
+
+    The persisted rollups hold every bucket before `until` for the history
+    before `offset`; the samples of later buckets are re-read from `resume`.
+    """
+
+    __slots__ = ('offset', 'size', 'series', 'resume', 'until', 'pending', 'lines', 'logged')
+
+    def __init__(self, offset: int = 0, series=None):
+        self.offset = offset
+        self.size = -1
+        self.series: Dict[str, Dict[str, Dict[str, array]]] = series or {}
+        self.resume = offset
+        self.until = -math.inf
+        # Writers only: rollups not yet in the log, the (offset, bucket) of
+        # the history lines they came from, and records in the log
+        self.pending: Dict[str, Dict[str, Dict[str, array]]] = {}
+        self.lines: List[Tuple[int, float]] = []
+        self.logged = 0
+
+
+class RollupStore:
+    """Per-day rollups of JSONL metric history, updated incrementally."""
+
+    def __init__(self, history_dir, rollup_dir=None, seconds: int = ROLLUP_SECONDS,
+                 use_numpy: Optional[bool] = None, writable: bool = True):
+        """Initialize rollup store
+
+        Args:
+            history_dir: Directory of metrics_YYYYMMDD.jsonl files
+            rollup_dir: Where rollup files are kept (default: <history_dir>/rollups)
+            seconds: Bucket width
+            use_numpy: Return NumPy columns (default: when NumPy is installed)
+            writable: Persist rollups. Only the process that writes the
+                      history should set this; others fold the unpersisted
+                      history tail in memory.
+        """
+        self.history_dir = Path(history_dir)
+        self.rollup_dir = Path(rollup_dir) if rollup_dir else self.history_dir / 'rollups'
+        self.seconds = int(seconds)
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        self.writable = writable
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, _DayRollup]" = OrderedDict()
+
+    def update(self, start: Optional[float] = None, end: Optional[float] = None) -> int:
+        """
+        Roll up history appended since the last update.
+
+        Args:
+            start: Only days overlapping [start, end] (None for unbounded)
+            end: See start
+
+        Returns:
+            int: Number of history bytes consumed
+        """
+        consumed = 0
+        with self._lock:
+            for path in self._history_files(start, end):
+                consumed += self._refresh(path)
+        return consumed
+
+    def load(self, start: float, end: float, host: Optional[str] = None
+             ) -> Dict[str, Dict[str, RollupSeries]]:
+        """
+        Return the rollups of the buckets overlapping [start, end].
+
+        History appended since the last call is rolled up first.
+
+        Args:
+            start: Range start (epoch seconds)
+            end: Range end (epoch seconds)
+            host: Only this host (None for all)
+
+        Returns:
+            dict: host -> series name -> RollupSeries
+        """
+        parts: Dict[str, Dict[str, List[Dict[str, array]]]] = {}
+        with self._lock:
+            for path in self._history_files(start, end):
+                self._refresh(path)
+                day = self._cache[path.name]
+                for day_host, by_name in day.series.items():
+                    if host is not None and day_host != host:
+                        continue
+                    for name, columns in by_name.items():
+                        starts = columns['start']
+                        lo = bisect_right(starts, start - self.seconds)
+                        hi = bisect_right(starts, end)
+                        if lo < hi:
+                            sliced = {field: columns[field][lo:hi] for field in FIELDS}
+                            parts.setdefault(day_host, {}).setdefault(name, []).append(sliced)
+
+        return {day_host: {name: self._join(chunks) for name, chunks in by_name.items()}
+                for day_host, by_name in parts.items()}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _history_files(self, start: Optional[float], end: Optional[float]) -> List[Path]:
+        if not self.history_dir.is_dir():
+            return []
+        # Daily files are named by local day: widen by a day for the offset
+        first = history_filename(start - 86400) if start is not None else None
+        last = history_filename(end + 86400) if end is not None else None
+        return [path for path in sorted(self.history_dir.glob(f"{HISTORY_PREFIX}*{HISTORY_SUFFIX}"))
+                if not ((first and path.name < first) or (last and path.name > last))]
+
+    def _rollup_path(self, history_path: Path) -> Path:
+        return self.rollup_dir / (history_path.name[:-len(HISTORY_SUFFIX)] + ROLLUP_SUFFIX)
+
+    def _log_path(self, history_path: Path) -> Path:
+        return self.rollup_dir / (history_path.name[:-len(HISTORY_SUFFIX)] + ROLLUP_LOG_SUFFIX)
+
+    def _refresh(self, path: Path) -> int:
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return 0
+
+        day = self._cache.get(path.name)
+        if day is None:
+            day = self._read_rollup(path)
+            self._cache[path.name] = day
+        self._cache.move_to_end(path.name)
+        while len(self._cache) > CACHE_DAYS:
+            self._cache.popitem(last=False)
+
+        if size == day.size:
+            return 0
+        if size < day.offset:
+            # History file was rewritten: start over
+            logger.info(f"Rebuilding rollups for {path.name}")
+            day = self._cache[path.name] = _DayRollup()
+            if self.writable:
+                self._remove_rollup(path)
+
+        with path.open('rb') as f:
+            f.seek(day.resume)
+            data = f.read(size - day.resume)
+        complete = data.rfind(b'\n') + 1   # a torn last line is read next time
+        day.size = size
+        if complete == 0:
+            return 0
+
+        snapshots = []
+        position = day.resume
+        for line in data[:complete].splitlines(keepends=True):
+            line_offset, position = position, position + len(line)
+            try:
+                snapshot = json.loads(line)
+            except ValueError:
+                continue
+            ts = snapshot_epoch(snapshot)
+            if ts is None:
+                continue
+            bucket = float(int(ts // self.seconds) * self.seconds)
+            if line_offset < day.offset and bucket < day.until:
+                continue  # already in the persisted rollups
+            snapshots.append(snapshot)
+            if self.writable:
+                day.lines.append((line_offset, bucket))
+
+        delta = rollup_snapshots(snapshots, self.seconds)
+        _merge_series(day.series, delta)
+        consumed = max(day.resume + complete - day.offset, 0)
+        day.offset = day.resume = day.resume + complete
+        if self.writable:
+            _merge_series(day.pending, delta)
+            if path.name < history_filename(time.time()):
+                # The day is over: fold the log into one file
+                self._compact(path, day)
+            else:
+                self._append_closed(path, day)
+        return consumed
+
+    def _read_rollup(self, history_path: Path) -> _DayRollup:
+        path = self._rollup_path(history_path)
+        try:
+            with path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != ROLLUP_VERSION or data.get('seconds') != self.seconds:
+                return self._discard_log(history_path)
+            series = {host: {name: {field: _decode(packed[field]) for field in FIELDS}
+                             for name, packed in by_name.items()}
+                      for host, by_name in data.get('series', {}).items()}
+            day = _DayRollup(int(data.get('offset', 0)), series)
+        except FileNotFoundError:
+            day = _DayRollup()
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable rollup file {path}: {e}")
+            return self._discard_log(history_path)
+
+        log_path = self._log_path(history_path)
+        try:
+            with log_path.open('rb') as f:
+                records = f.read()
+        except OSError:
+            return day
+        good = 0
+        for line in records.splitlines(keepends=True):
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('torn record')
+                record = json.loads(line)
+                if record['seconds'] != self.seconds:
+                    raise ValueError('bucket width changed')
+                delta = {host: {name: {field: array('d', column)
+                                       for field, column in zip(FIELDS, zip(*rows))}
+                                for name, rows in by_name.items()}
+                         for host, by_name in record['series'].items()}
+                offset, resume, until = int(record['offset']), int(record['resume']), float(record['until'])
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # Later records build on this one: the history is re-read instead
+                logger.warning(f"Ignoring rollup log {log_path} from byte {good}: {e}")
+                if self.writable:
+                    try:
+                        os.truncate(log_path, good)
+                    except OSError:
+                        pass
+                break
+            _merge_series(day.series, delta)
+            day.offset, day.resume, day.until = offset, resume, until
+            day.logged += 1
+            good += len(line)
+        return day
+
+    def _discard_log(self, history_path: Path) -> _DayRollup:
+        # A log only makes sense on top of the rollup file it was written after
+        if self.writable:
+            try:
+                self._log_path(history_path).unlink()
+            except OSError:
+                pass
+        return _DayRollup()
+
+    def _append_closed(self, history_path: Path, day: _DayRollup):
+        """Append the buckets that can no longer change to the rollup log."""
+        if not day.lines:
+            return
+        until = max(day.until, max(bucket for _, bucket in day.lines))
+        closed, still_open = _split_series(day.pending, until)
+        if not closed:
+            return
+        keep = [(offset, bucket) for offset, bucket in day.lines if bucket >= until]
+        resume = min((offset for offset, _ in keep), default=day.offset)
+        record = {
+            'seconds': self.seconds,
+            'offset': day.offset,
+            'resume': resume,
+            'until': until,
+            # Usually one bucket per series: plain rows beat packed columns
+            'series': {host: {name: [list(row) for row in zip(*(columns[field] for field in FIELDS))]
+                              for name, columns in by_name.items()}
+                       for host, by_name in closed.items()},
+        }
+        path = self._log_path(history_path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open('a', encoding='utf-8') as f:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        except OSError as e:
+            # Still pending: retried on the next refresh
+            logger.warning(f"Could not append to rollup log {path}: {e}")
+            return
+        day.pending, day.lines = still_open, keep
+        day.until, day.logged = until, day.logged + 1
+
+    def _compact(self, history_path: Path, day: _DayRollup):
+        """Write the whole day to the rollup file and drop its log."""
+        if not day.logged and not day.pending:
+            return
+        # Log first: a crash in between leaves an older rollup file, which
+        # is completed from the history rather than double-counted
+        try:
+            self._log_path(history_path).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not compact rollups for {history_path.name}: {e}")
+            return
+        day.pending, day.lines, day.logged = {}, [], 0
+        day.until = -math.inf
+        self._write_rollup(history_path, day)
+
+    def _remove_rollup(self, history_path: Path):
+        for path in (self._log_path(history_path), self._rollup_path(history_path)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _write_rollup(self, history_path: Path, day: _DayRollup):
+        path = self._rollup_path(history_path)
+        data = {
+            'version': ROLLUP_VERSION,
+            'seconds': self.seconds,
+            'source': history_path.name,
+            'offset': day.offset,
+            'series': {host: {name: {field: _encode(columns[field]) for field in FIELDS}
+                              for name, columns in by_name.items()}
+                       for host, by_name in day.series.items()},
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Rollups are a cache: the next load rebuilds what was not saved
+            logger.warning(f"Could not write rollup file {path}: {e}")
+
+    def _join(self, chunks: List[Dict[str, array]]) -> RollupSeries:
+        if self.use_numpy:
+            columns = {field: np.concatenate([np.frombuffer(chunk[field], dtype=np.float64)
+                                              for chunk in chunks])
+                       for field in FIELDS}
+            return RollupSeries(self.seconds, columns)
+        columns = {field: chunks[0][field] for field in FIELDS}
+        for chunk in chunks[1:]:
+            for field in FIELDS:
+                columns[field] = columns[field] + chunk[field]
+        return RollupSeries.from_arrays(self.seconds, columns, use_numpy=False)
+
+
+# ----------------------------------------------------------------------
+# Range statistics
+# ----------------------------------------------------------------------
+
+def report_thresholds(rules: Optional[List[Rule]] = None) -> List[Tuple[str, float]]:
+    """
+    Return (series pattern, threshold) pairs for time-above-threshold.
+
+    Taken from the '>' / '>=' rules on raw metrics (anomaly and forecast
+    rules are skipped); the lowest threshold wins when rules overlap.
+    """
+    if rules is None:
+        rules = [Rule.from_dict(data) for data in DEFAULT_RULES]
+    thresholds: Dict[str, float] = {}
+    for rule in rules:
+        if rule.op in ('>', '>=') and rule.section not in EXCLUDED_SECTIONS:
+            thresholds[rule.path] = min(rule.threshold, thresholds.get(rule.path, math.inf))
+    return sorted(thresholds.items())
+
+
+def _matches(name: str, patterns) -> bool:
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def _threshold_for(name: str, thresholds: List[Tuple[str, float]]) -> Optional[float]:
+    matched = [threshold for pattern, threshold in thresholds if fnmatchcase(name, pattern)]
+    return min(matched) if matched else None
+
+
+def series_stats(series: RollupSeries, threshold: Optional[float] = None,
+                 percentile: float = 95.0) -> Dict[str, Any]:
+    """
+    Compute min/avg/max/percentile and time above threshold of one series.
+
+    The percentile is taken over bucket means weighted by sample count, so
+    it is exact at the rollup resolution. Time above threshold counts the
+    buckets whose mean exceeds it.
+
+    Returns:
+        dict: {'min', 'avg', 'max', 'p95', 'samples', 'threshold', 'above_seconds'}
+    """
+    if len(series) == 0:
+        return {}
+    q = percentile / 100.0
+    if isinstance(series.n, array) or np is None:
+        counts = list(series.n)
+        total = sum(counts)
+        means = sorted((s / c, c) for s, c in zip(series.sum, counts) if c)
+        target, running, pct = q * total, 0.0, means[-1][0]
+        for mean, count in means:
+            running += count
+            if running >= target:
+                pct = mean
+                break
+        result = {'min': min(series.min), 'max': max(series.max),
+                  'avg': sum(series.sum) / total, 'p' + format(percentile, 'g'): pct,
+                  'samples': int(total)}
+        above = (sum(1 for mean, _ in means if mean > threshold)
+                 if threshold is not None else 0)
+    else:
+        total = series.n.sum()
+        means = series.sum / series.n
+        order = np.argsort(means, kind='stable')
+        cumulative = np.cumsum(series.n[order])
+        index = min(int(np.searchsorted(cumulative, q * total)), len(order) - 1)
+        result = {'min': float(series.min.min()), 'max': float(series.max.max()),
+                  'avg': float(series.sum.sum() / total),
+                  'p' + format(percentile, 'g'): float(means[order[index]]),
+                  'samples': int(total)}
+        above = int(np.count_nonzero(means > threshold)) if threshold is not None else 0
+
+    result['threshold'] = threshold
+    result['above_seconds'] = above * series.seconds
+    return result
+
+
+def counter_total(series: RollupSeries) -> float:
+    """
+    Return the increase of a monotonic counter over the series.
+
+    Deltas are taken between consecutive first/last values; a decrease is
+    a counter reset, after which the new value counts as traffic.
+    """
+    if len(series) == 0:
+        return 0.0
+    if isinstance(series.first, array) or np is None:
+        values = [v for pair in zip(series.first, series.last) for v in pair]
+        total = 0.0
+        for previous, current in zip(values, values[1:]):
+            total += current - previous if current >= previous else current
+        return total
+    values = np.column_stack((series.first, series.last)).ravel()
+    deltas = np.diff(values)
+    return float(np.where(deltas >= 0, deltas, values[1:]).sum())
+
+
+def _resource(name: str, section: str, suffix: str) -> str:
+    return name[len(section) + 1:-(len(suffix) + 1)]
+
+
+def host_summary(by_name: Dict[str, RollupSeries], thresholds: List[Tuple[str, float]],
+                 top_disks: int = 5) -> Dict[str, Any]:
+    """Return the range statistics of one host's rollups."""
+    metrics = []
+    for name in sorted(by_name):
+        if _matches(name, REPORT_METRICS):
+            stats = series_stats(by_name[name], _threshold_for(name, thresholds))
+            if stats:
+                metrics.append(dict(stats, metric=name))
+
+    # Disk growth: change in used percent (and GB when reported) over the range
+    disks = []
+    for name, series in by_name.items():
+        if not (name.startswith('disk.') and len(series)):
+            continue
+        suffix = name.rsplit('.', 1)[-1]
+        if suffix not in DISK_USED_PERCENT:
+            continue
+        disk = _resource(name, 'disk', suffix)
+        entry = {'disk': disk, 'start_percent': float(series.first[0]),
+                 'end_percent': float(series.last[-1])}
+        entry['growth_percent'] = entry['end_percent'] - entry['start_percent']
+        used_gb = by_name.get(f"disk.{disk}.used_gb")
+        if used_gb is not None and len(used_gb):
+            entry['growth_gb'] = float(used_gb.last[-1] - used_gb.first[0])
+        disks.append(entry)
+    disks.sort(key=lambda entry: (-entry['growth_percent'], entry['disk']))
+
+    # Network totals from counter deltas
+    interfaces: Dict[str, Dict[str, float]] = {}
+    for pattern, direction in NETWORK_COUNTERS:
+        for name, series in by_name.items():
+            if fnmatchcase(name, pattern):
+                iface = _resource(name, 'network', direction)
+                if iface.rsplit('.', 1)[-1].lower() in LOOPBACK_INTERFACES:
+                    continue
+                interfaces.setdefault(iface, {'rx_bytes': 0.0, 'tx_bytes': 0.0})[direction] = \
+                    counter_total(series)
+    network = {
+        'rx_bytes': sum(entry['rx_bytes'] for entry in interfaces.values()),
+        'tx_bytes': sum(entry['tx_bytes'] for entry in interfaces.values()),
+        'interfaces': [dict(entry, iface=iface) for iface, entry in sorted(interfaces.items())],
+    }
+
+    return {'metrics': metrics, 'disk_growth': disks[:top_disks], 'network': network}
+
+
+def range_summary(rollups: Dict[str, Dict[str, RollupSeries]], start: float, end: float,
+                  rules: Optional[List[Rule]] = None, top_disks: int = 5) -> Dict[str, Any]:
+    """
+    Summarize a time range from rollups.
+
+    Args:
+        rollups: host -> series name -> RollupSeries (RollupStore.load())
+        start: Range start (epoch seconds)
+        end: Range end (epoch seconds)
+        rules: Rules supplying thresholds (defaults to DEFAULT_RULES)
+        top_disks: Disks listed by growth per host
+
+    Returns:
+        dict: {'start', 'end', 'duration_seconds', 'resolution_seconds',
+               'hosts': [{'host', 'metrics', 'disk_growth', 'network'}, ...]}
+    """
+    thresholds = report_thresholds(rules)
+    resolution = next((series.seconds for by_name in rollups.values()
+                       for series in by_name.values()), ROLLUP_SECONDS)
+    return {
+        'start': start,
+        'end': end,
+        'duration_seconds': end - start,
+        'resolution_seconds': resolution,
+        'hosts': [dict(host_summary(by_name, thresholds, top_disks), host=host)
+                  for host, by_name in sorted(rollups.items())],
+    }
+
+
+# ----------------------------------------------------------------------
+# Fleet comparison
+# ----------------------------------------------------------------------
+
+# Per-host columns of a fleet summary: (name, label, unit)
+FLEET_COLUMNS = (
+    ('cpu_avg', 'CPU avg', '%'),
+    ('cpu_max', 'CPU max', '%'),
+    ('memory_avg', 'Memory avg', '%'),
+    ('memory_max', 'Memory max', '%'),
+    ('temperature_max', 'Temperature max', '°C'),
+    ('disk_percent', 'Fullest disk', '%'),
+    ('rx_bytes', 'Received', 'bytes'),
+    ('tx_bytes', 'Sent', 'bytes'),
+)
+
+# Percentile bands across the fleet
+FLEET_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Rankings: (name, column), highest first
+FLEET_RANKINGS = (
+    ('busiest_cpus', 'cpu_avg'),
+    ('hottest', 'temperature_max'),
+    ('fullest_disks', 'disk_percent'),
+)
+
+# A host is an outlier above p75 + FLEET_OUTLIER_IQR * (p75 - p25)
+FLEET_OUTLIER_IQR = 1.5
+FLEET_OUTLIER_MIN_HOSTS = 4
+
+
+def _reduce(series: RollupSeries) -> Tuple[float, float, float]:
+    """Return (sum, sample count, max) of a series."""
+    if isinstance(series.sum, array) or np is None:
+        return sum(series.sum), sum(series.n), max(series.max)
+    return float(series.sum.sum()), float(series.n.sum()), float(series.max.max())
+
+
+def _fleet_row(by_name: Dict[str, RollupSeries], kinds: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Reduce one host's rollups to the FLEET_COLUMNS scalars (None when absent)."""
+    row: Dict[str, Any] = {name: None for name, _, _ in FLEET_COLUMNS}
+    row['disk'] = None
+    rx = tx = 0.0
+    has_network = False
+    for name, series in by_name.items():
+        if not len(series):
+            continue
+        if name not in kinds:
+            # Classification is shared by every host reporting the series
+            kinds[name] = _fleet_kind(name)
+        kind = kinds[name]
+        if kind is None:
+            continue
+        if kind in ('cpu', 'memory'):
+            total, count, peak = _reduce(series)
+            if count:
+                row[kind + '_avg'] = total / count
+                row[kind + '_max'] = peak
+        elif kind == 'temperature':
+            peak = _reduce(series)[2]
+            if row['temperature_max'] is None or peak > row['temperature_max']:
+                row['temperature_max'] = peak
+        elif kind == 'disk':
+            # Fill at the end of the range
+            used = float(series.last[-1])
+            if row['disk_percent'] is None or used > row['disk_percent']:
+                row['disk_percent'] = used
+                row['disk'] = _resource(name, 'disk', name.rsplit('.', 1)[-1])
+        else:
+            has_network = True
+            if kind == 'rx_bytes':
+                rx += counter_total(series)
+            else:
+                tx += counter_total(series)
+    if has_network:
+        row['rx_bytes'], row['tx_bytes'] = rx, tx
+    return row
+
+
+def _fleet_kind(name: str) -> Optional[str]:
+    if name == 'cpu.usage_percent':
+        return 'cpu'
+    if name == 'memory.usage_percent':
+        return 'memory'
+    if _matches(name, ('temperature.*celsius', 'gpu.*celsius')):
+        return 'temperature'
+    if name.startswith('disk.') and name.rsplit('.', 1)[-1] in DISK_USED_PERCENT:
+        return 'disk'
+    for pattern, direction in NETWORK_COUNTERS:
+        if fnmatchcase(name, pattern):
+            iface = _resource(name, 'network', direction)
+            if iface.rsplit('.', 1)[-1].lower() in LOOPBACK_INTERFACES:
+                return None
+            return direction
+    return None
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated percentile of sorted values (NumPy's default)."""
+    position = (len(ordered) - 1) * q / 100.0
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _fleet_bands(rows: List[Dict[str, Any]]) -> List[List[Optional[float]]]:
+    """Return FLEET_PERCENTILES per column (None for columns no host reports)."""
+    if np is not None and rows:
+        # hosts x columns, NaN where a host lacks the column; one pass for all bands
+        matrix = np.array([[row[name] if row[name] is not None else np.nan
+                            for name, _, _ in FLEET_COLUMNS] for row in rows], dtype=np.float64)
+        present = ~np.isnan(matrix).all(axis=0)
+        bands = np.full((len(FLEET_PERCENTILES), len(FLEET_COLUMNS)), np.nan)
+        if present.any():
+            bands[:, present] = np.nanpercentile(matrix[:, present], FLEET_PERCENTILES, axis=0)
+        return [[None if math.isnan(v) else float(v) for v in column] for column in bands.T]
+    result = []
+    for name, _, _ in FLEET_COLUMNS:
+        ordered = sorted(row[name] for row in rows if row[name] is not None)
+        result.append([_percentile(ordered, q) for q in FLEET_PERCENTILES] if ordered
+                      else [None] * len(FLEET_PERCENTILES))
+    return result
+
+
+def fleet_summary(rollups: Dict[str, Dict[str, RollupSeries]], start: float, end: float,
+                  top: int = 10) -> Dict[str, Any]:
+    """
+    Compare hosts side by side over a time range.
+
+    Each host is reduced to one row of FLEET_COLUMNS (CPU and memory
+    average/max, hottest sensor, fullest disk at the end of the range,
+    network totals); bands, rankings and outliers are then computed over
+    those columns across the fleet. Percentiles are interpolated between
+    hosts; hosts without a column are left out of its statistics.
+
+    Args:
+        rollups: host -> series name -> RollupSeries (RollupStore.load())
+        start: Range start (epoch seconds)
+        end: Range end (epoch seconds)
+        top: Hosts listed per ranking
+
+    Returns:
+        dict: {'start', 'end', 'duration_seconds', 'resolution_seconds',
+               'host_count', 'hosts': [row, ...] (by host name),
+               'bands': [{'metric', 'label', 'unit', 'hosts', 'p5', ..., 'p95'}, ...],
+               'rankings': {'busiest_cpus', 'hottest', 'fullest_disks': [row, ...]},
+               'outliers': [{'host', 'metric', 'label', 'unit', 'value',
+                             'median', 'fence'}, ...]}
+    """
+    resolution = next((series.seconds for by_name in rollups.values()
+                       for series in by_name.values()), ROLLUP_SECONDS)
+    kinds: Dict[str, Optional[str]] = {}
+    rows = [dict(_fleet_row(by_name, kinds), host=host)
+            for host, by_name in sorted(rollups.items())]
+
+    bands = []
+    outliers = []
+    for (name, label, unit), values in zip(FLEET_COLUMNS, _fleet_bands(rows)):
+        reporting = sum(1 for row in rows if row[name] is not None)
+        band = {'metric': name, 'label': label, 'unit': unit, 'hosts': reporting}
+        band.update(('p' + format(q, 'g'), v) for q, v in zip(FLEET_PERCENTILES, values))
+        bands.append(band)
+        if reporting < FLEET_OUTLIER_MIN_HOSTS:
+            continue
+        fence = band['p75'] + FLEET_OUTLIER_IQR * (band['p75'] - band['p25'])
+        outliers.extend({'host': row['host'], 'metric': name, 'label': label, 'unit': unit,
+                         'value': row[name], 'median': band['p50'], 'fence': fence}
+                        for row in rows if row[name] is not None and row[name] > fence)
+    outliers.sort(key=lambda entry: (entry['metric'], -entry['value'], entry['host']))
+
+    rankings = {}
+    for ranking, column in FLEET_RANKINGS:
+        ranked = sorted((row for row in rows if row[column] is not None),
+                        key=lambda row: (-row[column], row['host']))
+        rankings[ranking] = ranked[:top]
+
+    return {
+        'start': start,
+        'end': end,
+        'duration_seconds': end - start,
+        'resolution_seconds': resolution,
+        'host_count': len(rows),
+        'hosts': rows,
+        'bands': bands,
+        'rankings': rankings,
+        'outliers': outliers,
+    }
+
+
+RANGE_PRESETS = {'1h': 3600, '24h': 86400, '1d': 86400, '7d': 7 * 86400, '1w': 7 * 86400}
+
+
+def preset_range(name: str, now: float, align: int = ROLLUP_SECONDS) -> Tuple[float, float]:
+    """
+    Return (start, end) for a preset such as '1h', '24h' or '7d'.
+
+    The end is aligned to the rollup interval so the same request made a
+    few seconds apart names the same range.
+    """
+    if name not in RANGE_PRESETS:
+        raise ValueError(f"Unknown range {name!r} (expected one of {', '.join(RANGE_PRESETS)})")
+    end = float(int(now // align) * align)
+    return end - RANGE_PRESETS[name], end
+
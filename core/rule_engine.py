@@ -0,0 +1,395 @@
+"""
+Rule Engine Module
+
+Evaluates declarative threshold rules against each new metrics snapshot
+and raises or resolves alerts through the alert manager.
+
+Rule expressions:
+    cpu.usage_percent > 85 for 2m
+    cpu.usage_percent > 85 for 2m clear 75
+    disk.*.used_percent > 90
+    temperature.cpu_celsius >= 80 for 30s
+
+The optional 'clear' threshold adds hysteresis: a firing rule stays
+firing while the value still satisfies the operator against the clear
+threshold, so a signal oscillating around the raise threshold does not
+raise and resolve on every sample.
+
+A '*' segment matches every entry of a list (keyed by device/iface/name)
+or every value of a dict; each match is tracked as its own resource.
+Rules are compiled once into accessor closures and indexed by the
+top-level section they read, so an update only runs the rules whose
+sections changed (plus rules with a pending 'for' timer).
+"""
+
+import json
+import logging
+import operator
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .alert_lifecycle import AlertLifecycle
+from .alert_manager import ALERT_LEVELS, DEFAULT_ALERTS_PATH
+from .metrics_collector import identity_key, snapshot_epoch
+
+logger = logging.getLogger(__name__)
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_RULE_RE = re.compile(
+    r'^\s*(?P<path>[^\s<>=!]+)\s*(?P<op>>=|<=|==|!=|>|<)\s*(?P<threshold>-?\d+(?:\.\d+)?)'
+    r'(?:\s+for\s+(?P<duration>\d+(?:\.\d+)?\s*[smhd]?))?'
+    r'(?:\s+clear\s+(?P<clear>-?\d+(?:\.\d+)?))?\s*$'
+)
+
+# Rules used when no RULES_CONFIG is provided
+DEFAULT_RULES = [
+    {'name': 'cpu_high', 'expr': 'cpu.usage_percent > 85 for 2m clear 75', 'level': 'warning'},
+    {'name': 'memory_high', 'expr': 'memory.usage_percent > 90 for 2m clear 85', 'level': 'critical'},
+    {'name': 'disk_full', 'expr': 'disk.*.used_percent > 90 clear 88', 'level': 'critical'},
+    {'name': 'cpu_temperature_high', 'expr': 'temperature.cpu_celsius > 85 for 1m clear 80', 'level': 'warning'},
+    {'name': 'gpu_temperature_high', 'expr': 'temperature.gpu_celsius > 85 for 1m clear 80', 'level': 'warning'},
+    # Scores from core.anomaly (present when snapshots are annotated)
+    {'name': 'cpu_anomaly', 'expr': 'anomaly.cpu.usage_percent > 6 for 5m clear 3', 'level': 'info'},
+    {'name': 'memory_anomaly', 'expr': 'anomaly.memory.usage_percent > 6 for 5m clear 3', 'level': 'info'},
+    # Trends from core.forecast
+    {'name': 'disk_full_forecast', 'expr': 'forecast.disk.*.hours_to_full < 24 clear 48', 'level': 'warning',
+     'message': 'Disk {resource} projected full in {value:.1f} h'},
+    {'name': 'thermal_forecast', 'expr': 'forecast.temperature.*.hours_to_threshold < 0.5 clear 1',
+     'level': 'warning', 'message': 'Sensor {resource} projected to reach its threshold in {value:.1f} h'},
+]
+
+Accessor = Callable[[Dict[str, Any]], List[Tuple[str, Any]]]
+
+
+def parse_duration(text: Optional[str]) -> float:
+    """
+    Parse a duration such as '30s', '2m', '1h' (bare numbers are seconds).
+
+    Example:
+        >>> parse_duration('2m')
+        120.0
+    """
+    if not text:
+        return 0.0
+    text = text.strip()
+    unit = text[-1] if text[-1] in _DURATION_UNITS else 's'
+    number = text[:-1] if text[-1] in _DURATION_UNITS else text
+    return float(number) * _DURATION_UNITS[unit]
+
+
+def compile_accessor(path: str) -> Accessor:
+    """
+    Compile a dot path (with optional '*' segments) into an accessor.
+
+    The accessor takes a snapshot and returns (resource, value) pairs. The
+    resource joins the keys matched by '*' segments ('' for plain paths).
+
+    Example:
+        >>> get = compile_accessor('disk.*.used_percent')
+        >>> get({'disk': [{'device': '/', 'used_percent': 91.0}]})
+        [('/', 91.0)]
+    """
+    segments = path.split('.')
+
+    def build(index: int) -> Callable[[Any, str, list], None]:
+        if index == len(segments):
+            def emit(node, resource, out):
+                out.append((resource, node))
+            return emit
+
+        segment = segments[index]
+        child = build(index + 1)
+
+        if segment == '*':
+            def wildcard(node, resource, out):
+                if isinstance(node, list):
+                    pairs = ((identity_key(entry, pos), entry) for pos, entry in enumerate(node))
+                elif isinstance(node, dict):
+                    pairs = node.items()
+                else:
+                    return
+                for key, value in pairs:
+                    child(value, f"{resource}.{key}" if resource else str(key), out)
+            return wildcard
+
+        def step(node, resource, out):
+            if isinstance(node, dict) and segment in node:
+                child(node[segment], resource, out)
+        return step
+
+    walk = build(0)
+
+    def accessor(snapshot: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        out: List[Tuple[str, Any]] = []
+        walk(snapshot, '', out)
+        return out
+
+    return accessor
+
+
+@dataclass
+class Rule:
+    """A compiled threshold rule.
+
+    Attributes:
+        name: Unique rule name
+        expression: Source expression, e.g. 'cpu.usage_percent > 85 for 2m'
+        level: Alert level raised when the rule fires
+        message: Optional message template ({resource}, {value}, {threshold})
+        clear: Optional clear threshold (overrides 'clear N' in the expression)
+    """
+    name: str
+    expression: str
+    level: str = 'warning'
+    message: Optional[str] = None
+    clear: Optional[float] = None
+
+    path: str = field(init=False)
+    op: str = field(init=False)
+    threshold: float = field(init=False)
+    for_seconds: float = field(init=False)
+    section: str = field(init=False)
+    accessor: Accessor = field(init=False, repr=False)
+
+    def __post_init__(self):
+        match = _RULE_RE.match(self.expression)
+        if not match:
+            raise ValueError(f"Invalid rule expression: {self.expression!r}")
+        if self.level not in ALERT_LEVELS:
+            raise ValueError(f"Invalid alert level {self.level!r} for rule {self.name}")
+
+        self.path = match.group('path')
+        self.op = match.group('op')
+        self.threshold = float(match.group('threshold'))
+        self.for_seconds = parse_duration(match.group('duration'))
+        if self.clear is None and match.group('clear') is not None:
+            self.clear = float(match.group('clear'))
+        self.section = self.path.split('.', 1)[0]
+        self.accessor = compile_accessor(self.path)
+        self._compare = OPERATORS[self.op]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Rule':
+        """Build a rule from {'name', 'expr', 'level', 'message', 'clear'}."""
+        return cls(
+            name=data['name'],
+            expression=data.get('expr') or data['expression'],
+            level=data.get('level', 'warning'),
+            message=data.get('message'),
+            clear=data.get('clear')
+        )
+
+    def matches(self, value: float) -> bool:
+        """Return True if `value` violates the rule's threshold."""
+        return self._compare(value, self.threshold)
+
+    def still_firing(self, value: float) -> bool:
+        """Return True if a firing rule should stay firing (clear threshold)."""
+        return self._compare(value, self.threshold if self.clear is None else self.clear)
+
+    def format_message(self, resource: str, value: float) -> str:
+        """Render the alert message for one resource."""
+        template = self.message or '{path} {op} {threshold:g} (current: {value:.1f})'
+        target = self.path.replace('*', resource) if resource else self.path
+        return template.format(path=target, op=self.op, threshold=self.threshold,
+                               value=value, resource=resource, rule=self.name)
+
+
+@dataclass
+class RuleEvent:
+    """A rule state transition ('raise' or 'resolve')."""
+    kind: str
+    rule: Rule
+    resource: str
+    value: Optional[float]
+    timestamp: float
+    host: Optional[str] = None
+    source: Optional[str] = None
+
+
+@dataclass
+class _RuleState:
+    pending_since: Optional[float] = None
+    firing: bool = False
+    value: Optional[float] = None
+
+
+def load_rules(path) -> List[Rule]:
+    """
+    Load rules from a JSON file holding a list of rule objects.
+
+    Example file:
+        [{"name": "cpu_high", "expr": "cpu.usage_percent > 85 for 2m", "level": "warning"}]
+    """
+    with Path(path).open('r', encoding='utf-8') as f:
+        return [Rule.from_dict(entry) for entry in json.load(f)]
+
+
+class AlertManagerSink:
+    """Write rule events to the alert log through an AlertLifecycle.
+
+    The lifecycle deduplicates repeated raises and dampens flapping rules
+    before rows reach core.alert_manager.
+    """
+
+    def __init__(self, path: str = DEFAULT_ALERTS_PATH,
+                 lifecycle: Optional[AlertLifecycle] = None):
+        self.path = path
+        self.lifecycle = lifecycle if lifecycle is not None else AlertLifecycle(path)
+
+    def __call__(self, event: RuleEvent):
+        rule = event.rule
+        resource = event.resource or None
+        if event.kind == 'raise':
+            self.lifecycle.open(rule.section, rule.level,
+                                rule.format_message(event.resource, event.value),
+                                value=event.value, threshold=rule.threshold,
+                                resource=resource, host=event.host, now=event.timestamp,
+                                rule=rule.name, source=event.source)
+        else:
+            target = rule.path.replace('*', event.resource) if event.resource else rule.path
+            self.lifecycle.resolve(rule.section, rule.level, resource=resource, host=event.host,
+                                   value=event.value, now=event.timestamp,
+                                   message=f"Resolved: {target} back within threshold")
+
+    def tick(self, now: float):
+        """Let the lifecycle end flapping periods."""
+        self.lifecycle.tick(now)
+
+
+class RuleEngine:
+    """Evaluate compiled rules on every new snapshot."""
+
+    def __init__(self, rules: Optional[List[Rule]] = None,
+                 sink: Optional[Callable[[RuleEvent], None]] = None):
+        """Initialize rule engine
+
+        Args:
+            rules: Rules to evaluate (defaults to DEFAULT_RULES)
+            sink: Called with each RuleEvent (defaults to AlertManagerSink)
+        """
+        if rules is None:
+            rules = [Rule.from_dict(data) for data in DEFAULT_RULES]
+        self.sink = sink if sink is not None else AlertManagerSink()
+
+        self.rules: List[Rule] = []
+        self.rules_by_section: Dict[str, List[Rule]] = {}
+        for rule in rules:
+            self.add_rule(rule)
+
+        # (host, rule name) -> resource -> state
+        self._states: Dict[Tuple[str, str], Dict[str, _RuleState]] = {}
+        self._previous: Dict[str, Dict[str, Any]] = {}
+
+    def add_rule(self, rule: Rule):
+        """Register a rule and index it by the section it reads."""
+        if any(existing.name == rule.name for existing in self.rules):
+            raise ValueError(f"Duplicate rule name: {rule.name}")
+        self.rules.append(rule)
+        self.rules_by_section.setdefault(rule.section, []).append(rule)
+
+    def on_snapshot(self, snapshot: Dict[str, Any], now: Optional[float] = None,
+                    host: Optional[str] = None) -> List[RuleEvent]:
+        """
+        Evaluate the rules affected by a new snapshot.
+
+        Args:
+            snapshot: Metrics snapshot
+            now: Evaluation time in epoch seconds (default: snapshot timestamp)
+            host: Host name (default: system.hostname)
+
+        Returns:
+            list: RuleEvents emitted (also passed to the sink)
+        """
+        if now is None:
+            now = snapshot_epoch(snapshot, time.time())
+        if host is None:
+            host = (snapshot.get('system') or {}).get('hostname') or 'unknown'
+
+        previous = self._previous.get(host, {})
+        changed = {section for section in self.rules_by_section
+                   if snapshot.get(section) != previous.get(section)}
+        self._previous[host] = {section: snapshot.get(section) for section in self.rules_by_section}
+
+        events: List[RuleEvent] = []
+        for rule in self.rules:
+            states = self._states.get((host, rule.name))
+            has_pending = states is not None and any(
+                s.pending_since is not None and not s.firing for s in states.values())
+            if rule.section in changed or has_pending:
+                events.extend(self._evaluate(rule, snapshot, now, host))
+
+        # Tag events with the agent that produced the snapshot (legacy/native)
+        source = snapshot.get('source')
+        for event in events:
+            event.source = source
+
+        for event in events:
+            try:
+                self.sink(event)
+            except Exception as e:
+                logger.error(f"Alert sink failed for rule {event.rule.name}: {e}")
+
+        tick = getattr(self.sink, 'tick', None)
+        if tick is not None:
+            tick(now)
+        return events
+
+    def _evaluate(self, rule: Rule, snapshot: Dict[str, Any], now: float,
+                  host: str) -> List[RuleEvent]:
+        states = self._states.setdefault((host, rule.name), {})
+        events = []
+        seen = set()
+
+        for resource, raw in rule.accessor(snapshot):
+            if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+                continue
+            value = float(raw)
+            seen.add(resource)
+            state = states.setdefault(resource, _RuleState())
+            state.value = value
+
+            if state.firing:
+                if not rule.still_firing(value):
+                    state.firing = False
+                    state.pending_since = None
+                    events.append(RuleEvent('resolve', rule, resource, value, now, host))
+            elif rule.matches(value):
+                if state.pending_since is None:
+                    state.pending_since = now
+                if now - state.pending_since >= rule.for_seconds:
+                    state.firing = True
+                    events.append(RuleEvent('raise', rule, resource, value, now, host))
+            else:
+                state.pending_since = None
+
+        # Resources that disappeared (e.g. unmounted disk) resolve and are dropped
+        for resource in [r for r in states if r not in seen]:
+            state = states.pop(resource)
+            if state.firing:
+                events.append(RuleEvent('resolve', rule, resource, state.value, now, host))
+
+        return events
+
+    def firing(self) -> List[Dict[str, Any]]:
+        """Return the currently firing (host, rule, resource) combinations."""
+        active = []
+        for (host, name), states in self._states.items():
+            for resource, state in states.items():
+                if state.firing:
+                    active.append({'host': host, 'rule': name, 'resource': resource,
+                                   'value': state.value})
+        return active
@@ -0,0 +1,434 @@
+"""
+SQLite Store Module
+
+Optional single-file storage backend for alerts and metric history.
+Intended for single-host installs that prefer one durable file over a
+directory of JSON files. Uses WAL journaling, batched inserts inside
+transactions and a fixed set of (statement-cached) queries for the
+dashboard's common shapes.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .metrics_collector import flatten_metrics, snapshot_epoch
+
+logger = logging.getLogger(__name__)
+
+# Paths with these suffixes are treated as SQLite databases by alert_manager
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# Alert levels (kept in sync with core.alert_manager.ALERT_LEVELS)
+ALERT_LEVELS = ['info', 'warning', 'critical']
+
+# Columns stored natively; anything else goes into the 'extra' JSON column
+_ALERT_COLUMNS = ('level', 'metric', 'host', 'message', 'value', 'threshold', 'timestamp')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts        REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    level     TEXT NOT NULL,
+    metric    TEXT NOT NULL,
+    host      TEXT,
+    message   TEXT,
+    value     REAL,
+    threshold REAL,
+    extra     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_level_ts ON alerts (level, ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts);
+
+CREATE TABLE IF NOT EXISTS samples (
+    host   TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts     REAL NOT NULL,
+    value  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_host_metric_ts ON samples (host, metric, ts);
+-- Fleet-wide time ranges (rollups without a host) scan by ts alone
+CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples (ts);
+"""
+
+# Prepared queries. sqlite3 caches compiled statements per connection, so
+# reusing these exact strings avoids re-parsing on every call.
+SQL_INSERT_ALERT = (
+    "INSERT INTO alerts (ts, timestamp, level, metric, host, message, value, threshold, extra) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_LATEST_ALERTS = "SELECT * FROM alerts ORDER BY ts DESC, id DESC LIMIT ?"
+SQL_LATEST_ALERTS_BY_LEVEL = "SELECT * FROM alerts WHERE level = ? ORDER BY ts DESC, id DESC LIMIT ?"
+SQL_ALERT_COUNTS = "SELECT level, COUNT(*) FROM alerts GROUP BY level"
+SQL_ALERTS_AFTER = "SELECT * FROM alerts WHERE id > ? ORDER BY id"
+SQL_ALERT_IDS = "SELECT id FROM alerts"
+SQL_CLEAR_ALERTS = "DELETE FROM alerts"
+SQL_DELETE_ALERTS_BEFORE = "DELETE FROM alerts WHERE ts < ?"
+SQL_DELETE_ALERTS_BEYOND = (
+    "DELETE FROM alerts WHERE id NOT IN "
+    "(SELECT id FROM alerts ORDER BY ts DESC, id DESC LIMIT ?)"
+)
+SQL_INSERT_SAMPLE = "INSERT INTO samples (host, metric, ts, value) VALUES (?, ?, ?, ?)"
+SQL_SERIES = (
+    "SELECT ts, value FROM samples WHERE host = ? AND metric = ? AND ts >= ? AND ts <= ? "
+    "ORDER BY ts"
+)
+SQL_HOSTS = "SELECT DISTINCT host FROM samples"
+# Rollups: per-bucket aggregates, then the first and last value of each bucket
+# (SQLite takes bare columns from the row holding the MIN()/MAX())
+_SQL_ROLLUP_RANGE = "FROM samples WHERE ts >= ? AND ts <= ?{host} GROUP BY host, metric, bucket ORDER BY host, metric, bucket"
+SQL_ROLLUPS = ("SELECT host, metric, CAST(ts / ? AS INTEGER) AS bucket, COUNT(*), SUM(value), "
+               "MIN(value), MAX(value) " + _SQL_ROLLUP_RANGE)
+SQL_ROLLUP_FIRST = "SELECT CAST(ts / ? AS INTEGER) AS bucket, MIN(ts), value " + _SQL_ROLLUP_RANGE
+SQL_ROLLUP_LAST = "SELECT CAST(ts / ? AS INTEGER) AS bucket, MAX(ts), value " + _SQL_ROLLUP_RANGE
+
+# Cache of open stores, one per database path
+_stores: Dict[str, 'SQLiteStore'] = {}
+_stores_lock = threading.Lock()
+
+
+def is_sqlite_path(path) -> bool:
+    """Return True if `path` names a SQLite database (by suffix)."""
+    return Path(path).suffix.lower() in SQLITE_SUFFIXES
+
+
+def open_store(path) -> 'SQLiteStore':
+    """
+    Return the shared SQLiteStore for `path`, opening it on first use.
+
+    Args:
+        path: Database file path
+
+    Returns:
+        SQLiteStore: Open store (shared per resolved path)
+    """
+    key = str(Path(path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = SQLiteStore(path)
+            _stores[key] = store
+        return store
+
+
+def close_store(path) -> bool:
+    """
+    Close the shared SQLiteStore for `path` (at shutdown).
+
+    A later open_store() for the same path opens a fresh store.
+
+    Returns:
+        bool: Whether a store was open
+    """
+    key = str(Path(path).resolve())
+    with _stores_lock:
+        store = _stores.pop(key, None)
+    if store is None:
+        return False
+    store.close()
+    return True
+
+
+def _utc_iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _alert_row(alert: Dict[str, Any]) -> Tuple:
+    ts = _parse_iso(alert.get('timestamp'))
+    if ts is None:
+        ts = time.time()
+    extra = {k: v for k, v in alert.items() if k not in _ALERT_COLUMNS and k != 'id'}
+    return (
+        ts,
+        alert.get('timestamp') or _utc_iso(ts),
+        alert.get('level', 'info'),
+        alert.get('metric', 'unknown'),
+        alert.get('host'),
+        alert.get('message'),
+        alert.get('value'),
+        alert.get('threshold'),
+        json.dumps(extra) if extra else None
+    )
+
+
+def _parse_iso(value: Any) -> Optional[float]:
+    if not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class SQLiteStore:
+    """Alert log and metric history stored in a single SQLite file."""
+
+    def __init__(self, path, timeout: float = 5.0):
+        """Open (and create if needed) the database
+
+        Args:
+            path: Database file path
+            timeout: Seconds to wait on a locked database
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=timeout,
+            check_same_thread=False,
+            isolation_level=None,  # explicit transactions only
+            cached_statements=128
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        logger.debug(f"Opened SQLite store: {self.path}")
+
+    def close(self):
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, rows: Iterable[Tuple]) -> int:
+        """Run a batched insert inside a single transaction."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(sql, rows)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(rows)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ------------------------------------------------------------------
+    # Alerts
+    # ------------------------------------------------------------------
+
+    def insert_alerts(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert alerts in one transaction.
+
+        Args:
+            alerts: Alert dicts in the alerts.json format
+
+        Returns:
+            int: Number of alerts inserted
+        """
+        return self._write(SQL_INSERT_ALERT, [_alert_row(alert) for alert in alerts])
+
+    def insert_alert(self, alert: Dict[str, Any]) -> int:
+        """Insert one alert and return its row id."""
+        with self._lock:
+            return self._conn.execute(SQL_INSERT_ALERT, _alert_row(alert)).lastrowid
+
+    def latest_alerts(self, limit: Optional[int] = None,
+                      level: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return the newest alerts, optionally for one level.
+
+        Args:
+            limit: Maximum number of alerts (None or <= 0 for all)
+            level: Optional level filter
+
+        Returns:
+            list: Alert dicts, newest first
+        """
+        limit = limit if limit and limit > 0 else -1
+        if level:
+            rows = self._query(SQL_LATEST_ALERTS_BY_LEVEL, (level, limit))
+        else:
+            rows = self._query(SQL_LATEST_ALERTS, (limit,))
+        return [self._row_to_alert(row) for row in rows]
+
+    def alerts_after(self, after_id: int = 0) -> List[Dict[str, Any]]:
+        """
+        Return the alerts inserted after `after_id`, oldest first.
+
+        Ids come from AUTOINCREMENT, so they are never reused and this is a
+        primary-key range scan over just the new rows.
+        """
+        return [self._row_to_alert(row) for row in self._query(SQL_ALERTS_AFTER, (after_id,))]
+
+    def alert_ids(self) -> Set[int]:
+        """Return the ids of every stored alert."""
+        return {row[0] for row in self._query(SQL_ALERT_IDS)}
+
+    def alert_counts(self) -> Dict[str, int]:
+        """Return the number of alerts per level."""
+        counts = {level: 0 for level in ALERT_LEVELS}
+        for level, count in self._query(SQL_ALERT_COUNTS):
+            counts[level] = count
+        return counts
+
+    def clear_alerts(self) -> int:
+        """Delete all alerts. Returns the number deleted."""
+        with self._lock:
+            cursor = self._conn.execute(SQL_CLEAR_ALERTS)
+            return cursor.rowcount
+
+    def trim_alerts(self, max_count: Optional[int] = None,
+                    before_ts: Optional[float] = None) -> int:
+        """
+        Delete alerts older than `before_ts` and beyond the newest `max_count`.
+
+        Returns:
+            int: Number of alerts deleted
+        """
+        removed = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if before_ts is not None:
+                    removed += self._conn.execute(SQL_DELETE_ALERTS_BEFORE, (before_ts,)).rowcount
+                if max_count is not None:
+                    removed += self._conn.execute(SQL_DELETE_ALERTS_BEYOND, (max_count,)).rowcount
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return removed
+
+    @staticmethod
+    def _row_to_alert(row: sqlite3.Row) -> Dict[str, Any]:
+        alert = {
+            'id': row['id'],
+            'level': row['level'],
+            'metric': row['metric'],
+            'message': row['message'],
+            'timestamp': row['timestamp']
+        }
+        for column in ('host', 'value', 'threshold'):
+            if row[column] is not None:
+                alert[column] = row[column]
+        if row['extra']:
+            try:
+                alert.update(json.loads(row['extra']))
+            except ValueError:
+                pass
+        return alert
+
+    # ------------------------------------------------------------------
+    # Metric history
+    # ------------------------------------------------------------------
+
+    def insert_samples(self, samples: Iterable[Tuple[str, str, float, float]]) -> int:
+        """
+        Insert (host, metric, ts, value) samples in one transaction.
+
+        Returns:
+            int: Number of samples inserted
+        """
+        return self._write(SQL_INSERT_SAMPLE, samples)
+
+    def insert_snapshot(self, metrics: Dict[str, Any], host: Optional[str] = None,
+                        ts: Optional[float] = None) -> int:
+        """
+        Flatten a metrics snapshot and store every numeric series.
+
+        Args:
+            metrics: Metrics snapshot (Host API / latest.json format)
+            host: Host name (defaults to system.hostname)
+            ts: Sample time in epoch seconds (defaults to the snapshot timestamp)
+
+        Returns:
+            int: Number of samples inserted
+        """
+        return self.insert_snapshots([(metrics, host, ts)])
+
+    def insert_snapshots(self, snapshots: Iterable[Tuple[Dict[str, Any], Optional[str], Optional[float]]]) -> int:
+        """Store several snapshots in a single transaction."""
+        rows = []
+        for metrics, host, ts in snapshots:
+            host = host or (metrics.get('system') or {}).get('hostname') or 'unknown'
+            ts = ts if ts is not None else snapshot_epoch(metrics, time.time())
+            rows.extend((host, name, ts, value) for name, value in flatten_metrics(metrics).items())
+        return self.insert_samples(rows)
+
+    def append_batch(self, snapshots: List[Dict[str, Any]]) -> int:
+        """History-writer interface (see core.history): store snapshots in one transaction."""
+        self.insert_snapshots((snapshot, None, None) for snapshot in snapshots)
+        return len(snapshots)
+
+    def flush(self):
+        """History-writer interface; commits are already durable."""
+
+    def series(self, host: str, metric: str, start: float = 0.0,
+               end: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        Return (ts, value) points of one series over a time range.
+
+        Args:
+            host: Host name
+            metric: Series name (see core.metrics_collector.flatten_metrics)
+            start: Inclusive start (epoch seconds)
+            end: Inclusive end (epoch seconds, default now)
+
+        Returns:
+            list: Points ordered by time
+        """
+        end = end if end is not None else time.time()
+        return [(row[0], row[1]) for row in self._query(SQL_SERIES, (host, metric, start, end))]
+
+    def rollups(self, start: float, end: float, host: Optional[str] = None,
+                seconds: int = 60) -> Dict[str, Dict[str, Any]]:
+        """
+        Return per-bucket rollups of the samples within [start, end].
+
+        Same shape as core.rollups.RollupStore.load(), computed in SQL.
+
+        Args:
+            start: Inclusive start (epoch seconds)
+            end: Inclusive end (epoch seconds)
+            host: Only this host (None for all)
+            seconds: Bucket width
+
+        Returns:
+            dict: host -> series name -> RollupSeries
+        """
+        # Imported here: core.rollups depends on modules that import this one
+        from array import array
+        from .rollups import FIELDS, RollupSeries
+
+        host_clause = ' AND host = ?' if host is not None else ''
+        params = (seconds, start, end) + ((host,) if host is not None else ())
+        aggregates = self._query(SQL_ROLLUPS.format(host=host_clause), params)
+        firsts = self._query(SQL_ROLLUP_FIRST.format(host=host_clause), params)
+        lasts = self._query(SQL_ROLLUP_LAST.format(host=host_clause), params)
+
+        columns_by_series: Dict[Tuple[str, str], Dict[str, array]] = {}
+        for row, first, last in zip(aggregates, firsts, lasts):
+            columns = columns_by_series.get((row[0], row[1]))
+            if columns is None:
+                columns = columns_by_series[(row[0], row[1])] = {name: array('d') for name in FIELDS}
+            for name, value in zip(FIELDS, (row[2] * seconds, row[3], row[4], row[5], row[6],
+                                            first[2], last[2])):
+                columns[name].append(value)
+
+        result: Dict[str, Dict[str, Any]] = {}
+        for (series_host, metric), columns in columns_by_series.items():
+            result.setdefault(series_host, {})[metric] = RollupSeries.from_arrays(seconds, columns)
+        return result
+
+    def hosts(self) -> List[str]:
+        """Return the hosts with stored samples."""
+        return sorted(row[0] for row in self._query(SQL_HOSTS))
@@ -0,0 +1,300 @@
+"""
+Write-Ahead Log Module
+
+Small append-only log that makes the collector-to-store path crash
+consistent. Every incoming sample is framed as
+
+    [length: uint32 LE][crc32: uint32 LE][payload: compact JSON, UTF-8]
+
+and made durable before it is handed to the writer. On start-up the log
+is replayed into the history store and then checkpointed. A torn or
+corrupt tail (crash mid-write) is detected by the length/CRC check and
+skipped.
+
+Durability uses group commit: concurrent callers of commit() share a
+single write+fsync, so throughput is bounded by fsync latency per batch
+rather than per record.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('<II')
+
+# Refuse absurd lengths from a corrupt header instead of allocating them
+MAX_RECORD_BYTES = 16 * 1024 * 1024
+
+
+def encode_record(record: Any) -> bytes:
+    """Frame a JSON-serializable record with its length and CRC32."""
+    payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class WriteAheadLog:
+    """Append-only, CRC-checked record log with group commit."""
+
+    def __init__(self, path, fsync: bool = True):
+        """Initialize write-ahead log
+
+        Args:
+            path: Log file path (created on first append)
+            fsync: fsync on commit (disable only for tests/benchmarks)
+        """
+        self.path = Path(path)
+        self.fsync = fsync
+
+        self._cond = threading.Condition()
+        self._file = None
+        self._pending = bytearray()       # appended but not yet written
+        self._frames: Deque[Tuple[int, bytes]] = deque()  # since last checkpoint
+        self._appended_lsn = 0
+        self._durable_lsn = 0
+        self._flushing = False
+        self._recovered = False
+
+        self.torn_bytes = 0  # bytes skipped at the tail by the last replay
+
+    # ------------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------------
+
+    def append(self, record: Any) -> int:
+        """
+        Buffer one record. It is durable only after commit().
+
+        Args:
+            record: JSON-serializable record
+
+        Returns:
+            int: Log sequence number (LSN) of the record
+        """
+        return self.append_many([record])
+
+    def append_many(self, records: Iterable[Any]) -> int:
+        """
+        Buffer several records.
+
+        Returns:
+            int: LSN of the last record appended
+        """
+        frames = [encode_record(record) for record in records]
+        with self._cond:
+            self._ensure_recovered()
+            for frame in frames:
+                self._appended_lsn += 1
+                self._pending += frame
+                self._frames.append((self._appended_lsn, frame))
+            return self._appended_lsn
+
+    def commit(self, lsn: Optional[int] = None) -> int:
+        """
+        Make every record up to `lsn` (default: all appended) durable.
+
+        Callers that arrive while another thread is flushing wait for that
+        flush and are usually covered by it (group commit).
+
+        Returns:
+            int: Highest durable LSN
+        """
+        with self._cond:
+            target = self._appended_lsn if lsn is None else lsn
+            while self._durable_lsn < target:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+
+                self._flushing = True
+                data = bytes(self._pending)
+                self._pending.clear()
+                batch_lsn = self._appended_lsn
+                self._cond.release()
+                written = False
+                try:
+                    self._write(data)
+                    written = True
+                finally:
+                    self._cond.acquire()
+                    if written:
+                        self._durable_lsn = max(self._durable_lsn, batch_lsn)
+                    else:
+                        # Keep the data so a later commit can retry it
+                        self._pending[0:0] = data
+                    self._flushing = False
+                    self._cond.notify_all()
+            return self._durable_lsn
+
+    def _write(self, data: bytes):
+        if not data:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'ab')
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def replay(self) -> Iterator[Any]:
+        """
+        Yield the records stored in the log, oldest first.
+
+        Reading stops at the first frame whose length or CRC does not check
+        out; everything after it is a torn tail and is truncated away before
+        the next append. Replayed records keep their place in the log (with
+        fresh LSNs) until checkpoint() confirms they reached the store.
+
+        Yields:
+            Decoded records
+        """
+        valid_end = 0
+        self.torn_bytes = 0
+
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+
+        frames = []
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            length, crc = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            end = start + length
+            if length > MAX_RECORD_BYTES or end > len(data):
+                break
+            payload = data[start:end]
+            if zlib.crc32(payload) != crc:
+                break
+            try:
+                record = json.loads(payload.decode('utf-8'))
+            except (UnicodeDecodeError, ValueError):
+                break
+            frames.append(data[offset:end])
+            valid_end = end
+            offset = end
+            yield record
+
+        self.torn_bytes = len(data) - valid_end
+        if self.torn_bytes:
+            logger.warning(f"WAL {self.path}: skipped torn tail of {self.torn_bytes} bytes")
+
+        with self._cond:
+            self._truncate_to(valid_end)
+            if not self._recovered:
+                # Replayed records stay in the log until checkpoint()
+                for frame in frames:
+                    self._appended_lsn += 1
+                    self._frames.append((self._appended_lsn, frame))
+                self._durable_lsn = self._appended_lsn
+                self._recovered = True
+
+    def records(self, after_lsn: int, upto_lsn: Optional[int] = None) -> List[Tuple[int, Any]]:
+        """
+        Return (lsn, record) for records after `after_lsn` not yet checkpointed.
+
+        Lets a consumer that lost records downstream (e.g. evicted from a
+        bounded queue) read them back from the log.
+
+        Args:
+            after_lsn: Return records with a higher LSN
+            upto_lsn: Highest LSN to return (default: all appended)
+        """
+        with self._cond:
+            frames = [(lsn, frame) for lsn, frame in self._frames
+                      if lsn > after_lsn and (upto_lsn is None or lsn <= upto_lsn)]
+        return [(lsn, json.loads(frame[_HEADER.size:].decode('utf-8'))) for lsn, frame in frames]
+
+    def _ensure_recovered(self):
+        """Drop a torn tail left by a crash before appending after it."""
+        if self._recovered:
+            return
+        for _ in self.replay():
+            pass
+
+    def _truncate_to(self, size: int):
+        try:
+            if self.path.exists() and self.path.stat().st_size > size:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(size)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"Could not truncate WAL {self.path}: {e}")
+
+    # ------------------------------------------------------------------
+    # Checkpointing
+    # ------------------------------------------------------------------
+
+    def checkpoint(self, upto_lsn: Optional[int] = None) -> int:
+        """
+        Discard records up to `upto_lsn` once they are safely in the store.
+
+        Records appended after `upto_lsn` are kept (rewritten into a fresh
+        log that atomically replaces the old one).
+
+        Args:
+            upto_lsn: Highest LSN persisted downstream (default: all durable)
+
+        Returns:
+            int: Number of records still in the log
+        """
+        self.commit()
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            upto = self._durable_lsn if upto_lsn is None else min(upto_lsn, self._durable_lsn)
+
+            while self._frames and self._frames[0][0] <= upto:
+                self._frames.popleft()
+
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+            # Frames appended after the commit above are still pending and
+            # will be written by the next commit, so only keep durable ones
+            durable = [frame for lsn, frame in self._frames if lsn <= self._durable_lsn]
+            if not durable:
+                self._truncate_to(0)
+                return len(self._frames)
+
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                for frame in durable:
+                    f.write(frame)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            return len(self._frames)
+
+    def close(self):
+        """Commit pending records and close the file."""
+        self.commit()
+        with self._cond:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @property
+    def appended_lsn(self) -> int:
+        return self._appended_lsn
+
+    @property
+    def durable_lsn(self) -> int:
+        return self._durable_lsn
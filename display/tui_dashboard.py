@@ -21,7 +21,7 @@
 from rich.align import Align
 
 from core.metrics_collector import load_current_metrics
-from core.alert_manager import load_alerts
+from core.alert_store import AlertStore
 
 # Configure logging
 logging.basicConfig(
@@ -55,6 +55,8 @@ def __init__(self, metrics_path: str, alerts_path: str):
         """
         self.metrics_path = Path(metrics_path)
         self.alerts_path = Path(alerts_path)
+        # Indexed alert view, refreshed incrementally on every redraw
+        self.alert_store = AlertStore(self.alerts_path)
         self.console = Console()
         logger.info(f"Dashboard initialized: metrics={metrics_path}, alerts={alerts_path}")
     
@@ -473,17 +475,30 @@ def generate_gpu_panel(self, metrics: Dict[str, Any]) -> Panel:
             border_style="cyan"
         )
     
-    def generate_alerts_panel(self, alerts: List[Dict[str, Any]]) -> Panel:
+    def generate_alerts_panel(
+        self,
+        alerts: List[Dict[str, Any]],
+        counts: Optional[Dict[str, int]] = None
+    ) -> Panel:
         """
         Generate alerts panel as footer.
         
         Args:
-            alerts: List of alert dictionaries
+            alerts: List of alert dictionaries (newest first)
+            counts: Optional per-level totals; when given, `alerts` may be
+                    just the few alerts that are displayed
             
         Returns:
             Panel: Alerts panel with color-coded alerts
         """
-        if not alerts:
+        if counts is None:
+            counts = {}
+            for alert in alerts:
+                level = alert.get('level', 'info')
+                counts[level] = counts.get(level, 0) + 1
+        alert_count = sum(counts.values())
+        
+        if not alert_count:
             return Panel(
                 Align.center("[dim]No alerts[/dim]"),
                 title="[bold]ALERTS (0)",
@@ -513,11 +528,10 @@ def generate_alerts_panel(self, alerts: List[Dict[str, Any]]) -> Panel:
             level_text = f"{icon}[{color}]{level.upper()}[/{color}]"
             table.add_row(level_text, message)
         
-        alert_count = len(alerts)
         return Panel(
             table,
             title=f"[bold]ALERTS ({alert_count})",
-            border_style="red" if any(a.get('level') == 'critical' for a in alerts) else "yellow"
+            border_style="red" if counts.get('critical') else "yellow"
         )
     
     def generate_dashboard(self) -> Layout:
@@ -529,7 +543,8 @@ def generate_dashboard(self) -> Layout:
         """
         # Load data
         metrics = load_current_metrics(str(self.metrics_path))
-        alerts = load_alerts(str(self.alerts_path))
+        self.alert_store.refresh()
+        alerts = self.alert_store.query(limit=3)
         
         # Create layout
         layout = self.create_layout()
@@ -541,7 +556,7 @@ def generate_dashboard(self) -> Layout:
         layout["gpu"].update(self.generate_gpu_panel(metrics))
         layout["disk"].update(self.generate_disk_panel(metrics))
         layout["network"].update(self.generate_network_panel(metrics))
-        layout["footer"].update(self.generate_alerts_panel(alerts))
+        layout["footer"].update(self.generate_alerts_panel(alerts, self.alert_store.counts()))
         
         return layout
     
@@ -363,9 +363,9 @@ function formatUptime(s) {
 
 // Generate Report Function
 async function generateReport() {
+    const btn = event.target.closest('button');
+    const originalText = btn.innerHTML;
     try {
-        const btn = event.target.closest('button');
-        const originalText = btn.innerHTML;
         btn.disabled = true;
         btn.innerHTML = '<i class="bx bx-loader bx-spin"></i> Generating...';
 
@@ -375,18 +375,37 @@ async function generateReport() {
         });
 
         const result = await response.json();
-
-        if (result.success) {
-            alert('Report generated successfully!\n\nHTML: ' + result.files.html + '\nMarkdown: ' + result.files.markdown);
-        } else {
+        if (!result.success) {
             alert('Failed to generate report: ' + (result.error || 'Unknown error'));
+            return;
         }
 
-        btn.disabled = false;
-        btn.innerHTML = originalText;
+        // Rendering happens in the background: poll the job until it finishes
+        const job = await pollReportJob(result.status_url, btn);
+        if (job.status === 'done') {
+            alert('Report generated successfully!\n\nHTML: ' + job.result.files.html + '\nMarkdown: ' + job.result.files.markdown);
+        } else {
+            alert('Failed to generate report: ' + (job.error || 'Unknown error'));
+        }
     } catch (error) {
         console.error('Report generation error:', error);
         alert('Error generating report: ' + error.message);
+    } finally {
+        btn.disabled = false;
+        btn.innerHTML = originalText;
+    }
+}
+
+async function pollReportJob(url, btn) {
+    while (true) {
+        const response = await fetch(url);
+        const result = await response.json();
+        if (!result.success) throw new Error(result.error || 'Report job lost');
+
+        const job = result.job;
+        if (job.status === 'done' || job.status === 'failed') return job;
+        btn.innerHTML = `<i class="bx bx-loader bx-spin"></i> ${job.stage} (${job.progress}%)`;
+        await new Promise(resolve => setTimeout(resolve, 1000));
     }
 }
 
@@ -0,0 +1,128 @@
+"""Unit tests for core.alert_journal module."""
+
+import json
+import threading
+import pytest
+from core.alert_journal import AlertJournal, journal_path, read_journal
+from core.alert_manager import add_alert, clear_alerts, load_alerts, trim_alerts
+
+
+def make_alert(n, level='warning'):
+    """Build a minimal alert with a unique id."""
+    return {'id': f'a{n}', 'level': level, 'metric': 'cpu', 'message': f'alert {n}',
+            'timestamp': f'2025-12-05T10:{n % 60:02d}:00Z'}
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """Path of an alerts.json snapshot in a temporary directory."""
+    return tmp_path / 'alerts.json'
+
+
+class TestJournal:
+    """Tests for appending and reading the journal."""
+
+    def test_append_does_not_rewrite_snapshot(self, snapshot_path):
+        snapshot_path.write_text(json.dumps({'timestamp': '', 'alerts': [make_alert(0)]}))
+        before = snapshot_path.read_text()
+
+        journal = AlertJournal(snapshot_path, fsync=False)
+        journal.append(make_alert(1))
+
+        assert snapshot_path.read_text() == before
+        assert journal_path(snapshot_path).name == 'alerts.journal.jsonl'
+        assert [a['id'] for a in journal.load()] == ['a0', 'a1']
+
+    def test_torn_line_skipped(self, snapshot_path):
+        journal = AlertJournal(snapshot_path, fsync=False)
+        journal.append(make_alert(1))
+        with open(journal.path, 'a') as f:
+            f.write('{"id": "a2", "lev')
+
+        assert [a['id'] for a in read_journal(journal.path)] == ['a1']
+
+    def test_append_after_torn_line(self, snapshot_path):
+        journal = AlertJournal(snapshot_path, fsync=False)
+        journal.append(make_alert(1))
+        with open(journal.path, 'a') as f:
+            f.write('{"id": "a2", "lev')
+        journal.append(make_alert(3))
+
+        assert [a['id'] for a in read_journal(journal.path)] == ['a1', 'a3']
+
+    def test_concurrent_appends(self, snapshot_path):
+        journal = AlertJournal(snapshot_path, fsync=False)
+
+        def produce(worker):
+            for i in range(100):
+                journal.append(make_alert(worker * 1000 + i))
+
+        threads = [threading.Thread(target=produce, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len({a['id'] for a in journal.load()}) == 400
+
+
+class TestCompaction:
+    """Tests for folding the journal into the snapshot."""
+
+    def test_compact(self, snapshot_path):
+        journal = AlertJournal(snapshot_path, fsync=False)
+        journal.append_many([make_alert(i) for i in range(3)])
+
+        assert journal.compact() == 3
+        assert journal.path.stat().st_size == 0
+        data = json.loads(snapshot_path.read_text())
+        assert [a['id'] for a in data['alerts']] == ['a0', 'a1', 'a2']
+
+    def test_crash_before_truncate_has_no_duplicates(self, snapshot_path):
+        journal = AlertJournal(snapshot_path, fsync=False)
+        journal.append_many([make_alert(i) for i in range(3)])
+        # Snapshot already holds the journal entries, journal not yet truncated
+        snapshot_path.write_text(json.dumps({'alerts': [make_alert(i) for i in range(3)]}))
+
+        assert len(journal.load()) == 3
+        assert journal.compact() == 3
+
+    def test_auto_compaction(self, snapshot_path):
+        journal = AlertJournal(snapshot_path, fsync=False, compact_bytes=500)
+        for i in range(20):
+            journal.append(make_alert(i))
+
+        assert journal.path.stat().st_size <= 500
+        assert len(journal.load()) == 20
+
+    def test_compact_with_keep(self, snapshot_path):
+        journal = AlertJournal(snapshot_path, fsync=False)
+        journal.append_many([make_alert(i) for i in range(5)])
+        journal.compact(keep=lambda alerts: alerts[-2:])
+        assert [a['id'] for a in journal.load()] == ['a3', 'a4']
+
+
+class TestAlertManagerIntegration:
+    """Tests for alert_manager functions on top of the journal."""
+
+    def test_add_and_load(self, snapshot_path):
+        for level in ('info', 'warning', 'critical'):
+            assert add_alert('cpu', level, f'{level} alert', path=str(snapshot_path))
+
+        alerts = load_alerts(str(snapshot_path))
+        assert len(alerts) == 3
+        assert all(a.get('id') for a in alerts)
+        assert not snapshot_path.exists()
+
+    def test_trim_compacts_journal(self, snapshot_path):
+        for i in range(5):
+            add_alert('cpu', 'warning', f'alert {i}', path=str(snapshot_path))
+
+        assert trim_alerts(str(snapshot_path), max_count=2) == 3
+        assert journal_path(snapshot_path).stat().st_size == 0
+        assert len(load_alerts(str(snapshot_path))) == 2
+
+    def test_clear_removes_journal_entries(self, snapshot_path):
+        add_alert('cpu', 'warning', 'alert', path=str(snapshot_path))
+        assert clear_alerts(str(snapshot_path))
+        assert load_alerts(str(snapshot_path)) == []
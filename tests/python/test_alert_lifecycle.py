@@ -0,0 +1,122 @@
+"""Unit tests for core.alert_lifecycle module."""
+
+import pytest
+from core.alert_lifecycle import AlertLifecycle, fingerprint
+from core.alert_manager import get_alert_counts, load_alerts
+from core.alert_store import AlertStore
+
+
+@pytest.fixture
+def rows():
+    """Rows the lifecycle writes, as (metric, level, message, fields)."""
+    return []
+
+
+@pytest.fixture
+def lifecycle(rows):
+    """Lifecycle that records rows instead of writing the alert log."""
+    def writer(metric, level, message, **fields):
+        rows.append((metric, level, message, fields))
+        return True
+    return AlertLifecycle(flap_window=100, flap_threshold=4, dampen_seconds=50, writer=writer)
+
+
+class TestFingerprint:
+    """Tests for alert fingerprints."""
+
+    def test_stable_and_distinct(self):
+        assert fingerprint('disk', 'critical', '/', 'a') == fingerprint('disk', 'critical', '/', 'a')
+        assert fingerprint('disk', 'critical', '/', 'a') != fingerprint('disk', 'warning', '/', 'a')
+        assert fingerprint('disk', 'critical', '/', 'a') != fingerprint('disk', 'critical', '/data', 'a')
+
+
+class TestLifecycle:
+    """Tests for open/resolve and repeat counting."""
+
+    def test_repeats_do_not_write_rows(self, lifecycle, rows):
+        assert lifecycle.open('cpu', 'warning', 'CPU high', 90.0, 85.0, now=0) == 'opened'
+        for t in range(1, 6):
+            assert lifecycle.open('cpu', 'warning', 'CPU high', 91.0, 85.0, now=t) == 'repeat'
+        assert lifecycle.resolve('cpu', 'warning', value=50.0, now=30) == 'resolved'
+
+        assert len(rows) == 2
+        assert rows[0][3]['state'] == 'open'
+        resolved = rows[1]
+        assert resolved[1] == 'info'
+        assert resolved[3]['state'] == 'resolved'
+        assert resolved[3]['repeat_count'] == 5
+        assert resolved[3]['duration_seconds'] == 30
+
+    def test_resolve_without_open_is_ignored(self, lifecycle, rows):
+        assert lifecycle.resolve('cpu', 'warning', now=0) == 'ignored'
+        assert rows == []
+
+    def test_resources_are_separate(self, lifecycle, rows):
+        lifecycle.open('disk', 'critical', 'full', resource='/', now=0)
+        lifecycle.open('disk', 'critical', 'full', resource='/data', now=0)
+        assert len(rows) == 2
+        assert len(lifecycle.active()) == 2
+
+
+class TestFlapping:
+    """Tests for flap detection and dampening."""
+
+    def flap(self, lifecycle, times):
+        for i, t in enumerate(times):
+            if i % 2 == 0:
+                lifecycle.open('cpu', 'warning', 'CPU high', now=t)
+            else:
+                lifecycle.resolve('cpu', 'warning', now=t)
+
+    def test_flapping_suppresses_rows(self, lifecycle, rows):
+        self.flap(lifecycle, range(0, 200, 10))  # 20 state changes
+
+        states = [r[3]['state'] for r in rows]
+        assert states == ['open', 'resolved', 'open', 'flapping']
+        assert lifecycle.rows_suppressed == 16
+
+    def test_flapping_ends_after_dampening(self, lifecycle, rows):
+        self.flap(lifecycle, range(0, 50, 10))  # ends open at t=40
+        assert rows[-1][3]['state'] == 'flapping'
+
+        assert lifecycle.tick(now=60) == 0
+        assert lifecycle.tick(now=95) == 1
+        assert rows[-1][3]['state'] == 'open'
+        assert 'stable after flapping' in rows[-1][2]
+        assert not lifecycle.active()[0]['flapping']
+
+    def test_slow_changes_do_not_flap(self, lifecycle, rows):
+        self.flap(lifecycle, range(0, 1000, 60))
+        assert 'flapping' not in [r[3]['state'] for r in rows]
+
+
+class TestAlertLogIntegration:
+    """Tests for writing through add_alert."""
+
+    def test_writes_to_alert_log(self, tmp_path):
+        path = tmp_path / 'alerts.json'
+        lifecycle = AlertLifecycle(str(path))
+        lifecycle.open('cpu', 'warning', 'CPU high', 90.0, 85.0, host='web-1', now=0)
+        lifecycle.open('cpu', 'warning', 'CPU high', 92.0, 85.0, host='web-1', now=2)
+
+        alerts = load_alerts(str(path))
+        assert len(alerts) == 1
+        assert alerts[0]['host'] == 'web-1'
+        assert alerts[0]['fingerprint'] == fingerprint('cpu', 'warning', None, 'web-1')
+
+    def test_resolution_rows_are_not_counted(self, tmp_path):
+        path = tmp_path / 'alerts.json'
+        lifecycle = AlertLifecycle(str(path))
+        lifecycle.open('cpu', 'critical', 'CPU high', 99.0, 95.0, host='web-1', now=0)
+        lifecycle.resolve('cpu', 'critical', host='web-1', now=60)
+
+        alerts = load_alerts(str(path))
+        assert len(alerts) == 2
+        expected = {'info': 0, 'warning': 0, 'critical': 1}
+        assert get_alert_counts(alerts) == expected
+        store = AlertStore(path)
+        store.refresh()
+        assert store.counts() == expected
+        stats = store.stats()
+        assert sum(row['critical'] + row['info'] for row in stats['buckets']) == 1
+        assert stats['top_metrics'] == [{'metric': 'cpu', 'count': 1}]
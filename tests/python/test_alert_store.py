@@ -0,0 +1,198 @@
+"""Unit tests for core.alert_store module."""
+
+import json
+import time
+import pytest
+from core.alert_store import AlertStore, alert_id, parse_alert_time
+from core.alert_manager import add_alert, trim_alerts
+from core.sqlite_store import open_store
+
+
+def make_alert(n, level='warning', metric='cpu'):
+    """Build an alert n minutes after a fixed start time."""
+    return {'id': f'a{n}', 'level': level, 'metric': metric, 'message': f'alert {n}',
+            'timestamp': f'2025-12-05T{n // 60:02d}:{n % 60:02d}:00Z'}
+
+
+@pytest.fixture
+def store():
+    """Store with 10 alerts cycling through levels and two metrics."""
+    store = AlertStore()
+    levels = ['info', 'warning', 'critical']
+    store.add_many([make_alert(n, levels[n % 3], 'cpu' if n % 2 else 'disk')
+                    for n in range(10)])
+    return store
+
+
+class TestAlertStore:
+    """Tests for indexing, counts and queries."""
+
+    def test_counts(self, store):
+        assert store.counts() == {'info': 4, 'warning': 3, 'critical': 3}
+        assert len(store) == 10
+
+    def test_latest(self, store):
+        assert store.latest()['id'] == 'a9'
+
+    def test_out_of_order_insert(self, store):
+        store.add(make_alert(0, 'info') | {'id': 'early', 'timestamp': '2025-12-04T00:00:00Z'})
+        assert store.query(limit=None)[-1]['id'] == 'early'
+        assert store.latest()['id'] == 'a9'
+
+    def test_duplicate_ignored(self, store):
+        assert store.add(make_alert(3)) is None
+        assert len(store) == 10
+
+    def test_query_filters(self, store):
+        assert [a['id'] for a in store.query(level='critical')] == ['a8', 'a5', 'a2']
+        assert [a['id'] for a in store.query(metric='cpu', limit=2)] == ['a9', 'a7']
+        assert [a['id'] for a in store.query(level='critical', metric='cpu')] == ['a5']
+
+    def test_cursor_pagination(self, store):
+        first = store.page(limit=4)
+        assert [a['id'] for a in first['alerts']] == ['a9', 'a8', 'a7', 'a6']
+        second = store.page(limit=4, after=first['next'])
+        assert [a['id'] for a in second['alerts']] == ['a5', 'a4', 'a3', 'a2']
+        third = store.page(limit=4, after=second['next'])
+        assert [a['id'] for a in third['alerts']] == ['a1', 'a0']
+        assert third['next'] is None
+
+    def test_iterate_pages_through_all(self, store):
+        assert [a['id'] for a in store.iterate(batch_size=3)] == [f'a{n}' for n in range(9, -1, -1)]
+        assert [a['id'] for a in store.iterate(batch_size=2, level='critical')] == ['a8', 'a5', 'a2']
+
+    def test_cursor_with_filter(self, store):
+        page = store.page(limit=1, level='info')
+        assert [a['id'] for a in store.query(level='info', after=page['next'])] == ['a6', 'a3', 'a0']
+
+    def test_unknown_cursor(self, store):
+        assert store.query(after='missing') == []
+
+    def test_remove(self, store):
+        assert store.remove('a8')
+        assert store.counts()['critical'] == 2
+        assert [a['id'] for a in store.query(level='critical')] == ['a5', 'a2']
+        assert not store.remove('a8')
+
+    def test_legacy_alert_id_is_stable(self):
+        alert = {'level': 'info', 'metric': 'cpu', 'message': 'x', 'timestamp': '2025-12-05T00:00:00Z'}
+        assert alert_id(alert) == alert_id(dict(alert))
+        assert alert_id(alert).startswith('h')
+
+    def test_parse_alert_time(self):
+        assert parse_alert_time('1970-01-01T00:01:00Z') == 60.0
+        assert parse_alert_time('garbage') == 0.0
+
+    def test_large_store_is_fast(self):
+        store = AlertStore()
+        store.add_many([make_alert(n, 'critical' if n % 100 == 0 else 'info')
+                        for n in range(100_000)])
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            store.counts()
+            store.query(level='critical', limit=20)
+        assert time.perf_counter() - start < 1.0
+
+
+class TestFiltersAndStats:
+    """Tests for host/time filters and cached aggregates."""
+
+    def test_host_and_time_range(self, store):
+        store.add(make_alert(20, 'critical', 'cpu') | {'host': 'web-1'})
+        store.add(make_alert(21, 'warning', 'cpu') | {'host': 'web-1'})
+        assert [a['id'] for a in store.query(host='web-1')] == ['a21', 'a20']
+        assert [a['id'] for a in store.query(host='web-1', level='critical')] == ['a20']
+
+        since = parse_alert_time('2025-12-05T00:03:00Z')
+        until = parse_alert_time('2025-12-05T00:05:00Z')
+        assert [a['id'] for a in store.query(since=since, until=until)] == ['a5', 'a4', 'a3']
+        assert [a['id'] for a in store.query(metric='cpu', since=since, until=until)] == ['a5', 'a3']
+        assert [a['id'] for a in store.query(since=since, until=until, after='a5')] == ['a4', 'a3']
+
+    def test_stats_buckets_and_top_metrics(self, store):
+        stats = store.stats(bucket_seconds=300)
+        assert stats['counts'] == {'info': 4, 'warning': 3, 'critical': 3}
+        assert [b['start'] for b in stats['buckets']] == [
+            parse_alert_time('2025-12-05T00:00:00Z'), parse_alert_time('2025-12-05T00:05:00Z')]
+        assert stats['buckets'][0] == {'start': stats['buckets'][0]['start'],
+                                       'info': 2, 'warning': 2, 'critical': 1}
+        assert stats['top_metrics'] == [{'metric': 'cpu', 'count': 5}, {'metric': 'disk', 'count': 5}]
+
+        since = parse_alert_time('2025-12-05T00:05:00Z')
+        ranged = store.stats(bucket_seconds=300, since=since, top=1)
+        assert len(ranged['buckets']) == 1
+        assert ranged['top_metrics'] == [{'metric': 'cpu', 'count': 3}]
+
+    def test_stats_update_incrementally(self, store):
+        store.stats(bucket_seconds=60)
+        store.add(make_alert(30, 'critical', 'gpu'))
+        store.remove('a0')
+
+        buckets = {b['start']: b for b in store.stats(bucket_seconds=60)['buckets']}
+        assert buckets[parse_alert_time('2025-12-05T00:30:00Z')]['critical'] == 1
+        assert parse_alert_time('2025-12-05T00:00:00Z') not in buckets
+
+    def test_stats_rejects_unknown_bucket(self, store):
+        with pytest.raises(ValueError):
+            store.stats(bucket_seconds=7)
+
+
+class TestRefresh:
+    """Tests for syncing the store with the alert log."""
+
+    def test_incremental_journal_refresh(self, tmp_path):
+        path = tmp_path / 'alerts.json'
+        path.write_text(json.dumps({'timestamp': '', 'alerts': [make_alert(0)]}))
+        store = AlertStore(path)
+        assert store.refresh() == 1
+
+        add_alert('cpu', 'critical', 'new', path=str(path))
+        assert store.refresh() == 1
+        assert store.refresh() == 0
+        assert store.counts()['critical'] == 1
+
+    def test_refresh_after_compaction(self, tmp_path):
+        path = tmp_path / 'alerts.json'
+        for i in range(5):
+            add_alert('cpu', 'warning', f'alert {i}', path=str(path))
+        store = AlertStore(path)
+        store.refresh()
+
+        trim_alerts(str(path), max_count=2)
+        store.refresh()
+        assert len(store) == 2
+
+    def test_sqlite_refresh(self, tmp_path):
+        path = tmp_path / 'alerts.db'
+        open_store(path).insert_alerts([make_alert(n) for n in range(3)])
+        store = AlertStore(path)
+        assert store.refresh() == 3
+        assert store.refresh() == 0
+
+    def test_sqlite_refresh_is_incremental(self, tmp_path):
+        path = tmp_path / 'alerts.db'
+        db = open_store(path)
+        db.insert_alerts([make_alert(n) for n in range(3)])
+        store = AlertStore(path)
+        store.refresh()
+
+        db.insert_alerts([make_alert(n) for n in range(3, 5)])
+        assert store.refresh() == 2
+
+        db.trim_alerts(max_count=2)
+        db.insert_alerts([make_alert(5)])
+        assert store.refresh() == 1
+        assert [a['message'] for a in store.query()] == ['alert 5', 'alert 4', 'alert 3']
+
+    def test_sqlite_listeners_see_new_alerts_oldest_first(self, tmp_path):
+        path = tmp_path / 'alerts.db'
+        db = open_store(path)
+        db.insert_alerts([make_alert(n) for n in range(3)])
+        store = AlertStore(path)
+        seen = []
+        store.listeners.append(lambda alert: seen.append(alert['message']))
+        store.refresh()
+        db.insert_alerts([make_alert(n) for n in range(3, 5)])
+        store.refresh()
+        assert seen == ['alert 0', 'alert 1', 'alert 2', 'alert 3', 'alert 4']
@@ -0,0 +1,115 @@
+"""Unit tests for core.anomaly module."""
+
+import random
+import time
+import pytest
+from core.anomaly import AnomalyDetector, SeriesState
+from core.rule_engine import Rule, RuleEngine
+
+
+def make_snapshot(cpu, rx_bytes=0, hostname='web-1'):
+    """Build a minimal snapshot in the collector format."""
+    return {
+        'system': {'hostname': hostname, 'uptime_seconds': 100},
+        'cpu': {'usage_percent': cpu},
+        'network': [{'iface': 'eth0', 'rx_bytes': rx_bytes}]
+    }
+
+
+@pytest.fixture
+def detector():
+    """Detector with a short warm-up."""
+    return AnomalyDetector(warmup=20)
+
+
+class TestSeriesScores:
+    """Tests for per-series scoring."""
+
+    def test_warmup_returns_none(self, detector):
+        assert all(detector.update('s', 1.0, t) is None for t in range(20))
+        assert detector.update('s', 1.0, 20) is not None
+
+    def test_spike_scores_high(self, detector):
+        rng = random.Random(1)
+        for t in range(200):
+            detector.update('s', 50 + rng.gauss(0, 2), t)
+        normal = detector.update('s', 51.0, 200)
+        spike = detector.update('s', 90.0, 201)
+
+        assert abs(normal.score) < 3
+        assert spike.score > 6
+        assert spike.robust_z > 6
+
+    def test_flat_series_jump(self, detector):
+        for t in range(50):
+            detector.update('s', 10.0, t)
+        assert detector.update('s', 20.0, 50).score > 6
+
+    def test_robust_median_resists_spikes(self):
+        state = SeriesState()
+        rng = random.Random(2)
+        for _ in range(2000):
+            value = 1000.0 if rng.random() < 0.05 else 50 + rng.gauss(0, 1)
+            state.update(value, 0.05, 0.05, None)
+        assert abs(state.median - 50) < 2
+        assert state.mean > 80  # EWMA is dragged by the spikes
+
+    def test_seasonal_baseline(self):
+        detector = AnomalyDetector(warmup=5, seasonal=True, seasonal_warmup=3)
+        # Every day, 02:00-03:00 is busy; the rest of the day is idle
+        for day in range(7):
+            for hour in range(24):
+                ts = 86400 * day + 3600 * hour
+                detector.update('s', 90.0 if hour == 2 else 10.0, ts)
+
+        busy_hour = 86400 * 7 * 4 + 7200  # same weekday and hour four weeks on
+        for week in range(3):
+            detector.update('s', 90.0, busy_hour - 86400 * 7 * (3 - week))
+        score = detector.update('s', 90.0, busy_hour)
+        assert score.seasonal_z is not None
+        assert abs(score.seasonal_z) < 3
+
+
+class TestSnapshots:
+    """Tests for snapshot observation and annotation."""
+
+    def test_counters_scored_as_rates(self, detector):
+        for t in range(30):
+            scores = detector.observe(make_snapshot(20.0, rx_bytes=1000 * t), now=t)
+        rate = scores[('network', 'eth0', 'rx_bytes')]
+        assert rate.value == 1000.0
+
+    def test_ignored_fields(self, detector):
+        for t in range(30):
+            scores = detector.observe(make_snapshot(20.0), now=t)
+        assert ('system', 'uptime_seconds') not in scores
+        assert ('cpu', 'usage_percent') in scores
+
+    def test_annotate_does_not_modify_input(self, detector):
+        snapshot = make_snapshot(20.0)
+        for t in range(25):
+            annotated = detector.annotate(snapshot, now=t)
+        assert 'anomaly' not in snapshot
+        assert 'usage_percent' in annotated['anomaly']['cpu']
+
+    def test_rule_on_anomaly_score(self, detector):
+        events = []
+        engine = RuleEngine([Rule('cpu_anomaly', 'anomaly.cpu.usage_percent > 6')], sink=events.append)
+        for t in range(40):
+            engine.on_snapshot(detector.annotate(make_snapshot(20.0 + (t % 2)), now=t), now=t)
+        assert events == []
+        engine.on_snapshot(detector.annotate(make_snapshot(95.0), now=40), now=40)
+        assert [e.kind for e in events] == ['raise']
+
+    def test_thousands_of_series(self):
+        detector = AnomalyDetector(warmup=5)
+        snapshot = {'system': {'hostname': 'h'},
+                    'disk': [{'device': f'/d{i}', 'used_percent': 50.0, 'used_gb': 1.0}
+                             for i in range(1000)]}
+        for t in range(5):
+            detector.observe(snapshot, now=t)
+
+        start = time.perf_counter()
+        detector.observe(snapshot, now=10)
+        assert len(detector) == 2000
+        assert time.perf_counter() - start < 0.5
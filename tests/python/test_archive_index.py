@@ -0,0 +1,121 @@
+"""Unit tests for core.archive_index module."""
+
+import json
+import pytest
+from datetime import datetime
+from core import archive_index
+from core.archive_index import (
+    ArchiveIndex,
+    parse_archive_name,
+    INDEX_FILENAME
+)
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    """Create an archive directory with a few snapshot files."""
+    for name in ['20251218_085343.json', '20251217_161603.json',
+                 '20251218_084958.json', 'notes.txt', 'bad_name.json']:
+        (tmp_path / name).write_text('{}')
+    return tmp_path
+
+
+class TestParseArchiveName:
+    """Tests for parse_archive_name function."""
+
+    def test_parse_valid_name(self):
+        assert parse_archive_name('20251218_085343.json') == datetime(2025, 12, 18, 8, 53, 43)
+
+    def test_parse_invalid_names(self):
+        assert parse_archive_name('bad_name.json') is None
+        assert parse_archive_name('20251218_085343.txt') is None
+
+
+class TestArchiveIndex:
+    """Tests for ArchiveIndex class."""
+
+    def test_rebuild_ignores_non_archive_files(self, archive_dir):
+        index = ArchiveIndex(archive_dir).load()
+        assert len(index) == 3
+        assert index.latest().name == '20251218_085343.json'
+
+    def test_rebuild_persists_index(self, archive_dir):
+        ArchiveIndex(archive_dir).load()
+        data = json.loads((archive_dir / INDEX_FILENAME).read_text())
+        assert data['entries'][0] == '20251217_161603.json'
+
+    def test_add_keeps_order(self, archive_dir):
+        index = ArchiveIndex(archive_dir).load()
+        assert index.add('20251218_000000.json') is True
+        assert index.add('20251218_000000.json') is False
+        names = [p.name for p in index.range()]
+        assert names == sorted(names)
+        assert index.add('garbage.json') is False
+
+    def test_remove(self, archive_dir):
+        index = ArchiveIndex(archive_dir).load()
+        assert index.remove('20251218_085343.json') is True
+        assert index.remove('20251218_085343.json') is False
+        assert index.latest().name == '20251218_084958.json'
+
+    def test_nearest(self, archive_dir):
+        index = ArchiveIndex(archive_dir).load()
+        assert index.nearest(datetime(2025, 12, 18, 8, 50)).name == '20251218_084958.json'
+        assert index.nearest(datetime(2025, 12, 18, 8, 53)).name == '20251218_085343.json'
+        assert index.nearest(datetime(2020, 1, 1)).name == '20251217_161603.json'
+        assert index.nearest(datetime(2030, 1, 1)).name == '20251218_085343.json'
+
+    def test_range(self, archive_dir):
+        index = ArchiveIndex(archive_dir).load()
+        files = index.range(datetime(2025, 12, 18), datetime(2025, 12, 18, 8, 53, 43))
+        assert [p.name for p in files] == ['20251218_084958.json', '20251218_085343.json']
+
+    def test_excess_and_latest_n(self, archive_dir):
+        index = ArchiveIndex(archive_dir).load()
+        assert [p.name for p in index.excess(2)] == ['20251217_161603.json']
+        assert index.excess(5) == []
+        assert [p.name for p in index.latest_n(2)] == ['20251218_085343.json', '20251218_084958.json']
+
+    def test_empty_directory(self, tmp_path):
+        index = ArchiveIndex(tmp_path / 'missing', writable=False).load()
+        assert len(index) == 0
+        assert index.latest() is None
+        assert index.nearest(datetime.now()) is None
+
+    def test_reader_refreshes_from_writer(self, archive_dir):
+        writer = ArchiveIndex(archive_dir).load()
+        reader = ArchiveIndex(archive_dir, writable=False).load()
+        assert len(reader) == 3
+
+        writer.add('20251219_120000.json')
+        assert reader.refresh() is True
+        assert reader.latest().name == '20251219_120000.json'
+        assert reader.refresh() is False
+
+    def test_reader_does_not_persist(self, archive_dir):
+        ArchiveIndex(archive_dir, writable=False).load()
+        assert not (archive_dir / INDEX_FILENAME).exists()
+
+    def test_changes_append_to_log(self, archive_dir):
+        writer = ArchiveIndex(archive_dir).load()
+        snapshot = (archive_dir / INDEX_FILENAME).read_text()
+        writer.add('20251219_120000.json')
+        writer.remove_many(['20251217_161603.json', '20251218_084958.json'])
+        assert (archive_dir / INDEX_FILENAME).read_text() == snapshot
+
+        reader = ArchiveIndex(archive_dir, writable=False).load()
+        assert [p.name for p in reader.range()] == ['20251218_085343.json', '20251219_120000.json']
+        writer.remove('20251218_085343.json')
+        assert reader.refresh() is True
+        assert [p.name for p in reader.range()] == ['20251219_120000.json']
+
+    def test_log_compaction(self, archive_dir, monkeypatch):
+        monkeypatch.setattr(archive_index, 'LOG_COMPACT_ENTRIES', 2)
+        writer = ArchiveIndex(archive_dir).load()
+        reader = ArchiveIndex(archive_dir, writable=False).load()
+        for hour in range(10, 13):
+            writer.add(f'20251219_{hour}0000.json')
+        data = json.loads((archive_dir / INDEX_FILENAME).read_text())
+        assert data['entries'][-1] == '20251219_120000.json'
+        assert reader.refresh() is True
+        assert len(reader) == 6
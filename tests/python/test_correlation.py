@@ -0,0 +1,144 @@
+"""Unit tests for core.correlation module."""
+
+import time
+
+import pytest
+from core.alert_store import AlertStore
+from core.correlation import CorrelationEngine
+from core.rule_engine import AlertManagerSink, RuleEngine
+
+
+def iso(ts):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(ts))
+
+
+def alert(ident, ts, metric='cpu', host='web-1', level='warning', state='open',
+          source='host-api', resource=None):
+    row = {'id': ident, 'timestamp': iso(ts), 'metric': metric, 'level': level,
+           'message': f"{metric} alert", 'host': host, 'state': state, 'source': source,
+           'fingerprint': f"{host}/{metric}/{resource}"}
+    if resource:
+        row['resource'] = resource
+    return row
+
+
+@pytest.fixture
+def engine():
+    return CorrelationEngine(window=300, dedupe_window=120, stale_after=3600)
+
+
+T0 = 1_700_000_000
+
+
+class TestGrouping:
+    """Tests for grouping alerts into incidents."""
+
+    def test_storm_on_one_host_is_one_incident(self, engine):
+        incidents = {engine.process(alert(f"a{i}", T0 + i * 5, metric=m)).id
+                     for i, m in enumerate(['cpu', 'memory', 'temperature', 'disk'])}
+        assert len(incidents) == 1
+        incident = engine.get(incidents.pop())
+        assert incident.alert_ids == ['a0', 'a1', 'a2', 'a3']
+        assert incident.metrics == ['cpu', 'memory', 'temperature', 'disk']
+
+    def test_hosts_are_separate(self, engine):
+        a = engine.process(alert('a', T0, host='web-1'))
+        b = engine.process(alert('b', T0 + 1, host='web-2'))
+        assert a.id != b.id
+        assert [i.host for i in engine.incidents()] == ['web-2', 'web-1']
+
+    def test_quiet_gap_starts_new_incident(self, engine):
+        first = engine.process(alert('a', T0, metric='cpu'))
+        engine.process(alert('r', T0 + 10, metric='cpu', level='info', state='resolved'))
+        second = engine.process(alert('b', T0 + 1000, metric='cpu'))
+        assert first.id != second.id
+        assert engine.get(first.id).status == 'closed'
+
+    def test_causal_rule_joins_beyond_window(self, engine):
+        first = engine.process(alert('a', T0, metric='cpu'))
+        # cpu is still unresolved and temperature drives cpu
+        later = engine.process(alert('b', T0 + 900, metric='temperature'))
+        assert later.id == first.id
+        assert later.root_cause == 'temperature'
+        # network is unrelated: a new incident
+        other = engine.process(alert('c', T0 + 1800, metric='network'))
+        assert other.id != first.id
+
+
+class TestDuplicates:
+    """Tests for merging duplicates across sources."""
+
+    def test_legacy_and_native_duplicates_merge(self, engine):
+        legacy = engine.process(alert('a', T0, source='host-api'))
+        native = engine.process(alert('b', T0 + 3, source='native-go-agent'))
+        assert legacy.id == native.id
+        assert native.alert_ids == ['a']
+        assert native.duplicate_ids == ['b']
+        assert native.sources == ['host-api', 'native-go-agent']
+        assert engine.incident_for('b').id == legacy.id
+
+    def test_reprocessing_is_ignored(self, engine):
+        engine.process(alert('a', T0))
+        assert engine.process(alert('a', T0)) is None
+        assert engine.incidents()[0].alert_ids == ['a']
+
+    def test_reopen_is_not_a_duplicate(self, engine):
+        incident = engine.process(alert('a', T0))
+        engine.process(alert('r', T0 + 5, level='info', state='resolved'))
+        assert incident.status == 'resolved'
+        engine.process(alert('b', T0 + 10))
+        assert incident.alert_ids == ['a', 'r', 'b']
+        assert incident.status == 'open'
+
+
+class TestLifecycle:
+    """Tests for resolution, expiry and bounds."""
+
+    def test_resolves_when_all_members_resolve(self, engine):
+        incident = engine.process(alert('a', T0, metric='cpu'))
+        engine.process(alert('b', T0 + 1, metric='memory', level='critical'))
+        assert incident.level == 'critical'
+        engine.process(alert('c', T0 + 2, metric='cpu', level='info', state='resolved'))
+        assert incident.status == 'open'
+        engine.process(alert('d', T0 + 3, metric='memory', level='info', state='resolved'))
+        assert incident.status == 'resolved'
+
+        assert engine.expire(T0 + 3 + 301) == 1
+        assert incident.status == 'closed'
+
+    def test_stale_incidents_close(self, engine):
+        incident = engine.process(alert('a', T0))
+        assert engine.expire(T0 + 1000) == 0
+        assert engine.expire(T0 + 3601) == 1
+        assert incident.status == 'closed'
+
+    def test_closed_incidents_are_bounded(self):
+        engine = CorrelationEngine(window=10, stale_after=10, max_closed=3)
+        for i in range(10):
+            engine.process(alert(f"a{i}", T0 + i * 100, host=f"h{i}"))
+        engine.expire(T0 + 10_000)
+        assert len(engine.incidents(status='closed', limit=None)) == 3
+        assert engine.incident_for('a0') is None
+
+    def test_late_alerts_are_ignored(self, engine):
+        engine.process(alert('a', T0 + 10_000))
+        assert engine.process(alert('old', T0)) is None
+
+
+class TestIntegration:
+    """Tests for the alert store and rule engine wiring."""
+
+    def test_store_listener_feeds_incidents(self, tmp_path, engine):
+        path = tmp_path / 'alerts.json'
+        rule_engine = RuleEngine(sink=AlertManagerSink(str(path)))
+        rule_engine.on_snapshot({'source': 'host-api', 'system': {'hostname': 'db-1'},
+                                 'disk': [{'device': '/', 'used_percent': 95.0}]}, now=T0)
+
+        store = AlertStore(path)
+        store.listeners.append(engine.process)
+        store.refresh()
+
+        incident = engine.incidents()[0]
+        assert incident.host == 'db-1'
+        assert incident.sources == ['host-api']
+        assert incident.alert_ids == [store.latest()['id']]
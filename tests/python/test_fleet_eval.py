@@ -0,0 +1,109 @@
+"""Unit tests for core.fleet_eval module."""
+
+import random
+
+import pytest
+from core.fleet_eval import FleetEvaluator, np
+from core.rule_engine import Rule, RuleEngine
+
+BACKENDS = [False, pytest.param(True, marks=pytest.mark.skipif(np is None, reason="NumPy not installed"))]
+
+
+def rules():
+    return [
+        Rule('cpu_high', 'cpu.usage_percent > 85 for 60s clear 75'),
+        Rule('cpu_critical', 'cpu.usage_percent > 95', level='critical'),
+        Rule('disk_full', 'disk.*.used_percent > 90 clear 88', level='critical'),
+    ]
+
+
+def snapshot(cpu, disks):
+    return {'cpu': {'usage_percent': cpu},
+            'disk': [{'device': device, 'used_percent': used} for device, used in disks.items()]}
+
+
+def event_keys(events):
+    return sorted((e.kind, e.rule.name, e.host, e.resource) for e in events)
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+class TestFleetEvaluator:
+    """Tests for batch evaluation across hosts."""
+
+    def test_threshold_and_for_duration(self, use_numpy):
+        fleet = FleetEvaluator(rules(), sink=lambda e: None, use_numpy=use_numpy)
+        hot, cold = snapshot(90, {}), snapshot(10, {})
+
+        assert fleet.evaluate({'a': hot, 'b': cold}, now=0) == []
+        events = fleet.evaluate({'a': hot, 'b': cold}, now=60)
+        assert event_keys(events) == [('raise', 'cpu_high', 'a', '')]
+
+        # Hysteresis: 80 is below the raise threshold but above clear
+        assert fleet.evaluate({'a': snapshot(80, {}), 'b': cold}, now=70) == []
+        events = fleet.evaluate({'a': snapshot(70, {}), 'b': cold}, now=80)
+        assert event_keys(events) == [('resolve', 'cpu_high', 'a', '')]
+
+    def test_wildcard_resources_and_disappearing_disks(self, use_numpy):
+        fleet = FleetEvaluator(rules(), sink=lambda e: None, use_numpy=use_numpy)
+        events = fleet.evaluate({'a': snapshot(10, {'/': 95, '/data': 50}),
+                                 'b': snapshot(10, {'/': 91})}, now=0)
+        assert event_keys(events) == [('raise', 'disk_full', 'a', '/'), ('raise', 'disk_full', 'b', '/')]
+
+        # Host b is not in this round: its state is untouched
+        events = fleet.evaluate({'a': snapshot(10, {'/data': 50})}, now=10)
+        assert event_keys(events) == [('resolve', 'disk_full', 'a', '/')]
+        assert [(f['host'], f['resource']) for f in fleet.firing()] == [('b', '/')]
+
+    def test_capacity_grows_and_slots_are_reused(self, use_numpy):
+        fleet = FleetEvaluator(rules(), sink=lambda e: None, use_numpy=use_numpy)
+        hosts = {f"h{i}": snapshot(99, {'/': 95}) for i in range(200)}
+        events = fleet.evaluate(hosts, now=0)
+        assert sum(e.rule.name == 'cpu_critical' for e in events) == 200
+        assert len(fleet.firing()) == 200 * 2
+
+        assert fleet.forget('h0') == 2
+        fleet.evaluate({'new': snapshot(99, {'/': 10})}, now=1)
+        assert len(fleet.firing()) == 199 * 2 + 1
+
+    def test_rebreach_after_resolve_matches_rule_engine(self, use_numpy):
+        """A resolve followed by an immediate re-breach restarts the 'for' timer."""
+        fleet_events, engine_events = [], []
+        rule = [Rule('cpu_high', 'cpu.usage_percent > 85 for 2m clear 75')]
+        fleet = FleetEvaluator(rule, sink=fleet_events.append, use_numpy=use_numpy)
+        engine = RuleEngine(rule, sink=engine_events.append)
+
+        for now, cpu in [(0, 90), (60, 91), (120, 92), (130, 70), (140, 90), (260, 90)]:
+            fleet.evaluate({'a': snapshot(cpu, {})}, now=now)
+            engine.on_snapshot(snapshot(cpu, {}), now=now, host='a')
+
+        timeline = [(e.kind, e.timestamp) for e in fleet_events]
+        assert timeline == [('raise', 120), ('resolve', 130), ('raise', 260)]
+        assert timeline == [(e.kind, e.timestamp) for e in engine_events]
+
+    def test_matches_rule_engine(self, use_numpy):
+        """Random fleet rounds produce the same events as per-host evaluation."""
+        rng = random.Random(7)
+        fleet_events, engine_events = [], []
+        fleet = FleetEvaluator(rules(), sink=fleet_events.append, use_numpy=use_numpy)
+        engine = RuleEngine(rules(), sink=engine_events.append)
+
+        hosts = [f"host-{i}" for i in range(20)]
+        for step in range(60):
+            now = step * 15.0
+            round_ = {}
+            for host in rng.sample(hosts, 15):
+                disks = {d: rng.uniform(80, 100) for d in ('/', '/data', '/var') if rng.random() > 0.2}
+                round_[host] = snapshot(rng.choice([50, 80, 88, 97]), disks)
+            fleet.evaluate(round_, now=now)
+            for host, snap in round_.items():
+                engine.on_snapshot(snap, now=now, host=host)
+
+        assert fleet_events and event_keys(fleet_events) == event_keys(engine_events)
+        assert sorted((f['host'], f['rule'], f['resource']) for f in fleet.firing()) == \
+            sorted((f['host'], f['rule'], f['resource']) for f in engine.firing())
+
+
+def test_duplicate_rule_names_rejected():
+    with pytest.raises(ValueError):
+        FleetEvaluator([Rule('x', 'cpu.usage_percent > 1'), Rule('x', 'cpu.usage_percent > 2')],
+                       sink=lambda e: None)
@@ -0,0 +1,122 @@
+"""Unit tests for core.forecast module."""
+
+import random
+import pytest
+from core.forecast import (
+    RecursiveLeastSquares,
+    TrendForecaster,
+    TrendSeries,
+    load_forecasts
+)
+from core.rule_engine import Rule, RuleEngine
+
+
+def make_snapshot(used_percent, cpu_celsius=50.0, hostname='web-1'):
+    """Build a minimal snapshot with one disk and one temperature sensor."""
+    return {
+        'system': {'hostname': hostname},
+        'disk': [{'device': '/', 'used_percent': used_percent}],
+        'temperature': {'cpu_celsius': cpu_celsius, 'gpu_celsius': 0, 'status': 'ok'}
+    }
+
+
+class TestRecursiveLeastSquares:
+    """Tests for the online line fit."""
+
+    def test_recovers_line(self):
+        fit = RecursiveLeastSquares(forgetting=1.0)
+        for hour in range(50):
+            fit.update(hour * 3600, 10 + 2 * hour)
+        assert fit.slope_per_hour == pytest.approx(2.0, rel=1e-3)
+        assert fit.value_at(50 * 3600) == pytest.approx(110.0, rel=1e-3)
+
+    def test_forgetting_tracks_new_trend(self):
+        fit = RecursiveLeastSquares(forgetting=0.9)
+        for hour in range(100):
+            fit.update(hour * 3600, 50.0)
+        for hour in range(100, 150):
+            fit.update(hour * 3600, 50.0 + (hour - 100))
+        assert fit.slope_per_hour == pytest.approx(1.0, rel=0.05)
+
+
+class TestTrendSeries:
+    """Tests for rollups and time-to-target."""
+
+    def test_hours_to_full(self):
+        series = TrendSeries(100.0, rollup_seconds=300, forgetting=0.995)
+        rng = random.Random(3)
+        # 1 % per hour from 50 % for 12 h (now 62 %), sampled every 10 s with noise
+        for step in range(6 * 360 * 2):
+            ts = step * 10
+            series.add(ts, 50 + ts / 3600 + rng.gauss(0, 0.3))
+
+        forecast = series.forecast()
+        assert forecast['slope_per_hour'] == pytest.approx(1.0, rel=0.05)
+        assert forecast['hours_to_target'] == pytest.approx(38.0, rel=0.05)
+
+    def test_flat_series_has_no_eta(self):
+        series = TrendSeries(100.0, rollup_seconds=60, forgetting=0.99)
+        for step in range(600):
+            series.add(step * 10, 40.0)
+        assert series.forecast()['hours_to_target'] is None
+
+    def test_needs_rollups(self):
+        series = TrendSeries(100.0, rollup_seconds=300, forgetting=0.99)
+        for step in range(10):
+            series.add(step * 10, 40.0)
+        assert series.forecast() is None
+
+
+class TestTrendForecaster:
+    """Tests for snapshot-level forecasting."""
+
+    def test_annotate_and_rule(self):
+        forecaster = TrendForecaster()
+        events = []
+        engine = RuleEngine([Rule('disk_full_forecast', 'forecast.disk.*.hours_to_full < 24')],
+                            sink=events.append)
+
+        # Disk grows 5 % per hour from 40 %: full in 12 h
+        for step in range(0, 4 * 3600, 60):
+            annotated = forecaster.annotate(make_snapshot(40 + 5 * step / 3600), now=step)
+            engine.on_snapshot(annotated, now=step)
+
+        hours = annotated['forecast']['disk']['/']['hours_to_full']
+        assert 7 < hours < 9
+        assert [(e.kind, e.resource) for e in events] == [('raise', '/')]
+
+    def test_unavailable_sensor_skipped(self):
+        forecaster = TrendForecaster()
+        for step in range(0, 3600, 60):
+            forecaster.observe(make_snapshot(40.0), now=step)
+        names = {(f.kind, f.name) for f in forecaster.forecasts()}
+        assert ('temperature', 'cpu_celsius') in names
+        assert ('temperature', 'gpu_celsius') not in names
+
+    def test_thermal_threshold(self):
+        forecaster = TrendForecaster(thermal_thresholds={'cpu_celsius': 90})
+        # +10 °C per hour from 60 °C
+        for step in range(0, 1800, 10):
+            forecaster.observe(make_snapshot(40.0, cpu_celsius=60 + 10 * step / 3600), now=step)
+        cpu = next(f for f in forecaster.forecasts() if f.name == 'cpu_celsius')
+        assert cpu.target == 90
+        assert cpu.hours_to_target == pytest.approx(2.5, rel=0.1)
+
+    def test_save_and_load(self, tmp_path):
+        forecaster = TrendForecaster()
+        for step in range(0, 4 * 3600, 60):
+            forecaster.observe(make_snapshot(40 + step / 3600), now=step)
+        path = tmp_path / 'forecast.json'
+        forecaster.save(path)
+
+        data = load_forecasts(path)
+        disk = next(f for f in data['forecasts'] if f['kind'] == 'disk')
+        assert disk['eta'] is not None
+        assert load_forecasts(tmp_path / 'missing.json')['forecasts'] == []
+
+    def test_bootstrap_from_history(self):
+        forecaster = TrendForecaster()
+        snapshots = [dict(make_snapshot(50 + step / 3600), timestamp=f'2025-12-05T{step // 3600:02d}:{step % 3600 // 60:02d}:00Z')
+                     for step in range(0, 3 * 3600, 60)]
+        assert forecaster.bootstrap(snapshots) == len(snapshots)
+        assert any(f.kind == 'disk' for f in forecaster.forecasts())
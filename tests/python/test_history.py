@@ -0,0 +1,68 @@
+"""Unit tests for core.history module."""
+
+import json
+import pytest
+from datetime import datetime, timezone
+from core.history import JsonlHistoryWriter, read_history, history_filename
+
+
+def _snapshot(ts, cpu):
+    iso = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return {'timestamp': iso, 'cpu': {'usage_percent': cpu}}
+
+
+BASE = datetime(2025, 12, 18, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """Create a history writer that fsyncs every batch."""
+    w = JsonlHistoryWriter(tmp_path / 'history', fsync_interval=0)
+    yield w
+    w.close()
+
+
+class TestJsonlHistoryWriter:
+    """Tests for JsonlHistoryWriter class."""
+
+    def test_append_batch_writes_lines(self, writer, tmp_path):
+        assert writer.append_batch([_snapshot(BASE + i, i) for i in range(3)]) == 3
+        path = tmp_path / 'history' / history_filename(BASE)
+        lines = path.read_text().splitlines()
+        assert len(lines) == 3
+        assert json.loads(lines[2])['cpu']['usage_percent'] == 2
+
+    def test_empty_batch(self, writer):
+        assert writer.append_batch([]) == 0
+
+    def test_rolls_over_by_day(self, writer, tmp_path):
+        writer.append_batch([_snapshot(BASE, 1), _snapshot(BASE + 86400, 2)])
+        assert len(list((tmp_path / 'history').glob('metrics_*.jsonl'))) == 2
+
+    def test_appends_across_writers(self, tmp_path):
+        for cpu in (1, 2):
+            w = JsonlHistoryWriter(tmp_path, fsync_interval=0)
+            w.append_batch([_snapshot(BASE + cpu, cpu)])
+            w.close()
+        assert [s['cpu']['usage_percent'] for s in read_history(tmp_path)] == [1, 2]
+
+
+class TestReadHistory:
+    """Tests for read_history function."""
+
+    def test_time_range(self, writer, tmp_path):
+        writer.append_batch([_snapshot(BASE + i * 60, i) for i in range(10)])
+        writer.flush()
+        values = [s['cpu']['usage_percent'] for s in read_history(tmp_path / 'history', BASE + 120, BASE + 300)]
+        assert values == [2, 3, 4, 5]
+
+    def test_skips_torn_line(self, writer, tmp_path):
+        writer.append_batch([_snapshot(BASE, 1)])
+        writer.close()
+        path = tmp_path / 'history' / history_filename(BASE)
+        with path.open('a') as f:
+            f.write('{"timestamp": "2025-12-18T12:')
+        assert len(list(read_history(tmp_path / 'history'))) == 1
+
+    def test_missing_directory(self, tmp_path):
+        assert list(read_history(tmp_path / 'missing')) == []
@@ -12,7 +12,9 @@
     _extract_memory_metrics,
     _extract_disk_metrics,
     _extract_network_metrics,
-    _get_empty_metrics
+    _get_empty_metrics,
+    flatten_metrics,
+    snapshot_epoch
 )
 
 
@@ -338,3 +340,38 @@ def test_empty_metrics_structure(self):
         assert empty['memory']['status'] == 'unavailable'
         assert empty['disk'] == []
         assert empty['network']['total_rx_bytes'] == 0
+
+
+class TestFlattenMetrics:
+    """Tests for flatten_metrics function."""
+    
+    def test_flatten_nested_and_lists(self, valid_metrics_data):
+        """Test numeric leaves are flattened with identity keys for lists."""
+        series = flatten_metrics(valid_metrics_data)
+        
+        assert series['cpu.usage_percent'] == 45.2
+        assert series['cpu.load_average.1min'] == 1.2
+        assert series['disk.C:.usage_percent'] == 24.0
+        assert 'system.hostname' not in series
+        assert 'timestamp' not in series
+    
+    def test_flatten_skips_booleans_and_none(self):
+        """Test non-numeric values are skipped."""
+        series = flatten_metrics({'a': True, 'b': None, 'c': 1})
+        assert series == {'c': 1.0}
+    
+    def test_flatten_list_without_identity(self):
+        """Test list entries without identity fields use their position."""
+        series = flatten_metrics({'fans': [{'rpm': 1000}, {'rpm': 1200}]})
+        assert series == {'fans.0.rpm': 1000.0, 'fans.1.rpm': 1200.0}
+
+
+class TestSnapshotEpoch:
+    """Tests for snapshot_epoch function."""
+    
+    def test_valid_timestamp(self):
+        assert snapshot_epoch({'timestamp': '1970-01-01T00:01:00Z'}) == 60.0
+    
+    def test_invalid_timestamp(self):
+        assert snapshot_epoch({'timestamp': 'N/A'}, default=5.0) == 5.0
+        assert snapshot_epoch({}) is None
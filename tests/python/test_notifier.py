@@ -0,0 +1,288 @@
+"""Unit tests for core.notifier module."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from core.alert_manager import load_alerts
+from core.notifier import (
+    Destination, FileSink, NotificationDispatcher, NotificationSink, WebhookSink,
+    format_subject, load_destinations, notifying_writer,
+)
+
+
+class RecordingSink:
+    """Sink that records digests and can fail or stall on demand."""
+
+    def __init__(self, fail_times=0, delay=0.0):
+        self.digests = []
+        self.fail_times = fail_times
+        self.delay = delay
+        self.calls = 0
+
+    def send(self, alerts):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.calls <= self.fail_times:
+            raise ConnectionError("receiver down")
+        self.digests.append(list(alerts))
+
+    @property
+    def delivered(self):
+        return [alert for digest in self.digests for alert in digest]
+
+
+class WebhookReceiver:
+    """Local HTTP stand-in for a webhook receiver."""
+
+    def __init__(self, fail_times=0):
+        self.payloads = []
+        self.fail_times = fail_times
+        self.requests = 0
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                receiver.requests += 1
+                if receiver.requests <= receiver.fail_times:
+                    self.send_response(503)
+                else:
+                    receiver.payloads.append(json.loads(body))
+                    self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def alert(n, level='warning'):
+    return {'level': level, 'metric': 'cpu', 'message': f"alert {n}", 'n': n}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def dispatchers():
+    """Dispatchers created by a test; stopped afterwards."""
+    created = []
+    yield created
+    for dispatcher in created:
+        dispatcher.stop(timeout=2)
+
+
+def make_dispatcher(dispatchers, tmp_path, *destinations):
+    dispatcher = NotificationDispatcher(list(destinations), tmp_path / 'outbox', fsync=False)
+    dispatchers.append(dispatcher)
+    return dispatcher
+
+
+class TestDispatcher:
+    """Tests for batching, filtering and retries."""
+
+    def test_batches_alerts_into_digests(self, tmp_path, dispatchers):
+        sink = RecordingSink()
+        dispatcher = make_dispatcher(dispatchers, tmp_path,
+                                     Destination('rec', sink, batch_max=5, batch_wait=0.2))
+        dispatcher.start()
+        for n in range(12):
+            dispatcher.notify(alert(n))
+
+        assert wait_for(lambda: len(sink.delivered) == 12)
+        assert [a['n'] for a in sink.delivered] == list(range(12))
+        assert all(len(digest) <= 5 for digest in sink.digests)
+        assert len(sink.digests) < 12
+
+    def test_min_level_filter(self, tmp_path, dispatchers):
+        sink = RecordingSink()
+        dispatcher = make_dispatcher(dispatchers, tmp_path,
+                                     Destination('rec', sink, min_level='critical', batch_wait=0.05))
+        dispatcher.start()
+        assert dispatcher.notify(alert(1, 'warning')) == 0
+        assert dispatcher.notify(alert(2, 'critical')) == 1
+
+        assert wait_for(lambda: len(sink.delivered) == 1)
+        assert sink.delivered[0]['n'] == 2
+
+    def test_retries_with_backoff(self, tmp_path, dispatchers):
+        sink = RecordingSink(fail_times=2)
+        destination = Destination('rec', sink, batch_wait=0.05, backoff_base=0.01)
+        dispatcher = make_dispatcher(dispatchers, tmp_path, destination)
+        dispatcher.start()
+        dispatcher.notify(alert(1))
+
+        assert wait_for(lambda: len(sink.delivered) == 1)
+        assert sink.calls == 3
+        assert wait_for(lambda: dispatcher.stats()['rec'] == {'sent': 1, 'failures': 2})
+
+    def test_slow_receiver_does_not_block_notify(self, tmp_path, dispatchers):
+        slow = RecordingSink(delay=0.5)
+        fast = RecordingSink()
+        dispatcher = make_dispatcher(dispatchers, tmp_path,
+                                     Destination('slow', slow, batch_max=1, batch_wait=0),
+                                     Destination('fast', fast, batch_wait=0.05))
+        dispatcher.start()
+
+        started = time.monotonic()
+        for n in range(5):
+            dispatcher.notify(alert(n))
+        assert time.monotonic() - started < 0.4
+
+        # The fast destination is not held up by the slow one
+        assert wait_for(lambda: len(fast.delivered) == 5, timeout=1.0)
+        assert len(slow.delivered) < 5
+
+    def test_backoff_is_capped(self):
+        destination = Destination('rec', RecordingSink(), backoff_base=1, backoff_max=10)
+        assert 0.8 <= destination.backoff(1) <= 1.2
+        assert 8 <= destination.backoff(20) <= 12
+
+
+class TestOutbox:
+    """Tests for the persistent outbox."""
+
+    def test_undelivered_alerts_survive_restart(self, tmp_path, dispatchers):
+        down = RecordingSink(fail_times=1000)
+        first = NotificationDispatcher([Destination('rec', down, batch_wait=0.05, backoff_base=10)],
+                                       tmp_path / 'outbox', fsync=False)
+        first.start()
+        for n in range(3):
+            first.notify(alert(n))
+        assert wait_for(lambda: down.calls >= 1)
+        first.stop(timeout=2)
+
+        up = RecordingSink()
+        second = make_dispatcher(dispatchers, tmp_path, Destination('rec', up, batch_wait=0.05))
+        second.start()
+        assert wait_for(lambda: len(up.delivered) == 3)
+        assert [a['n'] for a in up.delivered] == [0, 1, 2]
+
+    def test_delivered_alerts_are_not_resent(self, tmp_path, dispatchers):
+        sink = RecordingSink()
+        first = NotificationDispatcher([Destination('rec', sink, batch_wait=0.05)],
+                                       tmp_path / 'outbox', fsync=False)
+        first.start()
+        first.notify(alert(1))
+        assert wait_for(lambda: len(sink.delivered) == 1)
+        time.sleep(0.1)  # let the checkpoint land
+        first.stop(timeout=2)
+
+        again = RecordingSink()
+        second = make_dispatcher(dispatchers, tmp_path, Destination('rec', again, batch_wait=0.05))
+        second.start()
+        second.notify(alert(2))
+        assert wait_for(lambda: len(again.delivered) == 1)
+        assert again.delivered[0]['n'] == 2
+
+    def test_alerts_before_start_are_delivered_once(self, tmp_path, dispatchers):
+        sink = RecordingSink()
+        dispatcher = make_dispatcher(dispatchers, tmp_path, Destination('rec', sink, batch_wait=0.05))
+        dispatcher.notify(alert(1))
+        dispatcher.start()
+        dispatcher.notify(alert(2))
+
+        assert wait_for(lambda: len(sink.delivered) == 2)
+        time.sleep(0.1)
+        assert [a['n'] for a in sink.delivered] == [1, 2]
+
+
+class TestSinks:
+    """Tests for the webhook and file sinks and config loading."""
+
+    def test_webhook_delivery_and_retry(self, tmp_path, dispatchers):
+        receiver = WebhookReceiver(fail_times=1)
+        try:
+            dispatcher = make_dispatcher(dispatchers, tmp_path, Destination(
+                'hook', WebhookSink(receiver.url, timeout=2), batch_wait=0.1, backoff_base=0.01))
+            dispatcher.start()
+            dispatcher.notify(alert(1))
+            dispatcher.notify(alert(2, 'critical'))
+
+            assert wait_for(lambda: receiver.payloads)
+            payload = receiver.payloads[0]
+            assert payload['count'] == 2
+            assert [a['n'] for a in payload['alerts']] == [1, 2]
+            assert receiver.requests == 2
+        finally:
+            receiver.close()
+
+    def test_file_sink_appends_jsonl(self, tmp_path):
+        sink = FileSink(tmp_path / 'out' / 'alerts.jsonl')
+        sink.send([alert(1)])
+        sink.send([alert(2)])
+        lines = (tmp_path / 'out' / 'alerts.jsonl').read_text().splitlines()
+        assert [json.loads(line)['n'] for line in lines] == [1, 2]
+
+    def test_format_subject(self):
+        subject = format_subject([alert(1), {'level': 'critical', 'metric': 'disk', 'message': ''}])
+        assert subject == '[critical] 2 alerts: cpu, disk'
+
+    def test_load_destinations(self, tmp_path):
+        config = tmp_path / 'notify.json'
+        config.write_text(json.dumps([
+            {'name': 'hook', 'type': 'webhook', 'url': 'http://localhost/x', 'batch_max': 10},
+            {'name': 'log', 'type': 'file', 'path': str(tmp_path / 'n.jsonl'), 'min_level': 'info'},
+        ]))
+        hook, log = load_destinations(config)
+        assert isinstance(hook.sink, WebhookSink) and hook.batch_max == 10
+        assert isinstance(log.sink, FileSink) and log.min_level == 'info'
+
+    def test_load_destinations_rejects_unknown_type(self, tmp_path):
+        config = tmp_path / 'notify.json'
+        config.write_text(json.dumps([{'name': 'x', 'type': 'pager'}]))
+        with pytest.raises(ValueError):
+            load_destinations(config)
+
+
+class TestNotifyingWriter:
+    """Tests for the AlertLifecycle writer that notifies."""
+
+    def test_writes_row_then_notifies(self, tmp_path, dispatchers):
+        sink = RecordingSink()
+        dispatcher = make_dispatcher(dispatchers, tmp_path, Destination('rec', sink, batch_wait=0.05))
+        dispatcher.start()
+        path = str(tmp_path / 'alerts.json')
+        write = notifying_writer(dispatcher, path)
+
+        assert write('disk', 'critical', 'Disk full', 99.0, 95.0, host='web-1', resource=None)
+        assert wait_for(lambda: sink.delivered)
+        delivered = sink.delivered[0]
+        assert delivered['metric'] == 'disk' and delivered['host'] == 'web-1'
+        assert 'resource' not in delivered
+        stored = load_alerts(path)[0]
+        assert stored['message'] == 'Disk full'
+        assert (delivered['id'], delivered['timestamp']) == (stored['id'], stored['timestamp'])
+
+    def test_sqlite_row_id_is_notified(self, tmp_path, dispatchers):
+        sink = RecordingSink()
+        dispatcher = make_dispatcher(dispatchers, tmp_path, Destination('rec', sink, batch_wait=0.05))
+        dispatcher.start()
+        path = str(tmp_path / 'alerts.db')
+        write = notifying_writer(dispatcher, path)
+
+        assert write('cpu', 'warning', 'CPU high', 91.0, 90.0)
+        assert wait_for(lambda: sink.delivered)
+        assert sink.delivered[0]['id'] == load_alerts(path)[0]['id']
+
+    def test_sink_must_implement_send(self):
+        with pytest.raises(TypeError):
+            NotificationSink()
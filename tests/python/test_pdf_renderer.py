@@ -0,0 +1,59 @@
+"""Unit tests for web.pdf_renderer module."""
+
+import pytest
+from web.pdf_renderer import PdfRenderer, PdfUnavailable, available
+
+
+def report_generator(*args, **kwargs):
+    module = pytest.importorskip('web.report_generator')  # needs jinja2
+    return module.ReportGenerator(*args, **kwargs)
+
+
+HTML = "<html><body><h1>Report</h1><div class='metric-group'>cpu 12%</div></body></html>"
+
+
+@pytest.mark.skipif(available(), reason="weasyprint is installed")
+class TestWithoutWeasyprint:
+    """Tests for the optional-dependency path."""
+
+    def test_render_raises_unavailable(self, tmp_path):
+        with pytest.raises(PdfUnavailable):
+            PdfRenderer().render(HTML, tmp_path / 'out.pdf')
+        assert not (tmp_path / 'out.pdf').exists()
+
+    def test_report_generator_without_renderer(self, tmp_path):
+        html_path = tmp_path / 'report_1.html'
+        html_path.write_text(HTML)
+        generator = report_generator(tmp_path / 'latest.json', tmp_path / 'alerts.json', tmp_path)
+        with pytest.raises(RuntimeError):
+            generator.render_pdf(html_path)
+
+
+@pytest.mark.skipif(not available(), reason="weasyprint is not installed")
+class TestRender:
+    """Tests for rendering in the worker pool."""
+
+    def test_render_writes_pdf(self, tmp_path):
+        renderer = PdfRenderer(workers=1, timeout=60)
+        try:
+            out = renderer.render(HTML, tmp_path / 'out.pdf')
+            # The warm worker is reused for the next document
+            again = renderer.render(HTML, tmp_path / 'again.pdf')
+        finally:
+            renderer.close()
+        assert out.read_bytes().startswith(b'%PDF')
+        assert again.read_bytes().startswith(b'%PDF')
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_report_generator_renders_pdf(self, tmp_path):
+        html_path = tmp_path / 'report_1.html'
+        html_path.write_text(HTML)
+        renderer = PdfRenderer(workers=1, timeout=60)
+        generator = report_generator(tmp_path / 'latest.json', tmp_path / 'alerts.json',
+                                     tmp_path, pdf_renderer=renderer)
+        try:
+            pdf_path = generator.render_pdf(html_path)
+        finally:
+            renderer.close()
+        assert pdf_path == tmp_path / 'pdf' / 'report_1.pdf'
+        assert any(r['type'] == 'pdf' for r in generator.list_reports())
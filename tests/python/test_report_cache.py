@@ -0,0 +1,124 @@
+"""Unit tests for web.report_cache module."""
+
+import pytest
+from core.alert_store import AlertStore
+from web.report_cache import ReportCache, input_key, normalize_metrics
+
+
+def metrics(cpu, timestamp='2025-01-01T00:00:00Z'):
+    return {'timestamp': timestamp, 'system': {'hostname': 'web-1', 'os': 'Linux'},
+            'cpu': {'usage_percent': cpu}, 'memory': {'usage_percent': 40.0, 'used_mb': 4096,
+                                                      'total_mb': 8192},
+            'disk': [{'device': '/', 'used_percent': 50.0, 'used_gb': 10.0, 'total_gb': 20.0}],
+            'network': [], 'temperature': {'cpu_celsius': 50.0}, 'gpu': {'devices': []}}
+
+
+def report_generator(tmp_path, **kwargs):
+    module = pytest.importorskip('web.report_generator')  # needs jinja2
+    return module.ReportGenerator(tmp_path / 'latest.json', tmp_path / 'alerts.json',
+                                  tmp_path / 'reports', **kwargs)
+
+
+class TestReportCache:
+    """Tests for the artifact index and fragment cache."""
+
+    def test_hit_returns_files(self, tmp_path):
+        report = tmp_path / 'report.html'
+        report.write_text('x')
+        cache = ReportCache(tmp_path / 'cache')
+        assert cache.get('k') is None
+        cache.put('k', {'html': report})
+        assert cache.get('k') == {'html': str(report)}
+        # The index survives a restart
+        assert ReportCache(tmp_path / 'cache').get('k') == {'html': str(report)}
+
+    def test_entry_dropped_when_file_removed(self, tmp_path):
+        report = tmp_path / 'report.html'
+        report.write_text('x')
+        cache = ReportCache(tmp_path / 'cache')
+        cache.put('k', {'html': report})
+        report.unlink()
+        assert cache.get('k') is None
+        assert cache.stats()['entries'] == 0
+
+    def test_bounded(self, tmp_path):
+        cache = ReportCache(tmp_path / 'cache', max_entries=2, max_fragments=2)
+        for n in range(3):
+            cache.put(str(n), {})
+            cache.fragment(str(n), lambda: 'markup')
+        assert cache.get('0') is None and cache.get('2') == {}
+        assert cache.stats()['fragments'] == 2
+
+    def test_fragment_renders_once(self, tmp_path):
+        cache = ReportCache(tmp_path / 'cache')
+        calls = []
+
+        def render():
+            calls.append(1)
+            return '<div/>'
+
+        assert cache.fragment('f', render) == '<div/>'
+        assert cache.fragment('f', render) == '<div/>'
+        assert len(calls) == 1
+
+    def test_input_key_normalizes(self):
+        a = normalize_metrics(metrics(10.0, '2025-01-01T00:00:00Z'))
+        b = normalize_metrics(metrics(10.0, '2025-01-01T00:00:05Z'))
+        assert input_key(a, 'v1') == input_key(b, 'v1')
+        assert input_key(a, 'v1') != input_key(a, 'v2')
+        assert input_key({'x': 1, 'y': 2}) == input_key({'y': 2, 'x': 1})
+
+
+class TestAlertStoreVersion:
+    """Tests for the alert set version used in report keys."""
+
+    def test_version_tracks_membership(self):
+        first, second = AlertStore(), AlertStore()
+        empty = first.version
+        first.add({'id': 'a', 'level': 'warning', 'timestamp': '2025-01-01T00:00:00Z'})
+        first.add({'id': 'b', 'level': 'info', 'timestamp': '2025-01-01T00:00:01Z'})
+        second.add({'id': 'b', 'level': 'info', 'timestamp': '2025-01-01T00:00:01Z'})
+        second.add({'id': 'a', 'level': 'warning', 'timestamp': '2025-01-01T00:00:00Z'})
+        assert first.version == second.version != empty
+        first.remove('b')
+        first.remove('a')
+        assert first.version == empty
+
+
+class TestGeneratorCaching:
+    """Tests for cached report rendering."""
+
+    def test_identical_inputs_reuse_artifacts(self, tmp_path):
+        generator = report_generator(tmp_path)
+        alerts = [{'id': 'a', 'level': 'warning', 'message': 'cpu high',
+                   'timestamp': '2025-01-01T00:00:00Z'}]
+        first = generator.generate_report(metrics(10.0), None, alerts)
+        # Only the snapshot timestamp differs
+        second = generator.generate_report(metrics(10.0, '2025-01-01T00:00:02Z'), None, alerts)
+        assert first == second
+        assert len(list((tmp_path / 'reports' / 'html').glob('report_*.html'))) == 1
+
+        third = generator.generate_report(metrics(55.0), None, alerts)
+        assert third != first
+        assert generator.cache.stats()['hits'] == 1
+
+    def test_only_changed_sections_rerender(self, tmp_path):
+        generator = report_generator(tmp_path)
+        alerts = [{'id': 'a', 'level': 'warning', 'message': 'cpu high',
+                   'timestamp': '2025-01-01T00:00:00Z'}]
+        generator.generate_report(metrics(10.0), metrics(20.0), alerts)
+        misses = generator.cache.stats()['fragment_misses']
+
+        html_path, _ = generator.generate_report(metrics(10.0), metrics(20.0),
+                                                 alerts + [dict(alerts[0], id='b', message='disk full')])
+        stats = generator.cache.stats()
+        # html + md: the two host sections hit, only the alerts sections render
+        assert stats['fragment_misses'] - misses == 2
+        assert stats['fragment_hits'] == 4
+        assert 'disk full' in html_path.read_text()
+
+    def test_custom_cache(self, tmp_path):
+        cache = ReportCache(tmp_path / 'other-cache')
+        generator = report_generator(tmp_path, cache=cache)
+        generator.generate_report(metrics(10.0), None, [])
+        assert cache.stats()['entries'] == 1
@@ -0,0 +1,111 @@
+"""Unit tests for core.report_catalog module."""
+
+import json
+import os
+import pytest
+from core.report_catalog import ReportCatalog, parse_report_name
+from core.retention import RetentionEngine, ReportRetentionPolicy
+
+
+NOW = 1_750_000_000.0
+
+
+def write_report(reports_dir, subdir, name, created, body='x'):
+    path = reports_dir / subdir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body)
+    os.utime(path, (created, created))
+    return path
+
+
+@pytest.fixture
+def reports_dir(tmp_path):
+    return tmp_path / 'reports'
+
+
+@pytest.fixture
+def catalog(reports_dir):
+    """Catalog with 5 html + 5 markdown snapshot reports, one a minute."""
+    catalog = ReportCatalog(reports_dir)
+    for i in range(5):
+        created = NOW - (4 - i) * 60
+        name = f'report_20250615_00000{i}_{i:08x}'
+        catalog.add(write_report(reports_dir, 'html', name + '.html', created), 'html', key=f'{i:08x}' * 8)
+        catalog.add(write_report(reports_dir, 'markdown', name + '.md', created), 'markdown')
+    return catalog
+
+
+class TestParseReportName:
+    """Tests for report filename parsing."""
+
+    def test_names(self):
+        assert parse_report_name('report_range_20250101_120000_1a2b3c4d.html') == ('range', '1a2b3c4d')
+        assert parse_report_name('report_20250101_120000_1a2b3c4d.md') == ('snapshot', '1a2b3c4d')
+        assert parse_report_name('report_20250101_120000.md') == ('snapshot', None)
+        assert parse_report_name('report_fleet_20250101_120000_1a2b3c4d.pdf') == ('fleet', '1a2b3c4d')
+
+
+class TestReportCatalog:
+    """Tests for catalog updates and listing."""
+
+    def test_query_newest_first_and_paginated(self, catalog):
+        entries, total = catalog.query(report_type='html', limit=2)
+        assert total == 5
+        assert [e.filename[-13:-5] for e in entries] == ['00000004', '00000003']
+        entries, _ = catalog.query(report_type='html', offset=4, limit=2)
+        assert [e.filename[-13:-5] for e in entries] == ['00000000']
+
+    def test_query_filters(self, catalog, reports_dir):
+        assert catalog.query(since=NOW - 60)[1] == 4
+        assert catalog.query(until=NOW - 240)[1] == 2
+        assert catalog.query(key='00000002')[1] == 1
+        catalog.add(write_report(reports_dir, 'html', 'report_range_20250615_000100_abcdef12.html', NOW),
+                    'html', kind='range', range_start=NOW - 3600, range_end=NOW)
+        entries, total = catalog.query(kind='range')
+        assert total == 1
+        assert entries[0].to_dict()['path'] == 'html/report_range_20250615_000100_abcdef12.html'
+        assert entries[0].range_end == NOW
+
+    def test_other_process_sees_changes(self, catalog, reports_dir):
+        reader = ReportCatalog(reports_dir)
+        assert len(reader) == 10
+        catalog.remove_many(['html/report_20250615_000000_00000000.html'])
+        assert len(reader) == 9
+        assert reader.get('html/report_20250615_000000_00000000.html') is None
+
+    def test_rebuilds_missing_manifest(self, catalog, reports_dir):
+        os.remove(reports_dir / 'catalog.jsonl')
+        rebuilt = ReportCatalog(reports_dir)
+        assert len(rebuilt) == 10
+        entry = rebuilt.get('html/report_20250615_000003_00000003.html')
+        assert entry.key == '00000003'
+        assert entry.created == NOW - 60
+
+    def test_compaction(self, reports_dir):
+        catalog = ReportCatalog(reports_dir, compact_min_lines=3)
+        path = write_report(reports_dir, 'html', 'report_20250615_000000_00000000.html', NOW)
+        for _ in range(6):
+            catalog.add(path, 'html')
+        lines = (reports_dir / 'catalog.jsonl').read_text().splitlines()
+        assert len(lines) < 6
+        assert json.loads(lines[-1])['filename'] == path.name
+        assert len(ReportCatalog(reports_dir)) == 1
+
+
+class TestReportRetention:
+    """Tests for catalog-driven report retention."""
+
+    def test_prunes_per_type(self, catalog, reports_dir):
+        engine = RetentionEngine([ReportRetentionPolicy(reports_dir, max_count=2)])
+        result = engine.run_once(now=NOW)[0]
+        assert result.files_deleted == 6
+        assert sorted(p.name for p in (reports_dir / 'html').iterdir()) == [
+            'report_20250615_000003_00000003.html', 'report_20250615_000004_00000004.html']
+        assert len(ReportCatalog(reports_dir)) == 4
+
+    def test_max_age_and_missing_files(self, catalog, reports_dir):
+        os.remove(reports_dir / 'markdown' / 'report_20250615_000000_00000000.md')
+        engine = RetentionEngine([ReportRetentionPolicy(reports_dir, max_age_seconds=150)])
+        result = engine.run_once(now=NOW)[0]
+        assert result.files_deleted == 3
+        assert catalog.query()[1] == 6
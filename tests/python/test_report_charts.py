@@ -0,0 +1,93 @@
+"""Unit tests for web.report_charts module."""
+
+import math
+
+import pytest
+from core.rollups import RollupSeries
+from web import report_charts
+from web.report_charts import ChartRenderer, ChartUnavailable, lttb, render_svg, series_points
+
+T0 = 1_700_000_040
+
+
+def rollup(values, seconds=60):
+    """One sample per bucket (array columns)."""
+    from array import array
+    starts = array('d', (T0 + i * seconds for i in range(len(values))))
+    values = array('d', values)
+    return RollupSeries(seconds, {'start': starts, 'n': array('d', [1.0] * len(values)),
+                                  'sum': values, 'min': values, 'max': values,
+                                  'first': values, 'last': values})
+
+
+class TestLttb:
+    """Tests for Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_keeps_endpoints_and_spikes(self):
+        xs = list(range(10000))
+        ys = [math.sin(x / 200.0) for x in xs]
+        ys[4321] = 50.0
+        out_x, out_y = lttb(xs, ys, 300)
+        assert len(out_x) == 300
+        assert (out_x[0], out_x[-1]) == (0, 9999)
+        assert out_x == sorted(out_x)
+        assert 4321 in out_x and max(out_y) == 50.0
+
+    def test_short_input_unchanged(self):
+        assert lttb([1, 2, 3], [4, 5, 6], 10) == ([1, 2, 3], [4, 5, 6])
+
+
+class TestRenderSvg:
+    """Tests for SVG drawing."""
+
+    def test_series_points(self):
+        xs, ys = series_points(rollup([10.0, 20.0]))
+        assert xs == [T0 + 30, T0 + 90]
+        assert ys == [10.0, 20.0]
+
+    def test_budget_gaps_and_escaping(self):
+        xs = [T0 + i * 60 for i in range(5000)] + [T0 + 400000]
+        svg = render_svg('<cpu>', [('a&b', xs, [50.0] * 5001)], T0, T0 + 400060, width=300)
+        assert svg.startswith('<svg') and '<title>&lt;cpu&gt;</title>' in svg
+        assert 'a&amp;b' in svg
+        path = svg.split(' d="')[1].split('"')[0]
+        # At most one point per plot pixel; the trailing point is detached
+        assert path.count('L') + path.count('M') <= 300 - 40 - 12
+        assert path.count('M') == 2
+
+
+class TestChartRenderer:
+    """Tests for host charts and their cache."""
+
+    def host(self, cpu=(10.0, 20.0, 30.0)):
+        return {'cpu.usage_percent': rollup(cpu), 'memory.usage_percent': rollup([50.0] * 3),
+                'disk./.used_percent': rollup([70.0] * 3), 'network.eth0.rx_bytes': rollup([0.0] * 3)}
+
+    def test_host_charts(self, tmp_path):
+        charts = ChartRenderer(tmp_path).host_charts('web-1', self.host(), T0, T0 + 180)
+        assert [chart['title'] for chart in charts] == ['CPU & Memory', 'Disk Used']
+        assert '>cpu</text>' in charts[0]['markup'] and '>memory</text>' in charts[0]['markup']
+
+    def test_cached_in_memory_and_on_disk(self, tmp_path):
+        renderer = ChartRenderer(tmp_path)
+        first = renderer.host_charts('web-1', self.host(), T0, T0 + 180)
+        assert renderer.host_charts('web-1', self.host(), T0, T0 + 180) == first
+        assert renderer.stats() == {'charts': 2, 'hits': 2, 'misses': 2}
+        assert len(list(tmp_path.glob('*.svg'))) == 2
+
+        other = ChartRenderer(tmp_path)
+        assert other.host_charts('web-1', self.host(), T0, T0 + 180) == first
+        assert other.stats()['misses'] == 0
+        # New CPU data redraws only that chart; another size or range redraws both
+        other.host_charts('web-1', self.host(cpu=(10.0, 20.0, 99.0)), T0, T0 + 180)
+        assert len(list(tmp_path.glob('*.svg'))) == 3
+        ChartRenderer(tmp_path, width=320).host_charts('web-1', self.host(), T0, T0 + 180)
+        other.host_charts('web-1', self.host(), T0, T0 + 240)
+        assert len(list(tmp_path.glob('*.svg'))) == 7
+
+    def test_png_requires_cairosvg(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(report_charts, 'cairosvg', None)
+        with pytest.raises(ChartUnavailable):
+            ChartRenderer(tmp_path, image_format='png')
+        with pytest.raises(ValueError):
+            ChartRenderer(tmp_path, image_format='gif')
@@ -0,0 +1,107 @@
+"""Unit tests for web.report_jobs module."""
+
+import threading
+import time
+
+import pytest
+from web.report_jobs import DONE, FAILED, QueueFull, ReportJobQueue, job_key
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class Gate:
+    """Renderer that blocks until released, recording its calls."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, params, progress):
+        self.calls.append(params)
+        progress(50, 'rendering')
+        self.release.wait(5)
+        if params.get('fail'):
+            raise RuntimeError('boom')
+        return {'files': {'html': f"report_{params.get('n', 0)}.html"}}
+
+
+@pytest.fixture
+def gate():
+    gate = Gate()
+    yield gate
+    gate.release.set()
+
+
+class TestReportJobQueue:
+    """Tests for the background report job queue."""
+
+    def test_job_runs_and_reports_progress(self, gate):
+        jobs = ReportJobQueue(gate, workers=1)
+        job, created = jobs.submit({'n': 1})
+        assert created
+        assert wait_for(lambda: jobs.get(job.id).stage == 'rendering')
+        assert jobs.get(job.id).progress == 50
+
+        gate.release.set()
+        assert wait_for(lambda: jobs.get(job.id).status == DONE)
+        assert jobs.get(job.id).to_dict()['result'] == {'files': {'html': 'report_1.html'}}
+        assert jobs.get(job.id).progress == 100
+        jobs.stop()
+
+    def test_identical_requests_share_a_job(self, gate):
+        jobs = ReportJobQueue(gate, workers=2)
+        first, created = jobs.submit({'n': 1, 'type': 'snapshot'})
+        second, again = jobs.submit({'type': 'snapshot', 'n': 1})
+        assert created and not again
+        assert first is second
+
+        gate.release.set()
+        assert wait_for(lambda: first.status == DONE)
+        assert len(gate.calls) == 1
+        # Once finished, the same request renders again
+        third, created = jobs.submit({'n': 1, 'type': 'snapshot'})
+        assert created and third.id != first.id
+        jobs.stop()
+
+    def test_bounded_queue_rejects_overload(self, gate):
+        jobs = ReportJobQueue(gate, workers=1, max_pending=2)
+        jobs.submit({'n': 0})
+        assert wait_for(lambda: len(gate.calls) == 1)  # worker busy
+        jobs.submit({'n': 1})
+        jobs.submit({'n': 2})
+        with pytest.raises(QueueFull):
+            jobs.submit({'n': 3})
+        # Duplicates of queued jobs are still accepted
+        assert jobs.submit({'n': 2})[1] is False
+
+        gate.release.set()
+        assert wait_for(lambda: jobs.stats()[DONE] == 3)
+        jobs.stop()
+
+    def test_failed_job_records_error(self, gate):
+        gate.release.set()
+        jobs = ReportJobQueue(gate, workers=1)
+        job, _ = jobs.submit({'fail': True})
+        assert wait_for(lambda: job.status == FAILED)
+        assert job.error == 'boom'
+        jobs.stop()
+
+    def test_finished_jobs_are_pruned(self, gate):
+        gate.release.set()
+        jobs = ReportJobQueue(gate, workers=1, keep_finished=2)
+        ids = [jobs.submit({'n': n})[0].id for n in range(4)]
+        assert wait_for(lambda: jobs.stats()[DONE] == 2 and jobs.get(ids[-1]) is not None
+                        and jobs.get(ids[-1]).status == DONE)
+        assert jobs.get(ids[0]) is None
+        jobs.stop()
+
+    def test_job_key_ignores_order(self):
+        assert job_key({'a': 1, 'b': 2}) == job_key({'b': 2, 'a': 1})
+        assert job_key({'a': 1}) != job_key({'a': 2})
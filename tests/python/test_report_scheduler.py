@@ -0,0 +1,174 @@
+"""Unit tests for web.report_scheduler module."""
+
+import json
+import pytest
+from datetime import datetime, timezone
+from web.report_scheduler import (
+    CronExpression,
+    ReportSchedule,
+    ReportScheduler,
+    load_schedules
+)
+
+
+def ts(text):
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp()
+
+
+class FakeQueue:
+    """Records submissions; jobs stay running until finish() is called."""
+
+    def __init__(self):
+        self.submitted = []
+        self.jobs = {}
+
+    def submit(self, body, scheduled_at):
+        job_id = f'job{len(self.submitted)}'
+        self.submitted.append((body, scheduled_at))
+        self.jobs[job_id] = {'id': job_id, 'status': 'running', 'started_at': scheduled_at}
+        return job_id
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def finish(self, job_id, at, status='done'):
+        self.jobs[job_id].update(status=status, finished_at=at,
+                                 result={'files': {'html': f'{job_id}.html'}})
+
+
+class TestCronExpression:
+    """Tests for cron parsing and next-run computation."""
+
+    def test_daily(self):
+        cron = CronExpression('0 6 * * *')
+        assert cron.next_after(ts('2025-03-01T05:59:30')) == ts('2025-03-01T06:00:00')
+        assert cron.next_after(ts('2025-03-01T06:00:00')) == ts('2025-03-02T06:00:00')
+
+    def test_weekly_names_and_steps(self):
+        # 2025-03-01 is a Saturday
+        assert CronExpression('30 6 * * mon').next_after(ts('2025-03-01T00:00:00')) == ts('2025-03-03T06:30:00')
+        assert CronExpression('*/15 * * * *').next_after(ts('2025-03-01T10:07:00')) == ts('2025-03-01T10:15:00')
+        assert CronExpression('0 0 1 jan-mar *').next_after(ts('2025-03-05T00:00:00')) == ts('2026-01-01T00:00:00')
+
+    def test_day_fields_either_match(self):
+        # Restricted day-of-month and day-of-week: either matches (the 10th or a Sunday)
+        cron = CronExpression('0 0 10 * sun')
+        assert cron.next_after(ts('2025-03-01T00:00:00')) == ts('2025-03-02T00:00:00')
+        assert cron.next_after(ts('2025-03-09T00:00:00')) == ts('2025-03-10T00:00:00')
+
+    def test_aliases_and_errors(self):
+        assert CronExpression('@hourly').next_after(ts('2025-03-01T10:07:00')) == ts('2025-03-01T11:00:00')
+        for bad in ('* * * *', '61 * * * *', '*/0 * * * *', '0 0 * * funday'):
+            with pytest.raises(ValueError):
+                CronExpression(bad)
+
+
+class TestReportScheduler:
+    """Tests for firing, staggering, skipping and history."""
+
+    def scheduler(self, schedules, queue, tmp_path, start='2025-03-01T05:00:00', **kwargs):
+        return ReportScheduler(schedules, queue.submit, queue.get,
+                               history_path=tmp_path / 'history.jsonl',
+                               clock=lambda: ts(start), **kwargs)
+
+    def test_staggers_hosts(self, tmp_path):
+        queue = FakeQueue()
+        schedule = ReportSchedule('daily', '0 6 * * *', range='24h', hosts=['a', 'b', 'c'],
+                                  stagger_seconds=60)
+        scheduler = self.scheduler([schedule], queue, tmp_path)
+        assert scheduler.tick(ts('2025-03-01T05:59:00')) == ts('2025-03-01T06:00:00')
+
+        scheduler.tick(ts('2025-03-01T06:00:05'))
+        assert queue.submitted == [({'range': '24h', 'host': 'a'}, ts('2025-03-01T06:00:00'))]
+        scheduler.tick(ts('2025-03-01T06:02:00'))
+        assert [body['host'] for body, _ in queue.submitted] == ['a', 'b', 'c']
+        # All hosts cover the same window
+        assert {at for _, at in queue.submitted} == {ts('2025-03-01T06:00:00')}
+
+    def test_skips_while_previous_running(self, tmp_path):
+        queue = FakeQueue()
+        scheduler = self.scheduler([ReportSchedule('snap', '*/5 * * * *')], queue, tmp_path)
+        scheduler.tick(ts('2025-03-01T05:05:00'))
+        scheduler.tick(ts('2025-03-01T05:10:00'))
+        assert len(queue.submitted) == 1
+        assert scheduler.history(limit=1)[0]['event'] == 'skipped'
+
+        queue.finish('job0', ts('2025-03-01T05:11:00'))
+        scheduler.tick(ts('2025-03-01T05:11:00'))
+        scheduler.tick(ts('2025-03-01T05:15:00'))
+        assert len(queue.submitted) == 2
+        events = [entry['event'] for entry in scheduler.history(schedule='snap')]
+        assert events == ['submitted', 'done', 'skipped', 'submitted']
+        done = scheduler.history(schedule='snap')[1]
+        assert done['files'] == {'html': 'job0.html'}
+        assert done['duration'] == 360
+
+    def test_submit_errors_and_wildcard_hosts(self, tmp_path):
+        queue = FakeQueue()
+
+        def failing(body, scheduled_at):
+            raise RuntimeError('queue full')
+
+        schedules = [ReportSchedule('all', '0 * * * *', range='1h', hosts='*', stagger_seconds=0),
+                     ReportSchedule('broken', '0 * * * *')]
+        scheduler = self.scheduler(schedules, queue, tmp_path, list_hosts=lambda: ['y', 'x'])
+        scheduler.submit = lambda body, at: (failing if 'host' not in body else queue.submit)(body, at)
+        scheduler.tick(ts('2025-03-01T06:00:00'))
+        assert [body['host'] for body, _ in queue.submitted] == ['x', 'y']
+        assert scheduler.history(schedule='broken')[0]['error'] == 'queue full'
+
+    def test_history_persisted_and_status(self, tmp_path):
+        queue = FakeQueue()
+        schedule = ReportSchedule('snap', '@hourly')
+        scheduler = self.scheduler([schedule], queue, tmp_path)
+        scheduler.tick(ts('2025-03-01T06:00:00'))
+
+        reloaded = self.scheduler([schedule], queue, tmp_path)
+        assert reloaded.history()[0]['job_id'] == 'job0'
+        status = reloaded.status()[0]
+        assert status['next_run'] == ts('2025-03-01T06:00:00')
+        assert status['last_event']['event'] == 'submitted'
+
+    def test_disabled_never_fires(self, tmp_path):
+        queue = FakeQueue()
+        scheduler = self.scheduler([ReportSchedule('off', '* * * * *', enabled=False)], queue, tmp_path)
+        scheduler.tick(ts('2025-03-02T00:00:00'))
+        assert queue.submitted == []
+
+    def test_lock_file_allows_one_runner(self, tmp_path):
+        queue = FakeQueue()
+        lock = tmp_path / 'scheduler.lock'
+        first = self.scheduler([], queue, tmp_path, lock_path=lock)
+        second = self.scheduler([], queue, tmp_path, lock_path=lock)
+        assert first.start() is not None
+        assert second.start() is None
+        first.stop(timeout=5)
+        assert second.start() is not None
+        second.stop(timeout=5)
+
+
+class TestLoadSchedules:
+    """Tests for the schedules config file."""
+
+    def test_load(self, tmp_path):
+        path = tmp_path / 'schedules.json'
+        path.write_text(json.dumps([
+            {'name': 'daily', 'cron': '0 6 * * *', 'range': '24h', 'hosts': '*'},
+            {'name': 'snap', 'cron': '@hourly', 'pdf': True},
+            {'name': 'fleet', 'cron': '@daily', 'range': '7d', 'fleet': True}
+        ]))
+        schedules = load_schedules(path)
+        assert [s.name for s in schedules] == ['daily', 'snap', 'fleet']
+        assert schedules[0].body() == {'range': '24h'}
+        assert schedules[1].body() == {'pdf': True}
+        assert schedules[2].body() == {'range': '7d', 'fleet': True}
+
+    def test_invalid(self, tmp_path):
+        path = tmp_path / 'schedules.json'
+        path.write_text(json.dumps([{'name': 'a', 'cron': '@daily'}, {'name': 'a', 'cron': '@daily'}]))
+        with pytest.raises(ValueError):
+            load_schedules(path)
+        with pytest.raises(ValueError):
+            ReportSchedule('snap', '@daily', hosts=['a'])
+        with pytest.raises(ValueError):
+            ReportSchedule('fleet', '@daily', range='24h', hosts='*', fleet=True)
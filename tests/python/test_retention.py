@@ -0,0 +1,181 @@
+"""Unit tests for core.retention module."""
+
+import json
+import os
+import pytest
+from datetime import datetime, timedelta
+from core.retention import (
+    RetentionEngine,
+    RetentionPolicy,
+    AlertRetentionPolicy,
+    ReportRetentionPolicy,
+    default_policies,
+    load_policies,
+    read_segment
+)
+from core.alert_manager import load_alerts, trim_alerts
+
+
+NOW = datetime(2025, 12, 18, 12, 0, 0)
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    """Create 6 minutely snapshot files ending at NOW."""
+    directory = tmp_path / 'json'
+    directory.mkdir()
+    for minutes in range(6):
+        ts = NOW - timedelta(minutes=minutes)
+        path = directory / (ts.strftime('%Y%m%d_%H%M%S') + '.json')
+        path.write_text(json.dumps({'cpu': {'usage_percent': minutes}}))
+    return directory
+
+
+@pytest.fixture
+def alerts_file(tmp_path):
+    """Create an alerts.json with alerts spread over several days."""
+    path = tmp_path / 'alerts.json'
+    alerts = [
+        {'level': 'info', 'metric': 'cpu', 'message': f'a{day}',
+         'timestamp': f'2025-12-{day:02d}T00:00:00Z'}
+        for day in range(1, 11)
+    ]
+    path.write_text(json.dumps({'timestamp': '', 'alerts': alerts}))
+    return path
+
+
+class TestDirectoryPolicies:
+    """Tests for count/age/bytes limits."""
+
+    def test_max_count(self, archive_dir):
+        deleted = []
+        engine = RetentionEngine(
+            [RetentionPolicy(archive_dir, pattern='*.json', max_count=4)],
+            on_delete=lambda directory, names: deleted.extend(names)
+        )
+        result = engine.run_once(now=NOW.timestamp())[0]
+
+        assert result.files_deleted == 2
+        assert result.bytes_reclaimed > 0
+        assert len(list(archive_dir.glob('*.json'))) == 4
+        # Oldest files are the ones removed
+        assert sorted(deleted)[0] == (NOW - timedelta(minutes=5)).strftime('%Y%m%d_%H%M%S') + '.json'
+
+    def test_max_age(self, archive_dir):
+        engine = RetentionEngine([RetentionPolicy(archive_dir, pattern='*.json', max_age_seconds=150)])
+        result = engine.run_once(now=NOW.timestamp())[0]
+        assert result.files_deleted == 3
+
+    def test_max_bytes(self, archive_dir):
+        size = next(archive_dir.glob('*.json')).stat().st_size
+        engine = RetentionEngine([RetentionPolicy(archive_dir, pattern='*.json', max_bytes=size * 2)])
+        engine.run_once(now=NOW.timestamp())
+        assert len(list(archive_dir.glob('*.json'))) == 2
+
+    def test_series_pattern(self, tmp_path):
+        for kind in ('daily', 'weekly'):
+            for i in range(3):
+                path = tmp_path / f'report_{kind}_{i}.html'
+                path.write_text('x')
+                os.utime(path, (1000 + i, 1000 + i))
+        engine = RetentionEngine([RetentionPolicy(tmp_path, pattern='report_*.html', max_count=1,
+                                                  series_pattern=r'report_(\w+?)_')])
+        engine.run_once(now=2000)
+        assert sorted(p.name for p in tmp_path.glob('*.html')) == ['report_daily_2.html', 'report_weekly_2.html']
+
+    def test_missing_directory(self, tmp_path):
+        engine = RetentionEngine([RetentionPolicy(tmp_path / 'missing', max_count=1)])
+        assert engine.run_once()[0].files_deleted == 0
+
+
+class TestCompaction:
+    """Tests for compaction of evicted snapshots into segments."""
+
+    def test_compact_into_daily_segment(self, archive_dir, tmp_path):
+        segments = tmp_path / 'segments'
+        engine = RetentionEngine([RetentionPolicy(archive_dir, pattern='*.json', max_count=2,
+                                                  compact_dir=segments)])
+        result = engine.run_once(now=NOW.timestamp())[0]
+
+        assert result.files_compacted == 4
+        assert result.segments_written == 1
+        assert len(list(archive_dir.glob('*.json'))) == 2
+
+        snapshots = read_segment(segments / '20251218.jsonl.gz')
+        assert [s['cpu']['usage_percent'] for s in snapshots] == [5, 4, 3, 2]
+        assert snapshots[0]['archive_file'].endswith('.json')
+
+    def test_compaction_appends(self, archive_dir, tmp_path):
+        segments = tmp_path / 'segments'
+        policy = RetentionPolicy(archive_dir, pattern='*.json', max_count=4, compact_dir=segments)
+        engine = RetentionEngine([policy])
+        engine.run_once(now=NOW.timestamp())
+        policy.max_count = 1
+        engine.run_once(now=NOW.timestamp())
+        assert len(read_segment(segments / '20251218.jsonl.gz')) == 5
+
+    def test_torn_snapshot_is_dropped(self, archive_dir, tmp_path):
+        oldest = sorted(archive_dir.glob('*.json'))[0]
+        oldest.write_text('{"cpu": ')
+        engine = RetentionEngine([RetentionPolicy(archive_dir, pattern='*.json', max_count=5,
+                                                  compact_dir=tmp_path / 'segments')])
+        result = engine.run_once(now=NOW.timestamp())[0]
+        assert result.files_deleted == 1
+        assert result.files_compacted == 0
+
+
+class TestAlertRetention:
+    """Tests for alert log trimming."""
+
+    def test_trim_alerts_max_count(self, alerts_file):
+        assert trim_alerts(str(alerts_file), max_count=3) == 7
+        alerts = load_alerts(str(alerts_file))
+        assert [a['message'] for a in alerts] == ['a10', 'a9', 'a8']
+
+    def test_trim_alerts_max_age(self, alerts_file):
+        now = datetime(2025, 12, 10).timestamp()
+        removed = trim_alerts(str(alerts_file), max_age_seconds=2 * 86400 + 1, now=now)
+        assert removed == 7
+
+    def test_trim_alerts_noop_leaves_file(self, alerts_file):
+        before = alerts_file.stat().st_mtime_ns, alerts_file.read_bytes()
+        assert trim_alerts(str(alerts_file), max_count=100) == 0
+        assert (alerts_file.stat().st_mtime_ns, alerts_file.read_bytes()) == before
+
+    def test_engine_alert_policy(self, alerts_file):
+        engine = RetentionEngine([AlertRetentionPolicy(alerts_file, max_count=5)])
+        result = engine.run_once()[0]
+        assert result.alerts_removed == 5
+        assert engine.stats()['totals']['alerts_removed'] == 5
+
+
+class TestPolicyConfig:
+    """Tests for default and file-based policies."""
+
+    def test_default_policies(self, tmp_path):
+        policies = default_policies(tmp_path)
+        assert policies[0].directory == tmp_path / 'json'
+        assert isinstance(policies[-1], AlertRetentionPolicy)
+        assert policies[-1].path == tmp_path / 'data' / 'alerts' / 'alerts.json'
+
+    def test_default_policies_alerts_path(self, tmp_path):
+        policies = default_policies(tmp_path, alerts_path=str(tmp_path / 'alerts.db'))
+        assert policies[-1].path == tmp_path / 'alerts.db'
+
+    def test_load_policies(self, tmp_path):
+        config = tmp_path / 'retention.json'
+        config.write_text(json.dumps([
+            {'directory': 'json', 'pattern': '*.json', 'max_count': 30},
+            {'path': 'data/alerts/alerts.json', 'max_count': 100}
+        ]))
+        policies = load_policies(config)
+        assert policies[0].directory == tmp_path / 'json'
+        assert policies[0].max_count == 30
+        assert policies[1].path == tmp_path / 'data/alerts/alerts.json'
+
+    def test_load_report_policy(self, tmp_path):
+        config = tmp_path / 'retention.json'
+        config.write_text(json.dumps([{'reports_dir': 'reports', 'max_count': 20}]))
+        policy = load_policies(config)[0]
+        assert isinstance(policy, ReportRetentionPolicy)
+        assert policy.reports_dir == tmp_path / 'reports'
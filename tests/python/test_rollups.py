@@ -0,0 +1,322 @@
+"""Unit tests for core.rollups module."""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from core import rollups
+from core.history import JsonlHistoryWriter
+from core.rollups import (
+    RollupSeries, RollupStore, counter_total, fleet_summary, np, preset_range,
+    range_summary, rollup_snapshots, series_stats
+)
+from core.sqlite_store import SQLiteStore
+
+T0 = 1_700_000_040  # a multiple of 60
+
+
+def snapshot(ts, cpu, host='web-1', disk=50.0, rx=0, lo=0):
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(ts)),
+        'system': {'hostname': host},
+        'cpu': {'usage_percent': cpu},
+        'disk': [{'device': '/', 'used_percent': disk, 'used_gb': disk * 2}],
+        'network': [{'iface': 'eth0', 'rx_bytes': rx, 'tx_bytes': 0},
+                    {'iface': 'lo', 'rx_bytes': lo, 'tx_bytes': lo}],
+    }
+
+
+def series(values, seconds=60):
+    """One sample per bucket."""
+    snapshots = [snapshot(T0 + i * seconds, value) for i, value in enumerate(values)]
+    columns = rollup_snapshots(snapshots, seconds)['web-1']['cpu.usage_percent']
+    return RollupSeries.from_arrays(seconds, columns)
+
+
+@pytest.fixture
+def history(tmp_path):
+    writer = JsonlHistoryWriter(tmp_path / 'history')
+    yield writer
+    writer.close()
+
+
+class TestRollupSnapshots:
+    """Tests for folding snapshots into buckets."""
+
+    def test_bucket_columns(self):
+        snapshots = [snapshot(T0 + offset, cpu) for offset, cpu in
+                     [(0, 10.0), (20, 30.0), (40, 20.0), (60, 50.0)]]
+        columns = rollup_snapshots(snapshots)['web-1']['cpu.usage_percent']
+        assert list(columns['start']) == [T0, T0 + 60]
+        assert list(columns['n']) == [3, 1]
+        assert list(columns['sum']) == [60.0, 50.0]
+        assert list(columns['min']) == [10.0, 50.0]
+        assert list(columns['max']) == [30.0, 50.0]
+        assert list(columns['first']) == [10.0, 50.0]
+        assert list(columns['last']) == [20.0, 50.0]
+
+    def test_identity_sections_are_skipped(self):
+        rolled = rollup_snapshots([dict(snapshot(T0, 1.0), anomaly={'cpu': {'usage_percent': 9.0}})])
+        names = set(rolled['web-1'])
+        assert 'cpu.usage_percent' in names
+        assert not any(name.startswith(('system.', 'anomaly.')) for name in names)
+
+    def test_out_of_order_sample_lands_in_its_bucket(self):
+        snapshots = [snapshot(T0 + 120, 3.0), snapshot(T0, 1.0), snapshot(T0 + 125, 5.0)]
+        columns = rollup_snapshots(snapshots)['web-1']['cpu.usage_percent']
+        assert list(columns['start']) == [T0, T0 + 120]
+        assert list(columns['n']) == [1, 2]
+
+
+class TestRollupStore:
+    """Tests for the incremental per-day rollup files."""
+
+    def test_incremental_update(self, tmp_path, history):
+        history.append_batch([snapshot(T0 + i * 2, 10.0) for i in range(60)])
+        history.flush()
+        store = RollupStore(tmp_path / 'history')
+        first = store.load(T0, T0 + 3600)['web-1']['cpu.usage_percent']
+        assert first.samples == 60
+
+        history.append_batch([snapshot(T0 + 120 + i * 2, 20.0) for i in range(30)])
+        history.flush()
+        second = store.load(T0, T0 + 3600)['web-1']['cpu.usage_percent']
+        assert second.samples == 90
+        assert float(second.max[-1]) == 20.0
+
+        # A new store reads the persisted rollups instead of the history
+        assert RollupStore(tmp_path / 'history').update() == 0
+        again = RollupStore(tmp_path / 'history').load(T0, T0 + 3600)
+        assert again['web-1']['cpu.usage_percent'].samples == 90
+
+    def test_torn_line_is_read_later(self, tmp_path, history):
+        history.append_batch([snapshot(T0, 10.0)])
+        history.flush()
+        path = next((tmp_path / 'history').glob('metrics_*.jsonl'))
+        with path.open('a') as f:
+            f.write('{"timestamp": "2023')
+        store = RollupStore(tmp_path / 'history')
+        assert store.load(T0, T0 + 60)['web-1']['cpu.usage_percent'].samples == 1
+        with path.open('a') as f:
+            f.write('-11-14T22:14:30Z", "cpu": {"usage_percent": 30.0}}\n')
+        rolled = store.load(T0, T0 + 60)
+        assert rolled['unknown']['cpu.usage_percent'].samples == 1
+
+    def test_load_filters_range_and_host(self, tmp_path, history):
+        history.append_batch([snapshot(T0 + i * 60, 10.0, host=host)
+                              for i in range(10) for host in ('a', 'b')])
+        history.flush()
+        store = RollupStore(tmp_path / 'history')
+        rolled = store.load(T0 + 120, T0 + 300, host='a')
+        assert list(rolled) == ['a']
+        # Buckets 120, 180, 240 and 300: the end is inclusive
+        assert len(rolled['a']['cpu.usage_percent']) == 4
+
+    def test_current_day_appends_closed_buckets(self, tmp_path, history, monkeypatch):
+        monkeypatch.setattr(rollups, 'time', SimpleNamespace(time=lambda: T0 + 600))
+        rollup_dir = tmp_path / 'history' / 'rollups'
+        history.append_batch([snapshot(T0 + i * 30, 10.0) for i in range(5)])
+        history.flush()
+        store = RollupStore(tmp_path / 'history')
+        store.update()
+        # Buckets T0 and T0+60 are closed; T0+120 is still open
+        assert [p.name.endswith('.rollup.log.jsonl') for p in rollup_dir.iterdir()] == [True]
+        log = next(rollup_dir.iterdir())
+        assert len(log.read_text().splitlines()) == 1
+
+        history.append_batch([snapshot(T0 + 180, 20.0), snapshot(T0 + 10, 30.0)])
+        history.flush()
+        store.update()
+        # The late sample for T0 is appended too, never the whole day
+        assert len(log.read_text().splitlines()) == 2
+        assert len(list(rollup_dir.iterdir())) == 1
+
+        expected = store.load(T0, T0 + 600)['web-1']['cpu.usage_percent']
+        assert expected.samples == 7
+        for reopened in (RollupStore(tmp_path / 'history'),
+                         RollupStore(tmp_path / 'history', writable=False)):
+            assert reopened.update() == 0
+            again = reopened.load(T0, T0 + 600)['web-1']['cpu.usage_percent']
+            assert list(again.n) == list(expected.n) == [3.0, 2.0, 1.0, 1.0]
+            assert list(again.last) == list(expected.last)
+
+    def test_read_only_store_never_writes(self, tmp_path, history):
+        history.append_batch([snapshot(T0 + i * 60, 10.0) for i in range(5)])
+        history.flush()
+        store = RollupStore(tmp_path / 'history', writable=False)
+        assert store.load(T0, T0 + 600)['web-1']['cpu.usage_percent'].samples == 5
+        assert not (tmp_path / 'history' / 'rollups').exists()
+
+    def test_day_rollover_compacts_log(self, tmp_path, history, monkeypatch):
+        monkeypatch.setattr(rollups, 'time', SimpleNamespace(time=lambda: T0 + 600))
+        history.append_batch([snapshot(T0 + i * 60, float(i)) for i in range(5)])
+        history.flush()
+        store = RollupStore(tmp_path / 'history')
+        store.update()
+        rollup_dir = tmp_path / 'history' / 'rollups'
+        log = next(rollup_dir.glob('*.rollup.log.jsonl'))
+
+        # A torn record is dropped and its buckets re-read from the history
+        with log.open('a') as f:
+            f.write('{"seconds": 60, "off')
+        monkeypatch.setattr(rollups, 'time', SimpleNamespace(time=lambda: T0 + 3 * 86400))
+        history.append_batch([snapshot(T0 + 300, 5.0)])
+        history.flush()
+        store = RollupStore(tmp_path / 'history')
+        store.update()
+        assert not log.exists()
+        data = json.loads(next(rollup_dir.glob('*.rollup.json')).read_text())
+        assert data['offset'] == next((tmp_path / 'history').glob('*.jsonl')).stat().st_size
+        again = RollupStore(tmp_path / 'history').load(T0, T0 + 600)['web-1']['cpu.usage_percent']
+        assert list(again.n) == [1.0] * 6
+
+    @pytest.mark.skipif(np is None, reason="NumPy not installed")
+    def test_numpy_and_fallback_agree(self, tmp_path, history):
+        history.append_batch([snapshot(T0 + i * 7, (i * 37) % 100, rx=i * 1000 % 70000)
+                              for i in range(2000)])
+        history.flush()
+        start, end = T0, T0 + 14000
+        vector = range_summary(RollupStore(tmp_path / 'history').load(start, end), start, end)
+        loop = range_summary(RollupStore(tmp_path / 'history', use_numpy=False).load(start, end),
+                             start, end)
+        assert vector['hosts'][0]['network'] == loop['hosts'][0]['network']
+        for a, b in zip(vector['hosts'][0]['metrics'], loop['hosts'][0]['metrics']):
+            assert a == pytest.approx(b)
+
+
+class TestStatistics:
+    """Tests for the range statistics."""
+
+    def test_series_stats(self):
+        stats = series_stats(series([float(v) for v in range(1, 101)]), threshold=90.0)
+        assert stats['min'] == 1.0 and stats['max'] == 100.0
+        assert stats['avg'] == pytest.approx(50.5)
+        assert stats['p95'] == 95.0
+        assert stats['samples'] == 100
+        assert stats['above_seconds'] == 10 * 60
+
+    def test_counter_total_handles_resets(self):
+        counter = series([100.0, 150.0, 400.0, 20.0, 50.0])
+        # 50 + 250 + reset (20 counted) + 30
+        assert counter_total(counter) == 350.0
+
+    def test_host_summary(self):
+        snapshots = [snapshot(T0 + i * 60, 50.0, disk=40.0 + i, rx=i * 100, lo=i * 999)
+                     for i in range(10)]
+        rolled = {host: {name: RollupSeries.from_arrays(60, columns) for name, columns in by_name.items()}
+                  for host, by_name in rollup_snapshots(snapshots).items()}
+        summary = range_summary(rolled, T0, T0 + 600)
+        host = summary['hosts'][0]
+        assert host['host'] == 'web-1'
+        assert [m['metric'] for m in host['metrics']] == ['cpu.usage_percent', 'disk./.used_percent']
+        assert host['metrics'][1]['threshold'] == 90.0
+
+        disk = host['disk_growth'][0]
+        assert disk['disk'] == '/'
+        assert disk['growth_percent'] == 9.0
+        assert disk['growth_gb'] == 18.0
+
+        assert host['network']['rx_bytes'] == 900.0
+        assert [entry['iface'] for entry in host['network']['interfaces']] == ['eth0']
+
+    def test_preset_range_is_aligned(self):
+        start, end = preset_range('1h', T0 + 59)
+        assert (start, end) == (T0 - 3600, T0)
+        with pytest.raises(ValueError):
+            preset_range('3y', T0)
+
+
+
+def fleet(hosts, minutes=10):
+    """Rollups of hosts given as host -> (cpu, disk)."""
+    snapshots = [snapshot(T0 + i * 60, cpu, host=host, disk=disk, rx=i * 100)
+                 for host, (cpu, disk) in hosts.items() for i in range(minutes)]
+    return {host: {name: RollupSeries.from_arrays(60, columns) for name, columns in by_name.items()}
+            for host, by_name in rollup_snapshots(snapshots).items()}
+
+
+class TestFleetSummary:
+    """Tests for the multi-host comparison."""
+
+    def test_rows_bands_and_rankings(self):
+        hosts = {f'web-{n}': (10.0 * n, 50.0 + n) for n in range(1, 6)}
+        summary = fleet_summary(fleet(hosts), T0, T0 + 600, top=2)
+        assert summary['host_count'] == 5
+        row = summary['hosts'][0]
+        assert row['host'] == 'web-1'
+        assert (row['cpu_avg'], row['disk_percent'], row['disk']) == (10.0, 51.0, '/')
+        assert row['rx_bytes'] == 900.0
+        assert row['temperature_max'] is None
+
+        cpu = next(band for band in summary['bands'] if band['metric'] == 'cpu_avg')
+        assert (cpu['hosts'], cpu['p5'], cpu['p50'], cpu['p95']) == (5, 12.0, 30.0, 48.0)
+        temperature = next(band for band in summary['bands'] if band['metric'] == 'temperature_max')
+        assert temperature['hosts'] == 0 and temperature['p50'] is None
+
+        assert [row['host'] for row in summary['rankings']['busiest_cpus']] == ['web-5', 'web-4']
+        assert [row['host'] for row in summary['rankings']['fullest_disks']] == ['web-5', 'web-4']
+        assert summary['rankings']['hottest'] == []
+
+    def test_outliers(self):
+        hosts = {f'web-{n}': (20.0 + n, 40.0) for n in range(8)}
+        hosts['db-1'] = (95.0, 40.0)
+        outliers = fleet_summary(fleet(hosts), T0, T0 + 600)['outliers']
+        assert [(o['host'], o['metric']) for o in outliers] == [('db-1', 'cpu_avg'), ('db-1', 'cpu_max')]
+        assert outliers[0]['median'] == 24.0
+
+    def test_numpy_and_loops_agree(self, monkeypatch):
+        import core.rollups as rollups
+        hosts = {f'h{n:03d}': ((n * 37) % 100, (n * 11) % 100) for n in range(40)}
+        rolled = fleet(hosts, minutes=3)
+        expected = fleet_summary(rolled, T0, T0 + 180)
+        monkeypatch.setattr(rollups, 'np', None)
+        actual = fleet_summary(rolled, T0, T0 + 180)
+        assert actual['hosts'] == expected['hosts']
+        assert actual['outliers'] == expected['outliers']
+        for a, b in zip(actual['bands'], expected['bands']):
+            assert a == pytest.approx(b)
+
+    @pytest.mark.skipif(np is None, reason='timing assumes NumPy')
+    def test_500_hosts_day(self):
+        buckets = 1440
+        start = np.arange(buckets, dtype=np.float64) * 60 + T0
+        ones = np.ones(buckets)
+        rng = np.random.default_rng(1)
+
+        def rollup(values):
+            return RollupSeries(60, {'start': start, 'n': ones, 'sum': values, 'min': values,
+                                     'max': values, 'first': values, 'last': values})
+
+        rolled = {f'host-{n:03d}': {
+            'cpu.usage_percent': rollup(rng.uniform(0, 100, buckets)),
+            'memory.usage_percent': rollup(rng.uniform(0, 100, buckets)),
+            'temperature.cpu_celsius': rollup(rng.uniform(30, 90, buckets)),
+            'disk./.used_percent': rollup(rng.uniform(0, 100, buckets)),
+            'disk./data.used_percent': rollup(rng.uniform(0, 100, buckets)),
+            'network.eth0.rx_bytes': rollup(np.cumsum(ones) * 1000),
+            'network.eth0.tx_bytes': rollup(np.cumsum(ones) * 10),
+        } for n in range(500)}
+        began = time.perf_counter()
+        summary = fleet_summary(rolled, T0, T0 + 86400)
+        assert time.perf_counter() - began < 1.0
+        assert summary['host_count'] == 500
+        assert len(summary['rankings']['hottest']) == 10
+
+class TestSQLiteRollups:
+    """Tests for rollups computed in SQL."""
+
+    def test_matches_jsonl_rollups(self, tmp_path, history):
+        snapshots = [snapshot(T0 + i * 7, (i * 13) % 100, rx=i * 1000 % 50000) for i in range(500)]
+        history.append_batch(snapshots)
+        history.flush()
+        db = SQLiteStore(tmp_path / 'history.db')
+        db.append_batch(snapshots)
+        start, end = T0, T0 + 3600 - 1
+        from_sql = range_summary(db.rollups(start, end, host='web-1'), start, end)
+        from_files = range_summary(RollupStore(tmp_path / 'history').load(start, end), start, end)
+        assert from_sql['hosts'][0]['network'] == from_files['hosts'][0]['network']
+        assert from_sql['hosts'][0]['disk_growth'] == from_files['hosts'][0]['disk_growth']
+        for a, b in zip(from_sql['hosts'][0]['metrics'], from_files['hosts'][0]['metrics']):
+            assert a == pytest.approx(b)
+        db.close()
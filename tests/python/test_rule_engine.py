@@ -0,0 +1,194 @@
+"""Unit tests for core.rule_engine module."""
+
+import json
+import pytest
+from core.rule_engine import (
+    Rule,
+    RuleEngine,
+    AlertManagerSink,
+    compile_accessor,
+    parse_duration,
+    load_rules
+)
+from core.alert_manager import load_alerts
+
+
+def make_snapshot(cpu=10.0, disks=None, hostname='web-1'):
+    """Build a minimal snapshot in the collector format."""
+    return {
+        'system': {'hostname': hostname},
+        'cpu': {'usage_percent': cpu},
+        'disk': disks if disks is not None else [{'device': '/', 'used_percent': 50.0}]
+    }
+
+
+@pytest.fixture
+def events():
+    """Collect rule events instead of writing alerts."""
+    return []
+
+
+class TestParsing:
+    """Tests for rule expression parsing."""
+
+    def test_parse_rule(self):
+        rule = Rule('cpu_high', 'cpu.usage_percent > 85 for 2m')
+        assert rule.path == 'cpu.usage_percent'
+        assert rule.op == '>'
+        assert rule.threshold == 85.0
+        assert rule.for_seconds == 120.0
+        assert rule.section == 'cpu'
+
+    def test_parse_duration(self):
+        assert parse_duration('30s') == 30.0
+        assert parse_duration('1h') == 3600.0
+        assert parse_duration('15') == 15.0
+        assert parse_duration(None) == 0.0
+
+    def test_parse_clear_threshold(self):
+        rule = Rule('cpu_high', 'cpu.usage_percent > 85 for 2m clear 75')
+        assert rule.for_seconds == 120.0
+        assert rule.clear == 75.0
+        assert Rule.from_dict({'name': 'x', 'expr': 'cpu.usage_percent > 85', 'clear': 70}).clear == 70
+
+    def test_invalid_expression(self):
+        with pytest.raises(ValueError):
+            Rule('bad', 'cpu.usage_percent >> 85')
+
+    def test_invalid_level(self):
+        with pytest.raises(ValueError):
+            Rule('bad', 'cpu.usage_percent > 85', level='fatal')
+
+    def test_wildcard_accessor(self):
+        get = compile_accessor('disk.*.used_percent')
+        snapshot = make_snapshot(disks=[{'device': '/', 'used_percent': 91.0},
+                                        {'device': '/data', 'used_percent': 40.0}])
+        assert get(snapshot) == [('/', 91.0), ('/data', 40.0)]
+
+    def test_missing_path(self):
+        assert compile_accessor('gpu.usage_percent')(make_snapshot()) == []
+
+    def test_load_rules(self, tmp_path):
+        path = tmp_path / 'rules.json'
+        path.write_text(json.dumps([{'name': 'disk', 'expr': 'disk.*.used_percent > 90',
+                                     'level': 'critical'}]))
+        rules = load_rules(path)
+        assert rules[0].level == 'critical'
+
+
+class TestEvaluation:
+    """Tests for raising and resolving alerts."""
+
+    def test_raise_and_resolve(self, events):
+        engine = RuleEngine([Rule('cpu_high', 'cpu.usage_percent > 85')], sink=events.append)
+
+        engine.on_snapshot(make_snapshot(cpu=90.0), now=0)
+        engine.on_snapshot(make_snapshot(cpu=95.0), now=10)
+        engine.on_snapshot(make_snapshot(cpu=20.0), now=20)
+
+        assert [e.kind for e in events] == ['raise', 'resolve']
+        assert events[0].value == 90.0
+        assert events[0].host == 'web-1'
+
+    def test_for_duration(self, events):
+        engine = RuleEngine([Rule('cpu_high', 'cpu.usage_percent > 85 for 2m')], sink=events.append)
+
+        engine.on_snapshot(make_snapshot(cpu=90.0), now=0)
+        engine.on_snapshot(make_snapshot(cpu=91.0), now=60)
+        assert events == []
+        engine.on_snapshot(make_snapshot(cpu=92.0), now=120)
+        assert [e.kind for e in events] == ['raise']
+
+    def test_for_duration_resets_on_recovery(self, events):
+        engine = RuleEngine([Rule('cpu_high', 'cpu.usage_percent > 85 for 1m')], sink=events.append)
+
+        engine.on_snapshot(make_snapshot(cpu=90.0), now=0)
+        engine.on_snapshot(make_snapshot(cpu=50.0), now=30)
+        engine.on_snapshot(make_snapshot(cpu=90.0), now=60)
+        assert events == []
+
+    def test_for_duration_restarts_after_resolve(self, events):
+        engine = RuleEngine([Rule('cpu_high', 'cpu.usage_percent > 85 for 2m clear 75')],
+                            sink=events.append)
+
+        for t, cpu in [(0, 90.0), (60, 91.0), (120, 92.0), (130, 70.0), (140, 90.0)]:
+            engine.on_snapshot(make_snapshot(cpu=cpu), now=t)
+        # The re-breach at t=140 must be held for another 2m
+        assert [(e.kind, e.timestamp) for e in events] == [('raise', 120), ('resolve', 130)]
+        engine.on_snapshot(make_snapshot(cpu=90.0), now=260)
+        assert [e.kind for e in events] == ['raise', 'resolve', 'raise']
+
+    def test_hysteresis(self, events):
+        engine = RuleEngine([Rule('cpu_high', 'cpu.usage_percent > 85 clear 75')], sink=events.append)
+
+        for t, cpu in enumerate([90.0, 84.0, 86.0, 80.0, 88.0, 70.0]):
+            engine.on_snapshot(make_snapshot(cpu=cpu), now=t)
+
+        # Oscillating between 80 and 88 stays firing until it drops below 75
+        assert [(e.kind, e.value) for e in events] == [('raise', 90.0), ('resolve', 70.0)]
+
+    def test_pending_rule_fires_on_unchanged_section(self, events):
+        engine = RuleEngine([Rule('cpu_high', 'cpu.usage_percent > 85 for 1m')], sink=events.append)
+
+        engine.on_snapshot(make_snapshot(cpu=90.0), now=0)
+        engine.on_snapshot(make_snapshot(cpu=90.0), now=60)
+        assert [e.kind for e in events] == ['raise']
+
+    def test_wildcard_resources_tracked_separately(self, events):
+        engine = RuleEngine([Rule('disk_full', 'disk.*.used_percent > 90')], sink=events.append)
+
+        engine.on_snapshot(make_snapshot(disks=[{'device': '/', 'used_percent': 95.0},
+                                                {'device': '/data', 'used_percent': 50.0}]), now=0)
+        engine.on_snapshot(make_snapshot(disks=[{'device': '/', 'used_percent': 95.0},
+                                                {'device': '/data', 'used_percent': 99.0}]), now=10)
+
+        assert [(e.kind, e.resource) for e in events] == [('raise', '/'), ('raise', '/data')]
+        assert len(engine.firing()) == 2
+
+    def test_vanished_resource_resolves(self, events):
+        engine = RuleEngine([Rule('disk_full', 'disk.*.used_percent > 90')], sink=events.append)
+
+        engine.on_snapshot(make_snapshot(disks=[{'device': '/mnt', 'used_percent': 95.0}]), now=0)
+        engine.on_snapshot(make_snapshot(disks=[]), now=10)
+        assert [(e.kind, e.resource) for e in events] == [('raise', '/mnt'), ('resolve', '/mnt')]
+
+    def test_only_affected_rules_run(self, events, monkeypatch):
+        cpu_rule = Rule('cpu_high', 'cpu.usage_percent > 85')
+        disk_rule = Rule('disk_full', 'disk.*.used_percent > 90')
+        engine = RuleEngine([cpu_rule, disk_rule], sink=events.append)
+        engine.on_snapshot(make_snapshot(cpu=10.0), now=0)
+
+        evaluated = []
+        original = engine._evaluate
+        monkeypatch.setattr(engine, '_evaluate',
+                            lambda rule, *args: evaluated.append(rule.name) or original(rule, *args))
+
+        engine.on_snapshot(make_snapshot(cpu=20.0), now=10)
+        assert evaluated == ['cpu_high']
+
+    def test_hosts_tracked_separately(self, events):
+        engine = RuleEngine([Rule('cpu_high', 'cpu.usage_percent > 85')], sink=events.append)
+
+        engine.on_snapshot(make_snapshot(cpu=90.0, hostname='a'), now=0)
+        engine.on_snapshot(make_snapshot(cpu=10.0, hostname='b'), now=0)
+        assert [(e.kind, e.host) for e in events] == [('raise', 'a')]
+
+
+class TestAlertManagerSink:
+    """Tests for writing rule events through the alert manager."""
+
+    def test_writes_alerts(self, tmp_path):
+        path = tmp_path / 'alerts.json'
+        engine = RuleEngine([Rule('disk_full', 'disk.*.used_percent > 90', level='critical')],
+                            sink=AlertManagerSink(str(path)))
+
+        engine.on_snapshot(make_snapshot(disks=[{'device': '/', 'used_percent': 95.0}]), now=0)
+        engine.on_snapshot(make_snapshot(disks=[{'device': '/', 'used_percent': 60.0}]), now=10)
+
+        alerts = {a['level']: a for a in load_alerts(str(path))}
+        assert set(alerts) == {'critical', 'info'}
+        assert alerts['critical']['resource'] == '/'
+        assert alerts['critical']['rule'] == 'disk_full'
+        assert alerts['critical']['threshold'] == 90.0
+        assert alerts['info']['message'].startswith('Resolved')
+        assert alerts['info']['fingerprint'] == alerts['critical']['fingerprint']
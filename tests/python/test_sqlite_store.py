@@ -0,0 +1,126 @@
+"""Unit tests for core.sqlite_store module."""
+
+import pytest
+from core.sqlite_store import SQL_ROLLUPS, SQLiteStore, close_store, is_sqlite_path, open_store
+from core.alert_manager import load_alerts, add_alert, clear_alerts, create_empty_alerts_file
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a temporary SQLite store."""
+    db = SQLiteStore(tmp_path / "monitor.db")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def sample_alerts():
+    """Sample alerts in alerts.json format."""
+    return [
+        {"level": "warning", "metric": "cpu", "message": "CPU high", "value": 85.5,
+         "threshold": 80.0, "timestamp": "2025-12-05T10:30:00Z"},
+        {"level": "critical", "metric": "memory", "message": "Memory critical",
+         "timestamp": "2025-12-05T10:25:00Z", "host": "web-1", "resource": "ram"},
+        {"level": "info", "metric": "disk", "message": "Disk info",
+         "timestamp": "2025-12-05T10:35:00Z"}
+    ]
+
+
+class TestIsSqlitePath:
+    """Tests for is_sqlite_path function."""
+
+    def test_suffixes(self):
+        assert is_sqlite_path("data/monitor.db")
+        assert is_sqlite_path("data/monitor.SQLITE")
+        assert not is_sqlite_path("data/alerts/alerts.json")
+
+
+class TestSQLiteStoreAlerts:
+    """Tests for the alert tables."""
+
+    def test_wal_mode_enabled(self, store):
+        mode = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == 'wal'
+
+    def test_insert_and_latest(self, store, sample_alerts):
+        assert store.insert_alerts(sample_alerts) == 3
+        alerts = store.latest_alerts()
+        assert [a['metric'] for a in alerts] == ['disk', 'cpu', 'memory']
+        assert alerts[1]['value'] == 85.5
+        assert alerts[2]['resource'] == 'ram'
+        assert alerts[2]['host'] == 'web-1'
+
+    def test_latest_with_level_and_limit(self, store, sample_alerts):
+        store.insert_alerts(sample_alerts)
+        assert [a['level'] for a in store.latest_alerts(level='critical')] == ['critical']
+        assert len(store.latest_alerts(limit=2)) == 2
+
+    def test_alert_counts(self, store, sample_alerts):
+        store.insert_alerts(sample_alerts + sample_alerts[:1])
+        assert store.alert_counts() == {'info': 1, 'warning': 2, 'critical': 1}
+
+    def test_clear_alerts(self, store, sample_alerts):
+        store.insert_alerts(sample_alerts)
+        assert store.clear_alerts() == 3
+        assert store.latest_alerts() == []
+
+
+class TestSQLiteStoreSamples:
+    """Tests for the metric history table."""
+
+    def test_insert_snapshot_and_series(self, store):
+        snapshot = {
+            "timestamp": "2025-12-05T10:30:00Z",
+            "system": {"hostname": "web-1"},
+            "cpu": {"usage_percent": 40.0},
+            "disk": [{"device": "/", "used_percent": 50.0}]
+        }
+        assert store.insert_snapshot(snapshot) == 2
+        snapshot = dict(snapshot, timestamp="2025-12-05T10:31:00Z", cpu={"usage_percent": 60.0})
+        store.insert_snapshot(snapshot)
+
+        points = store.series('web-1', 'cpu.usage_percent', 0, 2e9)
+        assert [v for _, v in points] == [40.0, 60.0]
+        assert store.series('web-1', 'disk./.used_percent', 0, 2e9)[0][1] == 50.0
+        assert store.hosts() == ['web-1']
+
+    def test_series_time_range(self, store):
+        store.insert_samples([('h', 'm', float(t), float(t)) for t in range(10)])
+        assert [t for t, _ in store.series('h', 'm', 3, 5)] == [3.0, 4.0, 5.0]
+
+    def test_fleet_rollups_use_ts_index(self, store):
+        store.insert_samples([(f'h{n}', 'm', float(t), 1.0) for n in range(3) for t in range(100)])
+        plan = store._query("EXPLAIN QUERY PLAN " + SQL_ROLLUPS.format(host=''), (60, 10.0, 20.0))
+        assert any('idx_samples_ts' in row[-1] for row in plan)
+        rollups = store.rollups(0, 119)
+        assert sorted(rollups) == ['h0', 'h1', 'h2']
+
+
+class TestAlertManagerSqliteBackend:
+    """alert_manager functions dispatch to SQLite for .db paths."""
+
+    def test_add_load_clear(self, tmp_path):
+        path = str(tmp_path / "alerts.db")
+        assert create_empty_alerts_file(path) is True
+        assert add_alert('cpu', 'warning', 'CPU high', 85.0, 80.0, path=path) is True
+        assert add_alert('memory', 'critical', 'Memory high', path=path) is True
+
+        assert len(load_alerts(path)) == 2
+        critical = load_alerts(path, level_filter='critical')
+        assert len(critical) == 1 and critical[0]['metric'] == 'memory'
+        assert len(load_alerts(path, limit=1)) == 1
+
+        assert clear_alerts(path) is True
+        assert load_alerts(path) == []
+
+    def test_open_store_is_shared(self, tmp_path):
+        path = tmp_path / "shared.db"
+        assert open_store(path) is open_store(str(path))
+
+    def test_close_store(self, tmp_path):
+        path = tmp_path / 'shared.db'
+        store = open_store(path)
+        assert close_store(path)
+        assert not close_store(path)
+        assert open_store(path) is not store
+        close_store(path)
@@ -0,0 +1,151 @@
+"""Unit tests for web.templating module."""
+
+import pytest
+
+templating = pytest.importorskip('web.templating')  # needs jinja2
+
+
+@pytest.fixture
+def template_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(templating, 'CACHE_DIR', tmp_path / 'bytecode')
+    directory = tmp_path / 'templates'
+    directory.mkdir()
+    (directory / 'page.html').write_text(
+        "{% macro body(v) %}<b>{{ v.name }}</b> {{ v.size|format_bytes }}{% endmacro %}"
+        "{{ fragment('body', item, body) }}")
+    return directory
+
+
+class TestEnvironment:
+    """Tests for the shared environment and bytecode cache."""
+
+    def test_shared_per_directory(self, template_dir):
+        env = templating.get_environment(template_dir)
+        assert templating.get_environment(template_dir) is env
+        assert templating.get_environment(template_dir, auto_reload=not env.auto_reload) is not env
+        assert env.filters['format_duration'] is templating.format_duration
+
+    def test_precompile_writes_bytecode(self, template_dir):
+        env = templating.get_environment(template_dir, auto_reload=False)
+        assert templating.precompile(env, ['page.html', 'missing.html']) == ['page.html']
+        assert list((templating.CACHE_DIR / 'reports').glob('__jinja2_*.cache'))
+
+    def test_auto_reload_only_in_development(self, monkeypatch):
+        for name in ('TEMPLATE_AUTO_RELOAD', 'FLASK_DEBUG', 'FLASK_ENV'):
+            monkeypatch.delenv(name, raising=False)
+        assert not templating.auto_reload_enabled()
+        monkeypatch.setenv('FLASK_ENV', 'development')
+        assert templating.auto_reload_enabled()
+        monkeypatch.setenv('TEMPLATE_AUTO_RELOAD', '0')
+        assert not templating.auto_reload_enabled()
+
+    def test_fragment_without_cache_renders(self, template_dir):
+        env = templating.get_environment(template_dir)
+        html = env.get_template('page.html').render(item={'name': '<disk>', 'size': 2048})
+        assert html == '<b>&lt;disk&gt;</b> 2.00 KB'
+
+    def test_fragment_uses_cache(self, template_dir, tmp_path):
+        from web.report_cache import ReportCache
+        cache = ReportCache(tmp_path / 'cache')
+        template = templating.get_environment(template_dir).get_template('page.html')
+        for _ in range(2):
+            template.render(item={'name': 'sda', 'size': 1}, fragment_cache=cache)
+        assert cache.stats()['fragment_hits'] == 1
+
+
+class TestFilters:
+    """Tests for the report filters."""
+
+    def test_format_duration(self):
+        assert templating.format_duration(90061) == '1d 1h'
+        assert templating.format_duration(3900) == '1h 05m'
+        assert templating.format_duration(None) == 'N/A'
+
+    def test_badges(self):
+        assert templating.alert_level_badge('CRITICAL') == 'danger'
+        assert templating.percentage_color(65) == 'warning'
+        assert templating.percentage_color('x') == 'secondary'
+
+
+class TestRenderToFile:
+    """Tests for streamed rendering to disk."""
+
+    def test_streams_lazily(self, template_dir, tmp_path):
+        (template_dir / 'rows.md').write_text("{% for r in rows %}{{ r }}\n{% endfor %}")
+        consumed = []
+
+        def rows():
+            for n in range(1000):
+                consumed.append(n)
+                yield n
+
+        template = templating.get_environment(template_dir).get_template('rows.md')
+        out = templating.render_to_file(template, tmp_path / 'rows.md', rows=rows())
+        assert out.read_text().splitlines() == [str(n) for n in range(1000)]
+        assert len(consumed) == 1000
+
+    def test_failed_render_leaves_nothing(self, template_dir, tmp_path):
+        (template_dir / 'bad.md').write_text("{% for r in rows %}{{ 1 // r }}{% endfor %}")
+        template = templating.get_environment(template_dir).get_template('bad.md')
+        with pytest.raises(ZeroDivisionError):
+            templating.render_to_file(template, tmp_path / 'bad.md', rows=[1, 0])
+        assert list(tmp_path.glob('bad.md*')) == []
+
+
+class TestStreamedReports:
+    """Tests for reports whose alert rows are streamed."""
+
+    ALERTS = [{'id': f'a{n}', 'level': 'critical' if n % 2 else 'warning',
+               'message': f'alert {n}', 'timestamp': '2025-01-01T00:00:00Z'} for n in range(300)]
+    METRICS = {'system': {'hostname': 'web-1'}, 'cpu': {'usage_percent': 5.0},
+               'memory': {'usage_percent': 40.0, 'used_mb': 4096, 'total_mb': 8192},
+               'disk': [], 'network': [], 'temperature': {}, 'gpu': {'devices': []}}
+
+    def generator(self, tmp_path):
+        module = pytest.importorskip('web.report_generator')
+        return module, module.ReportGenerator(tmp_path / 'latest.json', tmp_path / 'alerts.json',
+                                              tmp_path / 'reports')
+
+    def test_long_list_matches_cached_section(self, tmp_path, monkeypatch):
+        module, generator = self.generator(tmp_path)
+        html, md = generator.generate_report(self.METRICS, None, self.ALERTS)
+        monkeypatch.setattr(module, 'STREAM_ROWS', 1000)
+        html2, md2 = generator.generate_report(self.METRICS, dict(self.METRICS, cpu={}), self.ALERTS)
+        # Same alert markup whether streamed (300 > 200) or rendered as a section
+        assert md.read_text().split('System Alerts')[1] == md2.read_text().split('System Alerts')[1]
+        assert html.read_text().count('alert 1') == html2.read_text().count('alert 1') > 100
+
+    def test_callable_rows(self, tmp_path):
+        _, generator = self.generator(tmp_path)
+        html, md = generator.generate_report(self.METRICS, None, lambda: iter(self.ALERTS[:3]),
+                                             alert_counts={'critical': 1, 'warning': 2, 'info': 0},
+                                             alerts_version='v1')
+        assert md.read_text().count('**[') == 3
+        with pytest.raises(ValueError):
+            generator.generate_report(self.METRICS, None, lambda: iter([]))
+
+
+class TestFleetReport:
+    """Tests for the fleet comparison report."""
+
+    def test_renders_and_caches(self, tmp_path):
+        module = pytest.importorskip('web.report_generator')
+        from core.rollups import RollupSeries, fleet_summary, rollup_snapshots
+        hosts = {f'web-{n}': (10.0 * n, 50.0) for n in range(1, 8)}
+        hosts['db-1'] = (20.0, 97.0)
+        snapshots = [{'timestamp': f'2023-11-14T22:1{4 + i}:00Z', 'system': {'hostname': host},
+                      'cpu': {'usage_percent': cpu}, 'disk': [{'device': '/', 'used_percent': disk}]}
+                     for host, (cpu, disk) in hosts.items() for i in range(3)]
+        rollups = {host: {name: RollupSeries.from_arrays(60, columns) for name, columns in by_name.items()}
+                   for host, by_name in rollup_snapshots(snapshots).items()}
+        summary = fleet_summary(rollups, 1_700_000_040, 1_700_000_220)
+        generator = module.ReportGenerator(tmp_path / 'latest.json', tmp_path / 'alerts.json',
+                                           tmp_path / 'reports')
+        html, md = generator.generate_fleet_report(summary)
+        assert html.name.startswith('report_fleet_')
+        text = md.read_text()
+        assert '| db-1 | Fullest disk | 97.0% | 50.0% | 50.0% |' in text
+        assert text.count('| web-') == 7
+        assert 'badge-danger">97.0%' in html.read_text()
+        assert generator.generate_fleet_report(summary) == (html, md)
+        assert generator.catalog.query(kind='fleet')[1] == 2
@@ -373,17 +373,26 @@ class TestGenerateDashboard:
     """Tests for generate_dashboard method."""
     
     @patch('display.tui_dashboard.load_current_metrics')
-    @patch('display.tui_dashboard.load_alerts')
-    def test_generate_dashboard_loads_data(self, mock_load_alerts, mock_load_metrics, dashboard, sample_metrics, sample_alerts):
+    def test_generate_dashboard_loads_data(self, mock_load_metrics, dashboard, sample_metrics, sample_alerts):
         """Test dashboard generation loads data."""
         mock_load_metrics.return_value = sample_metrics
-        mock_load_alerts.return_value = sample_alerts
+        dashboard.alert_store.add_many(sample_alerts)
         
-        layout = dashboard.generate_dashboard()
+        with patch.object(dashboard.alert_store, 'refresh') as mock_refresh:
+            layout = dashboard.generate_dashboard()
         
         assert isinstance(layout, Layout)
         mock_load_metrics.assert_called_once()
-        mock_load_alerts.assert_called_once()
+        mock_refresh.assert_called_once()
+    
+    def test_alerts_panel_uses_store_counts(self, dashboard):
+        """Test alerts panel title shows the total, not just displayed alerts."""
+        panel = dashboard.generate_alerts_panel(
+            [{'level': 'info', 'message': 'Newest'}],
+            {'info': 10, 'warning': 5, 'critical': 1}
+        )
+        assert "16" in str(panel.title)
+        assert panel.border_style == "red"
 
 
 class TestRun:
@@ -6,8 +6,11 @@
 """
 
 import sys
+import functools
 import json
 import logging
+import threading
+import time
 from pathlib import Path
 from flask import Flask, render_template, jsonify, send_file, request
 from datetime import datetime
@@ -20,9 +23,32 @@
     sys.path.append(str(current_dir))
 
 try:
-    from report_generator import ReportGenerator
+    from report_charts import ChartRenderer, ChartUnavailable
+    from report_generator import STREAM_ROWS, ReportGenerator
+    from report_jobs import QueueFull, ReportJobQueue
+    from report_scheduler import ReportScheduler, load_schedules
+    import pdf_renderer
+    import templating
 except ImportError:
-    from web.report_generator import ReportGenerator
+    from web.report_charts import ChartRenderer, ChartUnavailable
+    from web.report_generator import STREAM_ROWS, ReportGenerator
+    from web.report_jobs import QueueFull, ReportJobQueue
+    from web.report_scheduler import ReportScheduler, load_schedules
+    from web import pdf_renderer
+    from web import templating
+
+# Project root must be importable for the shared core package
+if str(current_dir.parent) not in sys.path:
+    sys.path.append(str(current_dir.parent))
+
+from core.archive_index import ArchiveIndex
+from core.alert_store import STATS_BUCKETS, AlertStore, parse_alert_time
+from core.correlation import CorrelationEngine
+from core.forecast import load_forecasts
+from core.report_catalog import ReportCatalog
+from core.rollups import RollupStore, fleet_summary, preset_range, range_summary
+from core.rule_engine import parse_duration
+from core.sqlite_store import open_store
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -33,14 +59,63 @@
 HOST2_OUTPUT_DIR = PROJECT_ROOT / 'Host2'
 GO_LATEST_JSON = HOST2_OUTPUT_DIR / 'bin' / 'go_latest.json'
 REPORTS_DIR = PROJECT_ROOT / 'reports'
-ALERTS_FILE = DATA_DIR / 'alerts' / 'alerts.json'
+# Disk-full / thermal forecasts maintained by the JSON logging service
+FORECAST_FILE = JSON_DIR / 'forecast.json'
+# Metric history written by the JSON logging service (SQLite when HISTORY_DB is set)
+HISTORY_DIR = JSON_DIR / 'history'
+HISTORY_DB = os.getenv('HISTORY_DB')
+# Alerts log: alerts.json by default, or a .db/.sqlite file for the SQLite backend
+ALERTS_FILE = Path(os.getenv('ALERTS_PATH', str(DATA_DIR / 'alerts' / 'alerts.json')))
 
 # Native Agent Configuration
 NATIVE_AGENT_URL = os.getenv('NATIVE_AGENT_URL', 'http://host.docker.internal:8889')
 USE_NATIVE_AGENT = os.getenv('USE_NATIVE_AGENT', 'false').lower() == 'true'
 
-# Initialize Report Generator
-report_gen = ReportGenerator(HOST_LATEST_JSON, ALERTS_FILE, REPORTS_DIR)
+# PDF output (when weasyprint is installed) is rendered in worker processes
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', '1'))
+PDF_TIMEOUT = float(os.getenv('PDF_TIMEOUT', '120'))
+PDF_MEMORY_LIMIT_MB = int(os.getenv('PDF_MEMORY_LIMIT_MB', '1024'))
+pdf = (pdf_renderer.PdfRenderer(workers=PDF_WORKERS, timeout=PDF_TIMEOUT,
+                                memory_limit_mb=PDF_MEMORY_LIMIT_MB or None)
+       if pdf_renderer.available() else None)
+
+# Catalog of generated reports (reports/catalog.jsonl), loaded on first listing
+report_catalog = ReportCatalog(REPORTS_DIR)
+REPORTS_PAGE_MAX = 500
+
+# Report generator, created on first use so importing the app stays cheap
+_report_gen = None
+_report_gen_lock = threading.Lock()
+
+def get_report_generator():
+    """Return the shared ReportGenerator (templates load on first call)."""
+    global _report_gen
+    with _report_gen_lock:
+        if _report_gen is None:
+            _report_gen = ReportGenerator(HOST_LATEST_JSON, ALERTS_FILE, REPORTS_DIR,
+                                          pdf_renderer=pdf, catalog=report_catalog)
+        return _report_gen
+
+# Background report rendering: worker threads and queued jobs accepted before 429
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '2'))
+REPORT_QUEUE_MAX = int(os.getenv('REPORT_QUEUE_MAX', '8'))
+# Scheduled reports (see web/report_scheduler.py); disabled when the file is absent
+REPORT_SCHEDULES = Path(os.getenv('REPORT_SCHEDULES', str(DATA_DIR / 'report_schedules.json')))
+
+# Per-minute rollups of the JSONL history for time-range reports (persisted
+# by the JSON logging service; the dashboard only reads them)
+rollup_store = RollupStore(HISTORY_DIR, writable=False)
+
+# Read-only view of the archive index maintained by the JSON logging service
+archive_index = ArchiveIndex(JSON_DIR, writable=False)
+
+# Indexed in-memory view of the alert log, refreshed incrementally per request
+alert_store = AlertStore(ALERTS_FILE)
+ALERTS_PAGE_MAX = 500
+
+# Incidents built incrementally from the alerts the store picks up
+correlation = CorrelationEngine()
+alert_store.listeners.append(correlation.process)
 
 # Configure Logging
 logging.basicConfig(
@@ -49,9 +124,42 @@
 )
 logger = logging.getLogger('dashboard-v5')
 
+# History charts in range reports: 'svg' (default), 'png' (needs cairosvg) or 'none'
+REPORT_CHARTS = os.getenv('REPORT_CHARTS', 'svg').lower()
+chart_renderer = None
+if REPORT_CHARTS != 'none':
+    try:
+        chart_renderer = ChartRenderer(REPORTS_DIR / 'cache' / 'charts',
+                                       width=int(os.getenv('REPORT_CHART_WIDTH', '640')),
+                                       height=int(os.getenv('REPORT_CHART_HEIGHT', '180')),
+                                       image_format=REPORT_CHARTS)
+    except (ChartUnavailable, ValueError) as e:
+        logger.warning(f"REPORT_CHARTS={REPORT_CHARTS}: {e}; using SVG charts")
+        chart_renderer = ChartRenderer(REPORTS_DIR / 'cache' / 'charts')
+
 app = Flask(__name__,
             template_folder=str(PROJECT_ROOT / 'templates'),
             static_folder=str(PROJECT_ROOT / 'static'))
+# Bytecode-cached dashboard template, not re-checked on disk in production
+app.jinja_options = {**app.jinja_options, **templating.dashboard_options()}
+app.config['TEMPLATES_AUTO_RELOAD'] = templating.AUTO_RELOAD
+
+def _load_latest_archive(max_candidates=5):
+    """Return (path, data) for the newest readable archive file in json/.
+
+    Unreadable files (missing, or torn by a crash mid-write) are skipped
+    in favour of the next newest one.
+    """
+    archive_index.refresh()
+    for path in archive_index.latest_n(max_candidates):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return path, json.load(f)
+        except FileNotFoundError:
+            continue
+        except ValueError as e:
+            logger.warning(f"Skipping unreadable archive {path.name}: {e}")
+    return None, None
 
 @app.route('/')
 def index():
@@ -84,11 +192,8 @@ def get_metrics():
     # 2. Try Latest Log in json/ directory
     try:
         if JSON_DIR.exists():
-            json_files = sorted(JSON_DIR.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
-            if json_files:
-                latest_log = json_files[0]
-                with open(latest_log, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+            latest_log, data = _load_latest_archive()
+            if latest_log:
                 return jsonify({
                     'success': True,
                     'source': 'archive_log',
@@ -192,66 +297,475 @@ def get_metrics_source():
         'native_file_available': GO_LATEST_JSON.exists()
     })
 
-@app.route('/api/reports/generate', methods=['POST'])
-def generate_report():
-    """Generate a system report on demand."""
+def _time_arg(name):
+    """Parse an epoch-seconds or ISO 8601 query parameter (None if absent)."""
+    return _parse_time(name, request.args.get(name))
+
+def _parse_time(name, raw):
+    if not raw:
+        return None
     try:
-        # Fetch Dual Metrics (similar to get_dual_metrics)
-        legacy_data = None
-        native_data = None
-
-        # 1. Get Legacy
-        if HOST_LATEST_JSON.exists():
-            try:
-                with open(HOST_LATEST_JSON, 'r', encoding='utf-8') as f:
-                    legacy_data = json.load(f)
-            except: pass
-        
-        # Fallback for Legacy if missing
-        if not legacy_data and JSON_DIR.exists():
-            try:
-                json_files = sorted(JSON_DIR.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
-                if json_files:
-                    with open(json_files[0], 'r', encoding='utf-8') as f:
-                        legacy_data = json.load(f)
-            except: pass
-
-        # 2. Get Native
-        if GO_LATEST_JSON.exists():
-            try:
-                with open(GO_LATEST_JSON, 'r', encoding='utf-8') as f:
-                    native_data = json.load(f)
-            except: pass
-        
-        if not native_data:
-            try:
-                response = requests.get(f"{NATIVE_AGENT_URL}/metrics", timeout=1)
-                if response.status_code == 200:
-                    native_data = response.json()
-            except: pass
-
-        if not legacy_data and not native_data:
-             return jsonify({'success': False, 'error': 'No metrics available to generate report'})
-        
-        # Determine alerts (mock or load real)
-        alerts_data = []
-        if ALERTS_FILE.exists():
-            with open(ALERTS_FILE, 'r', encoding='utf-8') as f:
-                alerts_data = json.load(f)
-
-        html_path, md_path = report_gen.generate_report(legacy_data, native_data, alerts_data)
-        
-        return jsonify({
-            'success': True, 
-            'files': {
-                'html': str(html_path),
-                'markdown': str(md_path)
-            }
-        })
+        return float(raw)
+    except (TypeError, ValueError):
+        pass
+    ts = parse_alert_time(str(raw))
+    if not ts:
+        raise ValueError(f"{name} must be epoch seconds or an ISO 8601 timestamp")
+    return ts
+
+def _refresh_alert_store():
+    try:
+        alert_store.refresh()
     except Exception as e:
-        logger.error(f"Report generation failed: {e}")
+        logger.error(f"Failed to refresh alerts: {e}")
+
+@app.route('/api/alerts')
+def get_alerts():
+    """
+    Paginated alerts, newest first.
+
+    Query parameters:
+        level: Only alerts of this level (info, warning, critical)
+        metric: Only alerts for this metric
+        host: Only alerts for this host
+        since, until: Time range (epoch seconds or ISO 8601)
+        after: Cursor from the previous page's 'next' field
+        limit: Page size (default 50, max 500)
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), ALERTS_PAGE_MAX)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    try:
+        since, until = _time_arg('since'), _time_arg('until')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    _refresh_alert_store()
+
+    page = alert_store.page(
+        limit=limit,
+        level=request.args.get('level') or None,
+        metric=request.args.get('metric') or None,
+        host=request.args.get('host') or None,
+        since=since,
+        until=until,
+        after=request.args.get('after') or None
+    )
+    counts = alert_store.counts()
+    return jsonify({
+        'success': True,
+        'alerts': page['alerts'],
+        'next': page['next'],
+        'counts': counts,
+        'total': len(alert_store)
+    })
+
+@app.route('/api/alerts/stats')
+def get_alert_stats():
+    """
+    Alert aggregates for badges and charts.
+
+    Query parameters:
+        bucket: Bucket size (1m, 5m, 1h or 1d; default 1h)
+        since, until: Time range (epoch seconds or ISO 8601)
+        top: Number of noisiest metrics (default 5, max 50)
+    """
+    try:
+        bucket = int(parse_duration(request.args.get('bucket', '1h')))
+        top = min(max(int(request.args.get('top', 5)), 1), 50)
+        since, until = _time_arg('since'), _time_arg('until')
+        if bucket not in STATS_BUCKETS:
+            raise ValueError("bucket must be one of 1m, 5m, 1h, 1d")
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    _refresh_alert_store()
+
+    stats = alert_store.stats(bucket_seconds=bucket, since=since, until=until, top=top)
+    return jsonify({
+        'success': True,
+        'bucket_seconds': bucket,
+        'total': sum(stats['counts'].values()),
+        **stats
+    })
+
+@app.route('/api/incidents')
+def get_incidents():
+    """
+    Correlated incidents, newest first.
+
+    Query parameters:
+        status: 'open', 'resolved' or 'closed'
+        host: Only incidents for this host
+        limit: Maximum number of incidents (default 50, max 500)
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), ALERTS_PAGE_MAX)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+
+    _refresh_alert_store()
+    correlation.expire(time.time())
+
+    incidents = correlation.incidents(
+        status=request.args.get('status') or None,
+        host=request.args.get('host') or None,
+        limit=limit
+    )
+    return jsonify({
+        'success': True,
+        'incidents': [incident.to_dict() for incident in incidents]
+    })
+
+@app.route('/api/incidents/<incident_id>')
+def get_incident(incident_id):
+    """One incident with its member alerts."""
+    _refresh_alert_store()
+    correlation.expire(time.time())
+
+    incident = correlation.get(incident_id)
+    if incident is None:
+        return jsonify({'success': False, 'error': 'Incident not found'}), 404
+
+    data = incident.to_dict()
+    data['alerts'] = [alert for alert in map(alert_store.get, incident.alert_ids) if alert is not None]
+    return jsonify({'success': True, 'incident': data})
+
+@app.route('/api/forecast')
+def get_forecast():
+    """
+    Disk-full and thermal trend forecasts.
+
+    Query parameters:
+        host: Only forecasts for this host
+        kind: 'disk' or 'temperature'
+    """
+    try:
+        data = load_forecasts(FORECAST_FILE)
+    except Exception as e:
+        logger.error(f"Failed to read forecasts: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+    host = request.args.get('host')
+    kind = request.args.get('kind')
+    forecasts = [f for f in data.get('forecasts', [])
+                 if (not host or f.get('host') == host) and (not kind or f.get('kind') == kind)]
+    # Soonest first; series without an upward trend last
+    forecasts.sort(key=lambda f: (f.get('hours_to_target') is None, f.get('hours_to_target') or 0))
+    return jsonify({
+        'success': True,
+        'timestamp': data.get('timestamp'),
+        'forecasts': forecasts
+    })
+
+def _collect_report_inputs():
+    """Return (legacy, native) metrics for a report (either may be None)."""
+    legacy_data = None
+    native_data = None
+
+    # 1. Get Legacy
+    if HOST_LATEST_JSON.exists():
+        try:
+            with open(HOST_LATEST_JSON, 'r', encoding='utf-8') as f:
+                legacy_data = json.load(f)
+        except: pass
+
+    # Fallback for Legacy if missing
+    if not legacy_data and JSON_DIR.exists():
+        try:
+            _, legacy_data = _load_latest_archive()
+        except: pass
+
+    # 2. Get Native
+    if GO_LATEST_JSON.exists():
+        try:
+            with open(GO_LATEST_JSON, 'r', encoding='utf-8') as f:
+                native_data = json.load(f)
+        except: pass
+
+    if not native_data:
+        try:
+            response = requests.get(f"{NATIVE_AGENT_URL}/metrics", timeout=1)
+            if response.status_code == 200:
+                native_data = response.json()
+        except: pass
+
+    return legacy_data, native_data
+
+def _render_report(params, progress):
+    """Report job body: collect inputs and render (runs on a job worker)."""
+    progress(10, 'collecting metrics')
+    legacy_data, native_data = _collect_report_inputs()
+    if not legacy_data and not native_data:
+        raise RuntimeError('No metrics available to generate report')
+
+    # Alerts (newest first) and counts from the indexed store
+    progress(40, 'loading alerts')
+    _refresh_alert_store()
+    alerts_version = alert_store.version
+    if len(alert_store) > STREAM_ROWS:
+        # Rendered row by row from the store rather than copied into a list
+        alerts_data = functools.partial(alert_store.iterate, until=time.time())
+    else:
+        alerts_data = alert_store.query(limit=None)
+
+    progress(60, 'rendering')
+    report_gen = get_report_generator()
+    html_path, md_path = report_gen.generate_report(legacy_data, native_data, alerts_data,
+                                                    alert_counts=alert_store.counts(),
+                                                    alerts_version=alerts_version)
+    files = {'html': str(html_path), 'markdown': str(md_path)}
+
+    if params.get('pdf'):
+        progress(80, 'rendering pdf')
+        files['pdf'] = str(report_gen.render_pdf(html_path))
+    return {'files': files}
+
+def _render_range_report(params, progress):
+    """Range report job body: statistics from history rollups."""
+    start, end, host = params['start'], params['end'], params.get('host')
+
+    progress(10, 'loading rollups')
+    if HISTORY_DB:
+        rollups = open_store(HISTORY_DB).rollups(start, end, host=host)
+    else:
+        rollups = rollup_store.load(start, end, host=host)
+
+    progress(40, 'computing statistics')
+    summary = range_summary(rollups, start, end)
+    _refresh_alert_store()
+    alerts_per_day = alert_store.stats(bucket_seconds=86400, since=start, until=end)['buckets']
+
+    charts = None
+    if chart_renderer is not None:
+        progress(50, 'drawing charts')
+        charts = {host: chart_renderer.host_charts(host, by_name, start, end)
+                  for host, by_name in rollups.items()}
+
+    progress(60, 'rendering')
+    report_gen = get_report_generator()
+    html_path, md_path = report_gen.generate_range_report(summary, alerts_per_day, charts)
+    files = {'html': str(html_path), 'markdown': str(md_path)}
+
+    if params.get('pdf'):
+        progress(80, 'rendering pdf')
+        files['pdf'] = str(report_gen.render_pdf(html_path))
+    return {'files': files}
+
+def _render_fleet_report(params, progress):
+    """Fleet report job body: hosts compared side by side from history rollups."""
+    start, end, hosts = params['start'], params['end'], params.get('hosts')
+
+    progress(10, 'loading rollups')
+    if HISTORY_DB:
+        rollups = open_store(HISTORY_DB).rollups(start, end)
+    else:
+        rollups = rollup_store.load(start, end)
+    if hosts:
+        rollups = {host: by_name for host, by_name in rollups.items() if host in hosts}
+
+    progress(40, 'computing statistics')
+    summary = fleet_summary(rollups, start, end)
+    _refresh_alert_store()
+    alerts_per_day = alert_store.stats(bucket_seconds=86400, since=start, until=end)['buckets']
+
+    progress(60, 'rendering')
+    report_gen = get_report_generator()
+    html_path, md_path = report_gen.generate_fleet_report(summary, alerts_per_day)
+    files = {'html': str(html_path), 'markdown': str(md_path)}
+
+    if params.get('pdf'):
+        progress(80, 'rendering pdf')
+        files['pdf'] = str(report_gen.render_pdf(html_path))
+    return {'files': files}
+
+def _run_report_job(params, progress):
+    if params.get('type') == 'range':
+        return _render_range_report(params, progress)
+    if params.get('type') == 'fleet':
+        return _render_fleet_report(params, progress)
+    return _render_report(params, progress)
+
+def _report_params(body, now=None):
+    """Job parameters from a generate request body (raises ValueError).
+
+    Range presets end at `now` (default: the current time).
+    """
+    # PDF rendering is CPU-heavy: only on request
+    want_pdf = bool(body.get('pdf', False))
+    if want_pdf and pdf is None:
+        raise ValueError('PDF output requires weasyprint')
+
+    if not any(body.get(key) for key in ('range', 'start', 'end')):
+        if body.get('fleet'):
+            raise ValueError('Fleet reports need range or start/end')
+        return {'type': 'snapshot', 'pdf': want_pdf}
+
+    if body.get('range'):
+        start, end = preset_range(str(body['range']), now or time.time())
+    else:
+        start = _parse_time('start', body.get('start'))
+        end = _parse_time('end', body.get('end')) or time.time()
+        if start is None:
+            raise ValueError('start is required with end')
+    if start >= end:
+        raise ValueError('start must be before end')
+    if body.get('fleet'):
+        hosts = body.get('hosts')
+        if hosts is not None and not (isinstance(hosts, list) and all(isinstance(h, str) for h in hosts)):
+            raise ValueError('hosts must be a list of host names')
+        return {'type': 'fleet', 'start': start, 'end': end,
+                'hosts': sorted(set(hosts)) if hosts else None, 'pdf': want_pdf}
+    return {'type': 'range', 'start': start, 'end': end, 'host': body.get('host'), 'pdf': want_pdf}
+
+report_jobs = ReportJobQueue(_run_report_job, workers=REPORT_WORKERS, max_pending=REPORT_QUEUE_MAX)
+
+def _submit_scheduled_report(body, scheduled_at):
+    job, _ = report_jobs.submit(_report_params(body, now=scheduled_at))
+    return job.id
+
+def _scheduled_job(job_id):
+    job = report_jobs.get(job_id)
+    return job.to_dict() if job is not None else None
+
+def _report_hosts():
+    """Hosts with history in the last hour (for schedules with hosts='*')."""
+    end = time.time()
+    if HISTORY_DB:
+        return list(open_store(HISTORY_DB).rollups(end - 3600, end))
+    return list(rollup_store.load(end - 3600, end))
+
+report_scheduler = None
+if REPORT_SCHEDULES.exists():
+    try:
+        report_scheduler = ReportScheduler(load_schedules(REPORT_SCHEDULES),
+                                           _submit_scheduled_report, _scheduled_job,
+                                           history_path=REPORTS_DIR / 'schedule_history.jsonl',
+                                           list_hosts=_report_hosts,
+                                           lock_path=REPORTS_DIR / 'scheduler.lock')
+    except (OSError, ValueError, TypeError) as e:
+        logger.error(f"Report schedules disabled ({REPORT_SCHEDULES}): {e}")
+
+@app.route('/api/reports/generate', methods=['POST'])
+def generate_report():
+    """
+    Queue a report. Returns 202 with the job id; poll /api/reports/jobs/<id>.
+
+    An identical report already queued or running is shared rather than
+    rendered twice. Answers 429 when the queue is full.
+
+    JSON body (optional):
+        pdf: Also render a PDF (default: false; needs weasyprint)
+        range: Time-range report over the last '1h', '24h' or '7d'
+        start / end: Time-range report over a custom range
+                     (epoch seconds or ISO 8601; end defaults to now)
+        host: Only this host in a time-range report
+        fleet: Compare hosts side by side over the range (rankings,
+               percentile bands and outliers) instead of one section per host
+        hosts: Only these hosts in a fleet report
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        params = _report_params(body)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        job, created = report_jobs.submit(params)
+    except QueueFull as e:
+        response = jsonify({'success': False, 'error': f"Report queue full: {e}"})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'deduplicated': not created,
+        'status': job.status,
+        'status_url': f"/api/reports/jobs/{job.id}"
+    }), 202
+
+@app.route('/api/reports')
+def list_reports():
+    """
+    Paginated generated reports, newest first (from the report catalog).
+
+    Query parameters:
+        type: 'html', 'markdown' or 'pdf'
+        kind: 'snapshot', 'range' or 'fleet'
+        since, until: Creation time range (epoch seconds or ISO 8601)
+        key: Report input hash (or a prefix of it)
+        offset: Reports to skip
+        limit: Page size (default 50, max 500)
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), REPORTS_PAGE_MAX)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit and offset must be integers'}), 400
+    try:
+        since, until = _time_arg('since'), _time_arg('until')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    entries, total = report_catalog.query(
+        report_type=request.args.get('type') or None,
+        kind=request.args.get('kind') or None,
+        since=since,
+        until=until,
+        key=request.args.get('key') or None,
+        offset=offset,
+        limit=limit
+    )
+    return jsonify({
+        'success': True,
+        'reports': [entry.to_dict() for entry in entries],
+        'total': total,
+        'offset': offset,
+        'limit': limit
+    })
+
+@app.route('/api/reports/jobs/<job_id>')
+def get_report_job(job_id):
+    """Status, progress and (when done) output files of a report job."""
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route('/api/reports/schedules')
+def get_report_schedules():
+    """Configured report schedules with their next run and latest event."""
+    if report_scheduler is None:
+        return jsonify({'success': True, 'schedules': []})
+    return jsonify({'success': True, 'schedules': report_scheduler.status()})
+
+@app.route('/api/reports/schedules/history')
+def get_report_schedule_history():
+    """
+    Scheduled run history, newest first.
+
+    Query parameters:
+        schedule: Only runs of this schedule
+        limit: Maximum number of entries (default 50, max 500)
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), REPORTS_PAGE_MAX)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    if report_scheduler is None:
+        return jsonify({'success': True, 'history': []})
+    return jsonify({
+        'success': True,
+        'history': report_scheduler.history(schedule=request.args.get('schedule') or None,
+                                            limit=limit)
+    })
+
+@app.route('/api/reports/download/pdf/<filename>')
+def download_report_pdf(filename):
+    """Download PDF report."""
+    return send_file(REPORTS_DIR / 'pdf' / filename, as_attachment=True)
+
 @app.route('/api/reports/download/html/<filename>')
 def download_report_html(filename):
     """Download HTML report."""
@@ -300,6 +814,11 @@ def run_server(host='0.0.0.0', port=5000, debug=False):
     print(f"📡 Metrics Source: {HOST_LATEST_JSON}")
     print(f"🌍 Server: http://{host}:{port}")
     
+    # The debug reloader imports the app twice: only its serving child
+    # schedules, and the lock file keeps out any other process
+    if report_scheduler is not None and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        report_scheduler.start()
+    
     app.run(host=host, port=port, debug=debug)
 
 if __name__ == '__main__':
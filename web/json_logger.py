@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
 """
-JSON Logging Service - Saves metrics every 60 seconds from Host API
+JSON Logging Service - Collects metrics from Host API into history
 Logs are stored in json/ directory at project root
+
+Pipeline:
+    fetch stage (timer)  ->  WAL (group commit)
+                         ->  in-memory queue  ->  writer stage (batches)
+                                                   - history: json/history/metrics_YYYYMMDD.jsonl
+                                                     (or SQLite when HISTORY_DB is set)
+                                                   - per-minute rollups: json/history/rollups/
+                                                   - archive snapshot json/YYYYMMDD_HHMMSS.json
+                                                     at most every ARCHIVE_INTERVAL seconds
+    retention task (low frequency, background)
+
+The WAL (json/ingest.wal) is replayed into history on start-up, so samples
+fetched but not yet written survive a container restart.
 """
 
 import json
+import os
+import queue
+import threading
 import time
 import sys
 from pathlib import Path
@@ -16,129 +32,486 @@
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from core.archive_index import ArchiveIndex
+from core.history import JsonlHistoryWriter, read_history
+from core.sqlite_store import close_store, open_store
+from core.anomaly import AnomalyDetector
+from core.forecast import TrendForecaster
+from core.alert_lifecycle import AlertLifecycle
+from core.notifier import NotificationDispatcher, load_destinations, notifying_writer
+from core.retention import RetentionEngine, default_policies, load_policies
+from core.rollups import RollupStore
+from core.rule_engine import AlertManagerSink, RuleEngine, load_rules
+from core.wal import WriteAheadLog
+
 JSON_DIR = project_root / 'json'
-INTERVAL = 60  # seconds
-MAX_FILES = 10  # Keep only last 10 files
+HISTORY_DIR = JSON_DIR / 'history'
+WAL_PATH = JSON_DIR / 'ingest.wal'
+FORECAST_PATH = JSON_DIR / 'forecast.json'
+FORECAST_BOOTSTRAP_HOURS = 24  # history replayed into the trend fits at start-up
+INTERVAL = float(os.getenv('JSON_LOG_INTERVAL', '60'))  # seconds between fetches
+ARCHIVE_INTERVAL = max(INTERVAL, float(os.getenv('JSON_ARCHIVE_INTERVAL', '60')))  # seconds between snapshot files
+MAX_FILES = 10  # Keep only last 10 loose snapshot files
 HOST_API_URL = "http://host.docker.internal:8888/metrics"
 
-running = True
+QUEUE_MAX = 1000        # samples buffered between fetch and writer stages
+BATCH_MAX = 100         # samples per writer batch
+BATCH_WAIT = 1.0        # seconds the writer waits to fill a batch
+WRITE_RETRY_MAX = 30.0  # longest wait between retries of a failed batch
+FSYNC_INTERVAL = float(os.getenv('JSON_FSYNC_INTERVAL', '5'))  # seconds between fsyncs
+CLEANUP_INTERVAL = float(os.getenv('JSON_CLEANUP_INTERVAL', '300'))  # seconds between retention passes
+FETCH_BACKOFF_MAX = float(os.getenv('JSON_FETCH_BACKOFF_MAX', '60'))  # longest wait between failed fetches
+
+# Optional SQLite metric history (e.g. data/history.db); JSONL history when unset
+HISTORY_DB = os.getenv('HISTORY_DB')
+
+# Optional JSON retention config (see core.retention.load_policies)
+RETENTION_CONFIG = os.getenv('RETENTION_CONFIG')
+
+# Optional JSON rule file (see core.rule_engine.load_rules); built-in rules when unset
+RULES_CONFIG = os.getenv('RULES_CONFIG')
+ALERTS_PATH = os.getenv('ALERTS_PATH', str(project_root / 'data' / 'alerts' / 'alerts.json'))
+
+# Optional JSON list of notification destinations (see core.notifier)
+NOTIFY_CONFIG = os.getenv('NOTIFY_CONFIG')
+NOTIFY_OUTBOX = Path(os.getenv('NOTIFY_OUTBOX', str(project_root / 'data' / 'alerts' / 'outbox')))
+
+# Hour-of-week anomaly baselines (168 buckets per series)
+ANOMALY_SEASONAL = os.getenv('ANOMALY_SEASONAL', 'false').lower() == 'true'
+
+# Sorted index of archive files (rebuilt from disk once in main())
+archive_index = ArchiveIndex(JSON_DIR)
+
+# Durable hand-off between the fetch and writer stages
+wal = WriteAheadLog(WAL_PATH)
+sample_queue = queue.Queue(maxsize=QUEUE_MAX)
+stop_event = threading.Event()
+
+_history_sink = None
+_last_archive_at = None
+_written_lsn = 0
+
+
+def _build_retention_engine():
+    """Create the retention engine for archives, reports, logs and alerts"""
+    if RETENTION_CONFIG:
+        policies = load_policies(RETENTION_CONFIG, base_dir=project_root)
+    else:
+        policies = default_policies(project_root, alerts_path=ALERTS_PATH)
+        # Loose snapshots beyond MAX_FILES are compacted into daily segments
+        policies[0].max_count = MAX_FILES
+
+    def forget_deleted(directory, filenames):
+        if Path(directory) == JSON_DIR:
+            archive_index.remove_many(filenames)
+
+    return RetentionEngine(policies, on_delete=forget_deleted)
+
+
+retention_engine = _build_retention_engine()
+
+notifier = NotificationDispatcher(load_destinations(NOTIFY_CONFIG), NOTIFY_OUTBOX) if NOTIFY_CONFIG else None
+alert_lifecycle = AlertLifecycle(
+    ALERTS_PATH, writer=notifying_writer(notifier, ALERTS_PATH) if notifier else None)
+rule_engine = RuleEngine(load_rules(RULES_CONFIG) if RULES_CONFIG else None,
+                         sink=AlertManagerSink(ALERTS_PATH, alert_lifecycle))
+anomaly_detector = AnomalyDetector(seasonal=ANOMALY_SEASONAL)
+forecaster = TrendForecaster()
+# Per-minute rollups for time-range reports (SQLite history computes them in SQL)
+rollup_store = None if HISTORY_DB else RollupStore(HISTORY_DIR)
+
+
+def evaluate_rules(metrics):
+    """Annotate anomaly scores and trend forecasts, then run the alert rules"""
+    annotated = forecaster.annotate(anomaly_detector.annotate(metrics))
+    rule_engine.on_snapshot(annotated)
+
+
+def bootstrap_forecasts():
+    """Warm the trend fits from recent JSONL history (once, at start-up)"""
+    if HISTORY_DB:
+        return 0
+    start = time.time() - FORECAST_BOOTSTRAP_HOURS * 3600
+    replayed = forecaster.bootstrap(read_history(HISTORY_DIR, start=start))
+    if replayed:
+        print(f"Forecasts warmed from {replayed} stored sample(s)")
+    return replayed
+
+
+# Called with every written snapshot, in order
+snapshot_subscribers = [evaluate_rules]
+
+
+def get_history_sink():
+    """Return the history writer (SQLite store or rolling JSONL file)"""
+    global _history_sink
+    if _history_sink is None:
+        if HISTORY_DB:
+            _history_sink = open_store(HISTORY_DB)
+        else:
+            _history_sink = JsonlHistoryWriter(HISTORY_DIR, fsync_interval=FSYNC_INTERVAL)
+    return _history_sink
+
 
 def signal_handler(sig, frame):
-    """Handle Ctrl+C gracefully"""
-    global running
-    running = False
-    print("\n\nJSON Logging Service stopped")
-    sys.exit(0)
+    """Handle Ctrl+C gracefully (writer drains the queue before exit)"""
+    stop_event.set()
 
-def save_metrics_json():
-    """Save current metrics from Host API to JSON file with local timestamp"""
+
+# ----------------------------------------------------------------------
+# Fetch stage
+# ----------------------------------------------------------------------
+
+def fetch_metrics():
+    """Fetch one snapshot from the Host API and stamp it with local time"""
     try:
         # Fetch metrics from Host API (real hardware data)
-        response = requests.get(HOST_API_URL, timeout=5.0)
+        response = requests.get(HOST_API_URL, timeout=min(5.0, max(INTERVAL, 1.0)))
         response.raise_for_status()
         api_response = response.json()
-        
+
         if api_response.get('status') != 'ok':
             print(f"ERROR: Host API returned status: {api_response.get('status')}")
-            return False
-        
+            return None
+
         metrics = api_response.get('data', {})
-        
+
         # Get current local time
         now_local = datetime.now()
         now_utc = datetime.utcnow()
-        
-        # Filename format: YYYYMMDD_HHMMSS.json (local time)
-        filename = now_local.strftime('%Y%m%d_%H%M%S') + '.json'
-        filepath = JSON_DIR / filename
-        
+
         # Add timestamps to metrics (local time format: dd/mm/year HH:MM:SS)
         metrics['saved_at'] = now_utc.isoformat() + 'Z'
         metrics['log_timestamp'] = now_local.strftime('%d/%m/%Y %H:%M:%S')
         metrics['source'] = 'host-api'
-        
-        with open(filepath, 'w') as f:
-            json.dump(metrics, f, indent=2)
-        
-        print(f"[{now_local.strftime('%H:%M:%S')}] ✓ Saved: {filename} | Host: {metrics.get('system', {}).get('hostname', 'unknown')} | CPU: {metrics.get('cpu', {}).get('usage_percent', 0)}%")
-        
-        # Cleanup old files (keep only last 10)
-        cleanup_old_files()
-        
-        return True
-        
+        metrics.setdefault('timestamp', now_utc.strftime('%Y-%m-%dT%H:%M:%SZ'))
+
+        return metrics
+
     except requests.exceptions.RequestException as e:
         print(f"ERROR connecting to Host API: {e}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"ERROR fetching metrics: {e}", file=sys.stderr)
+        return None
+
+
+def enqueue_sample(metrics):
+    """Log a sample to the WAL, then queue it for the writer
+
+    If the writer is QUEUE_MAX samples behind, the oldest queued sample is
+    dropped from the queue so the fetch stage never blocks; the writer reads
+    it back from the WAL (see fill_gaps()).
+    """
+    lsn = wal.append(metrics)
+    wal.commit(lsn)
+    
+    while True:
+        try:
+            sample_queue.put_nowait((lsn, metrics))
+            return
+        except queue.Full:
+            try:
+                sample_queue.get_nowait()
+                print("Warning: writer is behind, oldest sample left to the WAL", file=sys.stderr)
+            except queue.Empty:
+                pass
+
+
+def fetch_loop():
+    """Fetch on a fixed schedule (no drift from request latency)
+
+    While the Host API is unreachable the interval backs off (doubling up to
+    FETCH_BACKOFF_MAX) and the schedule resumes on the first success.
+    """
+    consecutive_errors = 0
+    next_run = time.monotonic()
+
+    while not stop_event.is_set():
+        metrics = fetch_metrics()
+
+        interval = INTERVAL
+        if metrics is not None:
+            if consecutive_errors:
+                print(f"Host API reachable again after {consecutive_errors} failed fetch(es)")
+            consecutive_errors = 0
+            enqueue_sample(metrics)
+        else:
+            consecutive_errors += 1
+            interval = max(INTERVAL, min(INTERVAL * 2 ** consecutive_errors, FETCH_BACKOFF_MAX))
+            print(f"Warning: fetch failed {consecutive_errors} time(s) in a row, "
+                  f"retrying in {interval:g}s", file=sys.stderr)
+
+        next_run += interval
+        delay = next_run - time.monotonic()
+        if delay < 0:
+            # Fell behind (slow API); skip missed ticks instead of bursting
+            next_run = time.monotonic()
+            delay = 0
+        stop_event.wait(delay)
+
+
+# ----------------------------------------------------------------------
+# Writer stage
+# ----------------------------------------------------------------------
+
+def write_archive_snapshot(metrics):
+    """Atomically write one YYYYMMDD_HHMMSS.json snapshot (local time) and index it"""
+    # Filename format: YYYYMMDD_HHMMSS.json (local time)
+    filename = datetime.now().strftime('%Y%m%d_%H%M%S') + '.json'
+    filepath = JSON_DIR / filename
+    # Temp name does not match *.json, so readers never see a partial file
+    tmp_path = JSON_DIR / f'.{filename}.tmp'
+
+    with open(tmp_path, 'w') as f:
+        json.dump(metrics, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+    archive_index.add(filename)
+    return filename
+
+
+def fill_gaps(batch):
+    """Return the batch with samples missing since the last written LSN read back from the WAL
+
+    LSNs are consecutive, so a gap means samples were evicted from the queue;
+    samples at or below the written LSN (already in history) are skipped.
+    """
+    filled, expected = [], _written_lsn + 1
+    for lsn, metrics in batch:
+        if lsn < expected:
+            continue
+        if lsn > expected:
+            filled.extend(wal.records(expected - 1, lsn - 1))
+        filled.append((lsn, metrics))
+        expected = lsn + 1
+    return filled
+
+
+def write_batch(batch, force_archive=False):
+    """Append a batch of (lsn, metrics) to history and refresh the archive snapshot if due
+
+    The batch must continue from the written LSN (see fill_gaps()), which
+    then advances to its last sample; the WAL is never checkpointed past a
+    sample that is not in history.
+    """
+    global _last_archive_at, _written_lsn
+
+    get_history_sink().append_batch([metrics for _, metrics in batch])
+    _written_lsn = batch[-1][0]
+
+    for _, metrics in batch:
+        for subscriber in snapshot_subscribers:
+            try:
+                subscriber(metrics)
+            except Exception as e:
+                print(f"ERROR in snapshot subscriber: {e}", file=sys.stderr)
+
+    try:
+        forecaster.save(FORECAST_PATH)
+    except OSError as e:
+        print(f"ERROR writing forecasts: {e}", file=sys.stderr)
+
+    latest = batch[-1][1]
+    now = time.monotonic()
+    archived = None
+    if force_archive or _last_archive_at is None or now - _last_archive_at >= ARCHIVE_INTERVAL:
+        try:
+            archived = write_archive_snapshot(latest)
+            _last_archive_at = now
+        except OSError as e:
+            print(f"ERROR writing archive snapshot: {e}", file=sys.stderr)
+
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] ✓ Wrote {len(batch)} sample(s)"
+          f"{' | Archived: ' + archived if archived else ''}"
+          f" | Host: {latest.get('system', {}).get('hostname', 'unknown')}"
+          f" | CPU: {latest.get('cpu', {}).get('usage_percent', 0)}%")
+
+
+def checkpoint_wal():
+    """Make written history durable, then drop those samples from the WAL"""
+    get_history_sink().flush()
+    wal.checkpoint(_written_lsn)
+    if rollup_store is not None:
+        try:
+            rollup_store.update(start=time.time())
+        except OSError as e:
+            print(f"ERROR updating rollups: {e}", file=sys.stderr)
+
+
+def recover_wal():
+    """Replay samples left in the WAL by a previous run into history"""
+    global _written_lsn
+
+    replayed = list(wal.replay())
+    if replayed:
+        get_history_sink().append_batch(replayed)
+        get_history_sink().flush()
+        print(f"Recovered {len(replayed)} sample(s) from {WAL_PATH.name}")
+    if wal.torn_bytes:
+        print(f"Warning: skipped torn WAL tail ({wal.torn_bytes} bytes)", file=sys.stderr)
+    _written_lsn = wal.appended_lsn
+    wal.checkpoint()
+    return len(replayed)
+
+
+def writer_loop():
+    """Drain the queue in batches until stopped and the queue is empty
+
+    A batch that fails to write is retried (with backoff) before any later
+    sample is written. If it still fails at shutdown it stays in the WAL and
+    is replayed on the next start.
+    """
+    last_checkpoint = time.monotonic()
+    batch = None
+    retry_delay = 0.0
+    
+    while not (stop_event.is_set() and sample_queue.empty() and batch is None):
+        if batch is None:
+            try:
+                batch = [sample_queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(batch) < BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or stop_event.is_set():
+                    break
+                try:
+                    batch.append(sample_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            batch = fill_gaps(batch) or None
+            if batch is None:
+                continue
+
+        try:
+            write_batch(batch)
+        except Exception as e:
+            if stop_event.is_set():
+                print(f"ERROR writing batch of {len(batch)} samples: {e}; "
+                      f"left in {WAL_PATH.name} for the next start", file=sys.stderr)
+                break
+            retry_delay = min(max(retry_delay * 2, 1.0), WRITE_RETRY_MAX)
+            print(f"ERROR writing batch of {len(batch)} samples: {e}; "
+                  f"retrying in {retry_delay:g}s", file=sys.stderr)
+            stop_event.wait(retry_delay)
+            continue
+        batch = None
+        retry_delay = 0.0
+        
+        if time.monotonic() - last_checkpoint >= FSYNC_INTERVAL:
+            checkpoint_wal()
+            last_checkpoint = time.monotonic()
+
+    checkpoint_wal()
+
+
+def save_metrics_json():
+    """Fetch and write a single snapshot synchronously (one-shot mode)"""
+    metrics = fetch_metrics()
+    if metrics is None:
         return False
+    try:
+        lsn = wal.append(metrics)
+        wal.commit(lsn)
+        write_batch(fill_gaps([(lsn, metrics)]), force_archive=True)
+        checkpoint_wal()
+        return True
     except Exception as e:
         print(f"ERROR saving metrics: {e}", file=sys.stderr)
         return False
 
+
+# ----------------------------------------------------------------------
+# Retention task
+# ----------------------------------------------------------------------
+
 def cleanup_old_files():
-    """Keep only the last MAX_FILES JSON files"""
+    """Apply retention policies (keeps the last MAX_FILES loose JSON files)"""
     try:
-        files = sorted(JSON_DIR.glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
-        
-        if len(files) > MAX_FILES:
-            deleted_count = 0
-            for old_file in files[MAX_FILES:]:
-                try:
-                    old_file.unlink()
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"Warning: Could not delete {old_file}: {e}", file=sys.stderr)
-            
-            if deleted_count > 0:
-                print(f"  Cleaned up {deleted_count} old log files")
-                
+        results = retention_engine.run_once()
+
+        for result in results:
+            for error in result.errors:
+                print(f"Warning: Retention {result.target}: {error}", file=sys.stderr)
+
+        deleted = sum(r.files_deleted for r in results)
+        compacted = sum(r.files_compacted for r in results)
+        reclaimed = sum(r.bytes_reclaimed for r in results)
+        if deleted:
+            print(f"  Cleaned up {deleted} old log files ({compacted} compacted, {reclaimed} bytes reclaimed)")
+
     except Exception as e:
         print(f"Warning: Cleanup failed: {e}", file=sys.stderr)
 
+
 def main():
-    """Main loop - fetch from Host API and save metrics every 60 seconds"""
-    global running
-    
+    """Run the fetch/writer pipeline and the background retention task"""
     print("=" * 60)
     print("JSON Logging Service - Fetching from Host API")
     print("=" * 60)
     print(f"Host API:      {HOST_API_URL}")
     print(f"Log Directory: {JSON_DIR}")
-    print(f"Save Interval: {INTERVAL} seconds")
-    print(f"Max Files:     {MAX_FILES} (auto-cleanup)")
+    print(f"Fetch Every:   {INTERVAL:g} seconds")
+    print(f"Archive Every: {ARCHIVE_INTERVAL:g} seconds")
+    print(f"Max Files:     {MAX_FILES} (older snapshots compacted into json/segments)")
+    print(f"History:       {HISTORY_DB or HISTORY_DIR}")
+    print(f"Cleanup Every: {CLEANUP_INTERVAL:g} seconds")
     print(f"Timestamp:     Local time (dd/mm/yyyy HH:MM:SS)")
     print("=" * 60)
     print("\nPress Ctrl+C to stop\n")
-    
+
     # Create JSON directory
     JSON_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Build the archive index from disk (only done at start-up)
+    archive_index.load()
     
+    # Replay samples that were fetched but not written before a restart
+    recover_wal()
+
+    bootstrap_forecasts()
+
+    # Deliver alerts left in the notification outbox, then new ones
+    if notifier:
+        notifier.start()
+
     # Register signal handler
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
-    
-    consecutive_errors = 0
-    max_consecutive_errors = 5
-    
+
+    writer = threading.Thread(target=writer_loop, name='json-writer')
+    fetcher = threading.Thread(target=fetch_loop, name='json-fetch', daemon=True)
+
     try:
-        while running:
-            success = save_metrics_json()
-            
-            if success:
-                consecutive_errors = 0
-            else:
-                consecutive_errors += 1
-                if consecutive_errors >= max_consecutive_errors:
-                    print(f"\nERROR: {max_consecutive_errors} consecutive failures. Stopping.")
-                    break
-            
-            time.sleep(INTERVAL)
-            
-    except KeyboardInterrupt:
-        print("\n\nJSON Logging Service stopped by user")
+        writer.start()
+        fetcher.start()
+        retention_engine.start(CLEANUP_INTERVAL)
+
+        while not stop_event.is_set():
+            stop_event.wait(1.0)
+
     except Exception as e:
         print(f"\nFATAL ERROR: {e}", file=sys.stderr)
+        stop_event.set()
         sys.exit(1)
-    
+    finally:
+        stop_event.set()
+        retention_engine.stop(timeout=5)
+        writer.join(timeout=10)
+        wal.close()
+        if notifier:
+            notifier.stop(timeout=5)
+        if HISTORY_DB:
+            # Shared handle (see open_store)
+            close_store(HISTORY_DB)
+        else:
+            get_history_sink().close()
+        print("\n\nJSON Logging Service stopped")
+
     sys.exit(0)
 
 if __name__ == '__main__':
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+PDF rendering in a pool of worker processes.
+
+weasyprint layout is CPU-bound and holds the GIL for long stretches, so
+running it in the web process stalls everything else. PdfRenderer sends
+the HTML produced from report_template.html to a ProcessPoolExecutor
+whose workers import weasyprint, build the font configuration and parse
+the print stylesheet once at start-up, then reuse them for every job.
+
+Each job runs under a timer inside the worker (so a slow document fails
+without losing the warm process) and the parent waits a little longer
+before giving up on the pool and recycling it. Workers are started with
+an address-space limit (RLIMIT_AS) so a pathological document cannot
+exhaust the host's memory.
+
+weasyprint is optional: available() reports whether it is installed and
+render() raises PdfUnavailable when it is not.
+"""
+
+import concurrent.futures
+import importlib.util
+import logging
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 1
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MEMORY_LIMIT_MB = 1024
+
+# Extra seconds the parent waits beyond the in-worker timer before recycling
+TIMEOUT_GRACE = 10.0
+
+# Print stylesheet applied on top of the template's own styles
+PRINT_STYLESHEET = Path(__file__).parent.parent / 'templates' / 'report_print.css'
+
+
+class PdfUnavailable(RuntimeError):
+    """Raised when weasyprint is not installed."""
+
+
+class PdfTimeout(RuntimeError):
+    """Raised when a document takes longer than the per-job timeout."""
+
+
+# ----------------------------------------------------------------------
+# Worker process side
+# ----------------------------------------------------------------------
+
+_worker = {}
+
+
+def _init_worker(stylesheets: List[str], memory_limit_mb: Optional[int]):
+    """Preload weasyprint, fonts and stylesheets once per worker process."""
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Could not cap PDF worker memory: {e}")
+
+    # Importing weasyprint pulls in Pango/cairo: do it once, here
+    import weasyprint
+    from weasyprint.text.fonts import FontConfiguration
+
+    fonts = FontConfiguration()
+    _worker['weasyprint'] = weasyprint
+    _worker['fonts'] = fonts
+    _worker['stylesheets'] = [weasyprint.CSS(filename=path, font_config=fonts)
+                              for path in stylesheets if os.path.exists(path)]
+
+
+def _on_timeout(signum, frame):
+    raise PdfTimeout("PDF rendering timed out")
+
+
+def _render_in_worker(html: str, output_path: str, base_url: Optional[str], timeout: float) -> int:
+    """Render one document; returns the PDF size in bytes."""
+    weasyprint = _worker['weasyprint']
+    use_timer = hasattr(signal, 'setitimer')
+    if use_timer:
+        signal.signal(signal.SIGALRM, _on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    tmp_path = output_path + '.tmp'
+    try:
+        document = weasyprint.HTML(string=html, base_url=base_url)
+        document.write_pdf(tmp_path, stylesheets=_worker['stylesheets'],
+                           font_config=_worker['fonts'])
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    os.replace(tmp_path, output_path)
+    return os.path.getsize(output_path)
+
+
+# ----------------------------------------------------------------------
+# Parent side
+# ----------------------------------------------------------------------
+
+def available() -> bool:
+    """Return True if weasyprint is installed."""
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+class PdfRenderer:
+    """Render HTML to PDF in warm worker processes."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+        stylesheets: Optional[List[Path]] = None
+    ):
+        """Initialize PDF renderer
+
+        Args:
+            workers: Worker processes
+            timeout: Seconds a single document may take
+            memory_limit_mb: Address-space cap per worker (None for no cap)
+            stylesheets: Extra CSS applied to every document
+                         (defaults to templates/report_print.css)
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.stylesheets = [str(p) for p in (stylesheets if stylesheets is not None
+                                             else [PRINT_STYLESHEET])]
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def render(self, html: str, output_path, base_url: Optional[str] = None) -> Path:
+        """
+        Render an HTML document to a PDF file.
+
+        Args:
+            html: Document markup
+            output_path: PDF file to write (replaced atomically)
+            base_url: Base for relative URLs (images, stylesheets)
+
+        Returns:
+            Path: output_path
+
+        Raises:
+            PdfUnavailable: weasyprint is not installed
+            PdfTimeout: Rendering exceeded the timeout
+        """
+        if not available():
+            raise PdfUnavailable("weasyprint is not installed")
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        future = self._pool().submit(_render_in_worker, html, str(output_path), base_url, self.timeout)
+        try:
+            future.result(timeout=self.timeout + TIMEOUT_GRACE)
+        except concurrent.futures.TimeoutError:
+            # The worker is stuck where the timer cannot interrupt it
+            self._recycle()
+            raise PdfTimeout(f"PDF rendering exceeded {self.timeout:g}s") from None
+        except (BrokenProcessPool, MemoryError) as e:
+            # A worker died (e.g. hit the memory cap): start fresh ones
+            self._recycle()
+            raise RuntimeError(f"PDF worker failed: {e or type(e).__name__}") from None
+        return output_path
+
+    def warm(self):
+        """Start the worker processes now instead of on the first render."""
+        if available():
+            pool = self._pool()
+            for _ in range(self.workers):
+                pool.submit(os.getpid)
+
+    def close(self):
+        """Shut the worker processes down."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.stylesheets, self.memory_limit_mb)
+                )
+            return self._executor
+
+    def _recycle(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # Running futures cannot be cancelled: terminate the workers
+        for process in list(getattr(executor, '_processes', {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
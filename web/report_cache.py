@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Content-addressed report cache.
+
+Report inputs (metrics, alert set version, time range, template sources)
+are normalized and hashed; the hash names the rendered artifacts. A
+request whose inputs hash to a key already in the cache returns the
+existing files instead of rendering new ones.
+
+Rendering is also cached below the report level: templates wrap their
+sections (host columns, alerts, ...) in macros rendered through the
+`fragment()` template global, which caches each section's markup by the
+hash of that section's own inputs. A report whose alerts changed but
+whose metrics did not re-renders only the alerts section.
+
+The artifact index is persisted (reports/cache/index.json) so hits
+survive restarts; fragments are kept in memory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_FRAGMENTS = 256
+
+# Snapshot fields that change on every sample without changing the report
+VOLATILE_FIELDS = ('timestamp', 'collected_at')
+
+
+def normalize_metrics(metrics: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Drop volatile top-level fields from a metrics snapshot."""
+    if not isinstance(metrics, dict):
+        return metrics
+    return {key: value for key, value in metrics.items() if key not in VOLATILE_FIELDS}
+
+
+def input_key(*parts: Any) -> str:
+    """Return the content hash of report inputs (JSON-canonicalized)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ReportCache:
+    """Maps input hashes to rendered report files and caches fragments."""
+
+    def __init__(self, cache_dir, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_fragments: int = DEFAULT_MAX_FRAGMENTS):
+        """Initialize report cache
+
+        Args:
+            cache_dir: Directory holding the artifact index
+            max_entries: Artifacts remembered (oldest forgotten first)
+            max_fragments: Rendered sections kept in memory
+        """
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / 'index.json'
+        self.max_entries = max_entries
+        self.max_fragments = max_fragments
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._fragments: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+        self._load()
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Return the files rendered for `key`.
+
+        Entries whose files were removed (e.g. by retention) are dropped.
+
+        Returns:
+            dict or None: Output type -> file path
+        """
+        with self._lock:
+            files = self._entries.get(key)
+            if files is not None and all(os.path.exists(path) for path in files.values()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(files)
+            if files is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, files: Dict[str, str]):
+        """Record the files rendered for `key`."""
+        with self._lock:
+            self._entries[key] = {kind: str(path) for kind, path in files.items()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def fragment(self, key: str, render: Callable[[], str]) -> str:
+        """Return the cached markup for `key`, rendering it on a miss."""
+        with self._lock:
+            markup = self._fragments.get(key)
+            if markup is not None:
+                self._fragments.move_to_end(key)
+                self.fragment_hits += 1
+                return markup
+            self.fragment_misses += 1
+
+        # Render outside the lock; a concurrent miss renders the same markup
+        markup = str(render())
+        with self._lock:
+            self._fragments[key] = markup
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.max_fragments:
+                self._fragments.popitem(last=False)
+        return markup
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and sizes."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'fragments': len(self._fragments),
+                'fragment_hits': self.fragment_hits,
+                'fragment_misses': self.fragment_misses,
+            }
+
+    def _load(self):
+        try:
+            with self.index_path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable report cache index {self.index_path}: {e}")
+            return
+        for key, files in data.get('entries', []):
+            self._entries[key] = files
+
+    def _save(self):
+        tmp_path = self.index_path.with_suffix('.json.tmp')
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump({'entries': list(self._entries.items())}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not write report cache index {self.index_path}: {e}")
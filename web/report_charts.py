@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Server-side charts for reports.
+
+Range reports show each host's CPU, memory, temperature and disk history
+as line charts drawn from the history rollups. A week of per-minute
+rollups is ~10k points per series, far more than a chart a few hundred
+pixels wide can show, so every series is first downsampled with
+Largest-Triangle-Three-Buckets (LTTB) to one point per horizontal pixel
+of the plot area. LTTB keeps the points that shape the line (spikes and
+dips survive, unlike with plain averaging), and the resulting SVG stays a
+few KB however long the range.
+
+Charts are SVG, inlined into the HTML report (weasyprint renders inline
+SVG, so PDFs get them too). PNG output is optional and needs cairosvg;
+available_formats() reports what is installed.
+
+Rendered charts are cached by (host, series, range, size, format) plus a
+fingerprint of the data, in memory and under reports/cache/charts/, so
+repeated reports over the same range reuse them.
+
+Example:
+    >>> charts = ChartRenderer('reports/cache/charts')
+    >>> charts.host_charts('web-1', rollups['web-1'], start, end)
+    [{'title': 'CPU & Memory', 'markup': '<svg ...>'}, ...]
+"""
+
+import base64
+import hashlib
+import html
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import cairosvg
+except ImportError:  # optional: charts are SVG only
+    cairosvg = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTH = 640
+DEFAULT_HEIGHT = 180
+DEFAULT_MAX_CHARTS = 256
+
+# Plot area margins (px): left (y labels), right, top (legend), bottom (x labels)
+MARGINS = (40, 12, 22, 20)
+
+# Lines per chart; further series (e.g. many disks) are left out
+MAX_LINES = 6
+
+# Line colors, in order (the report stylesheet's accent colors)
+PALETTE = ('#3b82f6', '#22c55e', '#f59e0b', '#ef4444', '#8b5cf6', '#06b6d4')
+
+# Charts per host: (title, series patterns, unit)
+HOST_CHARTS = (
+    ('CPU & Memory', ('cpu.usage_percent', 'memory.usage_percent'), '%'),
+    ('Temperature', ('temperature.*celsius', 'gpu.*celsius'), '°C'),
+    ('Disk Used', ('disk.*.used_percent', 'disk.*.usage_percent'), '%'),
+)
+
+FORMATS = ('svg', 'png')
+
+
+class ChartUnavailable(RuntimeError):
+    """Raised when PNG charts are requested without cairosvg."""
+
+
+def available_formats() -> Tuple[str, ...]:
+    """Chart formats that can be rendered here."""
+    return FORMATS if cairosvg is not None else ('svg',)
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> Tuple[List[float], List[float]]:
+    """
+    Downsample a line to `threshold` points (Largest-Triangle-Three-Buckets).
+
+    The first and last points are kept; from each bucket in between the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket is kept.
+
+    Returns:
+        tuple: (xs, ys) lists; the input unchanged when it is short enough
+    """
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(xs), list(ys)
+
+    out_x, out_y = [xs[0]], [ys[0]]
+    every = (count - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        ax, ay = xs[previous], ys[previous]
+        best, best_area = next_start - 1, -1.0
+        for index in range(int(bucket * every) + 1, next_start):
+            area = abs((ax - avg_x) * (ys[index] - ay) - (ax - xs[index]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = index, area
+        out_x.append(xs[best])
+        out_y.append(ys[best])
+        previous = best
+
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+
+def series_points(series) -> Tuple[List[float], List[float]]:
+    """Return (bucket midpoints, bucket means) of a RollupSeries."""
+    half = series.seconds / 2.0
+    if isinstance(series.sum, array):
+        points = [(start + half, total / n)
+                  for start, total, n in zip(series.start, series.sum, series.n) if n]
+        return [x for x, _ in points], [y for _, y in points]
+    mask = series.n > 0
+    return ((series.start[mask] + half).tolist(),
+            (series.sum[mask] / series.n[mask]).tolist())
+
+
+def _fingerprint(series) -> str:
+    """Digest of a series' data (changes when buckets are added or updated)."""
+    digest = hashlib.sha256()
+    for column in (series.start, series.n, series.sum):
+        digest.update(column.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _nice_ceiling(value: float) -> float:
+    """Smallest 1/2/5 x 10^k at or above value (axis maximum)."""
+    if value <= 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(value))
+    return next(step * magnitude for step in (1, 2, 5, 10) if step * magnitude >= value)
+
+
+def _number(value: float) -> str:
+    return format(round(value, 1), 'g')
+
+
+def render_svg(title: str, lines: List[Tuple[str, List[float], List[float]]],
+               start: float, end: float, width: int = DEFAULT_WIDTH,
+               height: int = DEFAULT_HEIGHT, unit: str = '%',
+               gap_seconds: Optional[float] = None) -> str:
+    """
+    Draw line series as an SVG chart.
+
+    Each series is downsampled (LTTB) to the plot width in pixels. The
+    y axis runs from 0 to 100 for percentages, else to a rounded maximum;
+    lines are broken where consecutive points are more than `gap_seconds`
+    apart (default: three pixels' worth of time).
+
+    Args:
+        title: Accessible chart title
+        lines: (label, xs (epoch seconds), ys) per series
+        start: Range start (left edge)
+        end: Range end (right edge)
+        width: Image width (px)
+        height: Image height (px)
+        unit: Value unit ('%' fixes the axis to 0-100)
+
+    Returns:
+        str: SVG document
+    """
+    left, right, top, bottom = MARGINS
+    plot_w, plot_h = max(width - left - right, 3), max(height - top - bottom, 1)
+    span = max(end - start, 1.0)
+    gap = gap_seconds if gap_seconds is not None else 3 * span / plot_w
+
+    peak = max((max(ys) for _, _, ys in lines if ys), default=0.0)
+    y_max = 100.0 if unit == '%' else _nice_ceiling(peak * 1.1)
+
+    def x_of(x):
+        return left + (x - start) / span * plot_w
+
+    def y_of(y):
+        return top + plot_h - min(max(y, 0.0), y_max) / y_max * plot_h
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" role="img" font-family="sans-serif" font-size="10">',
+        f'<title>{html.escape(title)}</title>',
+    ]
+
+    # Grid and axis labels
+    for step in range(5):
+        value = y_max * step / 4
+        y = y_of(value)
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_w}" y2="{y:.1f}" '
+                     f'stroke="#e2e8f0"/>')
+        parts.append(f'<text x="{left - 4}" y="{y + 3:.1f}" text-anchor="end" fill="#64748b">'
+                     f'{_number(value)}{html.escape(unit)}</text>')
+    label_format = '%H:%M' if span <= 2 * 86400 else '%m-%d'
+    for step in range(5):
+        at = start + span * step / 4
+        anchor = ('start', 'middle', 'middle', 'middle', 'end')[step]
+        parts.append(f'<text x="{x_of(at):.1f}" y="{height - 6}" text-anchor="{anchor}" fill="#64748b">'
+                     f'{time.strftime(label_format, time.gmtime(at))}</text>')
+
+    # Series
+    legend_x = left
+    for (label, xs, ys), color in zip(lines[:MAX_LINES], PALETTE):
+        xs, ys = lttb(xs, ys, plot_w)
+        path = []
+        last_x = None
+        for x, y in zip(xs, ys):
+            command = 'M' if last_x is None or x - last_x > gap else 'L'
+            path.append(f'{command}{x_of(x):.1f},{y_of(y):.1f}')
+            last_x = x
+        if path:
+            parts.append(f'<path d="{"".join(path)}" fill="none" stroke="{color}" '
+                         f'stroke-width="1.5" stroke-linejoin="round"/>')
+        parts.append(f'<rect x="{legend_x}" y="6" width="10" height="10" rx="2" fill="{color}"/>')
+        parts.append(f'<text x="{legend_x + 14}" y="15" fill="#0f172a">{html.escape(label)}</text>')
+        legend_x += 24 + 6 * len(label)
+
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def svg_to_png(svg: str) -> bytes:
+    """Rasterize an SVG chart (raises ChartUnavailable without cairosvg)."""
+    if cairosvg is None:
+        raise ChartUnavailable('PNG charts require cairosvg')
+    return cairosvg.svg2png(bytestring=svg.encode('utf-8'))
+
+
+class ChartRenderer:
+    """Render report charts from rollups, caching them by content."""
+
+    def __init__(self, cache_dir=None, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT,
+                 image_format: str = 'svg', max_charts: int = DEFAULT_MAX_CHARTS):
+        """Initialize chart renderer
+
+        Args:
+            cache_dir: Directory for rendered charts (None to cache in memory only)
+            width: Chart width (px)
+            height: Chart height (px)
+            image_format: 'svg' or 'png' (png requires cairosvg)
+            max_charts: Charts kept in memory
+        """
+        if image_format not in FORMATS:
+            raise ValueError(f"Unknown chart format {image_format!r} (expected svg or png)")
+        if image_format not in available_formats():
+            raise ChartUnavailable('PNG charts require cairosvg')
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.width = width
+        self.height = height
+        self.image_format = image_format
+        self.max_charts = max_charts
+
+        self._lock = threading.Lock()
+        self._charts: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def host_charts(self, host: str, by_name: Dict[str, Any], start: float,
+                    end: float) -> List[Dict[str, str]]:
+        """
+        Return the HOST_CHARTS of one host that have data.
+
+        Args:
+            host: Host name (part of the cache key)
+            by_name: Series name -> RollupSeries
+            start: Range start (epoch seconds)
+            end: Range end (epoch seconds)
+
+        Returns:
+            list: [{'title', 'markup'}, ...]; markup is inline SVG or an
+                  <img> with a PNG data URI
+        """
+        charts = []
+        for title, patterns, unit in HOST_CHARTS:
+            names = sorted(name for name, series in by_name.items()
+                           if len(series) and any(fnmatchcase(name, p) for p in patterns))
+            if names:
+                series = [(name, by_name[name]) for name in names[:MAX_LINES]]
+                charts.append({'title': title,
+                               'markup': self.chart(f'{host} {title}', series, start, end, unit)})
+        return charts
+
+    def chart(self, title: str, series: List[Tuple[str, Any]], start: float, end: float,
+              unit: str = '%') -> str:
+        """Return the markup of one chart of (name, RollupSeries) lines, cached."""
+        key = hashlib.sha256(repr((
+            title, [(name, _fingerprint(s)) for name, s in series],
+            start, end, self.width, self.height, self.image_format, unit
+        )).encode('utf-8')).hexdigest()
+
+        markup = self._cached(key, title)
+        if markup is not None:
+            return markup
+
+        seconds = max(s.seconds for _, s in series)
+        lines = [(_label(name),) + series_points(s) for name, s in series]
+        svg = render_svg(title, lines, start, end, self.width, self.height, unit,
+                         gap_seconds=max(3 * seconds, 3 * (end - start) / max(self.width, 1)))
+        image = svg.encode('utf-8') if self.image_format == 'svg' else svg_to_png(svg)
+        markup = self._markup(title, image)
+        self._store(key, markup, image)
+        return markup
+
+    def _markup(self, title: str, image: bytes) -> str:
+        """Inline SVG, or an <img> with the PNG as a data URI."""
+        if self.image_format == 'svg':
+            return image.decode('utf-8')
+        data = base64.b64encode(image).decode('ascii')
+        return (f'<img src="data:image/png;base64,{data}" width="{self.width}" '
+                f'height="{self.height}" alt="{html.escape(title)}">')
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of charts in memory."""
+        with self._lock:
+            return {'charts': len(self._charts), 'hits': self.hits, 'misses': self.misses}
+
+    def _cached(self, key: str, title: str) -> Optional[str]:
+        with self._lock:
+            markup = self._charts.get(key)
+            if markup is not None:
+                self._charts.move_to_end(key)
+                self.hits += 1
+                return markup
+        if self.cache_dir is not None:
+            try:
+                markup = self._markup(title, self._path(key).read_bytes())
+            except FileNotFoundError:
+                pass
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"Ignoring unreadable cached chart {key}: {e}")
+        with self._lock:
+            if markup is not None:
+                self.hits += 1
+                self._remember(key, markup)
+            else:
+                self.misses += 1
+        return markup
+
+    def _store(self, key: str, markup: str, image: bytes):
+        with self._lock:
+            self._remember(key, markup)
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(image)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache chart {path}: {e}")
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f'{key}.{self.image_format}'
+
+    def _remember(self, key: str, markup: str):
+        self._charts[key] = markup
+        self._charts.move_to_end(key)
+        while len(self._charts) > self.max_charts:
+            self._charts.popitem(last=False)
+
+
+def _label(name: str) -> str:
+    """Legend label of a series: 'cpu', 'memory', 'cpu_celsius', '/data', ..."""
+    section, _, rest = name.partition('.')
+    if section in ('cpu', 'memory'):
+        return section
+    if section == 'disk':
+        return rest.rsplit('.', 1)[0]
+    return rest.replace('_celsius', '') or name
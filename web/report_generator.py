@@ -3,98 +3,116 @@
 
 from pathlib import Path
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
 import os
+import sys
+
+# Project root must be importable for the shared core package
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from core.alert_manager import counted
+from core.report_catalog import ReportCatalog
+
+try:
+    from report_cache import ReportCache, input_key, normalize_metrics
+    from templating import TEMPLATE_DIR, get_environment, render_to_file, template_version
+except ImportError:
+    from web.report_cache import ReportCache, input_key, normalize_metrics
+    from web.templating import TEMPLATE_DIR, get_environment, render_to_file, template_version
+
+# Alert lists longer than this are streamed row by row instead of being
+# rendered (and cached) as one section
+STREAM_ROWS = 200
 
 
 class ReportGenerator:
     """Generate HTML and Markdown reports from metrics and alerts"""
     
-    def __init__(self, metrics_file, alerts_file, reports_dir):
+    def __init__(self, metrics_file, alerts_file, reports_dir, pdf_renderer=None, cache=None,
+                 catalog=None):
         """Initialize report generator
         
         Args:
             metrics_file: Path to current.json metrics file
             alerts_file: Path to alerts.json file
             reports_dir: Directory to save generated reports
+            pdf_renderer: Optional PdfRenderer used by render_pdf()
+            cache: ReportCache for artifacts and fragments
+                   (defaults to one under reports_dir/cache)
+            catalog: ReportCatalog recording the written reports
+                     (defaults to reports_dir/catalog.jsonl)
         """
         self.metrics_file = Path(metrics_file)
         self.alerts_file = Path(alerts_file)
         self.reports_dir = Path(reports_dir)
+        self.pdf_renderer = pdf_renderer
+        self.cache = cache if cache is not None else ReportCache(self.reports_dir / 'cache')
+        self.catalog = catalog if catalog is not None else ReportCatalog(self.reports_dir)
         
         # Create report directories
         self.html_dir = self.reports_dir / 'html'
         self.markdown_dir = self.reports_dir / 'markdown'
+        self.pdf_dir = self.reports_dir / 'pdf'
         self.html_dir.mkdir(parents=True, exist_ok=True)
         self.markdown_dir.mkdir(parents=True, exist_ok=True)
         
-        # Setup Jinja2 environment
-        template_dir = Path(__file__).parent.parent / 'templates'
-        self.env = Environment(
-            loader=FileSystemLoader(str(template_dir)),
-            autoescape=select_autoescape(['html', 'xml'])
-        )
-        
-        # Add custom filters
-        self.env.filters['format_bytes'] = self._format_bytes
-        self.env.filters['format_timestamp'] = self._format_timestamp
-        self.env.filters['percentage_color'] = self._percentage_color
-        self.env.filters['alert_level_badge'] = self._alert_level_badge
+        # Shared, bytecode-cached Jinja2 environment
+        self.template_dir = TEMPLATE_DIR
+        self.env = get_environment(self.template_dir)
     
-    def _format_bytes(self, bytes_value, unit='auto'):
-        """Format bytes to human readable format"""
-        try:
-            bytes_value = float(bytes_value)
-            if unit == 'auto':
-                for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                    if bytes_value < 1024.0:
-                        return f"{bytes_value:.2f} {unit}"
-                    bytes_value /= 1024.0
-            return f"{bytes_value:.2f} {unit}"
-        except (ValueError, TypeError):
-            return "N/A"
-    
-    def _format_timestamp(self, timestamp_str):
-        """Format ISO timestamp to readable format"""
-        try:
-            dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            return dt.strftime('%Y-%m-%d %H:%M:%S UTC')
-        except:
-            return timestamp_str
-    
-    def _percentage_color(self, percentage):
-        """Get color class based on percentage"""
-        try:
-            pct = float(percentage)
-            if pct >= 80:
-                return 'danger'
-            elif pct >= 60:
-                return 'warning'
-            else:
-                return 'success'
-        except (ValueError, TypeError):
-            return 'secondary'
-    
-    def _alert_level_badge(self, level):
-        """Get Bootstrap badge class for alert level"""
-        level_map = {
-            'critical': 'danger',
-            'warning': 'warning',
-            'info': 'info'
-        }
-        return level_map.get(level.lower(), 'secondary')
+    def _template_version(self, name):
+        """Hash of a template's source"""
+        return template_version(name, self.template_dir)
     
-    def generate_report(self, legacy_metrics, native_metrics, alerts):
+    def generate_report(self, legacy_metrics, native_metrics, alerts, alert_counts=None,
+                        alerts_version=None):
         """Generate both HTML and Markdown reports
         
+        Inputs identical to an earlier report (ignoring snapshot timestamps)
+        return that report's files instead of rendering new ones.
+        
+        Reports are rendered straight to disk. Alert lists longer than
+        STREAM_ROWS (or given as a callable) are streamed row by row rather
+        than cached as a section, so memory use does not grow with them.
+        
         Args:
             legacy_metrics: Dictionary of legacy (WSL) metrics
             native_metrics: Dictionary of native (Windows) metrics
-            alerts: List of alert dictionaries
+            alerts: List of alert dictionaries, or a callable returning a
+                    fresh iterator of them (e.g. AlertStore.iterate); a
+                    callable requires alert_counts and alerts_version
+            alert_counts: Precomputed counts by level (e.g. AlertStore.counts());
+                          counted from `alerts` when omitted
+            alerts_version: Version of the alert set (e.g. AlertStore.version);
+                            `alerts` is hashed when omitted
             
         Returns:
             Tuple of (html_path, markdown_path)
         """
+        streamed = callable(alerts)
+        if streamed and (alert_counts is None or alerts_version is None):
+            raise ValueError('Streamed alerts need alert_counts and alerts_version')
+        
+        key = input_key('snapshot',
+                        self._template_version('report_template.html'),
+                        self._template_version('report_template.md'),
+                        normalize_metrics(legacy_metrics), normalize_metrics(native_metrics),
+                        alerts_version if alerts_version is not None else alerts, alert_counts)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Path(cached['html']), Path(cached['markdown'])
+        
+        if alert_counts is None:
+            alert_counts = self._count_alerts_by_level(alerts)
+        
+        # Row source for the streamed alerts section (called once per template)
+        alert_rows = None
+        if streamed:
+            alert_rows = alerts if any(alert_counts.values()) else None
+        elif isinstance(alerts, list) and len(alerts) > STREAM_ROWS:
+            alert_rows = lambda: iter(alerts)
+        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # Prepare report data
@@ -102,28 +120,150 @@ def generate_report(self, legacy_metrics, native_metrics, alerts):
             'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'legacy': legacy_metrics,
             'native': native_metrics,
-            'alerts': alerts,
-            'alert_counts': self._count_alerts_by_level(alerts),
+            'alerts': [] if streamed or alert_rows else alerts,
+            'alert_counts': alert_counts,
             'summary_legacy': self._generate_summary(legacy_metrics),
-            'summary_native': self._generate_summary(native_metrics)
+            'summary_native': self._generate_summary(native_metrics),
+            'fragment_cache': self.cache
         }
         
         # Generate HTML report
-        html_template = self.env.get_template('report_template.html')
-        html_content = html_template.render(**report_data)
-        html_filename = f'report_{timestamp}.html'
-        html_path = self.html_dir / html_filename
-        html_path.write_text(html_content, encoding='utf-8')
+        html_path = self.html_dir / f'report_{timestamp}_{key[:8]}.html'
+        if alert_rows:
+            report_data['alert_rows'] = alert_rows()
+        render_to_file(self.env.get_template('report_template.html'), html_path, **report_data)
         
         # Generate Markdown report
-        md_template = self.env.get_template('report_template.md')
-        md_content = md_template.render(**report_data)
-        md_filename = f'report_{timestamp}.md'
-        md_path = self.markdown_dir / md_filename
-        md_path.write_text(md_content, encoding='utf-8')
+        md_path = self.markdown_dir / f'report_{timestamp}_{key[:8]}.md'
+        if alert_rows:
+            report_data['alert_rows'] = alert_rows()
+        render_to_file(self.env.get_template('report_template.md'), md_path, **report_data)
+        
+        self.catalog.add(html_path, 'html', key=key)
+        self.catalog.add(md_path, 'markdown', key=key)
+        self.cache.put(key, {'html': html_path, 'markdown': md_path})
+        return html_path, md_path
+    
+    def generate_range_report(self, summary, alerts_per_day=None, charts=None):
+        """Generate HTML and Markdown reports for a time range
+        
+        Args:
+            summary: Range statistics from core.rollups.range_summary()
+            alerts_per_day: Daily alert buckets ({'start', 'critical', 'warning',
+                            'info'}), e.g. AlertStore.stats(86400, ...)['buckets']
+            charts: Host -> charts ({'title', 'markup'}) shown in the HTML
+                    report, e.g. from ChartRenderer.host_charts()
+            
+        Returns:
+            Tuple of (html_path, markdown_path)
+        """
+        if charts:
+            # Part of each host's section (and so of its fragment key)
+            summary = dict(summary, hosts=[dict(host, charts=charts.get(host['host'], []))
+                                           for host in summary['hosts']])
+        key = input_key('range',
+                        self._template_version('range_report_template.html'),
+                        self._template_version('range_report_template.md'),
+                        summary, alerts_per_day or [])
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Path(cached['html']), Path(cached['markdown'])
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_data = {
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'range_start': summary['start'],
+            'range_end': summary['end'],
+            'summary': summary,
+            'alerts_per_day': alerts_per_day or [],
+            'fragment_cache': self.cache
+        }
+        
+        html_path = self.html_dir / f'report_range_{timestamp}_{key[:8]}.html'
+        render_to_file(self.env.get_template('range_report_template.html'), html_path, **report_data)
+        
+        md_path = self.markdown_dir / f'report_range_{timestamp}_{key[:8]}.md'
+        render_to_file(self.env.get_template('range_report_template.md'), md_path, **report_data)
         
+        span = {'kind': 'range', 'key': key,
+                'range_start': summary['start'], 'range_end': summary['end']}
+        self.catalog.add(html_path, 'html', **span)
+        self.catalog.add(md_path, 'markdown', **span)
+        self.cache.put(key, {'html': html_path, 'markdown': md_path})
         return html_path, md_path
     
+    def generate_fleet_report(self, summary, alerts_per_day=None):
+        """Generate HTML and Markdown reports comparing hosts over a time range
+        
+        Args:
+            summary: Fleet statistics from core.rollups.fleet_summary()
+            alerts_per_day: Daily alert buckets ({'start', 'critical', 'warning',
+                            'info'}), e.g. AlertStore.stats(86400, ...)['buckets']
+            
+        Returns:
+            Tuple of (html_path, markdown_path)
+        """
+        key = input_key('fleet',
+                        self._template_version('fleet_report_template.html'),
+                        self._template_version('fleet_report_template.md'),
+                        summary, alerts_per_day or [])
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Path(cached['html']), Path(cached['markdown'])
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_data = {
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'range_start': summary['start'],
+            'range_end': summary['end'],
+            'summary': summary,
+            'alerts_per_day': alerts_per_day or [],
+            'fragment_cache': self.cache
+        }
+        
+        html_path = self.html_dir / f'report_fleet_{timestamp}_{key[:8]}.html'
+        render_to_file(self.env.get_template('fleet_report_template.html'), html_path, **report_data)
+        
+        md_path = self.markdown_dir / f'report_fleet_{timestamp}_{key[:8]}.md'
+        render_to_file(self.env.get_template('fleet_report_template.md'), md_path, **report_data)
+        
+        span = {'kind': 'fleet', 'key': key,
+                'range_start': summary['start'], 'range_end': summary['end']}
+        self.catalog.add(html_path, 'html', **span)
+        self.catalog.add(md_path, 'markdown', **span)
+        self.cache.put(key, {'html': html_path, 'markdown': md_path})
+        return html_path, md_path
+    
+    def render_pdf(self, html_path):
+        """Convert a generated HTML report to PDF
+        
+        The PDF is rendered from the HTML report itself (report_template.html
+        plus the print stylesheet), in the renderer's worker processes.
+        
+        Args:
+            html_path: HTML report returned by generate_report()
+            
+        Returns:
+            Path of the PDF report (reports/pdf/<name>.pdf)
+        """
+        if self.pdf_renderer is None:
+            raise RuntimeError('No PDF renderer configured')
+        html_path = Path(html_path)
+        pdf_path = self.pdf_dir / f'{html_path.stem}.pdf'
+        if pdf_path.exists() and pdf_path.stat().st_mtime >= html_path.stat().st_mtime:
+            # Already rendered for this (cached) HTML report
+            return pdf_path
+        html_content = html_path.read_text(encoding='utf-8')
+        self.pdf_renderer.render(html_content, pdf_path, base_url=str(self.template_dir))
+        
+        source = self.catalog.get(f'html/{html_path.name}')
+        if source is not None:
+            self.catalog.add(pdf_path, 'pdf', kind=source.kind, key=source.key,
+                             range_start=source.range_start, range_end=source.range_end)
+        else:
+            self.catalog.add(pdf_path, 'pdf')
+        return pdf_path
+    
     def _count_alerts_by_level(self, alerts):
         """Count alerts by severity level"""
         counts = {'critical': 0, 'warning': 0, 'info': 0}
@@ -133,7 +273,7 @@ def _count_alerts_by_level(self, alerts):
         if not isinstance(alerts, list):
             alerts = []
         for alert in alerts:
-            if isinstance(alert, dict):
+            if isinstance(alert, dict) and counted(alert):
                 level = alert.get('level', 'info').lower()
                 if level in counts:
                     counts[level] += 1
@@ -203,35 +343,25 @@ def _generate_summary(self, metrics):
         
         return summary
     
-    def list_reports(self):
-        """List all generated reports"""
-        reports = []
-        
-        # List HTML reports
-        for html_file in self.html_dir.glob('report_*.html'):
-            stat = html_file.stat()
-            reports.append({
-                'type': 'html',
-                'filename': html_file.name,
-                'size': stat.st_size,
-                'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                'path': str(html_file.relative_to(self.reports_dir.parent))
-            })
-        
-        # List Markdown reports
-        for md_file in self.markdown_dir.glob('report_*.md'):
-            stat = md_file.stat()
-            reports.append({
-                'type': 'markdown',
-                'filename': md_file.name,
-                'size': stat.st_size,
-                'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                'path': str(md_file.relative_to(self.reports_dir.parent))
-            })
-        
-        # Sort by creation time (newest first)
-        reports.sort(key=lambda r: r['created'], reverse=True)
-        
-        return reports
+    def list_reports(self, report_type=None, kind=None, offset=0, limit=None):
+        """List generated reports, newest first
+        
+        Reads the report catalog; the report directories are not scanned.
+        
+        Args:
+            report_type: Only 'html', 'markdown' or 'pdf' reports
+            kind: Only 'snapshot', 'range' or 'fleet' reports
+            offset: Reports to skip
+            limit: Maximum number of reports (None for all)
+        """
+        entries, _ = self.catalog.query(report_type=report_type, kind=kind,
+                                        offset=offset, limit=limit)
+        base = self.reports_dir.name
+        return [{
+            'type': entry.type,
+            'filename': entry.filename,
+            'size': entry.size,
+            'created': datetime.fromtimestamp(entry.created).isoformat(),
+            'modified': datetime.fromtimestamp(entry.created).isoformat(),
+            'path': f'{base}/{entry.path}'
+        } for entry in entries]
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Background report jobs.
+
+Rendering a report (collecting metrics, rendering templates, optionally a
+PDF) takes seconds, so /api/reports/generate no longer does it inside the
+request. ReportJobQueue accepts a job, returns its id immediately and
+renders it on a small worker pool; clients poll /api/reports/jobs/<id>.
+
+- Identical requests (same parameters) submitted while a matching job is
+  queued or running share that job instead of rendering twice.
+- The queue is bounded: when `max_pending` jobs are waiting, submit()
+  raises QueueFull so the endpoint can answer 429 instead of piling up
+  work it cannot finish.
+- Finished jobs are kept for polling (up to `keep_finished`, for at most
+  `ttl` seconds).
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 8
+DEFAULT_KEEP_FINISHED = 100
+DEFAULT_TTL = 3600.0
+
+# render(params, progress) -> result; progress(percent, stage)
+Renderer = Callable[[Dict[str, Any], Callable[[int, str], None]], Dict[str, Any]]
+
+
+class QueueFull(Exception):
+    """Raised by submit() when too many jobs are waiting."""
+
+
+@dataclass
+class ReportJob:
+    """One report rendering job."""
+    id: str
+    key: str
+    params: Dict[str, Any]
+    status: str = QUEUED
+    progress: int = 0
+    stage: str = 'queued'
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'stage': self.stage,
+            'params': self.params,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+def job_key(params: Dict[str, Any]) -> str:
+    """Return the de-duplication key for a set of job parameters."""
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class ReportJobQueue:
+    """Bounded, de-duplicating job queue rendered by a worker pool."""
+
+    def __init__(
+        self,
+        render: Renderer,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        keep_finished: int = DEFAULT_KEEP_FINISHED,
+        ttl: float = DEFAULT_TTL
+    ):
+        """Initialize report job queue
+
+        Args:
+            render: Callable rendering one job: render(params, progress) -> result
+            workers: Worker threads
+            max_pending: Queued (not yet running) jobs accepted before QueueFull
+            keep_finished: Finished jobs kept for polling
+            ttl: Seconds finished jobs are kept
+        """
+        self.render = render
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self.ttl = ttl
+
+        self._queue: "queue.Queue[Optional[ReportJob]]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ReportJob] = {}
+        self._active: Dict[str, ReportJob] = {}               # key -> queued/running job
+        self._finished: "OrderedDict[str, float]" = OrderedDict()  # id -> finished_at
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Start the worker threads (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'report-job-{n}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Let running jobs finish and stop the workers. Queued jobs are dropped."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            while True:
+                try:
+                    self._queue.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    self._drain_one()
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, params: Dict[str, Any]) -> Tuple[ReportJob, bool]:
+        """
+        Queue a job, or join an identical one that is queued or running.
+
+        Returns:
+            tuple: (job, created) where created is False for a shared job
+
+        Raises:
+            QueueFull: If `max_pending` jobs are already waiting
+        """
+        self.start()
+        key = job_key(params)
+        with self._lock:
+            self._prune()
+            existing = self._active.get(key)
+            if existing is not None:
+                return existing, False
+
+            job = ReportJob(id=uuid.uuid4().hex, key=key, params=params)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f"{self._queue.maxsize} report jobs already queued") from None
+            self._jobs[job.id] = job
+            self._active[key] = job
+            return job, True
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        """Return a job by id (None if unknown or expired)."""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of jobs per state."""
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: ReportJob):
+        with self._lock:
+            job.status, job.stage, job.started_at = RUNNING, 'starting', time.time()
+
+        def progress(percent: int, stage: str):
+            with self._lock:
+                job.progress = max(job.progress, min(100, int(percent)))
+                job.stage = stage
+
+        try:
+            result = self.render(job.params, progress)
+        except Exception as e:
+            logger.error(f"Report job {job.id} failed: {e}")
+            self._finish(job, FAILED, error=str(e))
+        else:
+            self._finish(job, DONE, result=result)
+
+    def _finish(self, job: ReportJob, status: str, result=None, error=None):
+        with self._lock:
+            job.status = status
+            job.result, job.error = result, error
+            job.finished_at = time.time()
+            job.stage = status
+            if status == DONE:
+                job.progress = 100
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+            self._finished[job.id] = job.finished_at
+            self._prune()
+
+    def _prune(self):
+        now = time.time()
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.keep_finished and now - finished_at <= self.ttl:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def _drain_one(self):
+        try:
+            job = self._queue.get_nowait()
+        except queue.Empty:
+            return
+        if job is not None:
+            self._finish(job, FAILED, error='Report service stopped')
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Scheduled report generation.
+
+ReportScheduler fires report jobs on cron-like schedules from a daemon
+thread inside the dashboard process; the jobs themselves run on the
+ReportJobQueue like on-demand reports, so no extra service is needed.
+
+- A schedule producing one report per host submits the host jobs
+  `stagger_seconds` apart instead of all at once.
+- A run is skipped (and recorded as such) while the previous job of the
+  same schedule and host is still queued or running.
+- Every submission, skip and outcome is appended to a JSONL run history
+  (reports/schedule_history.jsonl), trimmed to its newest entries.
+
+Missed runs (e.g. while the container was down) are not caught up. With
+a lock file, only the process holding it runs schedules, so a reloader
+parent or a second worker never submits the same run twice.
+
+Schedules config (JSON list):
+    [{"name": "daily", "cron": "0 6 * * *", "range": "24h", "hosts": "*"},
+     {"name": "weekly", "cron": "30 6 * * mon", "range": "7d",
+      "hosts": ["web-1", "db-1"], "pdf": true, "stagger_seconds": 120},
+     {"name": "fleet", "cron": "0 7 * * *", "range": "24h", "fleet": true},
+     {"name": "snapshot", "cron": "@hourly"}]
+
+Cron expressions have five fields (minute hour day-of-month month
+day-of-week) with '*', lists, ranges, steps and month/day names, or one
+of @hourly, @daily, @weekly, @monthly. Times are UTC unless a schedule
+sets "timezone".
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGGER_SECONDS = 30.0
+DEFAULT_HISTORY_MAX = 500
+# Seconds between checks on submitted jobs
+POLL_INTERVAL = 15.0
+
+# Run history events
+SUBMITTED = 'submitted'
+SKIPPED = 'skipped'
+DONE = 'done'
+FAILED = 'failed'
+
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+MONTH_NAMES = {name: n for n, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+DAY_NAMES = {name: n for n, name in enumerate(('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'))}
+
+# Search horizon for the next matching minute (covers Feb 29 schedules)
+MAX_SEARCH_DAYS = 366 * 8
+
+
+# ----------------------------------------------------------------------
+# Cron expressions
+# ----------------------------------------------------------------------
+
+def _parse_field(text: str, low: int, high: int, names: Dict[str, int]) -> List[int]:
+    values = set()
+    for part in text.lower().split(','):
+        part, _, step_text = part.partition('/')
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"Invalid cron step in {text!r}")
+        if part == '*':
+            start, end = low, high
+        else:
+            first, _, last = part.partition('-')
+            start = names[first] if first in names else int(first)
+            end = (names[last] if last in names else int(last)) if last else (high if step_text else start)
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field {text!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronExpression:
+    """Five-field cron expression evaluated in a given timezone."""
+
+    def __init__(self, expression: str, tz=timezone.utc):
+        """Initialize cron expression
+
+        Args:
+            expression: 'minute hour day-of-month month day-of-week' or an alias
+            tz: tzinfo the fields are evaluated in
+
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        self.expression = expression
+        self.tz = tz
+        fields = CRON_ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression!r} must have 5 fields")
+        try:
+            self.minutes = _parse_field(fields[0], 0, 59, {})
+            self.hours = _parse_field(fields[1], 0, 23, {})
+            self.days = set(_parse_field(fields[2], 1, 31, {}))
+            self.months = set(_parse_field(fields[3], 1, 12, MONTH_NAMES))
+            # 7 is Sunday as well
+            self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7, DAY_NAMES)}
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from None
+        # Standard cron: when both day fields are restricted either may match
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, ts: float) -> float:
+        """Return the first matching minute strictly after `ts` (epoch seconds)."""
+        current = datetime.fromtimestamp((int(ts) // 60 + 1) * 60, self.tz)
+        for _ in range(MAX_SEARCH_DAYS):
+            if self._day_matches(current):
+                for hour in self.hours:
+                    if hour < current.hour:
+                        continue
+                    for minute in self.minutes:
+                        if hour == current.hour and minute < current.minute:
+                            continue
+                        return current.replace(hour=hour, minute=minute).timestamp()
+            current = (current + timedelta(days=1)).replace(hour=0, minute=0)
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+
+# ----------------------------------------------------------------------
+# Schedules
+# ----------------------------------------------------------------------
+
+@dataclass
+class ReportSchedule:
+    """One scheduled report.
+
+    Attributes:
+        name: Unique schedule name
+        cron: Cron expression (see CronExpression)
+        range: Range preset ('1h', '24h', '7d', ...) for a time-range
+               report; a snapshot report when unset
+        hosts: Range reports only: one report per listed host, or '*' for
+               every host with recent history; one all-host report when unset
+        fleet: Range reports only: one fleet comparison report of all hosts
+        pdf: Also render a PDF (default: false; needs weasyprint)
+        stagger_seconds: Delay between the per-host jobs of one run
+        timezone: IANA timezone the cron fields are evaluated in
+        enabled: Disabled schedules are listed but never fire
+    """
+    name: str
+    cron: str
+    range: Optional[str] = None
+    hosts: Optional[Union[str, List[str]]] = None
+    pdf: bool = False
+    fleet: bool = False
+    stagger_seconds: float = DEFAULT_STAGGER_SECONDS
+    timezone: str = 'UTC'
+    enabled: bool = True
+    expression: CronExpression = field(init=False, repr=False)
+
+    def __post_init__(self):
+        tz = timezone.utc
+        if self.timezone.upper() != 'UTC':
+            if ZoneInfo is None:
+                raise ValueError(f"Schedule {self.name}: timezones need Python 3.9+")
+            tz = ZoneInfo(self.timezone)
+        self.expression = CronExpression(self.cron, tz)
+        if self.hosts is not None and self.range is None:
+            raise ValueError(f"Schedule {self.name}: hosts require a range report")
+        if self.fleet and (self.range is None or self.hosts is not None):
+            raise ValueError(f"Schedule {self.name}: fleet reports need a range and no hosts")
+
+    def body(self, host: Optional[str] = None) -> Dict[str, Any]:
+        """Report request body (as for POST /api/reports/generate)."""
+        body: Dict[str, Any] = {}
+        if self.range:
+            body['range'] = self.range
+        if host:
+            body['host'] = host
+        if self.fleet:
+            body['fleet'] = True
+        if self.pdf:
+            body['pdf'] = True
+        return body
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'cron': self.cron,
+            'range': self.range,
+            'hosts': self.hosts,
+            'pdf': self.pdf,
+            'fleet': self.fleet,
+            'stagger_seconds': self.stagger_seconds,
+            'timezone': self.timezone,
+            'enabled': self.enabled,
+        }
+
+
+def load_schedules(path) -> List[ReportSchedule]:
+    """Build schedules from a JSON config file (see module docstring)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    schedules = [ReportSchedule(**entry) for entry in entries]
+    names = [schedule.name for schedule in schedules]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate report schedule names: {', '.join(duplicates)}")
+    return schedules
+
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+# submit(body, scheduled_at) -> job id; get_job(job id) -> job dict or None
+Submit = Callable[[Dict[str, Any], float], str]
+GetJob = Callable[[str], Optional[Dict[str, Any]]]
+
+
+class ReportScheduler:
+    """Fire report jobs on cron schedules and record their run history."""
+
+    def __init__(
+        self,
+        schedules: List[ReportSchedule],
+        submit: Submit,
+        get_job: GetJob,
+        history_path=None,
+        list_hosts: Optional[Callable[[], List[str]]] = None,
+        history_max: int = DEFAULT_HISTORY_MAX,
+        clock: Callable[[], float] = time.time,
+        lock_path=None
+    ):
+        """Initialize report scheduler
+
+        Args:
+            schedules: Schedules to run
+            submit: Queue a report: submit(body, scheduled_at) -> job id;
+                    may raise (e.g. QueueFull), which fails that run
+            get_job: Job status by id (ReportJob.to_dict() or None)
+            history_path: JSONL run history (None to keep it in memory only)
+            list_hosts: Hosts for schedules with hosts='*'
+            history_max: History entries kept (in memory and on disk)
+            clock: Time source (epoch seconds)
+            lock_path: Lock file held while running, so only one process
+                       schedules (None to skip the check)
+        """
+        self.schedules = {schedule.name: schedule for schedule in schedules}
+        self.submit = submit
+        self.get_job = get_job
+        self.history_path = Path(history_path) if history_path else None
+        self.list_hosts = list_hosts
+        self.history_max = history_max
+        self.clock = clock
+        self.lock_path = Path(lock_path) if lock_path else None
+
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._next_run: Dict[str, float] = {}
+        # (due, seq, schedule name, host, scheduled_at) waiting for their stagger slot
+        self._pending: List[Tuple[float, int, str, Optional[str], float]] = []
+        self._seq = itertools.count()
+        self._last_job: Dict[Tuple[str, Optional[str]], str] = {}
+        self._outstanding: Dict[str, Dict[str, Any]] = {}
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_max)
+        self._history_lines = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._load_history()
+        now = self.clock()
+        for schedule in self.schedules.values():
+            if schedule.enabled:
+                self._next_run[schedule.name] = schedule.expression.next_after(now)
+
+    # ------------------------------------------------------------------
+    # Background operation
+    # ------------------------------------------------------------------
+
+    def start(self) -> Optional[threading.Thread]:
+        """
+        Run the scheduler in a daemon thread (idempotent).
+
+        Returns:
+            Thread, or None if another process holds the lock file
+        """
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        if not self._acquire_lock():
+            logger.info(f"Report scheduler already running elsewhere ({self.lock_path})")
+            return None
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    wake = self.tick()
+                except Exception as e:
+                    logger.error(f"Report scheduler tick failed: {e}")
+                    wake = self.clock() + POLL_INTERVAL
+                # Re-check at least every POLL_INTERVAL (clock changes, job outcomes)
+                self._stop.wait(min(max(wake - self.clock(), 0.5), POLL_INTERVAL))
+
+        self._thread = threading.Thread(target=loop, name='report-scheduler', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._release_lock()
+
+    def _acquire_lock(self) -> bool:
+        if self.lock_path is None or self._lock_fd is not None:
+            return True
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        # Held until stop() or process exit
+        self._lock_fd = fd
+        return True
+
+    def _release_lock(self):
+        if self._lock_fd is None:
+            return
+        # Closing the descriptor drops the lock
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+    # ------------------------------------------------------------------
+    # Scheduling pass
+    # ------------------------------------------------------------------
+
+    def tick(self, now: Optional[float] = None) -> float:
+        """
+        Fire due schedules, submit due staggered jobs and poll job outcomes.
+
+        Returns:
+            float: Epoch time of the next scheduled event
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            for name, due in list(self._next_run.items()):
+                if due <= now:
+                    self._fire(self.schedules[name], due, now)
+
+            while self._pending and self._pending[0][0] <= now:
+                _, _, name, host, scheduled_at = heapq.heappop(self._pending)
+                self._submit(self.schedules[name], host, scheduled_at, now)
+
+            self._poll(now)
+
+            events = list(self._next_run.values())
+            if self._pending:
+                events.append(self._pending[0][0])
+            if self._outstanding:
+                events.append(now + POLL_INTERVAL)
+            return min(events) if events else now + POLL_INTERVAL
+
+    def _fire(self, schedule: ReportSchedule, scheduled_at: float, now: float):
+        # Missed runs are not caught up: the next run is the next match after now
+        self._next_run[schedule.name] = schedule.expression.next_after(max(now, scheduled_at))
+
+        hosts: List[Optional[str]] = [None]
+        if schedule.hosts == '*':
+            try:
+                hosts = sorted(self.list_hosts()) if self.list_hosts else []
+            except Exception as e:
+                self._record(schedule.name, None, scheduled_at, FAILED, error=f"Listing hosts: {e}")
+                return
+        elif schedule.hosts:
+            hosts = list(schedule.hosts)
+        if not hosts:
+            self._record(schedule.name, None, scheduled_at, SKIPPED, error='No hosts with history')
+            return
+
+        for position, host in enumerate(hosts):
+            due = scheduled_at + position * schedule.stagger_seconds
+            heapq.heappush(self._pending, (due, next(self._seq), schedule.name, host, scheduled_at))
+
+    def _submit(self, schedule: ReportSchedule, host: Optional[str], scheduled_at: float,
+                now: float):
+        previous = self._last_job.get((schedule.name, host))
+        if previous is not None and previous in self._outstanding:
+            job = self.get_job(previous)
+            if job is not None and job.get('status') in ('queued', 'running'):
+                self._record(schedule.name, host, scheduled_at, SKIPPED, job_id=previous,
+                             error='Previous run still in progress')
+                return
+
+        try:
+            job_id = self.submit(schedule.body(host), scheduled_at)
+        except Exception as e:
+            logger.warning(f"Scheduled report {schedule.name} ({host or 'all hosts'}) failed: {e}")
+            self._record(schedule.name, host, scheduled_at, FAILED, error=str(e))
+            return
+
+        self._last_job[(schedule.name, host)] = job_id
+        self._outstanding[job_id] = {'schedule': schedule.name, 'host': host,
+                                     'scheduled_at': scheduled_at, 'submitted_at': now}
+        self._record(schedule.name, host, scheduled_at, SUBMITTED, job_id=job_id)
+
+    def _poll(self, now: float):
+        for job_id, run in list(self._outstanding.items()):
+            job = self.get_job(job_id)
+            if job is None:
+                # Expired from the job queue before we saw it finish
+                del self._outstanding[job_id]
+                self._record(run['schedule'], run['host'], run['scheduled_at'], FAILED,
+                             job_id=job_id, error='Job outcome unknown')
+                continue
+            if job.get('status') not in (DONE, FAILED):
+                continue
+            del self._outstanding[job_id]
+            started = job.get('started_at') or run['submitted_at']
+            finished = job.get('finished_at') or now
+            self._record(run['schedule'], run['host'], run['scheduled_at'], job['status'],
+                         job_id=job_id, error=job.get('error'),
+                         files=(job.get('result') or {}).get('files'),
+                         duration=round(finished - started, 3))
+
+    # ------------------------------------------------------------------
+    # Status and history
+    # ------------------------------------------------------------------
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Return each schedule with its next run and latest history entry."""
+        with self._lock:
+            latest: Dict[str, Dict[str, Any]] = {}
+            for entry in self._history:
+                latest[entry['schedule']] = entry
+            return [dict(schedule.to_dict(), next_run=self._next_run.get(name),
+                         last_event=latest.get(name))
+                    for name, schedule in self.schedules.items()]
+
+    def history(self, schedule: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return run history entries, newest first."""
+        with self._lock:
+            entries = [entry for entry in reversed(self._history)
+                       if schedule is None or entry['schedule'] == schedule]
+            return entries[:limit]
+
+    def _record(self, schedule: str, host: Optional[str], scheduled_at: float, event: str,
+                **details):
+        entry = {'schedule': schedule, 'host': host, 'scheduled_at': scheduled_at,
+                 'event': event, 'at': self.clock()}
+        entry.update({key: value for key, value in details.items() if value is not None})
+        self._history.append(entry)
+        if self.history_path is None:
+            return
+        try:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.history_path.open('a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            self._history_lines += 1
+            if self._history_lines > 2 * self.history_max:
+                self._rewrite_history()
+        except OSError as e:
+            logger.warning(f"Could not write report schedule history {self.history_path}: {e}")
+
+    def _rewrite_history(self):
+        """Trim the history file to the entries kept in memory."""
+        tmp_path = self.history_path.with_name(self.history_path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            for entry in self._history:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        os.replace(tmp_path, self.history_path)
+        self._history_lines = len(self._history)
+
+    def _load_history(self):
+        if self.history_path is None:
+            return
+        try:
+            with self.history_path.open('r', encoding='utf-8') as f:
+                for line in f:
+                    self._history_lines += 1
+                    try:
+                        self._history.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Could not read report schedule history {self.history_path}: {e}")
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Shared Jinja2 environment for report and dashboard templates.
+
+All report generators render through one Environment (get_environment())
+so a template is parsed and compiled once per process rather than once
+per ReportGenerator. Compiled templates are also written to a
+FileSystemBytecodeCache, so a fresh process (e.g. a new container) loads
+bytecode instead of re-parsing the sources.
+
+render_to_file() writes a template's output chunks to disk as they are
+produced, so a report is never held in memory as one string.
+
+Outside development the loader does not stat template files on every
+render (auto_reload off); set TEMPLATE_AUTO_RELOAD=1, FLASK_DEBUG=1 or
+FLASK_ENV=development to pick up template edits without a restart.
+
+Run as a module to precompile the templates into the bytecode cache,
+e.g. while building the container image:
+
+    python3 -m web.templating
+"""
+
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from jinja2 import (Environment, FileSystemBytecodeCache, FileSystemLoader,
+                    TemplateError, pass_context, select_autoescape)
+from markupsafe import Markup
+
+try:
+    from report_cache import input_key, normalize_metrics
+except ImportError:
+    from web.report_cache import input_key, normalize_metrics
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+TEMPLATE_DIR = PROJECT_ROOT / 'templates'
+
+# Bytecode cache: kept out of the data/reports volumes so an image-built
+# cache is not hidden by a mount
+CACHE_DIR = Path(os.getenv('TEMPLATE_CACHE_DIR', str(PROJECT_ROOT / '.cache' / 'jinja')))
+
+REPORT_TEMPLATES = (
+    'report_template.html',
+    'report_template.md',
+    'range_report_template.html',
+    'range_report_template.md',
+    'fleet_report_template.html',
+    'fleet_report_template.md',
+)
+DASHBOARD_TEMPLATES = ('dashboard.html',)
+
+# Write buffer for streamed rendering (render_to_file)
+STREAM_BUFFER_BYTES = 64 * 1024
+
+
+def auto_reload_enabled() -> bool:
+    """Return True when templates should be re-checked on every render."""
+    flag = os.getenv('TEMPLATE_AUTO_RELOAD')
+    if flag is not None:
+        return flag.lower() in ('1', 'true', 'yes')
+    return (os.getenv('FLASK_DEBUG', '').lower() in ('1', 'true')
+            or os.getenv('FLASK_ENV') == 'development')
+
+
+AUTO_RELOAD = auto_reload_enabled()
+
+
+def bytecode_cache(subdir: Optional[str] = None) -> Optional[FileSystemBytecodeCache]:
+    """
+    Return a bytecode cache under CACHE_DIR (None if it cannot be created).
+
+    Environments with different options must not share compiled code, so
+    each gets its own `subdir`.
+    """
+    directory = CACHE_DIR / subdir if subdir else CACHE_DIR
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Template bytecode cache disabled ({directory}): {e}")
+        return None
+    return FileSystemBytecodeCache(str(directory))
+
+
+# ----------------------------------------------------------------------
+# Filters
+# ----------------------------------------------------------------------
+
+def format_bytes(bytes_value, unit='auto'):
+    """Format bytes to human readable format"""
+    try:
+        bytes_value = float(bytes_value)
+        if unit == 'auto':
+            for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+                if bytes_value < 1024.0:
+                    return f"{bytes_value:.2f} {unit}"
+                bytes_value /= 1024.0
+        return f"{bytes_value:.2f} {unit}"
+    except (ValueError, TypeError):
+        return "N/A"
+
+
+def format_timestamp(timestamp_str):
+    """Format ISO timestamp to readable format"""
+    try:
+        dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+        return dt.strftime('%Y-%m-%d %H:%M:%S UTC')
+    except:
+        return timestamp_str
+
+
+def format_epoch(ts, fmt='%Y-%m-%d %H:%M UTC'):
+    """Format epoch seconds (UTC)"""
+    try:
+        return datetime.fromtimestamp(float(ts), timezone.utc).strftime(fmt)
+    except (ValueError, TypeError, OverflowError):
+        return "N/A"
+
+
+def format_duration(seconds):
+    """Format seconds as e.g. '2d 3h', '4h 05m' or '12m'"""
+    try:
+        minutes = int(float(seconds) // 60)
+    except (ValueError, TypeError):
+        return "N/A"
+    days, minutes = divmod(minutes, 1440)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m"
+
+
+def percentage_color(percentage):
+    """Get color class based on percentage"""
+    try:
+        pct = float(percentage)
+        if pct >= 80:
+            return 'danger'
+        elif pct >= 60:
+            return 'warning'
+        else:
+            return 'success'
+    except (ValueError, TypeError):
+        return 'secondary'
+
+
+def alert_level_badge(level):
+    """Get Bootstrap badge class for alert level"""
+    level_map = {
+        'critical': 'danger',
+        'warning': 'warning',
+        'info': 'info'
+    }
+    return level_map.get(level.lower(), 'secondary')
+
+
+FILTERS = {
+    'format_bytes': format_bytes,
+    'format_timestamp': format_timestamp,
+    'percentage_color': percentage_color,
+    'alert_level_badge': alert_level_badge,
+    'format_epoch': format_epoch,
+    'format_duration': format_duration,
+}
+
+
+# ----------------------------------------------------------------------
+# Shared environment
+# ----------------------------------------------------------------------
+
+_lock = threading.Lock()
+_environments: Dict[Tuple[str, bool], Environment] = {}
+_template_versions: Dict[Tuple[str, str], Tuple[int, str]] = {}
+
+
+@pass_context
+def fragment(context, name, inputs, macro):
+    """
+    Render a template section macro, cached by the hash of its inputs.
+
+    The cache is the `fragment_cache` template variable (a ReportCache);
+    without one the macro is rendered directly.
+    """
+    cache = context.get('fragment_cache')
+    if cache is None:
+        return Markup(macro(inputs))
+    template_dir = context.environment.loader.searchpath[0]
+    key = input_key('fragment', context.name, template_version(context.name, template_dir),
+                    name, normalize_metrics(inputs))
+    return Markup(cache.fragment(key, lambda: macro(inputs)))
+
+
+def get_environment(template_dir=None, auto_reload: Optional[bool] = None) -> Environment:
+    """
+    Return the shared Environment for a template directory.
+
+    Args:
+        template_dir: Template directory (defaults to templates/)
+        auto_reload: Re-check template files on every render
+                     (defaults to AUTO_RELOAD)
+    """
+    template_dir = str(template_dir or TEMPLATE_DIR)
+    auto_reload = AUTO_RELOAD if auto_reload is None else auto_reload
+    key = (template_dir, auto_reload)
+    with _lock:
+        env = _environments.get(key)
+        if env is None:
+            env = Environment(
+                loader=FileSystemLoader(template_dir),
+                autoescape=select_autoescape(['html', 'xml']),
+                auto_reload=auto_reload,
+                bytecode_cache=bytecode_cache('reports'),
+                cache_size=64
+            )
+            env.filters.update(FILTERS)
+            env.globals['fragment'] = fragment
+            _environments[key] = env
+        return env
+
+
+def template_version(name: str, template_dir=None) -> str:
+    """
+    Hash of a template's source.
+
+    The source is re-read only when the file's mtime changes; without
+    auto-reload the first hash is kept for the life of the process,
+    matching the compiled template the environment keeps.
+    """
+    path = Path(template_dir or TEMPLATE_DIR) / name
+    key = (str(path.parent), name)
+    cached = _template_versions.get(key)
+    if cached is not None and not AUTO_RELOAD:
+        return cached[1]
+    stamp = path.stat().st_mtime_ns
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, input_key(path.read_text(encoding='utf-8')))
+        _template_versions[key] = cached
+    return cached[1]
+
+
+def render_to_file(template, path, buffer_size: int = STREAM_BUFFER_BYTES, **context) -> Path:
+    """
+    Render a template straight to a file.
+
+    Output chunks from Template.generate() are written as they are
+    produced to a temporary file that replaces `path` on completion, so
+    the full document is never held in memory (and readers never see a
+    partial report).
+
+    Args:
+        template: Template or template name (loaded from the shared environment)
+        path: File to write
+        buffer_size: Write buffer size in bytes
+        **context: Template variables; iterables are consumed lazily
+
+    Returns:
+        Path: path
+    """
+    if isinstance(template, str):
+        template = get_environment().get_template(template)
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=buffer_size) as f:
+            for chunk in template.generate(**context):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def precompile(env: Optional[Environment] = None,
+               names: Iterable[str] = REPORT_TEMPLATES) -> List[str]:
+    """
+    Load templates so they are compiled and written to the bytecode cache.
+
+    Returns:
+        list: Names of the templates that compiled
+    """
+    env = env or get_environment()
+    compiled = []
+    for name in names:
+        try:
+            env.get_template(name)
+        except TemplateError as e:
+            logger.error(f"Could not compile template {name}: {e}")
+            continue
+        compiled.append(name)
+    return compiled
+
+
+def dashboard_options() -> Dict[str, object]:
+    """Jinja options for the Flask app's own environment (dashboard.html)."""
+    return {'bytecode_cache': bytecode_cache('dashboard')}
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    compiled = precompile(names=REPORT_TEMPLATES)
+    dashboard_env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)),
+                                autoescape=select_autoescape(['html', 'htm', 'xml', 'xhtml', 'svg']),
+                                **dashboard_options())
+    compiled += precompile(dashboard_env, DASHBOARD_TEMPLATES)
+    logger.info(f"Precompiled {len(compiled)} templates into {CACHE_DIR}")
+    return 0 if len(compiled) == len(REPORT_TEMPLATES) + len(DASHBOARD_TEMPLATES) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())